@@ -0,0 +1,10 @@
+#!/usr/bin/env python3
+"""
+``python -m audio_tool``: headless command-line recorder.
+"""
+import sys
+
+from audio_tool.cli import main
+
+if __name__ == "__main__":
+    sys.exit(main())
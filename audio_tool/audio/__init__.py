@@ -1,2 +1,10 @@
 # Audio handling components for Audio Recorder and Renderer Tool
-from .recorder import AudioRecorder
\ No newline at end of file
+# AudioRecorder needs PySide6, so it is imported on first use; the engine
+# modules stay importable on headless machines without Qt.
+
+
+def __getattr__(name):
+    if name == "AudioRecorder":
+        from .recorder import AudioRecorder
+        return AudioRecorder
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+asyncio interface to the capture engine, for headless consumers.
+
+    async with open_capture(device_index, 48000) as stream:
+        async for block in stream:
+            process(block.samples)
+
+Blocks are ``AudioBlock`` views into the engine's capture ring, not copies.
+They stay valid until the ring wraps (``ring_seconds`` of audio later);
+``stream.is_valid(block)`` tells whether a held block was overwritten.
+"""
+import asyncio
+import threading
+
+from loguru import logger
+
+from .engine import AudioEngine
+
+DROP_OLDEST = "drop-oldest"
+BLOCK = "block"
+
+
+class CaptureStream:
+    """
+    Async iterator of captured blocks with a bounded queue.
+
+    Args:
+        engine: ``AudioEngine`` or ``CaptureProcess``; created if omitted
+        device_index (str | int, optional): Input device id or index, None for the default
+        queue_size (int): Blocks buffered between the engine and the consumer
+        policy (str): What happens when the queue is full:
+            ``"drop-oldest"`` discards the oldest queued block (counted in ``dropped``);
+            ``"block"`` makes the engine thread wait for the consumer. Capture
+            keeps filling the ring meanwhile, but the writer and other listeners
+            wait too, so only use it when every block must be seen.
+        record_to (str, optional): Also write the stream to this WAV file
+        engine_options: Passed to ``AudioEngine`` when the engine is created here
+    """
+
+    def __init__(self, engine=None, device_index=None, queue_size=32, policy=DROP_OLDEST,
+                 record_to=None, **engine_options):
+        if policy not in (DROP_OLDEST, BLOCK):
+            raise ValueError(f"unknown queue policy: {policy}")
+        self._owns_engine = engine is None
+        self.engine = engine
+        self._engine_options = engine_options
+        self.device_index = device_index
+        self.queue_size = queue_size
+        self.policy = policy
+        self.record_to = record_to
+        self.dropped = 0
+        self.recording = None
+
+        self._loop = None
+        self._queue = None
+        self._slots = threading.Semaphore(queue_size)
+        self._closed = False
+
+    async def __aenter__(self):
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(self.queue_size)
+        if self.engine is None:
+            self.engine = await self._loop.run_in_executor(None, lambda: AudioEngine(**self._engine_options))
+        self.engine.add_block_listener(self._on_block)
+        await asyncio.wrap_future(self.engine.open_device(self.device_index))
+        if self.record_to:
+            await asyncio.wrap_future(self.engine.start_recording(self.record_to, self.device_index))
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+
+    async def aclose(self):
+        """
+        Stop recording (if any), detach from the engine and release it if owned.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self.engine.remove_block_listener(self._on_block)
+        # Unblock an engine thread waiting on a full queue
+        for _ in range(self.queue_size):
+            self._slots.release()
+        if self.record_to and self.engine.is_recording:
+            self.recording = await asyncio.wrap_future(self.engine.stop_recording())
+        if self._owns_engine:
+            await self._loop.run_in_executor(None, self.engine.shutdown)
+        if self._queue.empty():
+            # Wake a consumer waiting in __anext__; one with blocks left drains them, then stops
+            self._queue.put_nowait(None)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self._closed and self._queue.empty():
+            raise StopAsyncIteration
+        block = await self._queue.get()
+        if block is None:
+            raise StopAsyncIteration
+        if self.policy == BLOCK:
+            self._slots.release()
+        return block
+
+    def is_valid(self, block):
+        """
+        Check that the ring has not overwritten ``block`` yet.
+        """
+        return block.position >= self.engine.ring.oldest
+
+    @property
+    def stats(self):
+        return self.engine.stats
+
+    # ------------------------------------------------------------------
+    # Engine thread side
+
+    def _on_block(self, block):
+        if self._closed:
+            return
+        if self.policy == BLOCK:
+            self._slots.acquire()
+            if self._closed:
+                return
+        try:
+            self._loop.call_soon_threadsafe(self._put, block)
+        except RuntimeError:
+            # Event loop already closed
+            logger.debug("capture stream loop closed; dropping block")
+
+    def _put(self, block):
+        if self._closed:
+            return
+        if self._queue.full():
+            self._queue.get_nowait()
+            self.dropped += 1
+        self._queue.put_nowait(block)
+
+
+def open_capture(device_index=None, rate=44100, channels=1, queue_size=32, policy=DROP_OLDEST,
+                 record_to=None, engine=None, **engine_options):
+    """
+    Open an async capture stream.
+
+    Args:
+        device_index (str | int, optional): Input device id or index, None for the default
+        rate (int): Sampling rate (Hz), used when the engine is created here
+        channels (int): Input channels, used when the engine is created here
+        queue_size (int): Blocks buffered for the consumer
+        policy (str): ``"drop-oldest"`` or ``"block"``
+        record_to (str, optional): Also write the capture to this WAV file
+        engine (AudioEngine | CaptureProcess, optional): Share an existing engine
+
+    Returns:
+        CaptureStream: Use with ``async with``
+    """
+    if engine is None:
+        engine_options.update(rate=rate, channels=channels)
+    return CaptureStream(engine, device_index, queue_size, policy, record_to, **engine_options)
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Batch statistics for recorded WAV archives.
+
+Each file is memory-mapped and cut into chunk ranges aligned to silence
+windows, so chunks can be analysed in any process and merged exactly:
+sums of squares are integers, peaks and clip counts combine trivially,
+and silent runs that touch a chunk edge are joined afterwards.
+
+    for stats in analyze_files(paths, jobs=8, progress=print):
+        print(stats.path, stats.peak_dbfs, stats.rms_dbfs)
+"""
+import math
+import mmap
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+
+import numpy as np
+from loguru import logger
+
+from .riff import read_wav_info
+
+FULL_SCALE = 32768
+CHUNK_BYTES = 64 * 1024 * 1024
+# Frames converted at a time inside a chunk; bounds worker memory
+_SLICE_FRAMES = 1 << 20
+
+
+@dataclass
+class ChunkStats:
+    """
+    Partial result for one chunk range; ``merge`` combines them exactly.
+    """
+    frames: int = 0
+    sum_squares: int = 0
+    peak: int = 0
+    clipped: int = 0
+    runs: list = field(default_factory=list)  # Silent (first_window, window_count), absolute window numbers
+
+
+@dataclass
+class FileStats:
+    """
+    Statistics for one WAV file.
+    """
+    path: str
+    rate: int = 0
+    channels: int = 0
+    frames: int = 0
+    size: int = 0
+    peak: int = 0
+    clipped: int = 0  # Samples at full scale
+    sum_squares: int = 0
+    silent_regions: list = field(default_factory=list)  # (start_s, end_s)
+    error: str = None
+
+    @property
+    def duration(self):
+        return self.frames / self.rate if self.rate else 0.0
+
+    @property
+    def peak_dbfs(self):
+        return 20 * math.log10(self.peak / FULL_SCALE) if self.peak else float("-inf")
+
+    @property
+    def rms_dbfs(self):
+        samples = self.frames * self.channels
+        if not samples or not self.sum_squares:
+            return float("-inf")
+        return 10 * math.log10(self.sum_squares / samples / FULL_SCALE ** 2)
+
+    @property
+    def silence_seconds(self):
+        return sum(end - start for start, end in self.silent_regions)
+
+    def as_dict(self):
+        """
+        JSON-friendly summary; levels of all-zero files are None rather than -inf.
+        """
+        def db(value):
+            return round(value, 2) if math.isfinite(value) else None
+
+        return {
+            "path": self.path, "rate": self.rate, "channels": self.channels,
+            "duration": round(self.duration, 3), "peak_dbfs": db(self.peak_dbfs),
+            "rms_dbfs": db(self.rms_dbfs), "clipped": self.clipped,
+            "silence_seconds": round(self.silence_seconds, 3),
+            "silent_regions": [(round(a, 3), round(b, 3)) for a, b in self.silent_regions],
+            "error": self.error,
+        }
+
+
+def _silent_runs(flags, first_window):
+    """
+    Runs of True in ``flags`` as ``(absolute_first_window, count)``.
+    """
+    edges = np.flatnonzero(np.diff(np.concatenate(([False], flags, [False])).astype(np.int8)))
+    starts, stops = edges[0::2], edges[1::2]
+    return [(first_window + int(a), int(b - a)) for a, b in zip(starts, stops)]
+
+
+def analyze_chunk(path, data_offset, channels, start_frame, stop_frame, window_frames, silence_threshold):
+    """
+    Statistics of frames ``[start_frame, stop_frame)`` of a 16-bit PCM WAV.
+
+    Args:
+        path (str): WAV file
+        data_offset (int): Byte offset of the ``data`` payload
+        channels (int): Interleaved channels
+        start_frame (int): First frame; a multiple of ``window_frames``
+        stop_frame (int): End frame (exclusive)
+        window_frames (int): Silence detection window
+        silence_threshold (float): Mean-square level (int16 units) below which a window is silent
+
+    Returns:
+        ChunkStats: Partial result
+    """
+    result = ChunkStats(frames=stop_frame - start_frame)
+    limit = silence_threshold * window_frames * channels
+    slice_frames = max(window_frames, _SLICE_FRAMES // window_frames * window_frames)
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        samples = np.frombuffer(mm, dtype="<i2", count=(stop_frame - start_frame) * channels,
+                                offset=data_offset + start_frame * channels * 2)
+        try:
+            for lo in range(0, result.frames, slice_frames):
+                hi = min(lo + slice_frames, result.frames)
+                x = samples[lo * channels:hi * channels].astype(np.int32)
+                magnitude = np.abs(x)
+                result.peak = max(result.peak, int(magnitude.max(initial=0)))
+                result.clipped += int(np.count_nonzero(magnitude >= FULL_SCALE - 1))
+                x *= x
+
+                whole = (hi - lo) // window_frames
+                energy = x[:whole * window_frames * channels].reshape(whole, window_frames * channels)
+                energy = energy.sum(axis=1, dtype=np.int64)
+                flags = energy < limit
+                if whole * window_frames < hi - lo:
+                    # Trailing partial window at end of file
+                    tail = int(x[whole * window_frames * channels:].sum(dtype=np.int64))
+                    energy = np.append(energy, tail)
+                    flags = np.append(flags, tail < silence_threshold * (hi - lo - whole * window_frames) * channels)
+                result.sum_squares += int(energy.sum())
+                result.runs.extend(_silent_runs(flags, (start_frame + lo) // window_frames))
+        finally:
+            # The mapping cannot close while a view into it is alive
+            del samples
+    return _join_runs(result.runs, result)
+
+
+def _join_runs(runs, result):
+    joined = []
+    for first, count in runs:
+        if joined and joined[-1][0] + joined[-1][1] == first:
+            joined[-1] = (joined[-1][0], joined[-1][1] + count)
+        else:
+            joined.append((first, count))
+    result.runs = joined
+    return result
+
+
+def merge(parts):
+    """
+    Combine ``ChunkStats`` of consecutive chunks (in file order) exactly.
+    """
+    total = ChunkStats()
+    runs = []
+    for part in parts:
+        total.frames += part.frames
+        total.sum_squares += part.sum_squares
+        total.peak = max(total.peak, part.peak)
+        total.clipped += part.clipped
+        runs.extend(part.runs)
+    return _join_runs(runs, total)
+
+
+def plan_chunks(info, window_frames, chunk_bytes=CHUNK_BYTES):
+    """
+    Split a file's frames into window-aligned ``(start, stop)`` ranges of about ``chunk_bytes``.
+    """
+    per_chunk = max(1, chunk_bytes // (info.frame_size * window_frames)) * window_frames
+    return [(start, min(start + per_chunk, info.frames)) for start in range(0, info.frames, per_chunk)] or [(0, 0)]
+
+
+def analyze_files(paths, jobs=None, chunk_bytes=CHUNK_BYTES, silence_db=-60.0, window_seconds=0.05,
+                  min_silence=0.5, progress=None):
+    """
+    Analyse WAV files on a process pool.
+
+    Args:
+        paths (list): WAV files
+        jobs (int, optional): Worker processes (default: CPU count); 1 runs in this process
+        chunk_bytes (int): Work unit size; big files are split into chunks of about this size
+        silence_db (float): Window RMS (dBFS) below which audio counts as silent
+        window_seconds (float): Silence detection window
+        min_silence (float): Shortest silent stretch reported as a region
+        progress (callable, optional): ``progress(done_bytes, total_bytes, elapsed_seconds)``
+
+    Returns:
+        list: ``FileStats`` in the order of ``paths``
+    """
+    results = [FileStats(path) for path in paths]
+    threshold = (FULL_SCALE * 10 ** (silence_db / 20)) ** 2
+    tasks = []  # (file_no, chunk_no, args, nbytes)
+    plans = {}
+    for i, stats in enumerate(results):
+        try:
+            info = read_wav_info(stats.path)
+            if not info.is_pcm16:
+                raise ValueError(f"仅支持 16 位 PCM (格式 {info.format_tag}, {info.sample_width * 8} 位)")
+        except (OSError, ValueError) as e:
+            stats.error = str(e)
+            continue
+        stats.rate, stats.channels, stats.frames = info.rate, info.channels, info.frames
+        stats.size = info.frames * info.frame_size
+        window = max(1, round(window_seconds * info.rate))
+        chunks = plan_chunks(info, window, chunk_bytes)
+        plans[i] = (window, [None] * len(chunks))
+        for j, (start, stop) in enumerate(chunks):
+            args = (stats.path, info.data_offset, info.channels, start, stop, window, threshold)
+            tasks.append((i, j, args, (stop - start) * info.frame_size))
+
+    total_bytes = sum(task[3] for task in tasks)
+    done_bytes = 0
+    t0 = time.perf_counter()
+
+    def finish(i, j, part, nbytes):
+        nonlocal done_bytes
+        window, parts = plans[i]
+        parts[j] = part
+        done_bytes += nbytes
+        if progress is not None:
+            progress(done_bytes, total_bytes, time.perf_counter() - t0)
+        if all(p is not None for p in parts):
+            _finish_file(results[i], merge(parts), window, min_silence)
+
+    def fail(i, e):
+        results[i].error = str(e)
+        logger.error(f"analysis failed for {results[i].path}: {e}")
+
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1:
+        for i, j, args, nbytes in tasks:
+            try:
+                finish(i, j, analyze_chunk(*args), nbytes)
+            except Exception as e:
+                fail(i, e)
+        return results
+
+    with ProcessPoolExecutor(jobs) as pool:
+        futures = {pool.submit(analyze_chunk, *args): (i, j, nbytes) for i, j, args, nbytes in tasks}
+        for future in as_completed(futures):
+            i, j, nbytes = futures.pop(future)
+            try:
+                finish(i, j, future.result(), nbytes)
+            except Exception as e:
+                fail(i, e)
+    return results
+
+
+def _finish_file(stats, total, window, min_silence):
+    stats.peak = total.peak
+    stats.clipped = total.clipped
+    stats.sum_squares = total.sum_squares
+    min_windows = max(1, math.ceil(min_silence * stats.rate / window))
+    stats.silent_regions = [
+        (first * window / stats.rate, min((first + count) * window, stats.frames) / stats.rate)
+        for first, count in total.runs if count >= min_windows
+    ]
@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+"""
+Audio I/O backends used by the capture engine.
+
+``PyAudioBackend`` talks to real hardware. ``SyntheticBackend`` produces a
+test tone on a timer thread with the same callback contract, so the engine
+can be exercised and benchmarked on machines without an input device. With
+``loopback_delay`` set, whatever its output streams play comes back on its
+inputs that much later, like a cable from line out to line in. Duplex
+streams (``open_duplex``) take input and produce output in one callback.
+"""
+import random
+import threading
+import time
+
+import numpy as np
+
+# PortAudio callback return codes and status flags (portaudio.h)
+PA_CONTINUE = 0
+PA_COMPLETE = 1
+PA_INPUT_UNDERFLOW = 0x1
+PA_INPUT_OVERFLOW = 0x2
+PA_OUTPUT_UNDERFLOW = 0x4
+PA_OUTPUT_OVERFLOW = 0x8
+
+SAMPLE_WIDTH = 2  # int16 everywhere in the capture path
+
+
+class PyAudioBackend:
+    """
+    PortAudio access through a single long-lived PyAudio instance.
+    """
+
+    def __init__(self):
+        import pyaudio
+        self._pyaudio = pyaudio
+        self.pa = pyaudio.PyAudio()
+        # Streams are opened from more than one thread (engine, playback); a rescan must not
+        # swap the PyAudio instance between the open-stream check and an open
+        self._lock = threading.Lock()
+
+    def _open(self, **kwargs):
+        with self._lock:
+            return self.pa.open(format=self._pyaudio.paInt16, **kwargs)
+
+    def list_devices(self, rescan=False):
+        """
+        Enumerate devices through this backend's PortAudio instance.
+
+        Args:
+            rescan (bool): Reinitialize PortAudio first so hot-plugged hardware shows up. Only done
+                while none of this backend's streams is open; terminating PortAudio under a running
+                stream is undefined. PortAudio counts initializations per process, so another live
+                PyAudio instance in the same process also prevents the rescan.
+
+        Returns:
+            list: ``DeviceInfo`` objects in PortAudio index order
+        """
+        from .devices import enumerate_devices
+        with self._lock:
+            if rescan and not self.pa._streams:  # PyAudio's own set of open streams
+                self.pa.terminate()
+                self.pa = self._pyaudio.PyAudio()
+            return enumerate_devices(self.pa)
+
+    def open_input(self, device_index, rate, channels, frames_per_buffer, callback, start=True):
+        """
+        Open a callback-mode int16 input stream.
+
+        PyAudio has no way to pass a suggested latency and always asks PortAudio
+        for the device's default low input latency, so ``frames_per_buffer`` is
+        the only buffering knob; read the result back with
+        ``stream.get_input_latency()``.
+
+        Args:
+            device_index (int): PortAudio device index, None for the default device
+            rate (int): Sampling rate (Hz)
+            channels (int): Number of input channels
+            frames_per_buffer (int): Frames per callback
+            callback (callable): ``callback(in_data, frame_count, time_info, status)``
+            start (bool): Start the stream immediately
+
+        Returns:
+            pyaudio.Stream: The opened stream
+        """
+        return self._open(
+            input_device_index=device_index,
+            channels=channels,
+            rate=rate,
+            input=True,
+            frames_per_buffer=frames_per_buffer,
+            stream_callback=callback,
+            start=start,
+        )
+
+    def open_output(self, device_index, rate, channels, frames_per_buffer, callback, start=True):
+        """
+        Open a callback-mode int16 output stream.
+
+        Args:
+            callback (callable): ``callback(None, frame_count, time_info, status)`` returning
+                ``(bytes, PA_CONTINUE)``; ``time_info['output_buffer_dac_time']`` is when the
+                block's first frame reaches the converter
+            Other arguments as for ``open_input``.
+
+        Returns:
+            pyaudio.Stream: The opened stream
+        """
+        return self._open(
+            output_device_index=device_index,
+            channels=channels,
+            rate=rate,
+            output=True,
+            frames_per_buffer=frames_per_buffer,
+            stream_callback=callback,
+            start=start,
+        )
+
+    def open_duplex(self, input_index, output_index, rate, channels, frames_per_buffer, callback, start=True):
+        """
+        Open a callback-mode int16 stream with both an input and an output device.
+
+        Both directions run on one PortAudio callback, so a block captured
+        by the input can be returned as output in the same call. The
+        devices must share a host API (and, in practice, a clock).
+
+        Args:
+            input_index (int): Input device index, None for the default input
+            output_index (int): Output device index, None for the default output
+            callback (callable): ``callback(in_data, frame_count, time_info, status)`` returning
+                ``(output, PA_CONTINUE)``; ``output`` must be a bytes-like object of
+                ``frame_count`` frames
+            Other arguments as for ``open_input``.
+
+        Returns:
+            pyaudio.Stream: The opened stream
+        """
+        return self._open(
+            input_device_index=input_index,
+            output_device_index=output_index,
+            channels=channels,
+            rate=rate,
+            input=True,
+            output=True,
+            frames_per_buffer=frames_per_buffer,
+            stream_callback=callback,
+            start=start,
+        )
+
+    def terminate(self):
+        self.pa.terminate()
+
+
+class _LoopbackLine:
+    """
+    Mono signal addressed by monotonic time; output streams write it, input streams read it back later.
+    """
+
+    def __init__(self, rate, delay, seconds=10.0):
+        self.rate = rate
+        self.delay = delay
+        self.epoch = time.monotonic()
+        self._buf = np.zeros(int(rate * seconds), dtype=np.int16)
+        self._lock = threading.Lock()
+        self._start = None  # Sample range ever written
+        self._end = None
+
+    def _index(self, t):
+        return int(round((t - self.epoch) * self.rate))
+
+    def write(self, t, samples):
+        i = self._index(t)
+        n = len(samples)
+        with self._lock:
+            cap = len(self._buf)
+            idx = np.arange(i, i + n) % cap
+            self._buf[idx] = samples
+            self._start = i if self._start is None else min(self._start, i)
+            self._end = i + n if self._end is None else max(self._end, i + n)
+
+    def read(self, t, n):
+        i = self._index(t - self.delay)
+        out = np.zeros(n, dtype=np.int16)
+        with self._lock:
+            if self._start is None:
+                return out
+            cap = len(self._buf)
+            lo = max(i, self._start, self._end - cap)
+            hi = min(i + n, self._end)
+            if lo < hi:
+                out[lo - i:hi - i] = self._buf[np.arange(lo, hi) % cap]
+        return out
+
+
+class _SyntheticStream:
+
+    def __init__(self, rate, channels, frames_per_buffer, callback, frequency, speed, jitter=0.0,
+                 device_latency=0.0, line=None, drift_ppm=0.0, bursts=None):
+        self.rate = rate
+        self.channels = channels
+        self.frames_per_buffer = frames_per_buffer
+        self.callback = callback
+        self.frequency = frequency
+        self.speed = speed
+        self.jitter = jitter
+        self.device_latency = device_latency
+        self.line = line
+        # The simulated converter clock runs this much fast against time.monotonic()
+        self.clock_rate = rate * (1 + drift_ppm * 1e-6)
+        self.bursts = bursts
+        self._active = False
+        self._closed = False
+        self._thread = None
+        self._phase = 0
+        self._start_time = None
+
+    def _render(self, n):
+        if self.line is not None:
+            tone = self.line.read(self._start_time + self._phase / self.clock_rate, n)
+        else:
+            t = (np.arange(self._phase, self._phase + n) / self.rate)
+            tone = 0.3 * 32767 * np.sin(2 * np.pi * self.frequency * t)
+            if self.bursts is not None:
+                on, off = self.bursts
+                tone *= (t % (on + off)) < on
+            tone = tone.astype(np.int16)
+        self._phase += n
+        return np.repeat(tone[:, None], self.channels, axis=1).tobytes()
+
+    def _run(self):
+        period = self.frames_per_buffer / self.clock_rate / self.speed
+        deadline = time.monotonic()
+        while self._active:
+            deadline += period
+            delay = deadline - time.monotonic()
+            if self.jitter:
+                # Scheduling noise of a loaded machine
+                delay += random.uniform(0.0, self.jitter)
+            if delay > 0:
+                time.sleep(delay)
+            now = time.monotonic()
+            # Falling further behind than the device buffers is what PortAudio reports as an input overflow
+            status = PA_INPUT_OVERFLOW if now - deadline > self._buffered(period) else 0
+            self._tick(now, status)
+
+    def _buffered(self, period):
+        # One block of device buffer
+        return period
+
+    def _tick(self, now, status):
+        # Stream time is the host clock, as with most PortAudio host APIs
+        time_info = {
+            'input_buffer_adc_time': self._start_time + self._phase / self.clock_rate / self.speed,
+            'current_time': now,
+            'output_buffer_dac_time': 0.0,
+        }
+        self.callback(self._render(self.frames_per_buffer), self.frames_per_buffer, time_info, status)
+
+    def start_stream(self):
+        if self._active:
+            return
+        self._active = True
+        self._start_time = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name="synthetic-input", daemon=True)
+        self._thread.start()
+
+    def stop_stream(self):
+        self._active = False
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+
+    def close(self):
+        self.stop_stream()
+        self._closed = True
+
+    def is_active(self):
+        return self._active
+
+    def get_input_latency(self):
+        return max(self.device_latency, self.frames_per_buffer / self.rate)
+
+    def get_time(self):
+        return time.monotonic()
+
+
+class _SyntheticOutputStream(_SyntheticStream):
+    """
+    Pulls blocks from an output callback; one block of output latency.
+    """
+
+    def _tick(self, now, status):
+        dac = self._start_time + (self._phase / self.speed + self.frames_per_buffer) / self.rate
+        time_info = {
+            'input_buffer_adc_time': 0.0,
+            'current_time': now,
+            'output_buffer_dac_time': dac,
+        }
+        data, flag = self.callback(None, self.frames_per_buffer, time_info, 0)
+        if self.line is not None and data:
+            samples = np.frombuffer(data, dtype=np.int16).reshape(-1, self.channels)[:, 0]
+            self.line.write(dac, samples)
+        self._phase += self.frames_per_buffer
+        if flag == PA_COMPLETE:
+            self._active = False
+
+    def get_output_latency(self):
+        return self.frames_per_buffer / self.rate
+
+
+class _SyntheticDuplexStream(_SyntheticStream):
+    """
+    Input as ``_SyntheticStream``; the callback's output is played one block later.
+
+    ``output_frames`` and ``output_peak`` record what was played. The
+    device buffers ``device_latency`` each way; a callback later than
+    that underflows the output as well as overflowing the input.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.output_frames = 0
+        self.output_peak = 0
+
+    def _buffered(self, period):
+        # What a duplex device buffers on each side
+        return max(period, self.device_latency / self.speed)
+
+    def _tick(self, now, status):
+        n = self.frames_per_buffer
+        adc = self._start_time + self._phase / self.clock_rate / self.speed
+        time_info = {
+            'input_buffer_adc_time': adc,
+            'current_time': now,
+            'output_buffer_dac_time': adc + 2 * n / self.rate / self.speed,
+        }
+        if status & PA_INPUT_OVERFLOW:
+            status |= PA_OUTPUT_UNDERFLOW
+        data, flag = self.callback(self._render(n), n, time_info, status)
+        if data is not None:
+            samples = np.frombuffer(data, dtype=np.int16)
+            self.output_frames += len(samples) // self.channels
+            if len(samples):
+                self.output_peak = max(self.output_peak, -int(samples.min()), int(samples.max()))
+            if self.line is not None:
+                self.line.write(time_info['output_buffer_dac_time'], samples[::self.channels])
+        if flag == PA_COMPLETE:
+            self._active = False
+
+    def get_output_latency(self):
+        return self.frames_per_buffer / self.rate
+
+
+class SyntheticBackend:
+    """
+    Tone generator that behaves like a PortAudio callback stream.
+
+    Args:
+        frequency (float): Tone frequency (Hz)
+        speed (float): Real-time multiplier; values above 1 deliver blocks faster than real time
+        open_delay (float): Simulated device open time in seconds
+        jitter (float): Up to this many seconds of random lateness per block, like a loaded VM
+        loopback_delay (float, optional): Feed output streams back into input streams after this many seconds
+        drift_ppm (float): Input sample clock error against the host clock, in parts per million
+        bursts (tuple, optional): ``(on_seconds, off_seconds)``; the tone is gated into bursts, for triggers
+        device_latency (float): Seconds the simulated device buffers, like the default low
+            latency PyAudio opens real devices at
+    """
+
+    def __init__(self, frequency=440.0, speed=1.0, open_delay=0.0, jitter=0.0, loopback_delay=None,
+                 drift_ppm=0.0, bursts=None, device_latency=0.010):
+        self.frequency = frequency
+        self.speed = speed
+        self.open_delay = open_delay
+        self.jitter = jitter
+        self.loopback_delay = loopback_delay
+        self.drift_ppm = drift_ppm
+        self.bursts = bursts
+        self.device_latency = device_latency
+        self.pa = None
+        self._lines = {}
+
+    def list_devices(self, rescan=False):
+        """
+        The one simulated device: a stereo input playing the tone and a stereo output.
+        """
+        from .devices import DeviceInfo, _stable_id
+        return [DeviceInfo(
+            id=_stable_id("Synthetic", "Synthetic tone", 2, 2, 0), index=0, name="Synthetic tone",
+            host_api="Synthetic", max_input_channels=2, max_output_channels=2, default_sample_rate=44100.0,
+            default_low_input_latency=self.device_latency, default_high_input_latency=0.1,
+            default_low_output_latency=self.device_latency,
+            default_high_output_latency=0.1, is_default_input=True, is_default_output=True,
+        )]
+
+    def _line(self, rate):
+        if self.loopback_delay is None:
+            return None
+        if rate not in self._lines:
+            self._lines[rate] = _LoopbackLine(rate, self.loopback_delay)
+        return self._lines[rate]
+
+    def open_input(self, device_index, rate, channels, frames_per_buffer, callback, start=True):
+        if self.open_delay:
+            time.sleep(self.open_delay)
+        stream = _SyntheticStream(rate, channels, frames_per_buffer, callback, self.frequency, self.speed,
+                                  self.jitter, self.device_latency, self._line(rate), self.drift_ppm, self.bursts)
+        if start:
+            stream.start_stream()
+        return stream
+
+    def open_output(self, device_index, rate, channels, frames_per_buffer, callback, start=True):
+        stream = _SyntheticOutputStream(rate, channels, frames_per_buffer, callback, self.frequency,
+                                        self.speed, self.jitter, line=self._line(rate))
+        if start:
+            stream.start_stream()
+        return stream
+
+    def open_duplex(self, input_index, output_index, rate, channels, frames_per_buffer, callback, start=True):
+        if self.open_delay:
+            time.sleep(self.open_delay)
+        stream = _SyntheticDuplexStream(rate, channels, frames_per_buffer, callback, self.frequency, self.speed,
+                                        self.jitter, self.device_latency, self._line(rate), self.drift_ppm, self.bursts)
+        if start:
+            stream.start_stream()
+        return stream
+
+    def terminate(self):
+        pass
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Publish/subscribe fan-out of captured samples.
+
+The capture ring is the only copy of the audio. ``SampleBus`` publishes
+its write position after every engine drain, and each subscriber keeps
+its own cursor into the ring and reads views from it: nothing is copied
+and nothing is queued per subscriber.
+
+Every subscription picks:
+
+* a decimation step (or a target rate): blocks are strided views, every
+  ``step``-th frame at absolute positions that are multiples of the step,
+  so the stride continues seamlessly across reads. There is no
+  anti-alias filter and the step is an integer, so the delivered rate
+  (``Subscription.rate``) is only near the one asked for: decimated
+  blocks are for displays and meters. Audio for listening or sending
+  is read at full rate and run through ``resample.Resample``;
+* an overflow policy: ``"latest"`` skips to the newest ``window`` frames
+  on every read (displays, meters), ``"lossless"`` reads everything from
+  its cursor. Neither ever holds up capture: a lossless subscriber that
+  falls a whole ring behind loses the overwritten frames (``lost``).
+
+Subscriptions with a callback get a thread of their own, woken by the
+publish and rate-limited by ``interval``, so a slow subscriber only delays
+itself. Without a callback the owner calls ``read()`` when it wants data,
+e.g. from a GUI timer.
+
+    bus = SampleBus(engine)
+    bus.subscribe("waveform", widget.push_block, policy=LATEST, window_seconds=1.0, interval=1 / 30)
+    scope = bus.subscribe("scope", policy=LOSSLESS, rate=8000)   # 7350 Hz from 44100, aliased
+    for block in scope.read():
+        plot(block.samples, scope.rate)
+"""
+import threading
+import time
+
+from loguru import logger
+
+from .ring import AudioBlock
+
+LATEST = "latest"
+LOSSLESS = "lossless"
+
+
+class Subscription:
+    """
+    One subscriber's cursor into the ring; create with ``SampleBus.subscribe``.
+
+    Attributes:
+        name (str): Label in logs and stats
+        step (int): Ring frames per delivered frame
+        rate (float): Frame rate actually delivered, the bus rate over ``step``
+        policy (str): ``"latest"`` or ``"lossless"``
+        window (int): Ring frames kept by a ``"latest"`` read
+        cursor (int): Next ring position to read
+        delivered (int): Frames handed out (after decimation)
+        skipped (int): Ring frames passed over by the ``"latest"`` policy
+        lost (int): Ring frames overwritten before they were read
+        torn (int): Delivered blocks the ring overwrote while the callback still held them
+    """
+
+    def __init__(self, bus, name, callback, step, policy, window, interval):
+        self.bus = bus
+        self.name = name
+        self.callback = callback
+        self.step = step
+        self.rate = bus.rate / step
+        self.policy = policy
+        self.window = window
+        self.interval = interval
+        self.cursor = bus.published
+        self.delivered = 0
+        self.skipped = 0
+        self.lost = 0
+        self.torn = 0
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = None
+        if callback is not None:
+            self._thread = threading.Thread(target=self._run, name=f"bus-{name}", daemon=True)
+            self._thread.start()
+
+    @property
+    def lag(self):
+        """
+        Ring frames published but not read yet.
+        """
+        return max(0, self.bus.published - self.cursor)
+
+    def read(self):
+        """
+        Views of everything due since the last read, per the policy and decimation.
+
+        Call from one thread only (the subscription's own thread when it has a callback).
+
+        Returns:
+            list: ``AudioBlock`` views into the ring, valid until the ring wraps (see ``valid``)
+        """
+        ring = self.bus.ring
+        if ring is None:
+            return []
+        end = self.bus.published
+        start = self.cursor
+        if self.policy == LATEST and end - self.window > start:
+            self.skipped += end - self.window - start
+            start = end - self.window
+        oldest = ring.oldest
+        if start < oldest:
+            self.lost += oldest - start
+            start = oldest
+        blocks = []
+        step = self.step
+        for position, view in ring.views(start, end):
+            first = -position % step
+            samples = view[first::step] if step > 1 else view
+            if len(samples):
+                blocks.append(AudioBlock(samples, position + first, self.bus.timestamp(position + first)))
+                self.delivered += len(samples)
+        self.cursor = max(start, end)
+        return blocks
+
+    def valid(self, block):
+        """
+        Check that the ring has not overwritten ``block`` yet.
+        """
+        return block.position >= self.bus.ring.oldest
+
+    def close(self):
+        self.bus.unsubscribe(self)
+
+    def _run(self):
+        due = 0.0
+        while not self._closed:
+            self._wake.wait(0.1)
+            self._wake.clear()
+            if self.interval:
+                delay = due - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                due = time.monotonic() + self.interval
+            if self._closed:
+                break
+            for block in self.read():
+                try:
+                    self.callback(block)
+                except Exception as e:
+                    logger.error(f"bus subscriber {self.name} failed: {e}")
+                if not self.valid(block):
+                    self.torn += 1
+
+
+class SampleBus:
+    """
+    Fans the capture ring of an ``AudioEngine`` or ``CaptureProcess`` out to subscribers.
+
+    Args:
+        engine: The capture engine; the bus follows its ``ring`` across resizes
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.rate = engine.rate
+        self.published = engine.ring.written if engine.ring is not None else 0
+        self._clock = (self.published, time.monotonic())  # (position, capture time), swapped whole
+        self._subscriptions = []
+        self._lock = threading.Lock()
+        engine.add_block_listener(self._publish)
+
+    @property
+    def ring(self):
+        return self.engine.ring
+
+    def subscribe(self, name, callback=None, rate=None, decimation=1, policy=LATEST, window_seconds=0.1,
+                  interval=0.0):
+        """
+        Add a subscriber, starting from the newest frame.
+
+        Args:
+            name (str): Label in logs and stats
+            callback (callable, optional): ``callback(block)`` on the subscription's own thread;
+                None to ``read()`` on demand
+            rate (float, optional): Wanted frame rate; sets the decimation to the nearest integer
+                step, without filtering (display use only). The rate delivered is the
+                subscription's ``rate``, e.g. 7350 Hz for 8000 Hz asked of a 44100 Hz bus
+            decimation (int): Deliver every n-th frame (ignored when ``rate`` is given)
+            policy (str): ``"latest"`` or ``"lossless"``
+            window_seconds (float): Audio kept by each ``"latest"`` read
+            interval (float): Minimum seconds between callback deliveries
+
+        Returns:
+            Subscription: The new subscription
+        """
+        if policy not in (LATEST, LOSSLESS):
+            raise ValueError(f"unknown bus policy: {policy}")
+        step = max(1, round(self.rate / rate)) if rate else max(1, int(decimation))
+        if rate and abs(self.rate / step - rate) > 0.01 * rate:
+            logger.info(f"bus subscriber {name}: {rate:.0f} Hz asked, every {step}th frame gives "
+                        f"{self.rate / step:.0f} Hz")
+        subscription = Subscription(self, name, callback, step, policy, max(1, int(window_seconds * self.rate)),
+                                    interval)
+        with self._lock:
+            self._subscriptions = self._subscriptions + [subscription]
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions = [s for s in self._subscriptions if s is not subscription]
+        subscription._closed = True
+        subscription._wake.set()
+        if subscription._thread is not None and subscription._thread is not threading.current_thread():
+            subscription._thread.join(1.0)
+
+    def timestamp(self, position):
+        """
+        ``time.monotonic()`` capture time of a ring position.
+        """
+        end, captured_at = self._clock
+        return captured_at - (end - position) / self.rate
+
+    def stats(self):
+        """
+        Counters per subscriber, by name.
+        """
+        return {s.name: {"step": s.step, "rate": s.rate, "policy": s.policy, "delivered": s.delivered, "skipped": s.skipped,
+                         "lost": s.lost, "torn": s.torn, "lag": s.lag}
+                for s in self._subscriptions}
+
+    def close(self):
+        """
+        Detach from the engine and stop every subscriber thread.
+        """
+        self.engine.remove_block_listener(self._publish)
+        for subscription in list(self._subscriptions):
+            self.unsubscribe(subscription)
+
+    def _publish(self, block):
+        # Engine (or capture process reader) thread: O(subscribers), never waits on one
+        self._clock = (block.end, block.timestamp + block.frames / self.rate)
+        self.published = block.end
+        for subscription in self._subscriptions:
+            subscription._wake.set()
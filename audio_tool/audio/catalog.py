@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+SQLite catalog of recorded takes.
+
+Every finished take gets one row holding everything a browser needs
+(device, format, start time, duration, level and loudness summaries,
+where its peak sidecar is), so listing and filtering never touches the
+WAV files. Rows are indexed by start time and by device; listings are
+paged, and a page is picked from the indexes alone before its rows are
+read, so a view over 100k takes only ever reads the rows on screen.
+
+    catalog = Catalog()
+    catalog.add_recording(info, device_id=..., device_name=..., loudness=reading)
+    catalog.count(TakeFilter(text="interview"))
+    catalog.query(TakeFilter(device_id=...), limit=100)
+
+The database runs in WAL mode, so a headless recorder can register takes
+while the GUI browses the same catalog.
+"""
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import astuple, dataclass, fields
+
+from .backend import SAMPLE_WIDTH
+
+CATALOG_NAME = "catalog.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS takes (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    duration REAL NOT NULL,
+    frames INTEGER NOT NULL,
+    rate INTEGER NOT NULL,
+    channels INTEGER NOT NULL,
+    sample_width INTEGER NOT NULL,
+    files INTEGER NOT NULL,
+    size INTEGER,
+    device_id TEXT,
+    device_name TEXT,
+    peak_dbfs REAL,
+    integrated_lufs REAL,
+    max_short_term_lufs REAL,
+    true_peak_dbtp REAL,
+    peaks_path TEXT,
+    sidecar_path TEXT,
+    added_at REAL NOT NULL
+);
+-- Names ride along in the time index so text filters scan it instead of the table
+CREATE INDEX IF NOT EXISTS takes_started_at ON takes (started_at, id, name, device_name);
+CREATE INDEX IF NOT EXISTS takes_device ON takes (device_id, started_at);
+CREATE TABLE IF NOT EXISTS devices (
+    device_id TEXT PRIMARY KEY,
+    name TEXT
+);
+"""
+
+
+def library_dir():
+    """
+    Where the GUI keeps its takes and catalog: ``$AUDIO_TOOL_HOME`` or ``~/AudioTool``.
+    """
+    return os.environ.get("AUDIO_TOOL_HOME") or os.path.join(os.path.expanduser("~"), "AudioTool")
+
+
+def unique_take_path(directory, prefix="rec", when=None):
+    """
+    Reserve a new, unused WAV file name for a take.
+
+    Takes go into one sub-directory per month, named after their start time
+    (``2026-10/rec_20261019_101530.wav``); a counter is appended when that
+    name is taken. The empty file is created here, so two recorders can
+    never pick the same name.
+
+    Args:
+        directory (str): Recordings root
+        prefix (str): File name prefix
+        when (float, optional): Start time (default: now)
+
+    Returns:
+        str: Path of the reserved file
+    """
+    t = time.localtime(when)
+    folder = os.path.join(directory, time.strftime("%Y-%m", t))
+    os.makedirs(folder, exist_ok=True)
+    stem = f"{prefix}_{time.strftime('%Y%m%d_%H%M%S', t)}"
+    for n in range(10000):
+        path = os.path.join(folder, f"{stem}.wav" if n == 0 else f"{stem}_{n}.wav")
+        try:
+            with open(path, "x"):
+                return path
+        except FileExistsError:
+            continue
+    raise OSError(f"无法创建唯一的录音文件名: {stem}")
+
+
+@dataclass
+class Take:
+    """
+    One catalog row; field order matches the ``takes`` table.
+    """
+    id: int
+    path: str  # First file of the take
+    name: str  # File name, what the text filter matches
+    started_at: float  # Wall-clock time of the first frame
+    duration: float  # Seconds
+    frames: int
+    rate: int
+    channels: int
+    sample_width: int
+    files: int  # Number of files when the writer rotated
+    size: int  # Bytes of sample data
+    device_id: str = None
+    device_name: str = None
+    peak_dbfs: float = None
+    integrated_lufs: float = None
+    max_short_term_lufs: float = None
+    true_peak_dbtp: float = None
+    peaks_path: str = None
+    sidecar_path: str = None
+    added_at: float = 0.0
+
+
+_COLUMNS = [f.name for f in fields(Take)]
+_INSERT = f"INSERT OR REPLACE INTO takes ({', '.join(_COLUMNS[1:])}) VALUES ({', '.join('?' * (len(_COLUMNS) - 1))})"
+_DEVICE = "INSERT OR REPLACE INTO devices (device_id, name) VALUES (?, ?)"
+
+
+@dataclass
+class TakeFilter:
+    """
+    Conditions for ``Catalog.count``/``Catalog.query``; unset fields match everything.
+    """
+    text: str = None  # Substring of the file name or device name
+    device_id: str = None
+    since: float = None  # started_at >= since
+    until: float = None  # started_at < until
+    min_duration: float = None
+
+    def where(self):
+        clauses, params = [], []
+        if self.text:
+            pattern = "%" + self.text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            clauses.append("(name LIKE ? ESCAPE '\\' OR device_name LIKE ? ESCAPE '\\')")
+            params += [pattern, pattern]
+        if self.device_id is not None:
+            clauses.append("device_id = ?")
+            params.append(self.device_id)
+        if self.since is not None:
+            clauses.append("started_at >= ?")
+            params.append(self.since)
+        if self.until is not None:
+            clauses.append("started_at < ?")
+            params.append(self.until)
+        if self.min_duration is not None:
+            clauses.append("duration >= ?")
+            params.append(self.min_duration)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+
+def _finite(value):
+    return None if value is None or value == float("-inf") else float(value)
+
+
+class Catalog:
+    """
+    Take catalog in one SQLite file; safe to share between threads.
+
+    Args:
+        path (str, optional): Database file (default: ``catalog.sqlite`` in ``library_dir()``)
+    """
+
+    def __init__(self, path=None):
+        if path is None:
+            os.makedirs(library_dir(), exist_ok=True)
+            path = os.path.join(library_dir(), CATALOG_NAME)
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        with self._lock:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.executescript(_SCHEMA)
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def add(self, take):
+        """
+        Insert a take, replacing any row for the same path.
+
+        Args:
+            take (Take): Row to store; ``id`` is ignored
+
+        Returns:
+            int: Row id
+        """
+        with self._lock, self._db:
+            cursor = self._db.execute(_INSERT, astuple(take)[1:])
+            if take.device_id is not None:
+                self._db.execute(_DEVICE, (take.device_id, take.device_name))
+            return cursor.lastrowid
+
+    def add_many(self, takes):
+        """
+        Insert many takes in one transaction (imports, benchmarks).
+        """
+        takes = list(takes)
+        devices = {take.device_id: take.device_name for take in takes if take.device_id is not None}
+        with self._lock, self._db:
+            self._db.executemany(_INSERT, [astuple(take)[1:] for take in takes])
+            self._db.executemany(_DEVICE, devices.items())
+
+    def add_recording(self, info, device_id=None, device_name=None, loudness=None, sidecar=None):
+        """
+        Register a finished take.
+
+        Args:
+            info (RecordingInfo): The engine's description of the take
+            device_id (str, optional): Stable id of the capture device
+            device_name (str, optional): Its display name
+            loudness (LoudnessReading, optional): Loudness of the take
+            sidecar (str, optional): Path of the JSON sidecar
+
+        Returns:
+            int: Row id
+        """
+        path = os.path.abspath((info.files or [info.path])[0])
+        take = Take(
+            id=None, path=path, name=os.path.basename(path), started_at=info.started_at,
+            duration=info.duration, frames=info.frames, rate=info.rate, channels=info.channels,
+            sample_width=SAMPLE_WIDTH, files=len(info.files or [info.path]),
+            size=info.frames * info.channels * SAMPLE_WIDTH, device_id=device_id, device_name=device_name,
+            peak_dbfs=_finite(info.peak_dbfs),
+            integrated_lufs=_finite(loudness.integrated) if loudness else None,
+            max_short_term_lufs=_finite(loudness.max_short_term) if loudness else None,
+            true_peak_dbtp=_finite(loudness.true_peak) if loudness else None,
+            peaks_path=os.path.abspath(info.peaks_path) if info.peaks_path else None,
+            sidecar_path=os.path.abspath(sidecar) if sidecar else None,
+            added_at=time.time(),
+        )
+        return self.add(take)
+
+    def add_region(self, result, info, source=None, sidecar=None):
+        """
+        Register a region exported from another file.
+
+        Args:
+            result (ExportResult): What ``export_region`` wrote
+            info (WavInfo): Format of the exported file
+            source (Take, optional): Catalog row of the source; the region inherits its device and start time
+            sidecar (str, optional): Path of the JSON sidecar
+
+        Returns:
+            int: Row id
+        """
+        path = os.path.abspath(result.path)
+        offset = result.start_frame / info.rate
+        take = Take(
+            id=None, path=path, name=os.path.basename(path),
+            started_at=source.started_at + offset if source else time.time(),
+            duration=info.duration, frames=info.frames, rate=info.rate, channels=info.channels,
+            sample_width=info.sample_width, files=1, size=info.data_size,
+            device_id=source.device_id if source else None, device_name=source.device_name if source else None,
+            sidecar_path=os.path.abspath(sidecar) if sidecar else None, added_at=time.time(),
+        )
+        return self.add(take)
+
+    def remove(self, take_id):
+        """
+        Drop a take from the catalog (its files are left alone).
+        """
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM takes WHERE id = ?", (take_id,))
+
+    def get(self, take_id):
+        """
+        Returns:
+            Take: The row, or None
+        """
+        with self._lock:
+            row = self._db.execute(f"SELECT {', '.join(_COLUMNS)} FROM takes WHERE id = ?", (take_id,)).fetchone()
+        return Take(*row) if row else None
+
+    def count(self, where=None):
+        """
+        Args:
+            where (TakeFilter, optional): Conditions
+
+        Returns:
+            int: Number of matching takes
+        """
+        clause, params = (where or TakeFilter()).where()
+        with self._lock:
+            return self._db.execute(f"SELECT COUNT(*) FROM takes{clause}", params).fetchone()[0]
+
+    def query(self, where=None, limit=100, offset=0, newest_first=True):
+        """
+        One page of matching takes in start-time order.
+
+        Args:
+            where (TakeFilter, optional): Conditions
+            limit (int): Rows per page
+            offset (int): Rows to skip
+            newest_first (bool): Descending start time
+
+        Returns:
+            list: ``Take`` rows
+        """
+        clause, params = (where or TakeFilter()).where()
+        order = f"ORDER BY started_at {'DESC' if newest_first else 'ASC'}, id {'DESC' if newest_first else 'ASC'}"
+        # Skipping and filtering happen inside the covering indexes; only the page's rows are read
+        sql = (f"SELECT {', '.join(_COLUMNS)} FROM takes WHERE id IN "
+               f"(SELECT id FROM takes{clause} {order} LIMIT ? OFFSET ?) {order}")
+        with self._lock:
+            rows = self._db.execute(sql, params + [limit, offset]).fetchall()
+        return [Take(*row) for row in rows]
+
+    def devices(self):
+        """
+        Devices that have takes in the catalog.
+
+        Returns:
+            list: ``(device_id, device_name, takes)`` tuples, by name
+        """
+        with self._lock:
+            return self._db.execute(
+                "SELECT t.device_id, d.name, t.takes FROM "
+                "(SELECT device_id, COUNT(*) AS takes FROM takes WHERE device_id IS NOT NULL GROUP BY device_id) t "
+                "LEFT JOIN devices d ON d.device_id = t.device_id ORDER BY d.name").fetchall()
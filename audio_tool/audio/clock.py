@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Device sample clock versus the host's monotonic clock.
+
+Every callback contributes one point (frames captured so far, capture time
+of the last of them, on the stream's clock plus a fixed ``offset`` to
+``time.monotonic()``). ``ClockDriftEstimator`` keeps a running least-squares
+line through the points with Welford-style updates: O(1) per callback,
+numerically stable over days, and the scheduling jitter of individual
+callbacks averages out. The slope is the device's true sampling rate, so
+its ppm offset from the nominal rate is the drift, and the line maps any
+frame number to host time (and from there to wall-clock time).
+"""
+import math
+import time
+
+
+class ClockDriftEstimator:
+    """
+    Running linear fit of frame position against ``time.monotonic()``.
+
+    Args:
+        rate (int): Nominal sampling rate (Hz)
+        min_span (float): Seconds of data before the slope is trusted over the nominal rate
+    """
+
+    def __init__(self, rate, min_span=10.0):
+        self.rate = rate
+        self.min_span = min_span
+        # Wall minus monotonic clock, to turn fitted host times into wall times
+        self.wall_offset = time.time() - time.monotonic()
+        self.reset()
+
+    def reset(self):
+        self.offset = 0.0  # Added to fitted times to get time.monotonic()
+        self.count = 0
+        self._t0 = None
+        self._p0 = 0
+        self._mean_t = 0.0
+        self._mean_p = 0.0
+        self._m2_t = 0.0
+        self._m2_p = 0.0
+        self._cov = 0.0
+        self._last_t = 0.0
+
+    def add(self, position, timestamp):
+        """
+        Add one observation (called from the audio callback).
+
+        Args:
+            position (int): Absolute frame count at ``timestamp``
+            timestamp (float): Capture time of that frame, ``time.monotonic()`` minus ``offset``
+        """
+        if self._t0 is None:
+            self._t0, self._p0 = timestamp, position
+        t = timestamp - self._t0
+        p = position - self._p0
+        self.count += 1
+        dt = t - self._mean_t
+        dp = p - self._mean_p
+        self._mean_t += dt / self.count
+        self._mean_p += dp / self.count
+        self._m2_t += dt * (t - self._mean_t)
+        self._m2_p += dp * (p - self._mean_p)
+        self._cov += dt * (p - self._mean_p)
+        self._last_t = t
+
+    @property
+    def span(self):
+        """
+        Seconds covered by the observations.
+        """
+        return self._last_t
+
+    @property
+    def measured_rate(self):
+        """
+        Fitted frames per host second; the nominal rate until ``min_span`` seconds are in.
+        """
+        if self.count < 3 or self.span < self.min_span or self._m2_t <= 0:
+            return float(self.rate)
+        return self._cov / self._m2_t
+
+    @property
+    def ppm(self):
+        """
+        Device clock drift against the host clock, in parts per million (positive: device runs fast).
+        """
+        return (self.measured_rate / self.rate - 1.0) * 1e6
+
+    @property
+    def residual(self):
+        """
+        RMS distance (seconds) of the observations from the fitted line.
+        """
+        if self.count < 3 or self._m2_t <= 0:
+            return 0.0
+        rate = self.measured_rate
+        # Residual variance of p about the line, expressed in time
+        var_p = max(0.0, self._m2_p - 2 * rate * self._cov + rate * rate * self._m2_t) / self.count
+        return math.sqrt(var_p) / rate
+
+    def time_at(self, position):
+        """
+        Host (monotonic) time at which frame ``position`` was captured, on the fitted line.
+        """
+        if self._t0 is None:
+            return None
+        return self.offset + self._t0 + self._mean_t + (position - self._p0 - self._mean_p) / self.measured_rate
+
+    def mapping(self, segments, file_rate=None):
+        """
+        Frame-to-time mapping of a recording, for its sidecar.
+
+        Args:
+            segments (list): ``(take_frame, position)`` where each contiguous run of the take starts;
+                take frames count across rotated files
+            file_rate (int, optional): Sampling rate of the file when it differs from the capture rate
+
+        Returns:
+            dict: Nominal and measured rates, drift, and the host/wall time of each segment start;
+            take frame ``f`` of a segment was captured at ``wall + (f - take_frame) / file_measured_rate``
+        """
+        return {
+            "nominal_rate": self.rate,
+            "measured_rate": round(self.measured_rate, 6),
+            "drift_ppm": round(self.ppm, 3),
+            "fit_seconds": round(self.span, 3),
+            "fit_points": self.count,
+            "residual_ms": round(self.residual * 1000, 4),
+            "segments": self.resolve(segments, file_rate),
+        }
+
+    def resolve(self, segments, file_rate=None):
+        """
+        Host and wall time of segment starts, see ``mapping``.
+        """
+        if self._t0 is None:
+            return []
+        scale = (file_rate or self.rate) / self.rate
+        return [
+            {"take_frame": frame, "monotonic": round(self.time_at(position), 6),
+             "wall": round(self.time_at(position) + self.wall_offset, 6),
+             "file_measured_rate": round(self.measured_rate * scale, 6)}
+            for frame, position in segments
+        ]
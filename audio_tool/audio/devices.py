@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Audio device discovery with a cached, diffable registry.
+"""
+import hashlib
+import threading
+from dataclasses import dataclass, field, replace
+
+from loguru import logger
+
+
+@dataclass(frozen=True)
+class DeviceInfo:
+    """
+    Snapshot of one PortAudio device as reported at enumeration time.
+
+    ``id`` is derived from the host API, name and channel layout only, so it
+    stays the same when PortAudio hands out different indices after a device
+    is plugged in or removed. ``index`` is only valid for the scan that
+    produced it, and only in the process that scanned: pass ``id`` to the
+    engine, which resolves it right before opening a stream.
+    """
+    id: str
+    index: int
+    name: str
+    host_api: str
+    max_input_channels: int
+    max_output_channels: int
+    default_sample_rate: float
+    default_low_input_latency: float
+    default_high_input_latency: float
+    default_low_output_latency: float
+    default_high_output_latency: float
+    is_default_input: bool = False
+    is_default_output: bool = False
+
+    @property
+    def is_input(self):
+        return self.max_input_channels > 0
+
+    @property
+    def is_output(self):
+        return self.max_output_channels > 0
+
+    def as_dict(self):
+        """
+        Legacy dictionary form used by the microphone combo boxes.
+
+        Returns:
+            dict: ``{'id', 'index', 'name'}``
+        """
+        return {'id': self.id, 'index': self.index, 'name': self.name}
+
+
+@dataclass
+class DeviceDiff:
+    """
+    Difference between two registry snapshots.
+    """
+    added: list = field(default_factory=list)
+    removed: list = field(default_factory=list)
+    changed: list = field(default_factory=list)
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed)
+
+
+def _stable_id(host_api, name, max_in, max_out, ordinal):
+    key = f"{host_api}|{name}|{max_in}|{max_out}|{ordinal}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+
+
+def enumerate_devices(pa):
+    """
+    Read the full device list from a PyAudio instance.
+
+    Args:
+        pa (pyaudio.PyAudio): Initialized PyAudio instance
+
+    Returns:
+        list: ``DeviceInfo`` objects in PortAudio index order
+    """
+    try:
+        default_in = pa.get_default_input_device_info()['index']
+    except (IOError, OSError):
+        default_in = None
+    try:
+        default_out = pa.get_default_output_device_info()['index']
+    except (IOError, OSError):
+        default_out = None
+
+    host_apis = {}
+    seen = {}
+    devices = []
+    for i in range(pa.get_device_count()):
+        info = pa.get_device_info_by_index(i)
+        api_index = info.get('hostApi', 0)
+        if api_index not in host_apis:
+            try:
+                host_apis[api_index] = pa.get_host_api_info_by_index(api_index)['name']
+            except Exception:
+                host_apis[api_index] = str(api_index)
+        host_api = host_apis[api_index]
+
+        # Identical devices (two of the same USB interface) get an ordinal so
+        # their ids stay distinct but still independent of the global index.
+        key = (host_api, info['name'], info['maxInputChannels'], info['maxOutputChannels'])
+        ordinal = seen.get(key, 0)
+        seen[key] = ordinal + 1
+
+        devices.append(DeviceInfo(
+            id=_stable_id(*key, ordinal),
+            index=i,
+            name=info['name'],
+            host_api=host_api,
+            max_input_channels=int(info['maxInputChannels']),
+            max_output_channels=int(info['maxOutputChannels']),
+            default_sample_rate=float(info['defaultSampleRate']),
+            default_low_input_latency=float(info['defaultLowInputLatency']),
+            default_high_input_latency=float(info['defaultHighInputLatency']),
+            default_low_output_latency=float(info['defaultLowOutputLatency']),
+            default_high_output_latency=float(info['defaultHighOutputLatency']),
+            is_default_input=(i == default_in),
+            is_default_output=(i == default_out),
+        ))
+    return devices
+
+
+def diff_devices(old, new):
+    """
+    Compare two ``{id: DeviceInfo}`` mappings.
+
+    A device that only moved to a different index is not reported as changed.
+
+    Returns:
+        DeviceDiff: Devices added, removed, or whose details changed
+    """
+    diff = DeviceDiff()
+    for device_id, info in new.items():
+        if device_id not in old:
+            diff.added.append(info)
+        elif replace(old[device_id], index=info.index) != info:
+            diff.changed.append(info)
+    for device_id, info in old.items():
+        if device_id not in new:
+            diff.removed.append(info)
+    return diff
+
+
+class DeviceRegistry:
+    """
+    Cached view of the audio devices, refreshed on demand or in the background.
+
+    Lookups (``devices``, ``get``, ``resolve_index``) never touch PortAudio.
+    ``refresh`` re-enumerates and notifies listeners with a ``DeviceDiff`` when
+    something changed; ``refresh_async`` does the same on a worker thread so
+    callers on the GUI thread never block on the host audio API.
+
+    Args:
+        scanner (callable, optional): ``scanner(rescan)`` returning ``DeviceInfo`` objects, e.g.
+            ``AudioEngine.list_devices`` (resolved) so the scan runs where the streams are opened
+    """
+
+    def __init__(self, scanner=None):
+        self._scanner = scanner
+        self._lock = threading.Lock()
+        self._devices = {}
+        self._listeners = []
+        self._worker = None
+
+    def add_listener(self, callback):
+        """
+        Register ``callback(diff)``; it runs on whichever thread refreshed.
+        """
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def devices(self, input_only=False, output_only=False):
+        """
+        Get the cached devices.
+
+        Args:
+            input_only (bool): Only devices with input channels
+            output_only (bool): Only devices with output channels
+
+        Returns:
+            list: ``DeviceInfo`` objects in PortAudio index order
+        """
+        with self._lock:
+            devices = list(self._devices.values())
+        if input_only:
+            devices = [d for d in devices if d.is_input]
+        if output_only:
+            devices = [d for d in devices if d.is_output]
+        return devices
+
+    def get(self, device_id):
+        with self._lock:
+            return self._devices.get(device_id)
+
+    def resolve_index(self, device_id):
+        """
+        Map a stable device id to the PortAudio index from the last scan.
+
+        Returns:
+            int: Device index, or None if the device is unknown or gone
+        """
+        info = self.get(device_id)
+        return info.index if info is not None else None
+
+    def find(self, name):
+        """
+        Find the first cached device whose name contains ``name``.
+        """
+        for info in self.devices():
+            if name in info.name:
+                return info
+        return None
+
+    def refresh(self, pa=None, rescan=False, **options):
+        """
+        Re-enumerate devices and update the cache.
+
+        PortAudio only rescans hardware when it is initialized for the first
+        time in the process, so hot-plugged devices only show up when the
+        scanner may reinitialize it (``rescan``, honoured while no stream is
+        open). Pass ``pa`` to read the device list of that instance instead.
+
+        Args:
+            pa (pyaudio.PyAudio, optional): Instance to enumerate instead of the scanner
+            rescan (bool): Ask the scanner to reinitialize PortAudio first
+            options: Extra keyword arguments for the scanner, for this scan only
+
+        Returns:
+            DeviceDiff: What changed since the previous scan
+        """
+        if pa is not None:
+            scanned = enumerate_devices(pa)
+        elif self._scanner is not None:
+            scanned = self._scanner(rescan, **options)
+        else:
+            raise ValueError("DeviceRegistry needs a scanner or a PyAudio instance")
+
+        new = {d.id: d for d in scanned}
+        with self._lock:
+            diff = diff_devices(self._devices, new)
+            self._devices = new
+
+        if diff:
+            logger.info(f"devices changed: +{len(diff.added)} -{len(diff.removed)} ~{len(diff.changed)}")
+            for callback in list(self._listeners):
+                try:
+                    callback(diff)
+                except Exception as e:
+                    logger.error(f"device listener failed: {e}")
+        return diff
+
+    def refresh_async(self, rescan=True, **options):
+        """
+        Start a background refresh unless one is already running.
+
+        Args:
+            rescan (bool): As for ``refresh``
+            options: As for ``refresh``
+
+        Returns:
+            bool: True if a new refresh was started
+        """
+        if self._worker is not None and self._worker.is_alive():
+            return False
+        self._worker = threading.Thread(target=self._refresh_worker, args=(rescan, options), name="device-scan",
+                                        daemon=True)
+        self._worker.start()
+        return True
+
+    def _refresh_worker(self, rescan, options):
+        try:
+            self.refresh(rescan=rescan, **options)
+        except Exception as e:
+            logger.error(f"后台刷新设备列表失败: {e}")
@@ -0,0 +1,951 @@
+#!/usr/bin/env python3
+"""
+Long-lived capture engine driven by a command queue.
+
+One engine thread owns the PortAudio stream, the sample ring and the WAV
+writer for the lifetime of the application. The stream stays open and
+running between takes ("standby"), so starting a recording only moves the
+write cursor instead of opening a device. The PortAudio callback does
+nothing but copy each block into the ring and wake the engine thread.
+
+Blocks carry their ring position and capture time; the capture time comes
+from PortAudio's ``input_buffer_adc_time`` where the host API provides it,
+mapped onto ``time.monotonic()``. ``engine.latency`` keeps per-stage
+histograms of how old the newest sample is when each stage is done.
+
+With passthrough on (``set_passthrough``) the stream is full duplex: the
+same callback also returns the captured block, scaled by the monitor gain,
+to an output device, so the input is heard one stream latency later.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+
+import numpy as np
+from loguru import logger
+
+from .backend import PA_CONTINUE, PA_INPUT_OVERFLOW, PA_OUTPUT_UNDERFLOW, SAMPLE_WIDTH
+from .clock import ClockDriftEstimator
+from .devices import DeviceRegistry
+from .latency import BufferTuner, CallbackTiming, StageLatencies, get_profile
+from .peaks import PEAK_FRAMES, PeakWriter
+from .riff import append_cues
+from .ring import AudioBlock, SampleRing
+from .trigger import TriggerDetector
+from .writer import WaveWriter
+from ..utils.profiling import profiler
+
+_PROFILER = profiler()
+
+# Engine states
+IDLE = "idle"            # No stream open
+STANDBY = "standby"      # Stream running, nothing written
+RECORDING = "recording"  # Stream running, frames go to the writer
+PAUSED = "paused"        # Writer open, writes gated off
+
+PASSTHROUGH_FRAMES = 128  # Block size of the duplex stream: ~3 ms per direction at 44.1 kHz
+
+
+@dataclass
+class EngineStats:
+    """
+    Counters updated by the callback and engine threads.
+    """
+    callbacks: int = 0
+    frames_captured: int = 0
+    frames_written: int = 0
+    overflows: int = 0  # Input overflow flags reported by PortAudio
+    dropped_frames: int = 0  # Frames lost because the engine thread fell a whole ring behind
+    stream_open_time: float = 0.0  # Seconds spent in the last device open
+    start_latency: float = 0.0  # Seconds from start_recording() to the first frame on disk
+    frames_per_buffer: int = 0  # Block size of the open stream
+    latency_us: int = 0  # Effective input latency of the open stream (microseconds)
+    bytes_written: int = 0  # Sample bytes handed to WAV writers, all takes
+    write_position: int = 0  # Ring position up to which the current take has been written
+    output_underflows: int = 0  # Passthrough blocks the output device ran out of (PortAudio flag)
+    late_callbacks: int = 0  # Callbacks more than one block period later than due
+    passthrough_latency_us: int = 0  # Input-to-output latency of the duplex stream (microseconds)
+
+
+@dataclass
+class RecordingInfo:
+    """
+    Description of the current (or last) take.
+    """
+    path: str
+    rate: int
+    channels: int
+    device_index: int = None
+    start_position: int = 0
+    preroll_frames: int = 0  # Frames captured before start_recording() was called
+    files: list = None  # Every file of the take when the writer rotates
+    started_at: float = 0.0  # Wall-clock time of the first frame
+    frames: int = 0
+    segments: list = None  # (take_frame, position) where each contiguous run starts (start, resumes)
+    clock: dict = None  # Frame-to-time mapping from the drift estimator, see ClockDriftEstimator.mapping
+    peaks_path: str = None  # Min/max peak sidecar of the take, see peaks.py
+    peak_dbfs: float = None  # Highest sample level written
+    markers: list = None  # [take_frame, label] of every pause; written to the WAV as cue points at close
+
+    @property
+    def duration(self):
+        return self.frames / self.rate if self.rate else 0.0
+
+
+def describe_open_error(e):
+    """
+    Turn a stream-open failure into a user-facing message.
+    """
+    error_code = e.errno if hasattr(e, 'errno') else None
+    if error_code in [-9996, -9997]:
+        return f"""麦克风访问失败: 请检查麦克风权限设置。\n在 macOS 系统偏好设置中，进入"安全性与隐私" -> "隐私" -> "麦克风"，确保应用已获得授权。"""
+    return f"麦克风访问失败: {str(e)}"
+
+
+class AudioEngine:
+    """
+    Capture engine with a persistent stream and a command queue.
+
+    All public methods are thread-safe; they enqueue a command and return a
+    ``concurrent.futures.Future`` that resolves once the engine thread has
+    handled it. Block listeners run on the engine thread and receive
+    ``AudioBlock`` views into the ring, valid until the ring wraps.
+
+    Args:
+        backend: ``PyAudioBackend`` (default) or ``SyntheticBackend``
+        rate (int): Sampling rate (Hz)
+        channels (int): Number of input channels
+        frames_per_buffer (int, optional): Frames per PortAudio callback (default: from the profile)
+        latency_profile (str): ``"low-latency"``, ``"balanced"`` or ``"high-throughput"``
+        auto_tune (bool): Adjust the block size to the measured callback jitter and overflows
+        ring_seconds (float): Ring capacity; how far the engine thread may fall behind
+        max_bytes (int, optional): Stop a take once its data reaches this size
+        preroll_seconds (float): Audio kept from before the record click while monitoring
+        ring (SampleRing, optional): Externally owned ring (e.g. in shared memory); never resized
+        peak_frames (int, optional): Frames per min/max pair of the peak sidecar; None writes no peaks
+    """
+
+    # Ring headroom beyond the pre-roll so the engine thread may still lag
+    RING_SLACK_SECONDS = 1.0
+
+    def __init__(self, backend=None, rate=44100, channels=1, frames_per_buffer=None, latency_profile="balanced",
+                 auto_tune=False, ring_seconds=2.0, max_bytes=None, preroll_seconds=0.0, ring=None,
+                 peak_frames=PEAK_FRAMES):
+        if backend is None:
+            from .backend import PyAudioBackend
+            backend = PyAudioBackend()
+        self.backend = backend
+        self.rate = rate
+        self.channels = channels
+        self.latency_profile = get_profile(latency_profile)
+        self.frames_per_buffer = frames_per_buffer or self.latency_profile.frames_per_buffer
+        self.tuner = None
+        if auto_tune:
+            self._make_tuner()
+        self.max_bytes = max_bytes
+        # callable(path, channels, rate, sample_width) -> writer; e.g. a RotatingWaveWriter partial
+        self.writer_factory = WaveWriter
+        self.peak_frames = peak_frames
+        # callable(rate, channels) -> Pipeline, built fresh for each take; None writes raw samples
+        self.pipeline_factory = None
+        self.monitoring = False
+        self.preroll_seconds = preroll_seconds
+        self.ring_seconds = ring_seconds
+        self.trigger = None  # TriggerDetector while threshold-triggered recording is armed
+        # Input is also played on passthrough_device through a full-duplex stream
+        self.passthrough = False
+        self.passthrough_device = None
+        self.passthrough_frames = PASSTHROUGH_FRAMES
+        self.passthrough_gain_db = 0.0
+
+        self._fixed_ring = ring is not None
+        self.ring = ring if ring is not None else SampleRing(self._ring_capacity(preroll_seconds), channels)
+        if self._fixed_ring:
+            self.preroll_seconds = min(preroll_seconds, self._max_preroll())
+        self.stats = EngineStats()
+        # capture: device to callback, engine: to engine-thread pickup,
+        # writer: handed to the WAV file, listeners: after all block listeners
+        self.latency = StageLatencies(("capture", "engine", "writer", "listeners"))
+        # Sample clock of the open stream against time.monotonic(); restarts with every stream
+        self.clock = ClockDriftEstimator(rate)
+        self._clock_resolved = []  # Segments of the take already mapped by an earlier stream's fit
+        self.state = IDLE
+        self.device = None  # Device as asked for: stable id, PortAudio index or None (default)
+        self.device_index = None  # PortAudio index it resolved to
+        # Device list of this process's PortAudio instance; ids are resolved here, where streams are opened
+        self.devices = DeviceRegistry(scanner=getattr(backend, "list_devices", lambda rescan: []))
+        self.recording = None
+        self.trigger_events = 0
+        self._trigger_paths = None
+        self._trigger_pos = 0
+        self._trigger_take = False  # The open take was started by the trigger
+        self._trigger_restore = None
+        self._pause_pos = 0  # Ring position where the current pause began
+
+        self._stream = None
+        self._writer = None
+        self._pipeline = None
+        self._read_pos = 0
+        self._write_pos = 0
+        self._requested_at = None
+        self._cb_time = time.monotonic()
+        self._cb_pos = 0
+        self._cb_last = None
+        self._gain = 1.0  # Passthrough gain as a factor; read by the callback
+        self._out_raw = None  # Preallocated passthrough output block
+        self._out_samples = None  # int16 view of it
+        self._out_bytes = None  # Read-only view of it, handed back to PortAudio
+        self._timing = CallbackTiming()
+        self._tune_overflows = 0
+        self._stream_offset = float("inf")
+
+        self._commands = queue.SimpleQueue()
+        self._wake = threading.Event()
+        self._thread = None
+        self._running = False
+        self._block_listeners = []
+        self._event_listeners = []
+
+    # ------------------------------------------------------------------
+    # Listeners
+
+    def add_block_listener(self, callback):
+        """
+        Register ``callback(block)``, called on the engine thread for every captured block.
+        """
+        self._block_listeners.append(callback)
+
+    def remove_block_listener(self, callback):
+        if callback in self._block_listeners:
+            self._block_listeners.remove(callback)
+
+    def add_event_listener(self, callback):
+        """
+        Register ``callback(event, payload)`` for state changes and errors.
+
+        Events: ``recording_started``/``recording_stopped`` (RecordingInfo),
+        ``paused``/``resumed`` (position), ``device_opened`` (index), ``error`` (message).
+        """
+        self._event_listeners.append(callback)
+
+    def _emit(self, event, payload=None):
+        for callback in list(self._event_listeners):
+            try:
+                callback(event, payload)
+            except Exception as e:
+                logger.error(f"engine event listener failed: {e}")
+
+    # ------------------------------------------------------------------
+    # Public commands
+
+    @property
+    def is_recording(self):
+        return self.state in (RECORDING, PAUSED)
+
+    @property
+    def current_file(self):
+        """
+        File being written right now (changes when a rotating writer rolls over).
+        """
+        writer = self._writer
+        return writer.fn if writer is not None else None
+
+    def start(self):
+        """
+        Start the engine thread (idempotent).
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="audio-engine", daemon=True)
+        self._thread.start()
+
+    def shutdown(self, timeout=2.0):
+        """
+        Finish any take, close the stream and stop the engine thread.
+        """
+        if self._thread is None:
+            return
+        self._submit("shutdown")
+        self._thread.join(timeout)
+        self._thread = None
+
+    def open_device(self, device=None):
+        """
+        Open (or switch) the standby stream so the next start is instant.
+
+        Args:
+            device (str | int, optional): Stable device id (``DeviceInfo.id``), PortAudio index,
+                or None for the default input. Ids are resolved on the engine thread right
+                before the stream is opened, so they stay valid across rescans.
+        """
+        return self._submit("open", device=device)
+
+    def switch_device(self, device=None):
+        """
+        Move capture to another device; an active take continues in the same file.
+        """
+        return self._submit("open", device=device, force=True)
+
+    def start_recording(self, path, device=None):
+        """
+        Start writing to ``path`` from the frame that is being captured right now.
+        """
+        position = self.ring.written if self.state != IDLE else None
+        return self._submit("start", path=path, device=device,
+                            position=position, requested_at=time.perf_counter())
+
+    def list_devices(self, rescan=False, reopen=False):
+        """
+        Enumerate the audio devices on the engine thread, through the backend that opens the streams.
+
+        PortAudio only notices hot-plugged hardware when it is reinitialized,
+        which must not happen under an open stream. ``rescan`` does so while
+        no stream is open; with ``reopen`` an idle standby stream (nothing
+        recording, monitoring, armed or passing through) is closed for the
+        rescan and reopened on the same device id afterwards.
+
+        Returns:
+            concurrent.futures.Future: Resolves to a list of ``DeviceInfo``
+        """
+        return self._submit("devices", rescan=rescan, reopen=reopen)
+
+    def stop_recording(self):
+        """
+        Stop writing at the frame being captured right now and close the file.
+        """
+        return self._submit("stop", position=self.ring.written)
+
+    def pause(self):
+        """
+        Gate writes off while keeping the stream and file open.
+        """
+        return self._submit("pause", position=self.ring.written)
+
+    def resume(self):
+        """
+        Gate writes back on from the frame being captured right now.
+        """
+        return self._submit("resume", position=self.ring.written)
+
+    def set_monitoring(self, enabled, preroll_seconds=None):
+        """
+        Turn pre-roll monitoring on or off.
+
+        While monitoring, the last ``preroll_seconds`` of input are always
+        held in the ring; a take then starts that far before the click. The
+        ring is sized once for the pre-roll, so memory does not grow with
+        monitoring time.
+        """
+        return self._submit("monitor", enabled=enabled, preroll_seconds=preroll_seconds)
+
+    def set_trigger(self, settings=None, path_factory=None, device=None):
+        """
+        Arm threshold-triggered recording, or disarm it with ``settings=None``.
+
+        While armed, every event (``TriggerSettings``) is written to its own
+        file from ``path_factory()``, starting ``pre_seconds`` before the
+        crossing sample; ``trigger`` events carry each ``TriggerEvent``.
+        Disarming ends an open event and restores the monitoring setting.
+        """
+        return self._submit("trigger", settings=settings, path_factory=path_factory, device=device)
+
+    @property
+    def triggered(self):
+        return self.trigger is not None
+
+    def set_passthrough(self, enabled, output_device=None, gain_db=None, frames_per_buffer=None):
+        """
+        Play the input on ``output_device`` as it is captured, or stop.
+
+        Input and output share one duplex stream and callback, so the input
+        is heard one input plus one output latency later (see
+        ``stats.passthrough_latency_us``). A gain change applies from the
+        next block; switching on or off, or another device or block size,
+        reopens the stream and a take in progress continues. Auto-tuning
+        is suspended while passthrough is on.
+
+        Args:
+            enabled (bool): Passthrough on or off
+            output_device (str | int, optional): Stable id or index of the output device, None for the default
+            gain_db (float, optional): Monitor gain in dB; None keeps the current one
+            frames_per_buffer (int, optional): Block size of the duplex stream
+        """
+        return self._submit("passthrough", enabled=enabled, output_device=output_device, gain_db=gain_db,
+                            frames_per_buffer=frames_per_buffer)
+
+    def set_latency(self, profile=None, auto_tune=None):
+        """
+        Switch the latency profile and/or auto-tuning; an open stream is reopened with the new block size.
+        """
+        return self._submit("latency", profile=profile, auto_tune=auto_tune)
+
+    @property
+    def effective_latency(self):
+        """
+        Input latency of the open stream in seconds, as reported by the device (at least one block).
+        """
+        return self.stats.latency_us / 1e6
+
+    def _make_tuner(self):
+        self.tuner = BufferTuner(self.latency_profile, self.rate)
+        self.tuner.frames_per_buffer = self.frames_per_buffer
+
+    def _ring_capacity(self, preroll_seconds):
+        seconds = max(self.ring_seconds, preroll_seconds + self._trigger_lag() + self.RING_SLACK_SECONDS)
+        return int(self.rate * seconds)
+
+    def _max_preroll(self):
+        # Pre-roll a ring of fixed size can hold
+        return max(0.0, self.ring.capacity / self.rate - self.RING_SLACK_SECONDS - self._trigger_lag())
+
+    def _trigger_lag(self):
+        # How far the writer may trail capture while an armed trigger waits for an event's end
+        if self.trigger is None:
+            return 0.0
+        settings = self.trigger.settings
+        return max(0.0, settings.hold_seconds - settings.post_seconds)
+
+    def _submit(self, name, **kwargs):
+        future = Future()
+        self.start()
+        self._commands.put((name, kwargs, future))
+        self._wake.set()
+        return future
+
+    # ------------------------------------------------------------------
+    # PortAudio callback (PortAudio thread)
+
+    def _on_input(self, in_data, frame_count, time_info, status):
+        _PROFILER.note_thread("capture")
+        self.ring.write_bytes(in_data)
+        now = time.monotonic()
+        self._timing.tick(now)
+        if self._cb_last is not None and now - self._cb_last > 2 * frame_count / self.rate:
+            self.stats.late_callbacks += 1
+        self._cb_last = now
+        adc = time_info.get("input_buffer_adc_time") if time_info else None
+        if adc:
+            # Stream time -> monotonic. The offset between the two clocks is fixed; the
+            # smallest one seen is the one least delayed by getting here (GIL, scheduling)
+            offset = now - time_info["current_time"]
+            if offset < self._stream_offset:
+                self._stream_offset = offset
+                self.clock.offset = offset
+            # Fit in stream time so a settling offset cannot bend the line
+            stream_end = adc + frame_count / self.rate
+            end = stream_end + self._stream_offset
+        else:
+            stream_end = end = now
+        self._cb_time = min(end, now)
+        self._cb_pos = self.ring.written
+        self.clock.add(self._cb_pos, stream_end)
+        self.latency.record("capture", now - self._cb_time)
+        self.stats.callbacks += 1
+        self.stats.frames_captured += frame_count
+        if status & PA_INPUT_OVERFLOW:
+            self.stats.overflows += 1
+        self._wake.set()
+        return (None, PA_CONTINUE)
+
+    def _on_duplex(self, in_data, frame_count, time_info, status):
+        self._on_input(in_data, frame_count, time_info, status)
+        if status & PA_OUTPUT_UNDERFLOW:
+            self.stats.output_underflows += 1
+        gain = self._gain
+        if gain == 1.0:
+            return (in_data, PA_CONTINUE)
+        n = frame_count * self.channels
+        if n > len(self._out_samples):
+            return (bytes(n * SAMPLE_WIDTH), PA_CONTINUE)
+        out = self._out_samples[:n]
+        if gain == 0.0:
+            out.fill(0)
+        else:
+            x = np.frombuffer(in_data, dtype=np.int16)
+            if gain > 1.0:
+                # Clip first so the product stays in range; both steps write into the block
+                limit = int(32767 / gain)
+                np.clip(x, -limit, limit, out=out)
+                x = out
+            np.multiply(x, gain, out=out, casting="unsafe")
+        return (self._out_bytes[:n * SAMPLE_WIDTH], PA_CONTINUE)
+
+    # ------------------------------------------------------------------
+    # Engine thread
+
+    def _run(self):
+        logger.info("audio engine started")
+        while self._running:
+            self._wake.wait(0.05)
+            self._wake.clear()
+            _PROFILER.note_thread("writer")
+            while True:
+                try:
+                    name, kwargs, future = self._commands.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    future.set_result(getattr(self, f"_cmd_{name}")(**kwargs))
+                except Exception as e:
+                    logger.error(f"engine command {name} failed: {e}")
+                    self._emit("error", str(e))
+                    future.set_exception(e)
+            self._drain()
+            if self.tuner is not None:
+                self._tune()
+        logger.info("audio engine stopped")
+
+    def _cmd_shutdown(self):
+        if self.is_recording:
+            self._drain(final=True)
+        if self.is_recording:  # Unless the drain hit max_bytes and finished it
+            self._finish_recording()
+        self._close_stream()
+        self._running = False
+
+    def _cmd_devices(self, rescan=False, reopen=False):
+        if rescan and reopen and self._stream is not None and self.state == STANDBY and not (
+                self.monitoring or self.trigger is not None or self.passthrough):
+            self._close_stream()
+            self.devices.refresh(rescan=True)
+            try:
+                self._cmd_open(self.device)
+            except OSError as e:
+                # The standby device went away with the rescan; the next start opens one again
+                logger.warning(f"standby stream not reopened after the rescan: {e}")
+                self._emit("error", str(e))
+        else:
+            self.devices.refresh(rescan=rescan and self._stream is None)
+        return self.devices.devices()
+
+    def _resolve(self, device):
+        """
+        PortAudio index of a stable device id; indices and None pass through.
+        """
+        if not isinstance(device, str):
+            return device
+        index = self.devices.resolve_index(device)
+        if index is None:
+            # Not in the last scan (or none yet); rescan when nothing is open before giving up
+            self.devices.refresh(rescan=self._stream is None)
+            index = self.devices.resolve_index(device)
+        if index is None:
+            raise OSError(f"设备已断开: {device}")
+        return index
+
+    def _cmd_open(self, device=None, force=False):
+        if self._stream is not None and device == self.device and not force:
+            return self.device_index
+        if self._stream is not None and self.is_recording:
+            # Stop capture, then write out what the old stream captured before it goes
+            try:
+                self._stream.stop_stream()
+            except Exception as e:
+                logger.error(f"停止音频流失败: {e}")
+            self._drain()
+        self._close_stream()
+        if self.is_recording:
+            # The next stream has its own clock; pin the take so far to this one's fit
+            self._resolve_clock_segments()
+        self.clock.reset()
+        self._stream_offset = float("inf")
+        t0 = time.perf_counter()
+        try:
+            device_index = self._resolve(device)
+            self._stream = self._open_stream(device_index)
+        except OSError as e:
+            # A take cannot outlive its device; close the file with what it has
+            if self.is_recording:
+                self._finish_recording()
+            raise OSError(describe_open_error(e)) from e
+        self.stats.stream_open_time = time.perf_counter() - t0
+        self.stats.frames_per_buffer = self._block_frames()
+        self.stats.latency_us = int(self._stream_latency() * 1e6)
+        self.stats.passthrough_latency_us = int(self._passthrough_latency() * 1e6) if self.passthrough else 0
+        self._cb_last = None
+        self._timing = CallbackTiming()
+        self._tune_overflows = self.stats.overflows
+        self.device = device
+        self.device_index = device_index
+        self._read_pos = self.ring.written
+        if not self.is_recording:
+            self._write_pos = max(self._write_pos, self.ring.written)
+        if self.state == RECORDING:
+            self.recording.segments.append((self._writer.frames_written, self._write_pos))
+        if self.state == IDLE:
+            self.state = STANDBY
+        logger.info(f"stream opened on device {device_index} in {self.stats.stream_open_time * 1000:.1f} ms, "
+                    f"{self.stats.frames_per_buffer} frames per buffer, latency {self.effective_latency * 1000:.1f} ms"
+                    + (f", passthrough to {self.passthrough_device} "
+                       f"({self.stats.passthrough_latency_us / 1000:.1f} ms)" if self.passthrough else ""))
+        self._emit("device_opened", device_index)
+        return device_index
+
+    def _open_stream(self, device_index):
+        if self.passthrough:
+            frames = self.passthrough_frames
+            if self._out_samples is None or len(self._out_samples) != frames * self.channels:
+                self._out_raw = bytearray(frames * self.channels * SAMPLE_WIDTH)
+                self._out_samples = np.frombuffer(self._out_raw, dtype=np.int16)
+                self._out_bytes = memoryview(self._out_raw).toreadonly()  # PyAudio only takes read-only buffers
+            try:
+                output_index = self._resolve(self.passthrough_device)
+                return self.backend.open_duplex(
+                    device_index, output_index, self.rate, self.channels, frames, self._on_duplex)
+            except OSError as e:
+                # Devices on different host APIs or clocks cannot share a stream; keep capturing without it
+                self.passthrough = False
+                logger.error(f"passthrough to device {self.passthrough_device} failed: {e}")
+                self._emit("error", f"无法打开监听输出设备: {e}")
+        return self.backend.open_input(device_index, self.rate, self.channels, self.frames_per_buffer, self._on_input)
+
+    def _block_frames(self):
+        return self.passthrough_frames if self.passthrough else self.frames_per_buffer
+
+    def _stream_latency(self):
+        period = self._block_frames() / self.rate
+        try:
+            return max(period, float(self._stream.get_input_latency()))
+        except Exception:
+            return period
+
+    def _passthrough_latency(self):
+        period = self._block_frames() / self.rate
+        try:
+            output = max(period, float(self._stream.get_output_latency()))
+        except Exception:
+            output = period
+        return self._stream_latency() + output
+
+    def _cmd_latency(self, profile=None, auto_tune=None):
+        if profile is not None:
+            self.latency_profile = get_profile(profile)
+            self.frames_per_buffer = self.latency_profile.frames_per_buffer
+        if auto_tune is None:
+            auto_tune = self.tuner is not None
+        self.tuner = None
+        if auto_tune:
+            self._make_tuner()
+        if self._stream is not None and profile is not None:
+            self._cmd_open(self.device, force=True)
+        logger.info(f"latency profile {self.latency_profile.name}, auto-tune {'on' if self.tuner else 'off'}")
+        return self.latency_profile.name
+
+    def _tune(self):
+        """
+        Close a tuning window every ``tuner.window`` seconds and apply what the tuner proposes.
+        """
+        timing = self._timing
+        if self._stream is None or self.passthrough or time.monotonic() - timing.started < self.tuner.window:
+            # The duplex stream's block size is the passthrough's, not the tuner's
+            return
+        self._timing = CallbackTiming()
+        overflows = self.stats.overflows - self._tune_overflows
+        self._tune_overflows = self.stats.overflows
+        if self.is_recording and not overflows:
+            # Reopening mid-take leaves a short gap; only worth it once input is being lost anyway
+            return
+        retune = self.tuner.update(timing, overflows)
+        if retune is None:
+            return
+        logger.info(f"auto-tune ({retune.reason}, longest callback gap {timing.max_interval * 1000:.1f} ms, "
+                    f"{overflows} overflows): {self.frames_per_buffer} -> {retune.frames_per_buffer} frames")
+        self.frames_per_buffer = retune.frames_per_buffer
+        try:
+            self._cmd_open(self.device, force=True)
+        except OSError as e:
+            logger.error(str(e))
+            self._emit("error", str(e))
+
+    def _close_stream(self):
+        if self._stream is None:
+            return
+        try:
+            self._stream.stop_stream()
+            self._stream.close()
+        except Exception as e:
+            logger.error(f"关闭音频流失败: {e}")
+        self._stream = None
+        if self.state == STANDBY:
+            self.state = IDLE
+
+    def _cmd_passthrough(self, enabled, output_device=None, gain_db=None, frames_per_buffer=None):
+        if gain_db is not None:
+            self.passthrough_gain_db = gain_db
+            self._gain = 10 ** (gain_db / 20) if gain_db > -120 else 0.0
+        reopen = enabled != self.passthrough or (enabled and (
+            output_device != self.passthrough_device
+            or (frames_per_buffer is not None and frames_per_buffer != self.passthrough_frames)))
+        self.passthrough = enabled
+        if enabled:
+            self.passthrough_device = output_device
+            self.passthrough_frames = frames_per_buffer or self.passthrough_frames
+        if reopen and (enabled or self._stream is not None):
+            self._cmd_open(self.device, force=True)
+        logger.info(f"passthrough {'on' if self.passthrough else 'off'}, gain {self.passthrough_gain_db:+.1f} dB")
+        return self.passthrough
+
+    def _cmd_monitor(self, enabled, preroll_seconds=None):
+        if preroll_seconds is not None and self._fixed_ring:
+            preroll_seconds = min(preroll_seconds, self._max_preroll())
+        if not self._fixed_ring:
+            capacity = self._ring_capacity(self.preroll_seconds if preroll_seconds is None else preroll_seconds)
+            if capacity != self.ring.capacity:
+                # The callback writes into the ring, so swap it with the stream stopped
+                if self._stream is not None:
+                    self._stream.stop_stream()
+                self.ring = self.ring.resized(capacity)
+                if self._stream is not None:
+                    self._stream.start_stream()
+        if preroll_seconds is not None:
+            self.preroll_seconds = preroll_seconds
+        self.monitoring = enabled
+        logger.info(f"monitoring {'on' if enabled else 'off'}, pre-roll {self.preroll_seconds:.1f} s")
+        return self.monitoring
+
+    def _cmd_trigger(self, settings=None, path_factory=None, device=None):
+        if settings is None:
+            if self.trigger is None:
+                return self.trigger_events
+            if self._trigger_take and self.is_recording:
+                self._drain(final=True)
+                if self.is_recording:
+                    self._finish_recording()
+            self.trigger = None
+            self._cmd_monitor(*self._trigger_restore)
+            logger.info(f"trigger disarmed after {self.trigger_events} event(s)")
+            return self.trigger_events
+        if self._stream is None or device != self.device:
+            self._cmd_open(device)
+        if self.trigger is None:
+            self._trigger_restore = (self.monitoring, self.preroll_seconds)
+        self.trigger = TriggerDetector(self.rate, self.channels, settings)
+        self._trigger_paths = path_factory
+        self._trigger_pos = self.ring.written
+        self.trigger_events = 0
+        # The pre-trigger window is the pre-roll; the ring also covers the writer's hold-back
+        self._cmd_monitor(True, settings.pre_seconds)
+        logger.info(f"trigger armed: start {settings.start_dbfs:.1f} dBFS, stop {settings.release_dbfs:.1f} dBFS, "
+                    f"pre {settings.pre_seconds:g} s, post {settings.post_seconds:g} s, hold {settings.hold_seconds:g} s")
+        return self.trigger_events
+
+    def _scan_trigger(self, end):
+        """
+        Run the trigger over new frames and act on its events, before anything is written.
+        """
+        start = max(self._trigger_pos, self.ring.oldest)
+        for position, view in self.ring.views(start, end):
+            for event in self.trigger.process(position, view):
+                if event.kind == "start":
+                    if self.is_recording:
+                        continue  # A manual take is running; leave it alone
+                    self.trigger_events += 1
+                    try:
+                        self._cmd_start(self._trigger_paths(), self.device, position=event.position)
+                    except Exception as e:
+                        logger.error(f"触发录音失败: {e}")
+                        self._emit("error", str(e))
+                        continue
+                    self._trigger_take = True
+                elif self._trigger_take and self.is_recording:
+                    if self.state == RECORDING:
+                        self._write(event.position)
+                    if self.is_recording:
+                        self._finish_recording()
+                self._emit("trigger", event)
+        self._trigger_pos = end
+
+    def _cmd_start(self, path, device=None, position=None, requested_at=None):
+        if self.is_recording:
+            return self.recording
+        if self._stream is None or device != self.device:
+            self._cmd_open(device)
+            position = None
+
+        pipeline = self.pipeline_factory(self.rate, self.channels) if self.pipeline_factory else None
+        out_rate, out_channels = (pipeline.out_rate, pipeline.out_channels) if pipeline else (self.rate, self.channels)
+        writer = self.writer_factory(path, out_channels, out_rate, SAMPLE_WIDTH)
+        if self.peak_frames:
+            writer = PeakWriter(writer, self.peak_frames)
+        try:
+            writer.init()
+        except Exception as e:
+            raise OSError(f"创建录音文件失败: {str(e)}") from e
+        self._writer = writer
+        self._pipeline = pipeline
+
+        start = self.ring.written if position is None else max(position, self.ring.oldest)
+        preroll = 0
+        if self.monitoring:
+            # Pre-roll is flushed straight from the ring, then the same cursor keeps going live
+            preroll = min(int(self.preroll_seconds * self.rate), start - self.ring.oldest)
+            start -= preroll
+        self._write_pos = self.stats.write_position = start
+        self._requested_at = requested_at
+        self.recording = RecordingInfo(
+            path=path, rate=out_rate, channels=out_channels, device_index=self.device_index,
+            start_position=start, started_at=time.time() - (self.ring.written - start) / self.rate,
+            preroll_frames=preroll, segments=[(0, start)], markers=[],
+        )
+        self._clock_resolved = []
+        self.state = RECORDING
+        self._emit("recording_started", self.recording)
+        return self.recording
+
+    def _cmd_stop(self, position=None):
+        if not self.is_recording:
+            return self.recording
+        self._drain(position, final=True)
+        if not self.is_recording:
+            return self.recording  # The drain reached max_bytes and closed the take
+        return self._finish_recording()
+
+    def _cmd_pause(self, position=None):
+        if self.state != RECORDING:
+            return None
+        self._drain(position, final=True)
+        if self.state != RECORDING:
+            return None  # The drain reached max_bytes and closed the take
+        self.state = PAUSED
+        self._pause_pos = self._write_pos
+        self.recording.markers.append([self._writer.frames_written, f"pause {len(self.recording.markers) + 1}"])
+        self._emit("paused", self._write_pos)
+        return self._write_pos
+
+    def _cmd_resume(self, position=None):
+        if self.state != PAUSED:
+            return None
+        self._write_pos = self.ring.written if position is None else max(position, self.ring.oldest)
+        self.stats.write_position = self._write_pos
+        self.recording.segments.append((self._writer.frames_written, self._write_pos))
+        marker = self.recording.markers[-1]
+        marker[1] = f"{marker[1]} ({(self._write_pos - self._pause_pos) / self.rate:.3f} s)"
+        self.state = RECORDING
+        self._emit("resumed", self._write_pos)
+        return self._write_pos
+
+    def _finish_recording(self):
+        self._trigger_take = False
+        if self._writer is None:
+            return self.recording  # Already finished
+        writer, self._writer = self._writer, None
+        pipeline, self._pipeline = self._pipeline, None
+        if pipeline is not None:
+            try:
+                tail = pipeline.flush()
+                if len(tail):
+                    writer.write(tail)
+            except Exception as e:
+                logger.error(f"写入录音文件失败: {str(e)}")
+            logger.debug("pipeline: " + ", ".join(f"{name} {factor:.0f}x" for name, _, factor in pipeline.report()))
+        try:
+            writer.close()
+        except Exception as e:
+            logger.error(f"关闭录音文件失败: {str(e)}")
+        self.recording.frames = writer.frames_written
+        self.recording.files = list(getattr(writer, "files", [writer.fn]))
+        if self.recording.markers:
+            self._write_cues(getattr(writer, "max_frames", None))
+        self.recording.peaks_path = getattr(writer, "peaks_path", None)
+        self.recording.peak_dbfs = getattr(writer, "peak_dbfs", None)
+        self.recording.clock = self._clock_mapping()
+        if self.recording.clock["segments"]:
+            self.recording.started_at = self.recording.clock["segments"][0]["wall"]
+        self.state = STANDBY if self._stream is not None else IDLE
+        logger.info(f"recording stopped: {self.recording.path} ({self.recording.duration:.2f} s)")
+        self._emit("recording_stopped", self.recording)
+        return self.recording
+
+    def _write_cues(self, frames_per_file=None):
+        """
+        Append the take's markers to its file(s) as cue points; a rotating take splits them by file.
+        """
+        files = self.recording.files
+        by_file = {}
+        for frame, label in self.recording.markers:
+            index = min(frame // frames_per_file, len(files) - 1) if frames_per_file else 0
+            offset = frame - index * frames_per_file if frames_per_file else frame
+            by_file.setdefault(files[index], []).append((offset, label))
+        for path, cues in by_file.items():
+            try:
+                append_cues(path, cues)
+            except (OSError, ValueError) as e:
+                logger.error(f"写入暂停标记失败: {e}")
+
+    def _resolve_clock_segments(self):
+        # Empty if the stream never delivered a block; those segments wait for the next fit
+        pending = self.recording.segments[len(self._clock_resolved):]
+        self._clock_resolved += self.clock.resolve(pending, self.recording.rate)
+
+    def _clock_mapping(self):
+        mapping = self.clock.mapping(self.recording.segments[len(self._clock_resolved):], self.recording.rate)
+        mapping["segments"] = self._clock_resolved + mapping["segments"]
+        return mapping
+
+    def _timestamp(self, position):
+        return self._cb_time - (self._cb_pos - position) / self.rate
+
+    def _drain(self, until=None, final=False):
+        """
+        Hand everything captured since the last drain to the writer and the listeners.
+
+        An armed trigger holds the writer back to the earliest frame its open
+        event can still end at, unless this is the ``final`` drain of a take.
+        """
+        ring = self.ring
+        end = ring.written if until is None else min(until, ring.written)
+        newest = self._timestamp(end)
+        if end > self._read_pos:
+            self.latency.record("engine", time.monotonic() - newest)
+
+        if self.trigger is not None:
+            self._scan_trigger(end)
+        if self.state == RECORDING:
+            limit = end
+            if self._trigger_take and not final and self.trigger.active:
+                limit = min(end, self.trigger.pending_end)
+            self._write(limit, newest)
+
+        oldest = ring.oldest
+        if self._read_pos < oldest:
+            self._read_pos = oldest
+        if self._read_pos < end:
+            for position, view in ring.views(self._read_pos, end):
+                block = AudioBlock(view, position, self._timestamp(position))
+                for callback in self._block_listeners:
+                    try:
+                        callback(block)
+                    except Exception as e:
+                        logger.error(f"block listener failed: {e}")
+            self._read_pos = end
+            self.latency.record("listeners", time.monotonic() - newest)
+
+    def _write(self, end, newest=None):
+        """
+        Write the take up to ring position ``end``.
+        """
+        oldest = self.ring.oldest
+        if self._write_pos < oldest:
+            self.stats.dropped_frames += oldest - self._write_pos
+            self._write_pos = oldest
+        if self._write_pos >= end:
+            return
+        written = self._writer.bytes_written
+        for _, view in self.ring.views(self._write_pos, end):
+            if self._pipeline is not None:
+                view = self._pipeline.process(view)
+            self._writer.write(view)
+        self.stats.bytes_written += self._writer.bytes_written - written
+        self.stats.frames_written += end - self._write_pos
+        self._write_pos = end
+        self.stats.write_position = end
+        if newest is not None:
+            self.latency.record("writer", time.monotonic() - newest)
+        if self._requested_at is not None:
+            self.stats.start_latency = time.perf_counter() - self._requested_at
+            self._requested_at = None
+        if self.max_bytes and self._writer.bytes_written >= self.max_bytes:
+            self._finish_recording()
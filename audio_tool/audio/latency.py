@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Capture latency profiles and block-size auto-tuning.
+
+A profile names a starting ``frames_per_buffer`` together with the range
+auto-tuning may move it in. The block size is the only buffering knob:
+PyAudio always opens streams at the device's default low latency. ``CallbackTiming``
+is fed by the PortAudio callback (a few float operations per block);
+``BufferTuner`` looks at one window of it at a time and proposes a bigger
+block when callbacks arrive late or the device reports overflows, and a
+smaller one after a run of quiet windows.
+
+    engine = AudioEngine(backend, latency_profile="balanced", auto_tune=True)
+
+``LatencyHistogram``/``StageLatencies`` collect how old the newest captured
+sample is when each stage (callback, engine thread, writer, listeners,
+display) is done with it.
+"""
+import bisect
+import math
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class LatencyProfile:
+    name: str
+    frames_per_buffer: int
+    min_frames: int  # Auto-tune bounds
+    max_frames: int
+
+
+PROFILES = {
+    "low-latency": LatencyProfile("low-latency", 256, 128, 1024),
+    "balanced": LatencyProfile("balanced", 1024, 256, 4096),
+    "high-throughput": LatencyProfile("high-throughput", 4096, 1024, 16384),
+}
+
+
+def get_profile(profile):
+    """
+    Look up a profile by name (a ``LatencyProfile`` is returned unchanged).
+
+    Raises:
+        ValueError: Unknown profile name
+    """
+    if isinstance(profile, LatencyProfile):
+        return profile
+    try:
+        return PROFILES[profile]
+    except KeyError:
+        raise ValueError(f"未知的延迟配置: {profile} (可选: {', '.join(PROFILES)})") from None
+
+
+class CallbackTiming:
+    """
+    Callback arrival statistics for one tuning window.
+
+    ``tick`` runs on the PortAudio thread; the engine thread swaps in a fresh
+    instance to close a window, so neither side takes a lock.
+    """
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.count = 0
+        self.max_interval = 0.0
+        self._last = None
+
+    def tick(self, now):
+        if self._last is not None:
+            interval = now - self._last
+            if interval > self.max_interval:
+                self.max_interval = interval
+        self._last = now
+        self.count += 1
+
+
+@dataclass
+class Retune:
+    frames_per_buffer: int
+    reason: str  # "overflow", "jitter" or "stable"
+
+
+class BufferTuner:
+    """
+    Proposes block size changes from callback timing and overflow counts.
+
+    A window is late when its longest gap between callbacks exceeds one block
+    period by more than ``grow_jitter`` periods; any overflow also counts.
+    Either doubles the block. After
+    ``stable_windows`` consecutive windows with less than ``shrink_jitter``
+    periods of lateness the block is halved again, but not back down to a
+    size that was late until ``RETRY_FACTOR`` times as many quiet windows
+    have passed, so a busy machine does not flap between two sizes.
+
+    Args:
+        profile (LatencyProfile | str): Starting point and bounds
+        rate (int): Sampling rate (Hz)
+        window (float): Seconds per decision
+    """
+
+    RETRY_FACTOR = 6
+
+    def __init__(self, profile, rate, window=2.0, grow_jitter=0.5, shrink_jitter=0.15, stable_windows=5):
+        self.profile = get_profile(profile)
+        self.rate = rate
+        self.window = window
+        self.grow_jitter = grow_jitter
+        self.shrink_jitter = shrink_jitter
+        self.stable_windows = stable_windows
+        self.frames_per_buffer = self.profile.frames_per_buffer
+        self._stable = 0
+        self._late_at = 0  # Largest block size that was late or overflowed
+
+    @property
+    def period(self):
+        return self.frames_per_buffer / self.rate
+
+    def update(self, timing, overflows):
+        """
+        Judge one finished window.
+
+        Args:
+            timing (CallbackTiming): The window's callback statistics
+            overflows (int): Overflows reported during the window
+
+        Returns:
+            Retune: New settings, or None to keep the current ones
+        """
+        if timing.count < 2 and not overflows:
+            return None
+        lateness = max(0.0, timing.max_interval - self.period) / self.period
+        if overflows or lateness > self.grow_jitter:
+            self._late_at = max(self._late_at, self.frames_per_buffer)
+            return self._resize(2, "overflow" if overflows else "jitter")
+        if lateness >= self.shrink_jitter:
+            self._stable = 0
+            return None
+        self._stable += 1
+        if self._stable >= self.stable_windows * self.RETRY_FACTOR:
+            self._late_at = 0
+        if self._stable >= self.stable_windows and self.frames_per_buffer // 2 > self._late_at:
+            return self._resize(0.5, "stable")
+        return None
+
+    def _resize(self, factor, reason):
+        self._stable = 0
+        frames = int(min(self.profile.max_frames, max(self.profile.min_frames, self.frames_per_buffer * factor)))
+        if frames == self.frames_per_buffer:
+            return None
+        self.frames_per_buffer = frames
+        return Retune(frames, reason)
+
+
+# 100 log-spaced bins per decade from 10 us to 100 s (2.3 % wide)
+_EDGES = np.logspace(-5, 2, 701).tolist()
+
+
+class LatencyHistogram:
+    """
+    Fixed-size latency histogram; ``record`` is cheap enough for audio callbacks.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.counts = np.zeros(len(_EDGES) + 1, dtype=np.int64)
+        self.reset()
+
+    def reset(self):
+        self.counts[:] = 0
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        self.counts[bisect.bisect(_EDGES, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q):
+        """
+        Latency (seconds) below which ``q`` percent of the values fall, to bin resolution.
+        """
+        if not self.count:
+            return float("nan")
+        i = int(np.searchsorted(np.cumsum(self.counts), math.ceil(self.count * q / 100)))
+        if i == 0:
+            return _EDGES[0]
+        if i >= len(_EDGES):
+            return self.max
+        return min(math.sqrt(_EDGES[i - 1] * _EDGES[i]), self.max)
+
+    def summary(self):
+        """
+        Returns:
+            dict: ``count`` and mean/p50/p90/p99/max in milliseconds
+        """
+        if not self.count:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count * 1000, 3),
+            "p50_ms": round(self.percentile(50) * 1000, 3),
+            "p90_ms": round(self.percentile(90) * 1000, 3),
+            "p99_ms": round(self.percentile(99) * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+        }
+
+    def format(self):
+        s = self.summary()
+        if not s["count"]:
+            return f"{self.name:>10s}  no data"
+        return (f"{self.name:>10s}  n={s['count']:<6d} p50 {s['p50_ms']:8.2f}  p90 {s['p90_ms']:8.2f}  "
+                f"p99 {s['p99_ms']:8.2f}  max {s['max_ms']:8.2f} ms")
+
+
+class StageLatencies:
+    """
+    One ``LatencyHistogram`` per pipeline stage, in stage order.
+
+    Each value is the age of the newest sample a stage has handled, measured
+    from its capture time when the stage finishes, so later stages include
+    the earlier ones.
+    """
+
+    def __init__(self, stages):
+        self.stages = {name: LatencyHistogram(name) for name in stages}
+
+    def __getitem__(self, name):
+        return self.stages[name]
+
+    def add(self, histogram):
+        self.stages[histogram.name] = histogram
+
+    def record(self, stage, seconds):
+        self.stages[stage].record(seconds)
+
+    def reset(self):
+        for histogram in self.stages.values():
+            histogram.reset()
+
+    def as_dict(self):
+        return {name: h.summary() for name, h in self.stages.items()}
+
+    def format(self):
+        return "\n".join(h.format() for h in self.stages.values())
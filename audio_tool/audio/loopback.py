@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Round-trip latency measurement through an output and an input stream.
+
+A test signal (a train of noise bursts, or any WAV file) plays on the
+output while the capture engine records the input. Both sides are stamped
+on the monotonic clock: the output from ``output_buffer_dac_time``, the
+input from the engine's block timestamps. Every segment of the played
+signal is then located in the capture by cross-correlation near where it
+is expected, so each segment gives one round-trip time.
+
+    result = run_loopback(SyntheticBackend(loopback_delay=0.05), seconds=5)
+    print(result.round_trip.format())
+"""
+import time
+import wave
+from dataclasses import dataclass
+
+import numpy as np
+from loguru import logger
+
+from .backend import PA_CONTINUE
+from .engine import AudioEngine
+from .latency import LatencyHistogram
+
+MAX_LATENCY = 1.0  # Seconds searched after the expected position
+_MIN_CORRELATION = 0.5
+
+
+def burst_train(rate, seconds, interval=0.25, burst=0.005, level=0.5, seed=1):
+    """
+    Short noise bursts every ``interval`` seconds; they correlate to a single sharp peak.
+
+    Returns:
+        numpy.ndarray: Mono int16 samples
+    """
+    out = np.zeros(int(rate * seconds), dtype=np.int16)
+    n = max(16, int(rate * burst))
+    rng = np.random.default_rng(seed)
+    window = np.hanning(n)
+    for start in range(0, len(out) - n, int(rate * interval)):
+        out[start:start + n] = (rng.uniform(-1, 1, n) * window * level * 32767).astype(np.int16)
+    return out
+
+
+def read_source(path, rate):
+    """
+    Load a 16-bit WAV file as the test signal (first channel).
+
+    Raises:
+        ValueError: Not 16-bit PCM, or a different sampling rate
+    """
+    with wave.open(path, "rb") as w:
+        if w.getsampwidth() != 2:
+            raise ValueError("源文件必须是 16 位 PCM")
+        if w.getframerate() != rate:
+            raise ValueError(f"源文件采样率 {w.getframerate()} Hz 与设置的 {rate} Hz 不一致")
+        data = np.frombuffer(w.readframes(w.getnframes()), dtype="<i2")
+        return data.reshape(-1, w.getnchannels())[:, 0].copy()
+
+
+class _Player:
+    """
+    Output callback playing a signal and recording when each block reaches the converter.
+    """
+
+    def __init__(self, signal, rate):
+        self.signal = signal
+        self.rate = rate
+        self.position = 0
+        self.stamps = []  # (first sample index, monotonic DAC time)
+
+    def __call__(self, in_data, frame_count, time_info, status):
+        now = time.monotonic()
+        dac = time_info.get("output_buffer_dac_time") if time_info else None
+        self.stamps.append((self.position, now + (dac - time_info["current_time"]) if dac else now))
+        block = np.zeros(frame_count, dtype=np.int16)
+        part = self.signal[self.position:self.position + frame_count]
+        block[:len(part)] = part
+        self.position += frame_count
+        return block.tobytes(), PA_CONTINUE
+
+
+class _Recorder:
+    """
+    Engine block listener keeping the first channel and the block timestamps.
+    """
+
+    def __init__(self, frames):
+        self.samples = np.zeros(frames, dtype=np.int16)
+        self.frames = 0
+        self.stamps = []  # (sample index, monotonic capture time)
+
+    def __call__(self, block):
+        n = min(len(block.samples), len(self.samples) - self.frames)
+        if n <= 0:
+            return
+        self.stamps.append((self.frames, block.timestamp))
+        self.samples[self.frames:self.frames + n] = block.samples[:n, 0]
+        self.frames += n
+
+
+def _time_at(stamps, index, rate):
+    i = max(0, int(np.searchsorted(stamps[:, 0], index, side="right")) - 1)
+    return stamps[i, 1] + (index - stamps[i, 0]) / rate
+
+
+def _index_at(stamps, t, rate):
+    i = max(0, int(np.searchsorted(stamps[:, 1], t, side="right")) - 1)
+    return int(round(stamps[i, 0] + (t - stamps[i, 1]) * rate))
+
+
+def _correlate(ref, window):
+    """
+    Best lag of ``ref`` inside ``window`` and its normalized correlation.
+    """
+    n = len(ref) + len(window)
+    size = 1 << (n - 1).bit_length()
+    spectrum = np.fft.rfft(window, size) * np.conj(np.fft.rfft(ref, size))
+    corr = np.fft.irfft(spectrum, size)[:len(window) - len(ref) + 1]
+    energy = np.concatenate(([0.0], np.cumsum(window * window)))
+    local = energy[len(ref):] - energy[:-len(ref)]
+    norm = np.sqrt(np.maximum(local, 1e-12) * float(ref @ ref))
+    score = corr / norm
+    lag = int(np.argmax(score))
+    return lag, float(score[lag])
+
+
+def match_segments(played, play_stamps, captured, capture_stamps, rate, segment=0.25, max_latency=MAX_LATENCY):
+    """
+    Round-trip time of every non-silent segment of ``played`` found in ``captured``.
+
+    Args:
+        played (numpy.ndarray): Mono signal sent to the output
+        play_stamps (list): ``(sample index, monotonic time)`` pairs for ``played``
+        captured (numpy.ndarray): Mono capture
+        capture_stamps (list): ``(sample index, monotonic time)`` pairs for ``captured``
+        rate (int): Sampling rate of both
+        segment (float): Seconds per matched segment
+        max_latency (float): Longest round trip searched for
+
+    Returns:
+        tuple: ``(round_trip_seconds, non_silent_segments)``
+    """
+    if not play_stamps or not capture_stamps:
+        return [], 0
+    play_stamps = np.asarray(play_stamps, dtype=float)
+    capture_stamps = np.asarray(capture_stamps, dtype=float)
+    played = played.astype(np.float64)
+    captured = captured.astype(np.float64)
+    seg = int(segment * rate)
+    margin = seg // 2
+    quiet = (0.001 * 32767) ** 2 * seg
+    results = []
+    segments = 0
+    for k in range(0, len(played) - seg + 1, seg):
+        ref = played[k:k + seg]
+        if ref @ ref < quiet:
+            continue
+        segments += 1
+        t_play = _time_at(play_stamps, k, rate)
+        lo = max(0, _index_at(capture_stamps, t_play, rate) - margin)
+        hi = min(len(captured), lo + margin + int(max_latency * rate) + seg)
+        if hi - lo < seg:
+            continue
+        lag, score = _correlate(ref, captured[lo:hi])
+        if score < _MIN_CORRELATION:
+            continue
+        results.append(_time_at(capture_stamps, lo + lag, rate) - t_play)
+    return results, segments
+
+
+@dataclass
+class LoopbackResult:
+    round_trip: LatencyHistogram
+    segments: int  # Non-silent segments played
+    matched: int  # Segments found in the capture
+    stages: object = None  # The engine's StageLatencies during the run
+
+    def as_dict(self):
+        return {"round_trip": self.round_trip.summary(), "segments": self.segments, "matched": self.matched,
+                "stages": self.stages.as_dict() if self.stages is not None else None}
+
+
+def run_loopback(backend, input_device=None, output_device=None, rate=44100, source=None, seconds=5.0,
+                 frames_per_buffer=None, latency_profile="balanced", segment=0.25):
+    """
+    Play a test signal and measure how long it takes to come back on the input.
+
+    Args:
+        backend: Audio backend with ``open_input`` and ``open_output``
+        input_device (int, optional): Capture device index
+        output_device (int, optional): Playback device index
+        rate (int): Sampling rate of both streams
+        source (numpy.ndarray, optional): Mono int16 test signal (default: a burst train)
+        seconds (float): Length of the default burst train
+        frames_per_buffer (int, optional): Block size of both streams
+        latency_profile (str): Engine latency profile
+        segment (float): Seconds per measured segment
+
+    Returns:
+        LoopbackResult: Round-trip distribution and the engine's stage latencies
+    """
+    signal = burst_train(rate, seconds, interval=segment) if source is None else source
+    engine = AudioEngine(backend, rate=rate, channels=1, frames_per_buffer=frames_per_buffer,
+                         latency_profile=latency_profile)
+    recorder = _Recorder(len(signal) + int(rate * (MAX_LATENCY + 1.0)))
+    player = _Player(signal, rate)
+    try:
+        engine.open_device(input_device).result(10)
+        engine.add_block_listener(recorder)
+        stream = backend.open_output(output_device, rate, 1, engine.frames_per_buffer, player)
+        try:
+            time.sleep(len(signal) / rate + MAX_LATENCY)
+        finally:
+            stream.stop_stream()
+            stream.close()
+    finally:
+        engine.shutdown()
+
+    round_trip = LatencyHistogram("round trip")
+    times, segments = match_segments(signal, player.stamps, recorder.samples[:recorder.frames], recorder.stamps,
+                                     rate, segment=segment)
+    for t in times:
+        round_trip.record(t)
+    logger.info(f"loopback: matched {len(times)} of {segments} segments")
+    return LoopbackResult(round_trip, segments, len(times), engine.latency)
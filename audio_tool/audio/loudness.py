@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Streaming ITU-R BS.1770 / EBU R128 loudness and true-peak meter.
+
+K-weighting runs as two block biquads. Weighted energy is summed per
+100 ms step; momentary loudness is the mean of the last 4 steps (400 ms),
+short-term of the last 30 (3 s). Every 400 ms block goes into a fine
+loudness histogram holding per-bin counts and energy sums, so integrated
+loudness with both gates is a fixed-size sum however long the take is.
+True peak comes from 4x polyphase oversampling of the unweighted input.
+"""
+import math
+from dataclasses import asdict, dataclass
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .pipeline import Biquad, Stage
+from .resample import design_polyphase
+
+ABSOLUTE_GATE = -70.0
+RELATIVE_GATE = -10.0
+# Histogram of 400 ms block loudness, 0.01 LU bins from the absolute gate up
+_BIN_WIDTH = 0.01
+_BINS = int((10.0 - ABSOLUTE_GATE) / _BIN_WIDTH)
+
+TRUE_PEAK_OVERSAMPLING = 4
+_TRUE_PEAK_TAPS = 12  # Per phase, 48 in total as suggested by BS.1770 Annex 2
+
+
+def k_weighting(rate):
+    """
+    BS.1770 K-weighting (pre-filter shelf, then RLB high-pass) for any sampling rate.
+
+    The analog prototype is fitted to the 48 kHz coefficients of the standard
+    and re-discretized with the bilinear transform, so other rates match too.
+
+    Returns:
+        tuple: ``(shelf, highpass)`` ``Biquad`` stages
+    """
+    f0, gain_db, q = 1681.974450955533, 3.999843853973347, 0.7071752369554196
+    k = math.tan(math.pi * f0 / rate)
+    vh = 10 ** (gain_db / 20)
+    vb = vh ** 0.4996667741545416
+    a0 = 1 + k / q + k * k
+    shelf = Biquad([(vh + vb * k / q + k * k) / a0, 2 * (k * k - vh) / a0, (vh - vb * k / q + k * k) / a0],
+                   [1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0])
+
+    f0, q = 38.13547087602444, 0.5003270373238773
+    k = math.tan(math.pi * f0 / rate)
+    a0 = 1 + k / q + k * k
+    highpass = Biquad([1.0, -2.0, 1.0], [1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0])
+    return shelf, highpass
+
+
+def _lufs(mean_square):
+    return -0.691 + 10 * math.log10(mean_square) if mean_square > 0 else float("-inf")
+
+
+def _channel_weights(channels):
+    # L, R, C weigh 1.0; surrounds 1.41; the LFE of a 5.1 layout is ignored
+    weights = np.ones(channels)
+    if channels == 5:
+        weights[3:5] = 1.41
+    elif channels == 6:
+        weights[3] = 0.0
+        weights[4:6] = 1.41
+    return weights
+
+
+@dataclass
+class LoudnessReading:
+    momentary: float = float("-inf")  # LUFS, 400 ms
+    short_term: float = float("-inf")  # LUFS, 3 s
+    integrated: float = float("-inf")  # LUFS, gated, since the last reset
+    true_peak: float = float("-inf")  # dBTP, since the last reset
+    max_momentary: float = float("-inf")
+    max_short_term: float = float("-inf")
+
+    def as_dict(self):
+        """
+        JSON-friendly values (None instead of -inf), rounded to 0.01.
+        """
+        return {k: round(v, 2) if math.isfinite(v) else None for k, v in asdict(self).items()}
+
+
+class LoudnessMeter(Stage):
+    """
+    Loudness meter usable as a pass-through pipeline stage or as an engine block listener.
+
+        meter = LoudnessMeter(44100, 1)
+        engine.add_block_listener(meter)
+        ...
+        meter.reading().integrated
+
+    Args:
+        rate (int, optional): Sampling rate; configure now instead of from a pipeline
+        channels (int, optional): Channel count
+        max_frames (int): Largest block measured at once; bigger ones are split
+    """
+    name = "loudness"
+
+    def __init__(self, rate=None, channels=None, max_frames=4096):
+        if rate is not None:
+            self.configure(rate, channels or 1, max_frames)
+
+    def configure(self, rate, channels, max_frames):
+        super().configure(rate, channels, max_frames)
+        self.max_frames = max_frames
+        self.step = int(round(rate / 10))  # 100 ms
+        self._weights = _channel_weights(channels)
+        self._shelf, self._highpass = k_weighting(rate)
+        self._shelf.configure(rate, channels, max_frames)
+        self._highpass.configure(rate, channels, max_frames)
+        self._work = np.empty((max_frames, channels), dtype=np.float32)
+        self._in = np.empty((max_frames, channels), dtype=np.float32)
+        self._csum = np.empty(max_frames + 1)
+
+        self._tp_phases = np.ascontiguousarray(design_polyphase(
+            TRUE_PEAK_OVERSAMPLING, 1, _TRUE_PEAK_TAPS, 8.0, 0.9).T)  # (K, 4)
+        self._tp_buf = np.zeros((channels, _TRUE_PEAK_TAPS - 1 + max_frames), dtype=np.float32)
+        self._tp_windows = sliding_window_view(self._tp_buf, _TRUE_PEAK_TAPS, axis=1)  # (ch, max_frames, K)
+        self._steps = np.zeros(30)
+        self._hist_count = np.zeros(_BINS, dtype=np.int64)
+        self._hist_energy = np.zeros(_BINS)
+        self.reset()
+        return rate, channels, max_frames
+
+    def reset(self):
+        """
+        Start a new measurement (integrated, maxima and filter state).
+        """
+        self._shelf.reset()
+        self._highpass.reset()
+        self._tp_buf[:] = 0.0
+        self._steps[:] = 0.0
+        self._step_count = 0
+        self._partial = 0.0
+        self._fill = 0
+        self._hist_count[:] = 0
+        self._hist_energy[:] = 0.0
+        self._peak = 0.0
+        self.momentary = self.short_term = float("-inf")
+        self.max_momentary = self.max_short_term = float("-inf")
+
+    # ------------------------------------------------------------------
+
+    def process(self, block):
+        self._measure(block)
+        return block
+
+    def __call__(self, block):
+        """
+        Engine block listener: measure an ``AudioBlock`` of int16 samples.
+        """
+        samples = block.samples
+        for i in range(0, len(samples), self.max_frames):
+            part = samples[i:i + self.max_frames]
+            x = self._in[:len(part)]
+            np.multiply(part, np.float32(1 / 32768), out=x, casting="unsafe")
+            self._measure(x)
+
+    def _measure(self, x):
+        n = len(x)
+        if not n:
+            return
+        self._true_peak(x)
+
+        w = self._work[:n]
+        np.copyto(w, x)
+        self._highpass.process(self._shelf.process(w))
+        energy = np.square(w, out=w) @ self._weights
+
+        # Split the block's energy at 100 ms boundaries with one cumulative sum
+        csum = self._csum[:n + 1]
+        csum[0] = 0.0
+        np.cumsum(energy, out=csum[1:])
+        cuts = np.arange(self.step - self._fill, n + 1, self.step)
+        start = 0
+        for cut in cuts:
+            self._push_step(self._partial + csum[cut] - csum[start])
+            self._partial = 0.0
+            start = cut
+        self._partial += csum[n] - csum[start]
+        self._fill = (self._fill + n) % self.step if not len(cuts) else n - start
+
+    def _push_step(self, energy):
+        self._steps[self._step_count % 30] = energy
+        self._step_count += 1
+        count = self._step_count
+        if count >= 4:
+            recent = [(count - k) % 30 for k in range(1, 5)]
+            mean_square = self._steps[recent].sum() / (4 * self.step)
+            self.momentary = _lufs(mean_square)
+            self.max_momentary = max(self.max_momentary, self.momentary)
+            if self.momentary > ABSOLUTE_GATE:
+                b = min(int((self.momentary - ABSOLUTE_GATE) / _BIN_WIDTH), _BINS - 1)
+                self._hist_count[b] += 1
+                self._hist_energy[b] += mean_square
+        if count >= 30:
+            self.short_term = _lufs(self._steps.sum() / (30 * self.step))
+            self.max_short_term = max(self.max_short_term, self.short_term)
+
+    def _true_peak(self, x):
+        n = len(x)
+        K = _TRUE_PEAK_TAPS
+        buf = self._tp_buf[:, :K - 1 + n]
+        buf[:, K - 1:] = x.T
+        oversampled = self._tp_windows[:, :n] @ self._tp_phases  # (ch, n, 4)
+        peak = max(float(np.abs(oversampled).max()), float(np.abs(x).max()))
+        self._tp_buf[:, :K - 1] = buf[:, n:]
+        if peak > self._peak:
+            self._peak = peak
+
+    # ------------------------------------------------------------------
+
+    @property
+    def integrated(self):
+        """
+        Gated integrated loudness (LUFS) since the last reset.
+        """
+        count = self._hist_count.sum()
+        if not count:
+            return float("-inf")
+        gate = _lufs(self._hist_energy.sum() / count) + RELATIVE_GATE
+        first = max(0, int(math.ceil((gate - ABSOLUTE_GATE) / _BIN_WIDTH)))
+        count = self._hist_count[first:].sum()
+        return _lufs(self._hist_energy[first:].sum() / count) if count else float("-inf")
+
+    @property
+    def true_peak(self):
+        return 20 * math.log10(self._peak) if self._peak > 0 else float("-inf")
+
+    def reading(self):
+        """
+        Returns:
+            LoudnessReading: Current values
+        """
+        return LoudnessReading(self.momentary, self.short_term, self.integrated, self.true_peak,
+                               self.max_momentary, self.max_short_term)
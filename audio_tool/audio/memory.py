@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+One memory budget for every audio buffer in the process.
+
+Buffers register with a ``MemoryBudget`` under a subsystem name
+(``"ring"``, ``"display"``, ``"playback"``, ``"peaks"``, ...), so the
+budget always knows how much RAM audio data takes and where it goes:
+
+* fixed real-time buffers (capture ring, display history) are allocated
+  through ``allocate`` and counted until they are garbage collected;
+  they always stay in RAM;
+* arrays made elsewhere (decoded playback windows) are counted with
+  ``track``;
+* data that only grows with the length of a take is kept in a
+  ``SpillBuffer``, which moves its rows to an anonymous temporary file
+  when the budget runs short, least recently read buffer first. The OS
+  page cache then decides what stays resident.
+
+A long session therefore holds a bounded amount of RAM however many
+hours it records; ``usage`` reports RAM and disk per subsystem.
+
+    budget = default_budget()
+    ring = budget.allocate("ring", (capacity, channels), np.int16)
+    budget.usage()  # {"ring": MemoryUsage(ram=..., disk=0), ...}
+
+The default limit is ``$AUDIO_TOOL_MEMORY_MB`` megabytes, else an eighth of
+physical memory capped at 512 MB.
+"""
+import os
+import tempfile
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+
+import numpy as np
+from loguru import logger
+
+DEFAULT_LIMIT = 512 << 20
+MB = 1 << 20
+
+
+@dataclass
+class MemoryUsage:
+    ram: int = 0  # Bytes held in memory
+    disk: int = 0  # Bytes spilled to temporary files
+
+    @property
+    def total(self):
+        return self.ram + self.disk
+
+
+def _default_limit():
+    value = os.environ.get("AUDIO_TOOL_MEMORY_MB")
+    if value:
+        try:
+            return int(float(value) * MB)
+        except ValueError:
+            logger.warning(f"AUDIO_TOOL_MEMORY_MB 无效: {value}")
+    try:
+        physical = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (AttributeError, ValueError, OSError):
+        return DEFAULT_LIMIT  # Windows
+    return min(DEFAULT_LIMIT, physical // 8)
+
+
+class MemoryBudget:
+    """
+    Accounts audio buffers per subsystem and spills cold ones to disk; thread-safe.
+
+    Args:
+        limit (int, optional): Bytes of RAM for audio buffers (default: see module docs)
+        spill_dir (str, optional): Directory for spill files (default: the system temp dir)
+    """
+
+    def __init__(self, limit=None, spill_dir=None):
+        self.limit = int(limit) if limit is not None else _default_limit()
+        self.spill_dir = spill_dir
+        self._lock = threading.Lock()
+        self._usage = {}
+        self._spillable = weakref.WeakSet()
+        self._warned = set()
+
+    # ------------------------------------------------------------------
+    # Accounting
+
+    def _adjust(self, subsystem, ram=0, disk=0):
+        with self._lock:
+            usage = self._usage.setdefault(subsystem, MemoryUsage())
+            usage.ram += ram
+            usage.disk += disk
+
+    @property
+    def ram(self):
+        with self._lock:
+            return sum(u.ram for u in self._usage.values())
+
+    @property
+    def disk(self):
+        with self._lock:
+            return sum(u.disk for u in self._usage.values())
+
+    def usage(self):
+        """
+        Returns:
+            dict: Subsystem name -> ``MemoryUsage`` (a snapshot)
+        """
+        with self._lock:
+            return {name: MemoryUsage(u.ram, u.disk) for name, u in sorted(self._usage.items()) if u.total}
+
+    def summary(self):
+        """
+        Usage in megabytes for logs and sidecars.
+        """
+        return {
+            "limit_mb": round(self.limit / MB, 1),
+            "ram_mb": round(self.ram / MB, 1),
+            "disk_mb": round(self.disk / MB, 1),
+            "subsystems": {name: {"ram_mb": round(u.ram / MB, 2), "disk_mb": round(u.disk / MB, 2)}
+                           for name, u in self.usage().items()},
+        }
+
+    def track(self, subsystem, array):
+        """
+        Count ``array`` against ``subsystem`` until it (and every view of it) is garbage collected.
+
+        Returns:
+            numpy.ndarray: ``array``
+        """
+        nbytes = array.nbytes
+        on_disk = isinstance(array, np.memmap)
+        self._adjust(subsystem, ram=0 if on_disk else nbytes, disk=nbytes if on_disk else 0)
+        weakref.finalize(array, self._adjust, subsystem, 0 if on_disk else -nbytes, -nbytes if on_disk else 0)
+        return array
+
+    # ------------------------------------------------------------------
+    # Allocation
+
+    def allocate(self, subsystem, shape, dtype=np.int16):
+        """
+        Zeroed RAM array counted against ``subsystem``, for buffers that must stay resident.
+
+        Cold spillable data is moved to disk first when the budget would be exceeded.
+        """
+        nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        if not self.reserve(nbytes) and subsystem not in self._warned:
+            self._warned.add(subsystem)
+            logger.warning(f"内存预算不足: {subsystem} 需要 {nbytes / MB:.1f} MB, "
+                           f"已用 {self.ram / MB:.1f} / {self.limit / MB:.1f} MB")
+        return self.track(subsystem, np.zeros(shape, dtype=dtype))
+
+    def reserve(self, nbytes):
+        """
+        Make room for ``nbytes`` more RAM by spilling the least recently read spillable buffers.
+
+        Returns:
+            bool: Whether the budget now has room
+        """
+        with self._lock:
+            excess = sum(u.ram for u in self._usage.values()) + nbytes - self.limit
+            if excess <= 0:
+                return True
+            candidates = sorted(self._spillable, key=lambda b: b.last_read)
+        # Spill outside the lock: buffers update their accounting as they go
+        for buffer in candidates:
+            excess -= buffer.spill()
+            if excess <= 0:
+                return True
+        return False
+
+    def spill_file(self):
+        """
+        Anonymous temporary file for spilled data; removed when closed.
+        """
+        return tempfile.TemporaryFile(prefix="audio_tool_spill_", dir=self.spill_dir)
+
+    def register_spillable(self, buffer):
+        self._spillable.add(buffer)
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_budget():
+    """
+    The process-wide budget that buffers use unless given another.
+    """
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = MemoryBudget()
+        return _default
+
+
+class SpillBuffer:
+    """
+    Append-only array of rows in RAM that moves to a temporary file under memory pressure.
+
+    Rows are appended at amortized O(1) cost while in RAM (capacity doubles)
+    and written straight to the file once spilled; ``array`` returns the
+    rows either way, memory-mapped after a spill.
+
+    Args:
+        subsystem (str): Budget subsystem to count against
+        row_shape (tuple): Shape of one row
+        dtype: Row dtype
+        budget (MemoryBudget, optional): Budget (default: ``default_budget()``)
+    """
+
+    def __init__(self, subsystem, row_shape=(), dtype=np.float32, budget=None):
+        self.subsystem = subsystem
+        self.row_shape = tuple(row_shape)
+        self.dtype = np.dtype(dtype)
+        self.budget = budget or default_budget()
+        self.last_read = time.monotonic()
+        self._row_bytes = int(np.prod(self.row_shape, dtype=np.int64)) * self.dtype.itemsize
+        self._lock = threading.Lock()
+        self._rows = np.zeros((0,) + self.row_shape, dtype=self.dtype)
+        self._ram = 0  # Bytes of capacity held in RAM
+        self._length = 0
+        self._file = None
+        self._disk = 0
+        self.budget.register_spillable(self)
+
+    def __len__(self):
+        return self._length
+
+    @property
+    def spilled(self):
+        return self._file is not None
+
+    @property
+    def nbytes(self):
+        return self._length * self._row_bytes
+
+    def append(self, rows):
+        """
+        Append rows (one writer thread at a time).
+        """
+        rows = np.asarray(rows, dtype=self.dtype).reshape((-1,) + self.row_shape)
+        n = len(rows)
+        if not n:
+            return
+        if self._file is None and self._length + n > len(self._rows):
+            capacity = max(1024, 2 * len(self._rows), self._length + n)
+            if not self.budget.reserve((capacity - len(self._rows)) * self._row_bytes):
+                self.spill()
+        with self._lock:
+            if self._file is not None:
+                self._file.seek(self._disk)
+                self._file.write(np.ascontiguousarray(rows).tobytes())
+                self._disk += rows.nbytes
+                self.budget._adjust(self.subsystem, disk=rows.nbytes)
+            else:
+                if self._length + n > len(self._rows):
+                    grown = np.empty((max(1024, 2 * len(self._rows), self._length + n),) + self.row_shape,
+                                     dtype=self.dtype)
+                    grown[:self._length] = self._rows[:self._length]
+                    self._set_ram(grown)
+                self._rows[self._length:self._length + n] = rows
+            self._length += n
+
+    def array(self):
+        """
+        Returns:
+            numpy.ndarray: All rows so far; a view or a read-only memory map, valid until the next append
+        """
+        with self._lock:
+            self.last_read = time.monotonic()
+            if self._file is None:
+                return self._rows[:self._length]
+            if not self._length:
+                return np.zeros((0,) + self.row_shape, dtype=self.dtype)
+            self._file.flush()
+            return np.memmap(self._file, dtype=self.dtype, mode="r", shape=(self._length,) + self.row_shape)
+
+    def spill(self):
+        """
+        Move the rows to disk.
+
+        Returns:
+            int: Bytes of RAM released
+        """
+        with self._lock:
+            return self._spill()
+
+    def _spill(self):
+        if self._file is not None or not self._ram:
+            return 0
+        released = self._ram
+        self._file = self.budget.spill_file()
+        self._file.write(np.ascontiguousarray(self._rows[:self._length]).tobytes())
+        self._disk = self.nbytes
+        self.budget._adjust(self.subsystem, disk=self._disk)
+        self._set_ram(np.zeros((0,) + self.row_shape, dtype=self.dtype))
+        logger.info(f"{self.subsystem}: {self._disk / MB:.1f} MB 已转存到磁盘")
+        return released
+
+    def _set_ram(self, rows):
+        self.budget._adjust(self.subsystem, ram=rows.nbytes - self._ram)
+        self._rows = rows
+        self._ram = rows.nbytes
+
+    def close(self):
+        """
+        Drop the rows and the spill file.
+        """
+        with self._lock:
+            self._set_ram(np.zeros((0,) + self.row_shape, dtype=self.dtype))
+            if self._file is not None:
+                self.budget._adjust(self.subsystem, disk=-self._disk)
+                self._file.close()
+                self._file = None
+                self._disk = 0
+            self._length = 0
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
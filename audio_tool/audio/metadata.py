@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+JSON sidecar files stored next to recordings (``take.wav`` -> ``take.json``).
+
+Sections are merged, so independent parts of the program (recording
+details, loudness, clock drift, ...) can each add their own key. Writes go
+to a temporary file that replaces the sidecar atomically.
+"""
+import json
+import os
+
+from loguru import logger
+
+
+def sidecar_path(wav_path):
+    return os.path.splitext(wav_path)[0] + ".json"
+
+
+def read_sidecar(wav_path):
+    """
+    Returns:
+        dict: Sidecar contents, empty if there is none or it is unreadable
+    """
+    try:
+        with open(sidecar_path(wav_path), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning(f"ignoring unreadable sidecar for {wav_path}: {e}")
+        return {}
+
+
+def update_sidecar(wav_path, **sections):
+    """
+    Merge ``sections`` into the sidecar of ``wav_path``.
+
+    Args:
+        wav_path (str): Recording the metadata belongs to
+        sections: Top-level keys to set, e.g. ``loudness={...}``
+
+    Returns:
+        str: Sidecar path
+    """
+    path = sidecar_path(wav_path)
+    data = read_sidecar(wav_path)
+    data.update(sections)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+    return path
+
+
+def recording_section(info):
+    """
+    Sidecar section describing a finished take (``RecordingInfo``).
+    """
+    return {
+        "rate": info.rate,
+        "channels": info.channels,
+        "device_index": info.device_index,
+        "started_at": info.started_at,
+        "frames": info.frames,
+        "duration": round(info.duration, 6),
+        "preroll_frames": info.preroll_frames,
+        "files": [os.path.basename(f) for f in info.files or [info.path]],
+        "peaks": os.path.basename(info.peaks_path) if info.peaks_path else None,
+        "peak_dbfs": round(info.peak_dbfs, 2) if info.peak_dbfs not in (None, float("-inf")) else None,
+        "markers": [{"frame": frame, "label": label} for frame, label in info.markers or []],
+    }
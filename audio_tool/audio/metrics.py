@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Capture health metrics for fleet monitoring, in the Prometheus text format.
+
+A ``MetricsExporter`` thread collects a snapshot once per interval (engine
+counters, writer lag, bytes on disk, input level, memory budget, process
+CPU and RSS), renders it to text and publishes it by swapping one
+reference. Consumers only ever read that published text:
+
+* an HTTP endpoint on localhost (``GET /metrics``), for Prometheus or curl;
+* a file rewritten atomically (temp file + ``os.replace``), for the node
+  exporter textfile collector or any agent that tails files.
+
+Collection reads plain counters and a few milliseconds of the sample ring,
+so neither a scrape nor a collection ever waits on the capture callback.
+
+    exporter = MetricsExporter(engine_metrics(engine), port=9464, path="/var/lib/node_exporter/audio.prom")
+    exporter.start()
+"""
+import math
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+from loguru import logger
+
+from .engine import PAUSED, RECORDING
+from .memory import default_budget
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LEVEL_SECONDS = 0.1  # Window of the level gauges
+
+_PROCESS_START = time.time()  # Import time of this module, close enough to the process start
+_STATES = ("idle", "standby", "recording", "paused")
+
+
+def _format_value(value):
+    value = float(value)
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(int(value)) if value.is_integer() and abs(value) < 2 ** 53 else repr(value)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+               for k, v in labels.items())
+    return "{" + ",".join(escaped) + "}"
+
+
+def render(samples):
+    """
+    Prometheus text for ``(name, kind, help, value, labels)`` samples; samples of one name must be adjacent.
+    """
+    lines = []
+    last = None
+    for name, kind, help_text, value, labels in samples:
+        if name != last:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            last = name
+        lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def _resident_bytes():
+    """
+    Current RSS, from /proc where there is one.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def _child_cpu_seconds(pid):
+    """
+    User + system CPU of another process, from /proc where there is one.
+    """
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def process_metrics():
+    """
+    CPU time, resident memory and budgeted audio buffers of this process.
+    """
+    t = os.times()
+    samples = [
+        ("process_cpu_seconds_total", "counter", "User and system CPU time of the process.",
+         t.user + t.system, None),
+        ("process_start_time_seconds", "gauge", "Start time of the process since the epoch.", _PROCESS_START, None),
+    ]
+    rss = _resident_bytes()
+    if rss is not None:
+        samples.append(("process_resident_memory_bytes", "gauge", "Resident memory size.", rss, None))
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Kilobytes on Linux, bytes on macOS
+        peak = peak if os.uname().sysname == "Darwin" else peak * 1024
+        samples.append(("process_max_resident_memory_bytes", "gauge", "Peak resident memory size.", peak, None))
+    budget = default_budget()
+    samples.append(("audio_tool_buffer_limit_bytes", "gauge", "Memory budget for audio buffers.", budget.limit, None))
+    for subsystem, usage in budget.usage().items():
+        for kind, value in (("ram", usage.ram), ("disk", usage.disk)):
+            samples.append(("audio_tool_buffer_bytes", "gauge", "Audio buffer bytes per subsystem.", value,
+                            {"subsystem": subsystem, "kind": kind}))
+    return samples
+
+
+def _level(ring, frames):
+    """
+    Peak and RMS level (dBFS) of the newest ``frames`` in the ring.
+    """
+    written = ring.written
+    views = [v for _, v in ring.views(written - frames, written)]
+    if not views:
+        return float("-inf"), float("-inf")
+    peak, energy, count = 0, 0.0, 0
+    for view in views:
+        peak = max(peak, -int(view.min()), int(view.max()))
+        x = view.astype(np.float32).ravel()
+        energy += float(np.dot(x, x))
+        count += x.size
+    rms = math.sqrt(energy / count) if count else 0.0
+    return (20 * math.log10(peak / 32768) if peak else float("-inf"),
+            20 * math.log10(rms / 32768) if rms else float("-inf"))
+
+
+def engine_metrics(engine, loudness=None):
+    """
+    Collector for an ``AudioEngine`` or ``CaptureProcess``.
+
+    Args:
+        engine: The capture engine
+        loudness (LoudnessMeter, optional): Adds momentary/short-term loudness gauges
+
+    Returns:
+        callable: ``() -> samples``, for ``MetricsExporter``
+    """
+    def collect():
+        stats = engine.stats
+        rate = engine.rate
+        ring = engine.ring
+        recording = engine.state in (RECORDING, PAUSED)
+        samples = [
+            ("audio_tool_frames_captured_total", "counter", "Frames delivered by the input device.",
+             stats.frames_captured, None),
+            ("audio_tool_frames_written_total", "counter", "Frames handed to the WAV writer.", stats.frames_written, None),
+            ("audio_tool_disk_bytes_written_total", "counter", "Sample bytes written to WAV files.",
+             stats.bytes_written, None),
+            ("audio_tool_callbacks_total", "counter", "Input callbacks.", stats.callbacks, None),
+            ("audio_tool_overflows_total", "counter", "Input overflows reported by the device.", stats.overflows, None),
+            ("audio_tool_dropped_frames_total", "counter", "Frames lost because the writer fell a whole ring behind.",
+             stats.dropped_frames, None),
+            ("audio_tool_late_callbacks_total", "counter", "Callbacks more than one block period late.",
+             stats.late_callbacks, None),
+            ("audio_tool_output_underflows_total", "counter", "Passthrough output underflows reported by the device.",
+             stats.output_underflows, None),
+        ]
+        lag = 0.0
+        if ring is not None and engine.state == RECORDING and rate:
+            lag = max(0, ring.written - stats.write_position) / rate
+        samples.append(("audio_tool_writer_lag_seconds", "gauge", "Captured audio not yet handed to the writer.",
+                        lag, None))
+        for state in _STATES:
+            samples.append(("audio_tool_engine_state", "gauge", "Capture engine state (1 for the current one).",
+                            1 if engine.state == state else 0, {"state": state}))
+        samples += [
+            ("audio_tool_recording", "gauge", "1 while a take is open.", 1 if recording else 0, None),
+            ("audio_tool_input_latency_seconds", "gauge", "Input latency of the open stream.",
+             stats.latency_us / 1e6, None),
+            ("audio_tool_frames_per_buffer", "gauge", "Block size of the open stream.", stats.frames_per_buffer, None),
+            ("audio_tool_passthrough_latency_seconds", "gauge", "Input-to-output latency of passthrough (0 when off).",
+             stats.passthrough_latency_us / 1e6, None),
+            ("audio_tool_sample_rate_hertz", "gauge", "Capture sample rate.", rate, None),
+        ]
+        if ring is not None and rate:
+            peak, rms = _level(ring, int(LEVEL_SECONDS * rate))
+            samples += [
+                ("audio_tool_level_peak_dbfs", "gauge", "Sample peak of the last 100 ms.", peak, None),
+                ("audio_tool_level_rms_dbfs", "gauge", "RMS level of the last 100 ms.", rms, None),
+            ]
+        clock = getattr(engine, "clock", None)
+        if clock is not None:
+            samples.append(("audio_tool_clock_drift_ppm", "gauge", "Device sample clock error against the host.",
+                            clock.ppm, None))
+        pid = getattr(engine, "pid", None)
+        cpu = _child_cpu_seconds(pid) if pid else None
+        if cpu is not None:
+            samples.append(("audio_tool_capture_process_cpu_seconds_total", "counter",
+                            "CPU time of the separate capture process.", cpu, None))
+        if loudness is not None:
+            reading = loudness.reading()
+            samples += [
+                ("audio_tool_loudness_momentary_lufs", "gauge", "Momentary loudness (400 ms).", reading.momentary, None),
+                ("audio_tool_loudness_short_term_lufs", "gauge", "Short-term loudness (3 s).",
+                 reading.short_term, None),
+            ]
+        return samples
+
+    return collect
+
+
+class MetricsExporter:
+    """
+    Publishes collected metrics over HTTP on localhost and/or to a file.
+
+    Args:
+        collectors (callable | list): Functions returning ``(name, kind, help, value, labels)`` samples
+        port (int, optional): HTTP port on ``host``; 0 picks a free one; None serves no HTTP
+        path (str, optional): File rewritten atomically after every collection
+        interval (float): Seconds between collections
+        host (str): Bind address; keep it on loopback unless the network is trusted
+    """
+
+    def __init__(self, collectors, port=None, path=None, interval=1.0, host="127.0.0.1"):
+        self.collectors = list(collectors) if isinstance(collectors, (list, tuple)) else [collectors]
+        self.collectors.append(process_metrics)
+        self.port = port
+        self.path = path
+        self.interval = interval
+        self.host = host
+        self.text = ""  # Latest rendered snapshot; replaced whole, never modified
+        self._server = None
+        self._stop = threading.Event()
+        self._threads = []
+
+    def collect(self):
+        """
+        Collect and publish one snapshot now.
+
+        Returns:
+            str: The published text
+        """
+        t0 = time.perf_counter()
+        samples = []
+        for collector in self.collectors:
+            try:
+                samples += collector()
+            except Exception as e:
+                logger.error(f"metrics collector failed: {e}")
+        samples += [
+            ("audio_tool_metrics_timestamp_seconds", "gauge", "When this snapshot was collected.", time.time(), None),
+            ("audio_tool_metrics_collect_seconds", "gauge", "Time taken to collect this snapshot.",
+             time.perf_counter() - t0, None),
+        ]
+        text = render(samples)
+        self.text = text
+        if self.path:
+            try:
+                tmp = f"{self.path}.{os.getpid()}.tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    f.write(text)
+                os.replace(tmp, self.path)
+            except OSError as e:
+                logger.error(f"写入指标文件失败: {e}")
+        return text
+
+    def start(self):
+        """
+        Start collecting, and serving if a port was given.
+
+        Raises:
+            OSError: The port could not be bound
+        """
+        if self._threads:
+            return
+        self.collect()
+        if self.port is not None:
+            self._server = ThreadingHTTPServer((self.host, self.port), self._handler())
+            self._server.daemon_threads = True
+            self.port = self._server.server_address[1]
+            self._threads.append(threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True))
+            logger.info(f"metrics on http://{self.host}:{self.port}/metrics")
+        if self.path:
+            logger.info(f"metrics file: {self.path}")
+        self._stop.clear()
+        self._threads.append(threading.Thread(target=self._collect_loop, name="metrics", daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join(2.0)
+        self._threads = []
+
+    def _collect_loop(self):
+        while not self._stop.wait(self.interval):
+            self.collect()
+
+    def _handler(self):
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = exporter.text.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug(f"metrics: {self.address_string()} {format % args}")
+
+        return Handler
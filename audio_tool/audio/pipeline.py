@@ -0,0 +1,474 @@
+#!/usr/bin/env python3
+"""
+Block-based DSP stages between capture and the WAV writer.
+
+Every stage works on ``(frames, channels)`` float32 blocks scaled to
+[-1, 1) and writes into buffers allocated once in ``configure``. Recursive
+filters keep their state between blocks but are still evaluated with
+matrix products over whole sub-blocks rather than per-sample loops.
+"""
+import math
+import time
+
+import numpy as np
+
+
+class Stage:
+    """
+    Base class for pipeline stages.
+
+    ``configure`` is called once with the input format and must allocate all
+    buffers; ``process`` receives a float32 block and returns the output
+    block, which may be the input modified in place or a view of a stage
+    buffer.
+    """
+    name = "stage"
+
+    def configure(self, rate, channels, max_frames):
+        """
+        Prepare for blocks of at most ``max_frames`` frames.
+
+        Returns:
+            tuple: Output ``(rate, channels, max_frames)``
+        """
+        self.rate = rate
+        self.channels = channels
+        return rate, channels, max_frames
+
+    def process(self, block):
+        return block
+
+    def reset(self):
+        """
+        Forget filter state (e.g. between takes).
+        """
+
+    def flush(self):
+        """
+        Output still held back at the end of the stream (e.g. filter look-ahead).
+
+        Returns:
+            numpy.ndarray: float32 block, or None
+        """
+        return None
+
+
+class Gain(Stage):
+    """
+    Fixed gain in dB.
+    """
+    name = "gain"
+
+    def __init__(self, db=0.0):
+        self.db = db
+        self.factor = np.float32(10 ** (db / 20))
+
+    def process(self, block):
+        np.multiply(block, self.factor, out=block)
+        return block
+
+
+class Biquad(Stage):
+    """
+    Second-order IIR section (transposed direct form II) with carried state.
+
+    Blocks are cut into sub-blocks of ``M`` samples. Within a sub-block the
+    output is ``T @ x + O @ s`` (impulse-response Toeplitz matrix plus the
+    response to the incoming state). The state entering each sub-block
+    follows from the sub-block input projections through precomputed powers
+    of the state matrix, so a whole block is a few matrix products.
+
+    Args:
+        b (sequence): Numerator ``b0, b1, b2``
+        a (sequence): Denominator ``1, a1, a2`` (``a0`` is normalized out)
+        subblock (int): Sub-block length ``M``
+    """
+    name = "biquad"
+
+    def __init__(self, b, a, subblock=64):
+        a0 = a[0]
+        self.b = np.array(b, dtype=np.float64) / a0
+        self.a = np.array(a, dtype=np.float64) / a0
+        self.M = subblock
+
+    @classmethod
+    def lowpass(cls, rate, freq, q=1 / math.sqrt(2), **kwargs):
+        w0 = 2 * math.pi * freq / rate
+        alpha = math.sin(w0) / (2 * q)
+        c = math.cos(w0)
+        return cls([(1 - c) / 2, 1 - c, (1 - c) / 2], [1 + alpha, -2 * c, 1 - alpha], **kwargs)
+
+    @classmethod
+    def highpass(cls, rate, freq, q=1 / math.sqrt(2), **kwargs):
+        w0 = 2 * math.pi * freq / rate
+        alpha = math.sin(w0) / (2 * q)
+        c = math.cos(w0)
+        return cls([(1 + c) / 2, -(1 + c), (1 + c) / 2], [1 + alpha, -2 * c, 1 - alpha], **kwargs)
+
+    @classmethod
+    def high_shelf(cls, rate, freq, gain_db, q=1 / math.sqrt(2), **kwargs):
+        A = 10 ** (gain_db / 40)
+        w0 = 2 * math.pi * freq / rate
+        alpha = math.sin(w0) / (2 * q)
+        c = math.cos(w0)
+        sa = 2 * math.sqrt(A) * alpha
+        return cls(
+            [A * ((A + 1) + (A - 1) * c + sa), -2 * A * ((A - 1) + (A + 1) * c), A * ((A + 1) + (A - 1) * c - sa)],
+            [(A + 1) - (A - 1) * c + sa, 2 * ((A - 1) - (A + 1) * c), (A + 1) - (A - 1) * c - sa],
+            **kwargs,
+        )
+
+    def configure(self, rate, channels, max_frames):
+        super().configure(rate, channels, max_frames)
+        b0, b1, b2 = self.b
+        _, a1, a2 = self.a
+        M = self.M
+        A = np.array([[-a1, 1.0], [-a2, 0.0]])
+        B = np.array([b1 - a1 * b0, b2 - a2 * b0])
+        C = np.array([1.0, 0.0])
+
+        # A^k for k = 0..M
+        powers = np.empty((M + 1, 2, 2))
+        powers[0] = np.eye(2)
+        for k in range(1, M + 1):
+            powers[k] = powers[k - 1] @ A
+        self._A_pow = powers
+
+        # Impulse response h[0] = b0, h[m] = C A^(m-1) B
+        h = np.empty(M)
+        h[0] = b0
+        h[1:] = powers[:M - 1, 0, :] @ B
+        idx = np.arange(M)
+        lag = idx[:, None] - idx[None, :]
+        self._T = np.where(lag >= 0, h[np.clip(lag, 0, None)], 0.0)  # (M, M)
+        self._O = powers[:M, 0, :]  # (M, 2): C A^k
+        self._G = np.stack([powers[M - 1 - j] @ B for j in range(M)], axis=1)  # (2, M)
+
+        # State entering sub-block n: AM^n s0 + sum_{i<n} AM^(n-1-i) G x_i
+        nsub = max_frames // M + 1
+        AM = powers[M]
+        AM_pow = np.empty((nsub + 1, 2, 2))
+        AM_pow[0] = np.eye(2)
+        for k in range(1, nsub + 1):
+            AM_pow[k] = AM_pow[k - 1] @ AM
+        n_idx = np.arange(nsub + 1)
+        i_idx = np.arange(nsub)
+        steps = n_idx[:, None] - 1 - i_idx[None, :]
+        P = np.where((steps >= 0)[:, :, None, None], AM_pow[np.clip(steps, 0, None)], 0.0)
+
+        # Row form, one row per channel, so each product is a single GEMM:
+        # states are (ch, 2), sub-blocks (ch, nsub, M)
+        self._TT = np.ascontiguousarray(self._T.T)
+        self._OT = np.ascontiguousarray(self._O.T)
+        self._GT = np.ascontiguousarray(self._G.T)
+        self._PT = np.ascontiguousarray(P.transpose(1, 3, 0, 2).reshape(nsub * 2, (nsub + 1) * 2))
+        self._AMT = np.ascontiguousarray(AM_pow.transpose(2, 0, 1).reshape(2, (nsub + 1) * 2))
+
+        self._state = np.zeros((channels, 2))
+        self._work = np.empty((channels, nsub, M))
+        return rate, channels, max_frames
+
+    def reset(self):
+        self._state[:] = 0.0
+
+    def process(self, block):
+        n = len(block)
+        M = self.M
+        ch = self.channels
+        nsub, tail = divmod(n, M)
+        s0 = self._state
+
+        if nsub:
+            frames = block[:nsub * M].reshape(nsub, M, ch).transpose(2, 0, 1)
+            X = self._work[:, :nsub]
+            np.copyto(X, frames)
+            GX = (X @ self._GT).reshape(ch, nsub * 2)
+            S = s0 @ self._AMT[:, :(nsub + 1) * 2] + GX @ self._PT[:nsub * 2, :(nsub + 1) * 2]
+            Y = X @ self._TT
+            Y += S[:, :nsub * 2].reshape(ch, nsub, 2) @ self._OT
+            np.copyto(frames, Y, casting="unsafe")
+            s0 = S[:, nsub * 2:]
+
+        if tail:
+            xt = block[nsub * M:].astype(np.float64)
+            block[nsub * M:] = self._T[:tail, :tail] @ xt + self._O[:tail] @ s0.T
+            s0 = (self._A_pow[tail] @ s0.T + self._G[:, M - tail:] @ xt).T
+
+        self._state = s0
+        return block
+
+
+class DCBlock(Biquad):
+    """
+    DC-blocking high-pass (second order, default 20 Hz).
+    """
+    name = "dc_block"
+
+    def __init__(self, freq=20.0, subblock=64):
+        self.freq = freq
+        self.M = subblock
+
+    def configure(self, rate, channels, max_frames):
+        hp = Biquad.highpass(rate, self.freq)
+        self.b, self.a = hp.b, hp.a
+        return super().configure(rate, channels, max_frames)
+
+
+class HighPass(DCBlock):
+    """
+    Butterworth high-pass at ``freq``.
+    """
+    name = "highpass"
+
+    def __init__(self, freq=80.0, subblock=64):
+        super().__init__(freq, subblock)
+
+
+class Limiter(Stage):
+    """
+    Brick-wall peak limiter with linear-in-dB release.
+
+    Gain is computed per sub-block of ``step`` frames from the sub-block
+    peak, so no output sample exceeds the threshold. Release is a running
+    minimum of ``required_db[i] + (n - i) * release_per_step`` over all past
+    sub-blocks, which ``np.minimum.accumulate`` evaluates in one pass with
+    the previous block's final gain carried in.
+
+    Args:
+        threshold_db (float): Ceiling in dBFS
+        release_db_per_s (float): Gain recovery speed
+        step (int): Frames per gain step
+    """
+    name = "limiter"
+
+    def __init__(self, threshold_db=-1.0, release_db_per_s=20.0, step=32):
+        self.threshold_db = threshold_db
+        self.threshold = 10 ** (threshold_db / 20)
+        self.release_db_per_s = release_db_per_s
+        self.step = step
+
+    def configure(self, rate, channels, max_frames):
+        super().configure(rate, channels, max_frames)
+        nsteps = -(-max_frames // self.step)
+        self._release = self.release_db_per_s * self.step / rate
+        self._ramp = np.arange(nsteps + 1) * self._release
+        self._req = np.empty(nsteps + 1)
+        self._gain_db = 0.0
+        self.gain_reduction_db = 0.0
+        return rate, channels, max_frames
+
+    def reset(self):
+        self._gain_db = 0.0
+
+    def process(self, block):
+        n = len(block)
+        nsteps = -(-n // self.step)
+        padded = nsteps * self.step
+        req = self._req[:nsteps + 1]
+        req[0] = self._gain_db
+
+        if padded == n:
+            peaks = np.abs(block.reshape(nsteps, -1)).max(axis=1)
+        else:
+            peaks = np.empty(nsteps)
+            full = n // self.step
+            if full:
+                peaks[:full] = np.abs(block[:full * self.step].reshape(full, -1)).max(axis=1)
+            peaks[full] = np.abs(block[full * self.step:]).max()
+        np.maximum(peaks, 1e-9, out=peaks)
+        req[1:] = np.minimum(0.0, 20 * np.log10(self.threshold / peaks))
+
+        ramp = self._ramp[:nsteps + 1]
+        gains = np.minimum.accumulate(req - ramp) + ramp
+        np.minimum(gains, 0.0, out=gains)
+        self._gain_db = gains[-1]
+        self.gain_reduction_db = -gains[1:].min()
+
+        linear = (10 ** (gains[1:] / 20)).astype(np.float32)
+        full = n // self.step
+        if full:
+            view = block[:full * self.step].reshape(full, self.step, self.channels)
+            view *= linear[:full, None, None]
+        if full < nsteps:
+            block[full * self.step:] *= linear[full]
+        return block
+
+
+class Mixdown(Stage):
+    """
+    Average all channels to mono.
+    """
+    name = "mixdown"
+
+    def configure(self, rate, channels, max_frames):
+        super().configure(rate, channels, max_frames)
+        self._out = np.empty((max_frames, 1), dtype=np.float32)
+        return rate, 1, max_frames
+
+    def process(self, block):
+        n = len(block)
+        out = self._out[:n]
+        # Column adds beat np.mean over a short axis
+        mono = out[:, 0]
+        np.copyto(mono, block[:, 0])
+        for c in range(1, self.channels):
+            mono += block[:, c]
+        if self.channels > 1:
+            mono *= np.float32(1 / self.channels)
+        return out
+
+
+class DitherToInt16(Stage):
+    """
+    TPDF dither and quantize to int16. Must be the last stage.
+    """
+    name = "dither"
+
+    def __init__(self, seed=None):
+        self._rng = np.random.default_rng(seed)
+
+    def configure(self, rate, channels, max_frames):
+        super().configure(rate, channels, max_frames)
+        self._scaled = np.empty((max_frames, channels), dtype=np.float32)
+        self._r1 = np.empty((max_frames, channels), dtype=np.float32)
+        self._r2 = np.empty((max_frames, channels), dtype=np.float32)
+        self._out = np.empty((max_frames, channels), dtype=np.int16)
+        return rate, channels, max_frames
+
+    def process(self, block):
+        n = len(block)
+        scaled, r1, r2 = self._scaled[:n], self._r1[:n], self._r2[:n]
+        np.multiply(block, 32768.0, out=scaled)
+        self._rng.random(dtype=np.float32, out=r1)
+        self._rng.random(dtype=np.float32, out=r2)
+        scaled += r1
+        scaled -= r2
+        np.rint(scaled, out=scaled)
+        np.clip(scaled, -32768, 32767, out=scaled)
+        out = self._out[:n]
+        out[:] = scaled
+        return out
+
+
+class Pipeline:
+    """
+    Chain of stages fed with int16 capture blocks and producing int16 blocks.
+
+    If the last stage is not ``DitherToInt16`` the output is rounded and
+    clipped to int16 without dither. Per-stage wall time of the last block is
+    in ``last_ns``; ``report()`` summarizes all blocks so far.
+
+    Args:
+        stages (list): ``Stage`` instances, in order
+        rate (int): Input sampling rate (Hz)
+        channels (int): Input channels
+        max_frames (int): Largest block ``process`` is called with; bigger blocks are split
+    """
+
+    def __init__(self, stages, rate, channels=1, max_frames=4096):
+        self.stages = list(stages)
+        self.rate = rate
+        self.channels = channels
+        self.max_frames = max_frames
+        self._in = np.empty((max_frames, channels), dtype=np.float32)
+
+        fmt = (rate, channels, max_frames)
+        for stage in self.stages:
+            fmt = stage.configure(*fmt)
+        self.out_rate, self.out_channels, out_frames = fmt
+        self._dithered = bool(self.stages) and isinstance(self.stages[-1], DitherToInt16)
+        if not self._dithered:
+            self._quant = np.empty((out_frames, self.out_channels), dtype=np.float32)
+            self._out = np.empty((out_frames, self.out_channels), dtype=np.int16)
+
+        self.last_ns = np.zeros(len(self.stages) + 1, dtype=np.int64)
+        self.total_ns = np.zeros(len(self.stages) + 1, dtype=np.int64)
+        self.frames_processed = 0
+
+    @property
+    def stage_names(self):
+        return ["convert"] + [stage.name for stage in self.stages]
+
+    def reset(self):
+        for stage in self.stages:
+            stage.reset()
+
+    def process(self, samples):
+        """
+        Run int16 ``(frames, channels)`` samples through the chain.
+
+        Returns:
+            numpy.ndarray: int16 ``(frames, out_channels)``; a pipeline buffer, valid until the next call
+        """
+        if len(samples) > self.max_frames:
+            parts = [self.process(samples[i:i + self.max_frames]).copy()
+                     for i in range(0, len(samples), self.max_frames)]
+            return np.concatenate(parts)
+
+        clock = time.perf_counter_ns
+        t = clock()
+        n = len(samples)
+        block = self._in[:n]
+        np.multiply(samples, np.float32(1 / 32768), out=block, casting="unsafe")
+        now = clock()
+        self.last_ns[0] = now - t
+        t = now
+
+        for i, stage in enumerate(self.stages, start=1):
+            block = stage.process(block)
+            now = clock()
+            self.last_ns[i] = now - t
+            t = now
+
+        block = self._quantize(block)
+        self.last_ns[0] += clock() - t
+
+        self.total_ns += self.last_ns
+        self.frames_processed += n
+        return block
+
+    def flush(self):
+        """
+        Drain output held back by stages (resampler look-ahead) at the end of a take.
+
+        Returns:
+            numpy.ndarray: int16 ``(frames, out_channels)``, possibly empty
+        """
+        parts = []
+        for i, stage in enumerate(self.stages):
+            tail = stage.flush()
+            if tail is None or not len(tail):
+                continue
+            for later in self.stages[i + 1:]:
+                tail = later.process(tail)
+            parts.append(self._quantize(tail).copy())
+        if not parts:
+            return np.zeros((0, self.out_channels), dtype=np.int16)
+        return np.concatenate(parts)
+
+    def _quantize(self, block):
+        if self._dithered:
+            return block
+        m = len(block)
+        quant, out = self._quant[:m], self._out[:m]
+        np.multiply(block, 32768.0, out=quant)
+        np.rint(quant, out=quant)
+        np.clip(quant, -32768, 32767, out=quant)
+        out[:] = quant
+        return out
+
+    def report(self):
+        """
+        Summarize stage cost over all processed blocks.
+
+        Returns:
+            list: ``(name, total_ms, realtime_factor)`` per stage, then ``("total", ...)``
+        """
+        audio_s = self.frames_processed / self.rate
+        rows = []
+        for name, ns in zip(self.stage_names, self.total_ns):
+            seconds = ns / 1e9
+            rows.append((name, seconds * 1000, audio_s / seconds if seconds else float("inf")))
+        total = self.total_ns.sum() / 1e9
+        rows.append(("total", total * 1000, audio_s / total if total else float("inf")))
+        return rows
@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+Callback-driven playback with seeking, scrubbing and variable speed.
+
+``PlaybackEngine`` keeps an output stream open on one file and renders
+every block from a small decoded window of the file (a few seconds of
+float32 around the playhead). The window is refilled from a
+``WavReader`` by a worker thread ahead of the playhead, so the audio
+callback never touches the disk and file length does not matter.
+
+A seek loads the window around the target in the calling thread and
+hands it to the callback, which switches on its next block with a short
+crossfade; the delay from ``seek`` until the new position reaches the
+converter is kept in ``engine.latency``. Variable speed and scrubbing
+read the window at fractional positions with vectorized linear
+interpolation (tape-style: pitch follows speed).
+
+    player = PlaybackEngine(backend)
+    player.open("take.wav")
+    player.play()
+    player.seek(3600.0)
+"""
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+from loguru import logger
+
+from .backend import PA_CONTINUE
+from .latency import LatencyHistogram
+from .memory import default_budget
+from .reader import WavReader
+from ..utils.profiling import profiler
+
+_PROFILER = profiler()
+
+MAX_SPEED = 4.0
+_MIN_SCRUB_SPEED = 0.05  # Slower drags are silent rather than a buzz
+_SCRUB_SMOOTHING = 0.02  # Seconds over which the playhead catches up with the scrub target
+
+
+def to_float(samples):
+    """
+    Convert PCM or float samples to float32 in [-1, 1).
+    """
+    if samples.dtype.kind == "f":
+        return samples.astype(np.float32)
+    if samples.dtype == np.uint8:
+        return (samples.astype(np.float32) - 128) / 128
+    return samples.astype(np.float32) / float(1 << (8 * samples.dtype.itemsize - 1))
+
+
+class _Window:
+    """
+    Decoded frames ``[start, start + len(samples))`` of the file.
+    """
+    __slots__ = ("start", "samples")
+
+    def __init__(self, start, samples):
+        self.start = start
+        self.samples = samples
+
+    @property
+    def end(self):
+        return self.start + len(self.samples)
+
+    def covers(self, first, last):
+        return self.start <= first and last < self.end - 1
+
+    def stale(self, pos, lead, total):
+        """
+        Whether the playhead at ``pos`` is within ``lead`` frames of an edge that is not the file's.
+        """
+        ahead = self.end >= total or pos + lead < self.end
+        behind = self.start == 0 or pos - lead // 4 >= self.start
+        return not (ahead and behind and self.start <= pos < max(self.end, total + 1))
+
+
+class PlaybackEngine:
+    """
+    Output stream player over one WAV file; control methods may be called from any thread.
+
+    Args:
+        backend: Audio backend with ``open_output``
+        device_index (int, optional): Output device
+        frames_per_buffer (int): Output block size; bounds the seek latency
+        cache_seconds (float): Length of the decoded window around the playhead
+        crossfade (float): Seconds over which a jump blends into the new position
+        jump_seconds (float): Scrub moves further than this jump instead of speeding up
+    """
+
+    def __init__(self, backend, device_index=None, frames_per_buffer=256, cache_seconds=4.0, crossfade=0.005,
+                 jump_seconds=0.25):
+        self.backend = backend
+        self.device_index = device_index
+        self.frames_per_buffer = frames_per_buffer
+        self.cache_seconds = cache_seconds
+        self.crossfade = crossfade
+        self.jump_seconds = jump_seconds
+        self.latency = LatencyHistogram("seek")  # seek() to the new position at the converter
+        self.underruns = 0  # Blocks rendered partly outside the decoded window
+        self.on_finished = None  # callable(), from the worker thread when playback reaches the end
+
+        self.reader = None
+        self.rate = 0
+        self.channels = 0
+        self._stream = None
+        self._window = None
+        self._next_window = None
+        self._requests = queue.SimpleQueue()  # (frame, window, requested_at) jumps for the callback
+        self._pos = 0.0
+        self._speed = 1.0
+        self._playing = False
+        self._scrubbing = False
+        self._scrub_target = 0.0
+        self._gain = 0.0
+        self._finished = False
+        self._file_size = 0
+        self._wake = threading.Event()
+        self._closed = True
+        self._worker = None
+
+    # ------------------------------------------------------------------
+    # Control
+
+    def open(self, path):
+        """
+        Load a file and open the output stream, paused at the start.
+
+        Raises:
+            OSError: Output device could not be opened
+            ValueError: Unsupported WAV file
+        """
+        self.close()
+        reader = WavReader(path)
+        self.reader = reader
+        self.rate, self.channels = reader.rate, reader.channels
+        self._pos = 0.0
+        self._playing = self._scrubbing = self._finished = False
+        self._gain = 0.0
+        self._window = self._load(0)
+        self._next_window = None
+        self._file_size = os.path.getsize(path)
+        self._closed = False
+        self._worker = threading.Thread(target=self._prefetch_loop, name="playback-prefetch", daemon=True)
+        self._worker.start()
+        try:
+            self._stream = self.backend.open_output(self.device_index, self.rate, self.channels,
+                                                    self.frames_per_buffer, self._callback)
+        except Exception:
+            self.close()
+            raise
+        logger.info(f"playback opened: {path} ({reader.duration:.1f} s, {self.rate} Hz, {self.channels} ch)")
+
+    def close(self):
+        """
+        Stop and release the output stream and the file.
+        """
+        self._closed = True
+        self._playing = False
+        self._wake.set()
+        stream, self._stream = self._stream, None
+        if stream is not None:
+            stream.stop_stream()
+            stream.close()
+        if self._worker is not None and self._worker is not threading.current_thread():
+            self._worker.join(1.0)
+        self._worker = None
+        self._window = self._next_window = None
+        if self.reader is not None:
+            self.reader.close()
+            self.reader = None
+
+    @property
+    def is_open(self):
+        return self._stream is not None
+
+    @property
+    def is_playing(self):
+        return self._playing
+
+    @property
+    def duration(self):
+        return self.reader.duration if self.reader is not None else 0.0
+
+    @property
+    def position(self):
+        """
+        Playhead position in seconds.
+        """
+        return self._pos / self.rate if self.rate else 0.0
+
+    @property
+    def speed(self):
+        return self._speed
+
+    def play(self):
+        if self.reader is None:
+            return
+        if self._pos >= self.reader.num_frames:
+            self.seek(0.0)
+        self._finished = False
+        self._playing = True
+
+    def pause(self):
+        """
+        Fade out and hold the position.
+        """
+        self._playing = False
+
+    def set_speed(self, speed):
+        """
+        Playback rate relative to normal, 0.25 to 4 (pitch follows).
+        """
+        self._speed = float(min(MAX_SPEED, max(0.25, speed)))
+
+    def seek(self, seconds):
+        """
+        Jump to ``seconds``; the callback crossfades to it on its next block.
+        """
+        if self.reader is None:
+            return
+        requested_at = time.monotonic()  # Before the decode, which is part of the latency
+        frame = float(min(max(0.0, seconds * self.rate), self.reader.num_frames))
+        window = self._window
+        margin = self.frames_per_buffer * MAX_SPEED
+        if window is None or not window.covers(int(frame), int(frame + margin)):
+            window = self._load(int(frame))
+        if self._scrubbing:
+            self._scrub_target = frame
+        self._requests.put((frame, window, requested_at))
+
+    def begin_scrub(self, seconds=None):
+        """
+        Follow ``scrub`` positions (e.g. a mouse drag) instead of playing at a fixed speed.
+        """
+        self._scrubbing = True
+        self._scrub_target = self._pos
+        if seconds is not None:
+            self.seek(seconds)
+
+    def scrub(self, seconds):
+        """
+        Move the scrub target; small moves play through at the drag's speed, large ones jump.
+        """
+        if not self._scrubbing or self.reader is None:
+            return
+        frame = min(max(0.0, seconds * self.rate), self.reader.num_frames)
+        if abs(frame - self._pos) > self.jump_seconds * self.rate:
+            self.seek(seconds)
+        self._scrub_target = frame
+
+    def end_scrub(self):
+        """
+        Stop following the drag; the playhead lands on the last scrub position.
+        """
+        if not self._scrubbing:
+            return
+        self._scrubbing = False
+        if self.rate and abs(self._scrub_target - self._pos) >= 1:
+            self.seek(self._scrub_target / self.rate)
+
+    # ------------------------------------------------------------------
+    # Decoded window
+
+    @property
+    def _lead(self):
+        # Refill once the playhead is within a third of the window of its edge
+        return int(self.cache_seconds * self.rate) // 3
+
+    def _load(self, frame, backwards=False):
+        """
+        Decode the window around ``frame`` (calling thread).
+        """
+        size = int(self.cache_seconds * self.rate)
+        behind = size * 3 // 4 if backwards else size // 4
+        start = max(0, frame - behind)
+        return _Window(start, default_budget().track("playback", to_float(self.reader.frames(start, start + size))))
+
+    def _prefetch_loop(self):
+        while not self._closed:
+            self._wake.wait(0.05)
+            self._wake.clear()
+            if self._closed:
+                break
+            if self._finished:
+                self._finished = False
+                if self.on_finished is not None:
+                    try:
+                        self.on_finished()
+                    except Exception as e:
+                        logger.error(f"playback listener failed: {e}")
+            window, pos = self._window, int(self._pos)
+            if window.end >= self.reader.num_frames:
+                # A recording in progress may have grown since
+                size = os.path.getsize(self.reader.path)
+                if size != self._file_size:
+                    self._file_size = size
+                    self.reader.refresh()
+            if not window.stale(pos, self._lead, self.reader.num_frames):
+                continue
+            backwards = self._scrubbing and self._scrub_target < self._pos
+            try:
+                self._next_window = self._load(pos, backwards)
+            except Exception as e:
+                logger.error(f"playback read failed: {e}")
+
+    # ------------------------------------------------------------------
+    # Audio callback
+
+    def _render(self, window, pos, speed, n):
+        """
+        ``n`` frames from ``pos`` at ``speed``, interpolated from ``window``; zeros outside it.
+        """
+        samples = window.samples
+        total = self.reader.num_frames
+        if speed == 1.0 and pos == int(pos):
+            i = int(pos) - window.start
+            block = np.zeros((n, self.channels), dtype=np.float32)
+            lo, hi = max(0, i), min(len(samples), i + n)
+            if hi > lo:
+                block[lo - i:hi - i] = samples[lo:hi]
+            if lo - i > 0 or hi < min(total, i + n) - window.start:
+                self.underruns += 1
+            return block
+        index = pos - window.start + speed * np.arange(n)
+        base = np.floor(index).astype(np.int64)
+        frac = (index - base).astype(np.float32)[:, None]
+        valid = (base >= 0) & (base < len(samples) - 1)
+        if not valid.all() and window.start + int(base[~valid][0]) < total - 1:
+            self.underruns += 1
+        base = np.clip(base, 0, max(0, len(samples) - 2))
+        if len(samples) < 2:
+            return np.zeros((n, self.channels), dtype=np.float32)
+        block = samples[base] * (1 - frac) + samples[base + 1] * frac
+        block[~valid] = 0
+        return block
+
+    def _callback(self, in_data, frame_count, time_info, status):
+        _PROFILER.note_thread("playback")
+        jump = None
+        while True:
+            try:
+                jump = self._requests.get_nowait()  # Only the latest request matters
+            except queue.Empty:
+                break
+        next_window = self._next_window
+        if next_window is not None and jump is None:
+            self._next_window = None
+            # A prefetch started before a seek decodes around the old position; drop it
+            if next_window.start <= self._pos <= next_window.end:
+                self._window = next_window
+
+        n = frame_count
+        if self._scrubbing:
+            catch_up = max(n, _SCRUB_SMOOTHING * self.rate)
+            speed = float(np.clip((self._scrub_target - self._pos) / catch_up, -MAX_SPEED, MAX_SPEED))
+            audible = abs(speed) >= _MIN_SCRUB_SPEED
+        else:
+            speed = self._speed
+            audible = self._playing
+        g0, g1 = self._gain, 1.0 if audible else 0.0
+        if jump is None and g0 == 0.0 and g1 == 0.0:
+            return bytes(n * self.channels * 2), PA_CONTINUE
+
+        block = self._render(self._window, self._pos, speed, n) if g0 or jump is None else None
+        if jump is not None:
+            frame, window, requested_at = jump
+            self._window, self._pos = window, frame
+            self._next_window = None
+            fresh = self._render(window, frame, speed, n)
+            if block is not None:
+                # Blend the old position out and the new one in
+                fade = min(n, max(1, int(self.crossfade * self.rate)))
+                ramp = np.ones(n, dtype=np.float32)
+                ramp[:fade] = np.linspace(0.0, 1.0, fade, dtype=np.float32)
+                block = block * (1 - ramp)[:, None] + fresh * ramp[:, None]
+            else:
+                block = fresh
+            if g1:
+                # From seek() to this callback, plus the output buffering when the device reports it
+                latency = time.monotonic() - requested_at
+                dac = time_info.get("output_buffer_dac_time") if time_info else None
+                if dac and dac > time_info["current_time"]:
+                    latency += dac - time_info["current_time"]
+                if latency >= 0:
+                    self.latency.record(latency)
+        if g0 != g1:
+            block *= np.linspace(g0, g1, n, dtype=np.float32)[:, None]
+        elif g0 != 1.0:
+            block *= g0
+        self._gain = g1
+
+        if g0 or g1:
+            self._pos = max(0.0, self._pos + speed * n)
+        total = self.reader.num_frames
+        if not self._scrubbing and self._pos >= total:
+            self._pos = float(total)
+            if self._playing:
+                self._playing = False
+                self._gain = 0.0
+                self._finished = True
+                self._wake.set()
+        if self._window.stale(int(self._pos), self._lead, total):
+            self._wake.set()
+        block *= 32768
+        np.clip(block, -32768, 32767, out=block)
+        return np.rint(block).astype("<i2").tobytes(), PA_CONTINUE
@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+"""
+Capture engine in a child process with a shared-memory sample ring.
+
+The child runs ``AudioEngine`` (stream, ring writer, WAV writer) and never
+waits on the GUI process. Samples reach the parent through a
+``multiprocessing.shared_memory`` ring; commands, replies and engine events
+travel over a pipe. If the GUI stalls, the parent only misses display data;
+capture and writing carry on in the child.
+"""
+import itertools
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing import shared_memory
+
+import numpy as np
+from loguru import logger
+
+from .engine import IDLE, PAUSED, RECORDING, STANDBY, AudioEngine, EngineStats
+from .latency import StageLatencies
+from .memory import default_budget
+from .peaks import PEAK_FRAMES
+from .ring import AudioBlock, SampleRing
+
+# Shared header: one int64 per field, followed by the sample buffer
+_HEADER_FIELDS = ("written", "callbacks", "frames_captured", "frames_written",
+                  "overflows", "dropped_frames", "frames_per_buffer", "latency_us",
+                  "bytes_written", "write_position", "output_underflows", "late_callbacks",
+                  "passthrough_latency_us")
+_HEADER_BYTES = 128
+
+
+def _attach(name):
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 always registers the segment with the resource tracker.
+        # Spawned children share the parent's tracker, so this is a no-op there.
+        return shared_memory.SharedMemory(name=name)
+
+
+class SharedSampleRing(SampleRing):
+    """
+    ``SampleRing`` whose samples and write position live in shared memory.
+
+    The creating process owns the segment and must ``unlink`` it; other
+    processes ``attach`` by name. Engine counters are mirrored into the
+    header so the parent can read them without a round trip.
+    """
+
+    def __init__(self, capacity, channels=1, name=None):
+        self.capacity = int(capacity)
+        self.channels = int(channels)
+        self.dtype = np.dtype(np.int16)
+        size = _HEADER_BYTES + self.capacity * self.channels * self.dtype.itemsize
+        if name is None:
+            self._shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self._shm = _attach(name)
+        self._header = np.ndarray((_HEADER_BYTES // 8,), dtype=np.int64, buffer=self._shm.buf)
+        self._buf = np.ndarray((self.capacity, self.channels), dtype=self.dtype,
+                               buffer=self._shm.buf, offset=_HEADER_BYTES)
+        if name is None:
+            self._header[:] = 0
+            default_budget().track("ring", self._buf)
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    @property
+    def written(self):
+        return int(self._header[0])
+
+    @written.setter
+    def written(self, value):
+        self._header[0] = value
+
+    def resized(self, capacity):
+        """
+        Shared rings are sized once by their creator; both processes map the same segment.
+
+        Raises:
+            ValueError: Always; the engine never resizes a ring it was given
+        """
+        raise ValueError(f"shared ring size is fixed at {self.capacity} frames")
+
+    def publish_stats(self, stats):
+        for i, field in enumerate(_HEADER_FIELDS[1:], start=1):
+            self._header[i] = getattr(stats, field)
+
+    def read_stats(self):
+        values = {field: int(self._header[i]) for i, field in enumerate(_HEADER_FIELDS[1:], start=1)}
+        return EngineStats(**values)
+
+    def close(self):
+        # Views into the segment must go before the mapping can be closed
+        self._header = None
+        self._buf = None
+        try:
+            self._shm.close()
+        except BufferError:
+            logger.warning("shared ring still has live views; leaving mapping open")
+
+    def unlink(self):
+        self._shm.unlink()
+
+
+def _make_backend(name, options):
+    if name == "synthetic":
+        from .backend import SyntheticBackend
+        return SyntheticBackend(**options)
+    from .backend import PyAudioBackend
+    return PyAudioBackend()
+
+
+def _capture_main(conn, ring_name, capacity, channels, backend, backend_options, engine_options):
+    """
+    Child process entry point.
+    """
+    ring = SharedSampleRing(capacity, channels, name=ring_name)
+    engine = AudioEngine(_make_backend(backend, backend_options), channels=channels, ring=ring, **engine_options)
+    send_lock = threading.Lock()
+
+    def send(message):
+        with send_lock:
+            conn.send(message)
+
+    engine.add_event_listener(lambda event, payload: send(("event", event, payload)))
+    engine.start()
+
+    running = True
+    while running:
+        if conn.poll(0.05):
+            try:
+                call_id, name, kwargs = conn.recv()
+            except EOFError:
+                break
+            try:
+                if name == "shutdown":
+                    engine.shutdown()
+                    running = False
+                    result = None
+                else:
+                    result = getattr(engine, name)(**kwargs).result(timeout=10)
+                send(("result", call_id, result, None))
+            except Exception as e:
+                send(("result", call_id, None, str(e)))
+        ring.publish_stats(engine.stats)
+
+    if running:
+        engine.shutdown()
+    ring.publish_stats(engine.stats)
+    engine.backend.terminate()
+    ring.close()
+
+
+class CaptureProcess:
+    """
+    Drop-in stand-in for ``AudioEngine`` that runs capture in a child process.
+
+    Commands return futures like ``AudioEngine``. Block listeners run on a
+    reader thread in this process and receive views into the shared ring.
+
+    Args:
+        backend (str): ``"pyaudio"`` or ``"synthetic"``
+        backend_options (dict, optional): Keyword arguments for the backend
+        max_preroll_seconds (float): The shared ring is sized once for this much pre-roll
+        Other arguments are passed to ``AudioEngine`` in the child.
+    """
+
+    def __init__(self, backend="pyaudio", rate=44100, channels=1, frames_per_buffer=None,
+                 latency_profile="balanced", auto_tune=False, ring_seconds=2.0, max_bytes=None,
+                 preroll_seconds=0.0, max_preroll_seconds=30.0, backend_options=None, peak_frames=PEAK_FRAMES):
+        self.backend_name = backend
+        self.backend_options = backend_options or {}
+        self.rate = rate
+        self.channels = channels
+        self.max_preroll_seconds = max_preroll_seconds
+        self.capacity = int(rate * max(ring_seconds, max_preroll_seconds + AudioEngine.RING_SLACK_SECONDS))
+        preroll_seconds = self._clamp_preroll(preroll_seconds)
+        self.engine_options = dict(
+            rate=rate, frames_per_buffer=frames_per_buffer, latency_profile=latency_profile,
+            auto_tune=auto_tune, ring_seconds=ring_seconds, max_bytes=max_bytes, preroll_seconds=preroll_seconds,
+            peak_frames=peak_frames,
+        )
+
+        self.state = IDLE
+        self.monitoring = False
+        self.triggered = False
+        self.passthrough = False
+        self.recording = None
+        self.ring = None
+        # Stages seen from this process; block times are estimated from arrival here
+        self.latency = StageLatencies(("listeners",))
+
+        self._process = None
+        self._conn = None
+        self._send_lock = threading.Lock()
+        self._calls = {}
+        self._ids = itertools.count()
+        self._reader = None
+        self._running = False
+        self._read_pos = 0
+        self._block_listeners = []
+        self._event_listeners = []
+
+    def add_block_listener(self, callback):
+        self._block_listeners.append(callback)
+
+    def remove_block_listener(self, callback):
+        if callback in self._block_listeners:
+            self._block_listeners.remove(callback)
+
+    def add_event_listener(self, callback):
+        self._event_listeners.append(callback)
+
+    @property
+    def is_recording(self):
+        return self.state in (RECORDING, PAUSED)
+
+    @property
+    def stats(self):
+        return self.ring.read_stats() if self.ring is not None else EngineStats()
+
+    @property
+    def effective_latency(self):
+        return self.stats.latency_us / 1e6
+
+    @property
+    def pid(self):
+        return self._process.pid if self._process is not None else None
+
+    def start(self):
+        """
+        Create the shared ring and start the child process (idempotent).
+        """
+        if self._process is not None and self._process.is_alive():
+            return
+        self.ring = SharedSampleRing(self.capacity, self.channels)
+        ctx = multiprocessing.get_context("spawn")
+        self._conn, child_conn = ctx.Pipe()
+        self._process = ctx.Process(
+            target=_capture_main,
+            args=(child_conn, self.ring.name, self.capacity, self.channels,
+                  self.backend_name, self.backend_options, self.engine_options),
+            name="audio-capture",
+            daemon=True,
+        )
+        self._process.start()
+        child_conn.close()
+        self._running = True
+        self._reader = threading.Thread(target=self._read_loop, name="capture-reader", daemon=True)
+        self._reader.start()
+        logger.info(f"capture process started (pid {self._process.pid})")
+
+    def shutdown(self, timeout=5.0):
+        """
+        Stop the child, then release the shared ring.
+        """
+        if self._process is None:
+            return
+        try:
+            self._call("shutdown").result(timeout)
+        except Exception as e:
+            logger.error(f"capture process did not shut down cleanly: {e}")
+        self._process.join(timeout)
+        if self._process.is_alive():
+            self._process.terminate()
+        self._running = False
+        if self._reader is not None and self._reader is not threading.current_thread():
+            self._reader.join(timeout)
+        self._process = None
+        self.ring.close()
+        self.ring.unlink()
+        self.ring = None
+
+    def open_device(self, device=None):
+        """
+        ``device`` is best a stable id: the capture process resolves it against its own device list.
+        """
+        return self._call("open_device", device=device)
+
+    def switch_device(self, device=None):
+        return self._call("switch_device", device=device)
+
+    def start_recording(self, path, device=None):
+        return self._call("start_recording", path=path, device=device)
+
+    def list_devices(self, rescan=False, reopen=False):
+        """
+        Device list of the capture process's PortAudio instance, the one that opens the streams.
+        """
+        return self._call("list_devices", rescan=rescan, reopen=reopen)
+
+    def stop_recording(self):
+        return self._call("stop_recording")
+
+    def pause(self):
+        return self._call("pause")
+
+    def resume(self):
+        return self._call("resume")
+
+    def _clamp_preroll(self, preroll_seconds):
+        if preroll_seconds is not None and preroll_seconds > self.max_preroll_seconds:
+            logger.warning(f"pre-roll {preroll_seconds:.1f} s limited to {self.max_preroll_seconds:.1f} s "
+                           f"by the shared ring")
+            return self.max_preroll_seconds
+        return preroll_seconds
+
+    def set_monitoring(self, enabled, preroll_seconds=None):
+        """
+        ``preroll_seconds`` is limited to ``max_preroll_seconds``; the shared ring cannot grow.
+        """
+        preroll_seconds = self._clamp_preroll(preroll_seconds)
+        future = self._call("set_monitoring", enabled=enabled, preroll_seconds=preroll_seconds)
+        self.monitoring = enabled
+        return future
+
+    def set_trigger(self, settings=None, path_factory=None, device=None):
+        """
+        ``path_factory`` is sent to the capture process; use a picklable one such as ``EventPaths``.
+        """
+        future = self._call("set_trigger", settings=settings, path_factory=path_factory, device=device)
+        self.triggered = settings is not None
+        return future
+
+    def set_passthrough(self, enabled, output_device=None, gain_db=None, frames_per_buffer=None):
+        future = self._call("set_passthrough", enabled=enabled, output_device=output_device, gain_db=gain_db,
+                            frames_per_buffer=frames_per_buffer)
+        self.passthrough = enabled
+        # The capture process turns it back off when the output device cannot be opened
+        future.add_done_callback(lambda f: f.exception() or setattr(self, "passthrough", f.result()))
+        return future
+
+    def set_latency(self, profile=None, auto_tune=None):
+        return self._call("set_latency", profile=profile, auto_tune=auto_tune)
+
+    def _call(self, name, **kwargs):
+        self.start()
+        future = Future()
+        call_id = next(self._ids)
+        self._calls[call_id] = future
+        with self._send_lock:
+            self._conn.send((call_id, name, kwargs))
+        return future
+
+    def _emit(self, event, payload):
+        if event == "recording_started":
+            self.recording, self.state = payload, RECORDING
+        elif event == "recording_stopped":
+            self.recording, self.state = payload, STANDBY
+        elif event == "paused":
+            self.state = PAUSED
+        elif event == "resumed":
+            self.state = RECORDING
+        elif event == "device_opened" and self.state == IDLE:
+            self.state = STANDBY
+        for callback in list(self._event_listeners):
+            try:
+                callback(event, payload)
+            except Exception as e:
+                logger.error(f"engine event listener failed: {e}")
+
+    def _read_loop(self):
+        while self._running:
+            try:
+                while self._conn.poll(0.01):
+                    message = self._conn.recv()
+                    if message[0] == "event":
+                        self._emit(message[1], message[2])
+                    else:
+                        _, call_id, result, error = message
+                        future = self._calls.pop(call_id, None)
+                        if future is None:
+                            continue
+                        if error is None:
+                            future.set_result(result)
+                        else:
+                            future.set_exception(RuntimeError(error))
+            except (EOFError, OSError):
+                break
+            self._drain()
+
+    def _drain(self):
+        ring = self.ring
+        end = ring.written
+        start = max(self._read_pos, ring.oldest)
+        now = time.monotonic()
+        for position, view in ring.views(start, end):
+            block = AudioBlock(view, position, now - (end - position) / self.rate)
+            for callback in self._block_listeners:
+                try:
+                    callback(block)
+                except Exception as e:
+                    logger.error(f"block listener failed: {e}")
+        if end > self._read_pos:
+            self.latency.record("listeners", time.monotonic() - now)
+        self._read_pos = end
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Random-access WAV reading through a memory map.
+
+``WavReader`` maps the whole file once and hands out NumPy views of any
+frame or time range, shaped ``(frames, channels)``; nothing is copied or
+decoded until the caller does arithmetic on a view, and the OS pages in
+only the parts that are touched. Files that are still being written are
+followed with ``refresh``, which picks up the new data length.
+
+    with WavReader("take.wav") as reader:
+        block = reader.seconds(12.0, 12.5)  # (22050, channels) view
+        left = reader.frames(0, 4096)[:, 0]
+"""
+import mmap
+import os
+
+import numpy as np
+
+from .riff import WAVE_FORMAT_IEEE_FLOAT, WAVE_FORMAT_PCM, read_wav_info
+
+# (format tag, bytes per sample) -> sample dtype
+_DTYPES = {
+    (WAVE_FORMAT_PCM, 1): np.dtype("u1"),
+    (WAVE_FORMAT_PCM, 2): np.dtype("<i2"),
+    (WAVE_FORMAT_PCM, 4): np.dtype("<i4"),
+    (WAVE_FORMAT_IEEE_FLOAT, 4): np.dtype("<f4"),
+    (WAVE_FORMAT_IEEE_FLOAT, 8): np.dtype("<f8"),
+}
+
+
+class WavReader:
+    """
+    Memory-mapped WAV file with zero-copy range access.
+
+    Views stay valid after ``refresh`` and ``close``: each keeps the mapping
+    it was cut from alive until it is garbage collected.
+
+    Args:
+        path (str): WAV file
+
+    Raises:
+        ValueError: Not a WAV file, or a sample format without a NumPy dtype (e.g. 24-bit PCM)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = None
+        self._samples = None
+        try:
+            self.refresh()
+        except Exception:
+            self._file.close()
+            raise
+
+    def refresh(self):
+        """
+        Re-read the header and remap if the file has grown (a recording in progress).
+
+        Returns:
+            int: Frames now available
+        """
+        size = os.fstat(self._file.fileno()).st_size
+        if not size:
+            # Reserved for a take whose writer has not put the header down yet
+            self.info = None
+            self.dtype = np.dtype("<i2")
+            self._samples = np.zeros((0, 1), dtype=self.dtype)
+            return 0
+        info = read_wav_info(self.path)
+        dtype = _DTYPES.get((info.format_tag, info.sample_width))
+        if dtype is None:
+            raise ValueError(f"不支持的 WAV 采样格式: 格式 {info.format_tag}, {info.sample_width * 8} 位")
+        self.info = info
+        self.dtype = dtype
+        if self._map is None or len(self._map) < size:
+            # Old views keep the previous mapping alive; it is released when they go
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        available = max(0, min(info.data_size, size - info.data_offset)) // info.frame_size
+        if not available:
+            self._samples = np.zeros((0, info.channels), dtype=dtype)
+        else:
+            self._samples = np.frombuffer(self._map, dtype=dtype, count=available * info.channels,
+                                          offset=info.data_offset).reshape(available, info.channels)
+        return available
+
+    @property
+    def rate(self):
+        return self.info.rate if self.info else 0
+
+    @property
+    def channels(self):
+        return self.info.channels if self.info else 0
+
+    @property
+    def chunks(self):
+        """
+        Top-level RIFF chunks (``riff.Chunk``) as of the last ``refresh``.
+        """
+        return self.info.chunks if self.info else []
+
+    @property
+    def num_frames(self):
+        return len(self._samples)
+
+    @property
+    def duration(self):
+        return self.num_frames / self.rate if self.rate else 0.0
+
+    def __len__(self):
+        return self.num_frames
+
+    def frames(self, start=0, stop=None):
+        """
+        Frames ``[start, stop)``, clamped to the data available.
+
+        Args:
+            start (int): First frame
+            stop (int, optional): End frame (exclusive); default the end of the data
+
+        Returns:
+            numpy.ndarray: ``(frames, channels)`` read-only view
+        """
+        return self._samples[max(0, start):stop]
+
+    def seconds(self, t0=0.0, t1=None):
+        """
+        Frames from ``t0`` up to ``t1`` seconds, see ``frames``.
+        """
+        return self.frames(self.frame_at(t0), None if t1 is None else self.frame_at(t1))
+
+    def frame_at(self, seconds):
+        return int(round(seconds * self.rate))
+
+    def __getitem__(self, key):
+        """
+        ``reader[a:b]`` is ``reader.frames(a, b)``; steps and channel indices are passed through to the view.
+        """
+        return self._samples[key]
+
+    def close(self):
+        """
+        Release the file; outstanding views keep their own mapping.
+        """
+        self._samples = None
+        self._map = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
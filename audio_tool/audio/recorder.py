@@ -7,43 +7,25 @@ from loguru import logger
 
 import pyaudio
 import numpy as np
-import wave
-import time
-from PySide6.QtCore import QThread, Signal, QObject
+import functools
+import os
+import threading
+from PySide6.QtCore import Signal, QObject
 
-
-class WaveWriter:
-
-    def __init__(self, fn: str):
-        self.fn = fn
-        self.CHANNELS = 1  # Mono recording
-        self.RATE = 44100  # Sampling rate (Hz)
-        self.FORMAT = pyaudio.paInt16  # Sample format
-
-    def init(self, sw, fn: str = None):
-        if fn is None:
-            fn = self.fn
-        try:
-            self.w = wave.open(fn, 'wb')
-            self.w.setnchannels(self.CHANNELS)
-            self.w.setsampwidth(sw)
-            self.w.setframerate(self.RATE)
-        except Exception as e:
-            print(f"Error initializing wave file: {e}")
-            raise e
-
-    def write(self, data: bytes):
-        """
-        Write audio data to the wave file.
-        
-        Args:
-            data (bytes): Audio data to write
-        """
-        self.w.writeframes(data)
-        # self.recording_file_size += len(data)
-    
-    def close(self):
-        self.w.close()
+from .backend import SAMPLE_WIDTH, PyAudioBackend
+from .bus import SampleBus
+from .catalog import Catalog, library_dir, unique_take_path
+from .devices import DeviceRegistry
+from .engine import PAUSED, AudioEngine
+from .export import export_region
+from .loudness import LoudnessMeter
+from .playback import PlaybackEngine
+from .metrics import MetricsExporter, engine_metrics
+from .metadata import recording_section, sidecar_path, update_sidecar
+from .process import CaptureProcess
+from .reader import WavReader
+from .riff import read_wav_info
+from .trigger import TriggerSettings
 
 
 class AudioRecorder(QObject):
@@ -52,133 +34,371 @@ class AudioRecorder(QObject):
     """
     
     # Signals for communication with UI
-    audio_data_available = Signal(np.ndarray)  # Emitted when new audio data is available
 
     thread_started = Signal()  # Emitted when recording thread starts
     thread_stopped = Signal()  # Emitted when recording thread stops
 
     recording_started = Signal()  # Emitted when recording starts
     recording_stopped = Signal()  # Emitted when recording stops
+    recording_paused = Signal()  # Emitted when writes stop with the file still open
+    recording_resumed = Signal()  # Emitted when writes continue into the same file
     error_occurred = Signal(str)  # Emitted when an error occurs
     playing_started = Signal()  # Emitted when playback starts
     playing_stopped = Signal()  # Emitted when playback stops
+    devices_changed = Signal(object)  # Emitted with a DeviceDiff after a device rescan
+    take_registered = Signal(int)  # Emitted with the catalog row id of a finished take
+    region_exported = Signal(object)  # Emitted with the ExportResult of a finished region export
     
-    def __init__(self):
+    def __init__(self, out_of_process=False):
+        """
+        Args:
+            out_of_process (bool): Run capture and WAV writing in a child process
+        """
         super().__init__()
         
         # Audio parameters
-        self.CHUNK = 1024  # Number of frames per buffer
+        self.PLAYBACK_CHUNK = 256  # Frames per playback buffer; bounds the seek latency
+        self.LATENCY_PROFILE = "balanced"  # Capture buffer size is auto-tuned from here
         self.FORMAT = pyaudio.paInt16  # Sample format
         self.CHANNELS = 1  # Mono recording
         self.RATE = 44100  # Sampling rate (Hz)
         
-        # PyAudio instance
-        self.pa = pyaudio.PyAudio()
-        
-        # Recording state
-        self.is_recording = False
-        self.stream = None
-
         self.recording_file_size = 1024 * 1024 * 5  # 2MB
 
         self.MAX_FILE_SIZE = 1024 * 1024 * 20  # 100MB
+
+        # Long-lived capture engine; owns the PyAudio instance and the stream.
+        self._in_process = not out_of_process
+        # Out of process, the GUI keeps no PyAudio instance of its own.
+        if out_of_process:
+            self.engine = CaptureProcess(
+                "pyaudio",
+                rate=self.RATE,
+                channels=self.CHANNELS,
+                latency_profile=self.LATENCY_PROFILE,
+                auto_tune=True,
+                max_bytes=self.MAX_FILE_SIZE,
+            )
+        else:
+            self.engine = AudioEngine(
+                PyAudioBackend(),
+                rate=self.RATE,
+                channels=self.CHANNELS,
+                latency_profile=self.LATENCY_PROFILE,
+                auto_tune=True,
+                max_bytes=self.MAX_FILE_SIZE,
+            )
+        # Live loudness of the capture path; reset at the start of every take
+        self.loudness = LoudnessMeter(self.RATE, self.CHANNELS)
+        self.engine.add_event_listener(self._on_engine_event)
+        self.engine.add_block_listener(self._on_engine_block)
+        self.engine.start()
+        # Live samples for the UI and any other consumer: views into the capture ring, see bus.py
+        self.bus = SampleBus(self.engine)
+
+        # Cached device list, scanned by the engine that opens the streams (in the capture process if any)
+        self.devices = DeviceRegistry(scanner=self._scan_devices)
+        self.devices.add_listener(self.devices_changed.emit)
         
-        # Recording thread
-        self.record_thread = None
+        # Every take gets its own file under the library; the catalog indexes them
+        self.recordings_dir = os.path.join(library_dir(), "recordings")
+        self.output_path = None  # File of the current (or last) take
+        self._take_device = None  # (device_id, device_name) of the current take
+        try:
+            self.catalog = Catalog()
+        except Exception as e:
+            logger.error(f"打开录音库失败: {str(e)}")
+            self.catalog = None
         
-        # Playback state
-        self.is_playing = False
-        self.play_thread = None
+        # Playback engine, created with the first take played
+        self.player = None
+        self.playback_path = None
+        self.playback_speed = 1.0
+        self._playback_backend = None
+
+        # Optional metrics export for fleet monitoring ($AUDIO_TOOL_METRICS_PORT / $AUDIO_TOOL_METRICS_FILE)
+        self.metrics = None
+        port = os.environ.get("AUDIO_TOOL_METRICS_PORT")
+        path = os.environ.get("AUDIO_TOOL_METRICS_FILE")
+        if port or path:
+            try:
+                self.start_metrics(int(port) if port else None, path or None)
+            except (OSError, ValueError) as e:
+                logger.error(f"启动指标导出失败: {str(e)}")
     
+    def start_metrics(self, port=None, path=None):
+        """
+        Export capture metrics in the Prometheus text format.
+
+        Args:
+            port (int, optional): Serve ``http://127.0.0.1:<port>/metrics``
+            path (str, optional): Rewrite this file atomically every second
+
+        Returns:
+            MetricsExporter: The running exporter
+        """
+        if self.metrics is not None:
+            self.metrics.stop()
+        self.metrics = MetricsExporter(engine_metrics(self.engine, self.loudness), port=port, path=path)
+        self.metrics.start()
+        return self.metrics
+
     def get_available_microphones(self):
         """
         Get a list of available microphones.
+
+        Served from the device registry cache; the first call populates it
+        synchronously from the engine's PortAudio instance.
         
         Returns:
-            list: List of dictionaries containing microphone information (index, name)
+            list: List of dictionaries containing microphone information (id, index, name)
         """
-        microphones = []
-        
         try:
-            for i in range(self.pa.get_device_count()):
-                device_info = self.pa.get_device_info_by_index(i)
-                if device_info['maxInputChannels'] > 0:  # Only input devices (microphones)
-                    microphones.append({
-                        'index': i,
-                        'name': device_info['name']
-                    })
+            if not self.devices.devices():
+                self.devices.refresh()
+            microphones = [d.as_dict() for d in self.devices.devices(input_only=True)]
         except Exception as e:
             self.error_occurred.emit(f"获取麦克风列表失败: {str(e)}")
-            microphones.append({'index': 0, 'name': '默认麦克风'})
+            microphones = [{'id': None, 'index': 0, 'name': '默认麦克风'}]
         
         return microphones
+
+    def get_available_outputs(self):
+        """
+        Get a list of output devices, for passthrough.
+
+        Returns:
+            list: List of dictionaries containing device information (id, index, name)
+        """
+        try:
+            if not self.devices.devices():
+                self.devices.refresh()
+            return [d.as_dict() for d in self.devices.devices(output_only=True)]
+        except Exception as e:
+            self.error_occurred.emit(f"获取输出设备列表失败: {str(e)}")
+            return [{'id': None, 'index': 0, 'name': '默认输出设备'}]
+
+    def refresh_devices(self, reopen=False):
+        """
+        Rescan audio devices in the background; ``devices_changed`` fires if anything changed.
+
+        Hot-plugged devices are only seen while no stream is open (see
+        ``AudioEngine.list_devices``).
+
+        Args:
+            reopen (bool): Also rescan when only an idle standby stream is open, closing and
+                reopening it
+        """
+        self.devices.refresh_async(reopen=reopen)
+
+    def _scan_devices(self, rescan, reopen=False):
+        # Device registry worker: ids found here are the ones the engine resolves when opening
+        return self.engine.list_devices(rescan, reopen=rescan and reopen).result(timeout=10)
     
-    def start_recording(self, device_index=None):
+    @property
+    def is_recording(self):
+        return self.engine.is_recording
+
+    def prepare_device(self, device=None):
+        """
+        Open the standby stream on a microphone ahead of recording.
+
+        Args:
+            device (str | int, optional): Stable id or index of the microphone
+        """
+        try:
+            self.engine.open_device(device)
+        except OSError as e:
+            self.error_occurred.emit(str(e))
+
+    @property
+    def is_monitoring(self):
+        return self.engine.monitoring
+
+    def set_monitoring(self, enabled, preroll_seconds=None):
+        """
+        Keep capturing while idle so a take includes audio from before the click.
+
+        Args:
+            enabled (bool): Turn monitoring on or off
+            preroll_seconds (float, optional): Seconds of pre-roll to keep
+        """
+        try:
+            self.engine.set_monitoring(enabled, preroll_seconds)
+        except Exception as e:
+            self.error_occurred.emit(f"设置预录失败: {str(e)}")
+
+    @property
+    def is_triggered(self):
+        return self.engine.triggered
+
+    def arm_trigger(self, device=None, settings=None):
+        """
+        Record every event above a level threshold to its own take, without touching the record button.
+
+        Args:
+            device (str | int, optional): Stable id or index of the microphone
+            settings (TriggerSettings, optional): Thresholds and pre/post windows
+        """
+        self._take_device = self._describe_device(device)
+        try:
+            # A partial, not a closure: it may be sent to the capture process
+            paths = functools.partial(unique_take_path, self.recordings_dir, "trig")
+            self.engine.set_trigger(settings or TriggerSettings(), paths, device)
+        except Exception as e:
+            self.error_occurred.emit(f"启动触发录音失败: {str(e)}")
+
+    def disarm_trigger(self):
+        """
+        Stop triggered recording; an event in progress is saved.
+        """
+        try:
+            self.engine.set_trigger(None).result(timeout=2.0)
+        except Exception as e:
+            self.error_occurred.emit(f"停止触发录音失败: {str(e)}")
+
+    @property
+    def is_passthrough(self):
+        return self.engine.passthrough
+
+    def set_passthrough(self, enabled, output=None, gain_db=None):
+        """
+        Hear the microphone on an output device while capturing (full-duplex stream).
+
+        Args:
+            enabled (bool): Turn passthrough on or off
+            output (str | int, optional): Stable id or index of the output device
+            gain_db (float, optional): Monitor gain in dB
+
+        Returns:
+            concurrent.futures.Future: Resolves to whether passthrough is on, or None on error
+        """
+        try:
+            return self.engine.set_passthrough(enabled, output, gain_db)
+        except Exception as e:
+            self.error_occurred.emit(f"设置监听失败: {str(e)}")
+            return None
+
+    def get_glitches(self):
+        """
+        Glitch counters of the capture stream.
+
+        Returns:
+            dict: ``overflows``, ``output_underflows``, ``late_callbacks`` and
+            ``passthrough_latency`` (seconds, 0 while passthrough is off)
+        """
+        stats = self.engine.stats
+        return {
+            'overflows': stats.overflows,
+            'output_underflows': stats.output_underflows,
+            'late_callbacks': stats.late_callbacks,
+            'passthrough_latency': stats.passthrough_latency_us / 1e6,
+        }
+
+    def set_latency_profile(self, profile, auto_tune=None):
+        """
+        Change the capture latency profile.
+
+        Args:
+            profile (str): ``"low-latency"``, ``"balanced"`` or ``"high-throughput"``
+            auto_tune (bool, optional): Turn block-size auto-tuning on or off
+        """
+        try:
+            self.engine.set_latency(profile, auto_tune)
+        except Exception as e:
+            self.error_occurred.emit(f"设置延迟配置失败: {str(e)}")
+
+    def get_latency(self):
+        """
+        Effective capture latency and block size of the open stream.
+
+        Returns:
+            tuple: ``(seconds, frames_per_buffer)``, zeros while no stream is open
+        """
+        stats = self.engine.stats
+        return stats.latency_us / 1e6, stats.frames_per_buffer
+
+    def start_recording(self, device=None):
         """
         Start recording audio from the selected microphone.
+
+        The engine keeps the stream open between takes, so this only queues a
+        command; ``recording_started`` fires once the engine has opened the file.
         
         Args:
-            device_index (int, optional): Index of the microphone to use. Defaults to None (default device).
+            device (str | int, optional): Stable id or index of the microphone to use. Defaults to None (default device).
         """
         try:
             if self.is_recording:
                 return
-            
-            self.is_recording = True
-            self.recording_file_size = 0
 
-            try:
-                self.writer = WaveWriter("temp_recording.wav")
-                self.writer.init(self.pa.get_sample_size(self.FORMAT))
-            except Exception as e:
-                self.error_occurred.emit(f"创建录音文件失败: {str(e)}")
-                self.is_recording = False
-                return
-            
-            # Open audio stream
-            try:
-                self.stream = self.pa.open(
-                    input_device_index=device_index,
-                    format=self.FORMAT,
-                    channels=self.CHANNELS,
-                    rate=self.RATE,
-                    input=True,
-                    frames_per_buffer=self.CHUNK
-                )
-            except OSError as e:
-                # Check for permission-related errors
-                error_code = e.errno if hasattr(e, 'errno') else None
-                if error_code in [-9996, -9997]:
-                    s = f"""麦克风访问失败: 请检查麦克风权限设置。\n在 macOS 系统偏好设置中，进入"安全性与隐私" -> "隐私" -> "麦克风"，确保应用已获得授权。"""
-                    self.error_occurred.emit(s)
-                else:
-                    self.error_occurred.emit(f"麦克风访问失败: {str(e)}")
-                self.is_recording = False
-                
-                return
-            except Exception as e:
-                self.error_occurred.emit(f"打开音频流失败: {str(e)}")
-                self.is_recording = False
-                return
-            
-            # Create and start recording thread
-            self.record_thread = QThread()
-            self.moveToThread(self.record_thread)
-            self.record_thread.started.connect(self._record_loop)
-            self.recording_stopped.connect(self.record_thread.quit)
-            self.record_thread.finished.connect(self.record_thread.deleteLater)
-            self.record_thread.start()
-            
-            self.recording_started.emit()
+            self.recording_file_size = 0
+            # output_path follows the engine's recording_started event, not the reservation
+            path = unique_take_path(self.recordings_dir)
+            self._take_device = self._describe_device(device)
+            # Device ids go to the engine as they are; it resolves them where the stream is opened
+            future = self.engine.start_recording(path, device)
+            future.add_done_callback(lambda f, path=path: self._discard_unused(f, path))
             
         except Exception as e:
             self.error_occurred.emit(f"开始录音失败: {str(e)}")
-            self.is_recording = False
 
+
+    @property
+    def is_paused(self):
+        return self.engine.state == PAUSED
+
+    def pause_recording(self):
+        """
+        Stop writing without closing the stream or the file; ``resume_recording`` continues the same take.
+        """
+        if self.engine.state == PAUSED or not self.is_recording:
+            return
+        try:
+            self.engine.pause().result(timeout=2.0)
+        except Exception as e:
+            self.error_occurred.emit(f"暂停录音失败: {str(e)}")
+
+    def resume_recording(self):
+        """
+        Continue a paused take from the frame being captured now; the gap is marked in the file.
+        """
+        if self.engine.state != PAUSED:
+            return
+        try:
+            self.engine.resume().result(timeout=2.0)
+        except Exception as e:
+            self.error_occurred.emit(f"继续录音失败: {str(e)}")
+
+    def _describe_device(self, device):
+        """
+        ``(device_id, name)`` of a device id, index or None (the default input), for the catalog.
+        """
+        for info in self.devices.devices(input_only=True):
+            if info.id == device or info.index == device or (device is None and info.is_default_input):
+                return info.id, info.name
+        return (device if isinstance(device, str) else None), None
+
+    @staticmethod
+    def _discard_unused(future, path):
+        # unique_take_path reserved an empty file; remove it unless the take written is that file
+        # (the engine answers a start during a take with the take already running)
+        if future.exception() is not None or getattr(future.result(), "path", None) != path:
+            AudioRecorder._discard_unused_path(path)
+
+    @staticmethod
+    def _discard_unused_path(path):
+        try:
+            if os.path.getsize(path) == 0:
+                os.remove(path)
+        except OSError:
+            pass
     
     def stop_recording(self):
         """
         Stop recording audio.
+
+        Blocks until the engine has flushed and closed the file; the stream stays open.
         """
         try:
             if not self.is_recording:
@@ -186,82 +406,151 @@ class AudioRecorder(QObject):
                 return
             
             logger.info("stop_recording: recording")
-            self.is_recording = False
-
-            if self.record_thread:
-                # self.record_thread.quit()
-                self.record_thread.wait()
-                self.record_thread = None
-
-            self.pa.terminate()
+            self.engine.stop_recording().result(timeout=2.0)
             
         except Exception as e:
             self.error_occurred.emit(f"停止录音失败: {str(e)}")
+
+    def _on_engine_event(self, event, payload):
+        """
+        Translate engine events (engine thread) into Qt signals.
+        """
+        if event == "recording_started":
+            self.output_path = payload.path
+            if self.is_playing:
+                self.player.pause()
+                self.playing_stopped.emit()
+            self.loudness.reset()
+            self.engine.latency.reset()
+            self.recording_started.emit()
+        elif event == "paused":
+            self.recording_paused.emit()
+        elif event == "resumed":
+            self.recording_resumed.emit()
+        elif event == "recording_stopped":
+            self.recording_file_size = payload.frames * SAMPLE_WIDTH * self.CHANNELS
+            self._write_metadata(payload)
+            self.recording_stopped.emit()
+            self.thread_stopped.emit()
+        elif event == "error":
+            self.error_occurred.emit(payload)
+
+    def _on_engine_block(self, block):
+        """
+        Measure the loudness of captured audio (engine thread); a paused take's gap is left out.
+        """
+        if not (self.engine.is_recording or self.engine.monitoring or self.engine.triggered):
+            return
+        if self.engine.state == PAUSED:
+            return
+        self.loudness(block)
     
-    def _record_loop(self):
+    def _write_metadata(self, info):
         """
-        Internal recording loop that runs in a separate thread.
+        Store the take's details and loudness in a JSON sidecar next to the WAV file
+        and register the take in the catalog.
         """
-        logger.info("start _record_loop")
-        n = int(time.time() * 20)
-        self.recording_file_size = 0
+        wav_path = info.files[0] if info.files else info.path
+        reading = self.loudness.reading()
         try:
-            while self.is_recording:
-                data = self.stream.read(self.CHUNK)
-                
-                # Convert binary data to numpy array
-                audio_array = np.frombuffer(data, dtype=np.int16)
-                
-                # Store the data
-                # self.recording_data.append(audio_array)
-
-                self.writer.write(data)
-
-                self.recording_file_size += len(data)
-
-                if self.recording_file_size >= self.MAX_FILE_SIZE:
-                    self.stop_recording()
-                    break
-                
-                # Emit signal with new audio data
-                nn = int(time.time() * 20)
-                if nn - n > 1:
-                    n = nn
-                    self.audio_data_available.emit(audio_array)
-
-            logger.info("stop _record_loop")
-
+            update_sidecar(wav_path, recording=recording_section(info), loudness=reading.as_dict(),
+                           latency=self.engine.latency.as_dict(), clock=info.clock)
+        except Exception as e:
+            self.error_occurred.emit(f"保存录音信息失败: {str(e)}")
+        if self.catalog is None:
+            return
+        device_id, device_name = self._take_device or (None, None)
+        try:
+            take_id = self.catalog.add_recording(info, device_id=device_id, device_name=device_name,
+                                                 loudness=reading, sidecar=sidecar_path(wav_path))
         except Exception as e:
-            logger.error(f"_record_loop: 录音过程中发生错误: {str(e)}")
-            self.is_recording = False
-        finally:
-            self.is_recording = False
+            self.error_occurred.emit(f"登记录音失败: {str(e)}")
+            return
+        self.take_registered.emit(take_id)
 
+    def export_region(self, path, start_seconds, end_seconds, source=None):
+        """
+        Copy a region of a take into a new take, in the background; ``region_exported`` reports the result.
+
+        The samples are copied file-to-file by the kernel, never decoded, so
+        the time is that of the disk copy and memory use stays flat.
+
+        Args:
+            path (str): Take to cut from
+            start_seconds (float): Start of the region
+            end_seconds (float): End of the region
+            source (Take, optional): Catalog row of the take, for the new row's device and start time
+        """
+        try:
+            rate = read_wav_info(path).rate
+            output = unique_take_path(self.recordings_dir, "cut")
+        except (OSError, ValueError) as e:
+            self.error_occurred.emit(f"导出选区失败: {str(e)}")
+            return
+        start, end = sorted((int(round(start_seconds * rate)), int(round(end_seconds * rate))))
+        threading.Thread(target=self._export_worker, args=(path, output, start, end, source),
+                         name="region-export", daemon=True).start()
+
+    def _export_worker(self, path, output, start, end, source):
+        try:
+            result = export_region(path, output, start, end)
+        except (OSError, ValueError) as e:
+            self._discard_unused_path(output)
+            self.error_occurred.emit(f"导出选区失败: {str(e)}")
+            return
+        sidecar = None
         try:
-            logger.info("try close writer")
-            self.writer.close()
-            logger.info("close writer success")
+            sidecar = update_sidecar(output, export={"source": os.path.abspath(path), "start_frame": result.start_frame,
+                                                     "frames": result.frames, "method": result.method})
         except Exception as e:
-            logger.error(f"_record_loop: 关闭录音文件失败: {str(e)}")
-        finally:
-            logger.info("finally _record_loop")
-
-        logger.info("emit recording_stopped")
-        self.recording_stopped.emit()
-        logger.info("emit thread_stopped")
-        self.thread_stopped.emit()
-    
-    def get_recording_data(self):
+            self.error_occurred.emit(f"保存录音信息失败: {str(e)}")
+        if self.catalog is not None:
+            try:
+                take_id = self.catalog.add_region(result, read_wav_info(output), source, sidecar)
+                self.take_registered.emit(take_id)
+            except Exception as e:
+                self.error_occurred.emit(f"登记录音失败: {str(e)}")
+        self.region_exported.emit(result)
+
+    def get_loudness(self):
+        """
+        Current loudness reading (momentary, short-term, integrated, true peak).
+
+        Returns:
+            LoudnessReading: Latest values
+        """
+        return self.loudness.reading()
+
+    def add_latency_stage(self, histogram):
+        """
+        Report a ``LatencyHistogram`` measured outside the engine (e.g. display) with the engine's stages.
+        """
+        self.engine.latency.add(histogram)
+
+    def get_latency_report(self):
+        """
+        Per-stage latency of the current take, one line per stage.
+
+        Returns:
+            str: Table of p50/p90/p99/max per stage
+        """
+        return self.engine.latency.format()
+
+    def get_recording_data(self, path=None):
         """
         Get the recorded audio data.
+
+        Args:
+            path (str, optional): Take to read (default: the last one recorded)
         
         Returns:
-            numpy.ndarray: The recorded audio data as a single numpy array.
+            numpy.ndarray: ``(frames, channels)`` view of the take, mapped from disk rather than loaded
         """
-        if not self.recording_data:
-            return np.array([], dtype=np.int16)
-        
-        return np.concatenate(self.recording_data)
+        path = path or self.output_path
+        if not path or not os.path.exists(path):
+            return np.zeros((0, self.CHANNELS), dtype=np.int16)
+        with WavReader(path) as reader:
+            return reader.frames()
     
     def get_recording_duration(self):
         """
@@ -270,113 +559,140 @@ class AudioRecorder(QObject):
         Returns:
             float: Duration in seconds
         """
-        total_samples = sum(len(chunk) for chunk in self.recording_data)
-        return total_samples / self.RATE
+        if self.engine.recording is None:
+            return 0.0
+        return self.engine.recording.duration
     
-    def play_recording(self):
+    def open_playback(self, path):
         """
-        Play back the recorded audio.
+        Load a take into the playback engine, paused at its start.
+
+        Args:
+            path (str): Take to play
+
+        Returns:
+            bool: True if the take is loaded
         """
         try:
-            if self.is_playing or not self.recording_data:
+            if self.player is None:
+                # The capture backend can play too; out of process the GUI needs its own
+                backend = self.engine.backend if self._in_process else PyAudioBackend()
+                self.player = PlaybackEngine(backend, frames_per_buffer=self.PLAYBACK_CHUNK)
+                self.player.on_finished = self.playing_stopped.emit
+                self.player.set_speed(self.playback_speed)
+                self._playback_backend = None if self._in_process else backend
+            if self.playback_path != path or not self.player.is_open:
+                self.player.open(path)
+                self.playback_path = path
+            return True
+        except Exception as e:
+            self.error_occurred.emit(f"打开录音失败: {str(e)}")
+            return False
+
+    @property
+    def is_playing(self):
+        return self.player is not None and self.player.is_playing
+
+    def play_recording(self, path=None):
+        """
+        Play a take from the playhead.
+
+        Args:
+            path (str, optional): Take to play (default: the loaded one, else the last recorded)
+        """
+        try:
+            path = path or self.playback_path or self.output_path
+            if self.is_playing or not path or not os.path.exists(path):
                 return
-            
-            self.is_playing = True
-            
-            # Create and start playback thread
-            self.play_thread = QThread()
-            self.moveToThread(self.play_thread)
-            self.play_thread.started.connect(self._play_loop)
-            self.play_thread.start()
-            
+            if not self.open_playback(path):
+                return
+            self.player.play()
             self.playing_started.emit()
             
         except Exception as e:
             self.error_occurred.emit(f"开始播放失败: {str(e)}")
-            self.is_playing = False
     
     def stop_playback(self):
         """
-        Stop playback of audio.
+        Stop playback of audio, keeping the playhead where it is.
         """
         try:
             if not self.is_playing:
                 return
-            
-            self.is_playing = False
-            
-            if self.play_thread:
-                self.play_thread.quit()
-                self.play_thread.wait()
-                self.play_thread = None
-            
+            self.player.pause()
             self.playing_stopped.emit()
             
         except Exception as e:
             self.error_occurred.emit(f"停止播放失败: {str(e)}")
-    
-    def _play_loop(self):
+
+    def seek_playback(self, seconds):
         """
-        Internal playback loop that runs in a separate thread.
+        Move the playhead; playback (if running) continues from there.
         """
-        try:
-            if not self.recording_data:
-                return
-            
-            # Open audio stream for playback
-            stream = self.pa.open(
-                format=self.FORMAT,
-                channels=self.CHANNELS,
-                rate=self.RATE,
-                output=True,
-                frames_per_buffer=self.CHUNK
-            )
-            
-            # Convert recorded data to bytes for playback
-            all_data = self.get_recording_data()
-            
-            # Play the audio in chunks
-            num_chunks = len(all_data) // self.CHUNK
-            
-            for i in range(num_chunks):
-                if not self.is_playing:
-                    break
-                
-                # Get chunk data
-                chunk = all_data[i * self.CHUNK : (i + 1) * self.CHUNK]
-                
-                # Convert to bytes and write to stream
-                stream.write(chunk.tobytes())
-            
-            # Play any remaining data
-            if self.is_playing and len(all_data) % self.CHUNK > 0:
-                remaining_chunk = all_data[num_chunks * self.CHUNK :]
-                stream.write(remaining_chunk.tobytes())
-            
-            stream.stop_stream()
-            stream.close()
-            
-            self.is_playing = False
-            self.playing_stopped.emit()
-            
-        except Exception as e:
-            self.error_occurred.emit(f"播放过程中发生错误: {str(e)}")
-            self.is_playing = False
+        if self.player is not None and self.player.is_open:
+            self.player.seek(seconds)
+
+    def begin_scrub(self, seconds):
+        """
+        Start following mouse positions on the waveform; moves are audible at the drag's speed.
+        """
+        if self.player is not None and self.player.is_open:
+            self.player.begin_scrub(seconds)
+
+    def scrub(self, seconds):
+        if self.player is not None:
+            self.player.scrub(seconds)
+
+    def end_scrub(self):
+        if self.player is not None:
+            self.player.end_scrub()
+
+    def set_playback_speed(self, speed):
+        """
+        Playback rate relative to normal (0.25 to 4; pitch follows).
+        """
+        self.playback_speed = speed
+        if self.player is not None:
+            self.player.set_speed(speed)
+
+    def get_playback_position(self):
+        """
+        Returns:
+            tuple: ``(position, duration)`` of the loaded take in seconds, zeros if none
+        """
+        if self.player is None or not self.player.is_open:
+            return 0.0, 0.0
+        return self.player.position, self.player.duration
     
+    def shutdown(self):
+        """
+        Finish any take and release the audio device.
+        """
+        if self.metrics is not None:
+            self.metrics.stop()
+            self.metrics = None
+        self.bus.close()
+        self.engine.shutdown()
+        if self.player is not None:
+            self.player.close()
+        if self._playback_backend is not None:
+            self._playback_backend.terminate()
+            self._playback_backend = None
+        if self.catalog is not None:
+            self.catalog.close()
+
     def __del__(self):
         """
         Clean up PyAudio instance when object is deleted.
         """
         try:
             # Ensure all threads are stopped
-            if self.record_thread and self.record_thread.isRunning():
-                self.record_thread.quit()
-                self.record_thread.wait()
+            self.engine.shutdown()
             
-            if self.play_thread and self.play_thread.isRunning():
-                self.play_thread.quit()
-                self.play_thread.wait()
-                
-            self.pa.terminate()
+            if self.player is not None:
+                self.player.close()
+
+            if self._in_process:
+                self.engine.backend.terminate()
         except:
             pass
\ No newline at end of file
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Streaming polyphase sample-rate conversion as a pipeline stage.
+
+    Pipeline([HighPass(80), Resample(44100), DitherToInt16()], rate=48000, channels=2)
+
+The ratio ``out / in`` is reduced to ``L / M``. Output sample ``j`` lies at
+input time ``j * M / L``; it is the dot product of the ``K`` input samples
+around that time with phase ``(j * M) % L`` of a Kaiser-windowed sinc
+prototype. All outputs of a block are computed at once from a sliding
+window view over the carried history plus the new block.
+"""
+import math
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .pipeline import Stage
+
+# name -> (taps per phase, Kaiser beta, -6 dB cutoff as a fraction of the lower Nyquist rate).
+# At 48k -> 44.1k "high" is flat to 18 kHz and rejects everything above 22.05 kHz by ~100 dB.
+QUALITY_PRESETS = {
+    "fast": (16, 5.0, 0.80),
+    "medium": (32, 8.0, 0.87),
+    "high": (64, 10.0, 0.91),
+}
+
+
+def design_polyphase(up, down, taps, beta, rolloff):
+    """
+    Kaiser-windowed sinc low-pass split into ``up`` phases.
+
+    Args:
+        up (int): Interpolation factor ``L``
+        down (int): Decimation factor ``M``
+        taps (int): Taps per phase ``K``
+        beta (float): Kaiser window shape
+        rolloff (float): Cutoff as a fraction of the lower of the two Nyquist rates
+
+    Returns:
+        numpy.ndarray: float32 ``(L, K)``; row ``p`` is phase ``p`` ordered oldest sample first,
+        normalized to unity DC gain
+    """
+    n = taps * up
+    # Cutoff in cycles per sample of the up-sampled signal
+    cutoff = 0.5 * rolloff / max(up, down)
+    # Centered on an input sample (taps / 2 of them ahead) so the look-ahead cancels the delay exactly
+    half = taps // 2 * up
+    t = np.arange(n) - half
+    window = np.i0(beta * np.sqrt(np.clip(1 - (t / half) ** 2, 0.0, None))) / np.i0(beta)
+    h = 2 * cutoff * np.sinc(2 * cutoff * t) * window
+    # h[p + k * L] multiplies x[base - k]; reverse k so rows line up with ascending windows
+    phases = h.reshape(taps, up).T[:, ::-1]
+    phases = phases / phases.sum(axis=1, keepdims=True)
+    return np.ascontiguousarray(phases, dtype=np.float32)
+
+
+class Resample(Stage):
+    """
+    Convert to ``out_rate`` with carried state, so block boundaries are seamless.
+
+    The filter is centered by looking ``K / 2`` input samples ahead, so output
+    is time-aligned with the input but lags it by that much; ``flush()``
+    returns the held-back tail at the end of a take.
+
+    Args:
+        out_rate (int): Output sampling rate (Hz)
+        quality (str): ``"fast"``, ``"medium"`` or ``"high"``
+    """
+    name = "resample"
+
+    def __init__(self, out_rate, quality="high"):
+        if quality not in QUALITY_PRESETS:
+            raise ValueError(f"unknown resampler quality: {quality}")
+        self.out_rate = int(out_rate)
+        self.quality = quality
+
+    def configure(self, rate, channels, max_frames):
+        super().configure(rate, channels, max_frames)
+        g = math.gcd(self.out_rate, int(rate))
+        self.up, self.down = self.out_rate // g, int(rate) // g
+        taps, beta, rolloff = QUALITY_PRESETS[self.quality]
+        self.taps = taps
+        self.lookahead = taps // 2
+        self._phases = design_polyphase(self.up, self.down, taps, beta, rolloff)
+
+        self._max_in = max(max_frames, self.lookahead)
+        max_out = -(-self._max_in * self.up // self.down) + 1
+        self._buf = np.zeros((channels, taps - 1 + self._max_in), dtype=np.float32)
+        # (ch, max_in, K); window w ends at input before + w. Made once: a new view per block is slower
+        # and grows NumPy's internal caches with every distinct block length
+        self._windows = sliding_window_view(self._buf, taps, axis=1)
+        self._out = np.empty((max_out, channels), dtype=np.float32)
+        self.reset()
+        return self.out_rate, channels, max_out
+
+    def reset(self):
+        self._buf[:] = 0.0
+        self._consumed = 0  # input frames seen
+        self._produced = 0  # output frames emitted
+
+    def process(self, block):
+        n = len(block)
+        K = self.taps
+        before = self._consumed
+        buf = self._buf[:, :K - 1 + n]
+        buf[:, K - 1:] = block.T
+        self._consumed += n
+
+        # Output j is ready once input (j * M) // L + lookahead has arrived
+        ready = self._consumed - self.lookahead
+        total = -(-ready * self.up // self.down) if ready > 0 else 0
+        j = np.arange(self._produced, total, dtype=np.int64)
+        pos = j * self.down
+        base = pos // self.up + self.lookahead
+        out = self._out[:len(j)]
+        np.einsum("cjk,jk->jc", self._windows[:, base - before], self._phases[pos % self.up], out=out)
+        self._produced = total
+
+        # Keep the last K - 1 inputs as history for the next block
+        self._buf[:, :K - 1] = buf[:, n:]
+        return out
+
+    def flush(self):
+        return self.process(np.zeros((self.lookahead, self.channels), dtype=np.float32))
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Minimal RIFF/WAVE chunk parser.
+
+Only reads headers, so it is cheap enough to run on every file of an
+archive before handing sample ranges to workers. Files left behind by a
+crash (size fields never patched) are treated as running to end of file.
+Cue points with ``LIST``/``adtl`` labels are appended to finished files and
+read back the same way.
+"""
+import os
+import struct
+from dataclasses import dataclass, field
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+@dataclass
+class Chunk:
+    id: str
+    offset: int  # Offset of the chunk payload in the file
+    size: int
+
+
+@dataclass
+class WavInfo:
+    """
+    Format and data location of a WAV file.
+    """
+    path: str
+    format_tag: int
+    channels: int
+    rate: int
+    sample_width: int
+    data_offset: int
+    data_size: int
+    chunks: list = field(default_factory=list)
+
+    @property
+    def frame_size(self):
+        return self.channels * self.sample_width
+
+    @property
+    def frames(self):
+        return self.data_size // self.frame_size if self.frame_size else 0
+
+    @property
+    def duration(self):
+        return self.frames / self.rate if self.rate else 0.0
+
+    @property
+    def is_pcm16(self):
+        return self.format_tag == WAVE_FORMAT_PCM and self.sample_width == 2
+
+
+def read_chunks(f, file_size):
+    """
+    List the top-level chunks of an open RIFF/WAVE file.
+
+    Returns:
+        list: ``Chunk`` entries in file order; the last one is clamped to the file size
+    """
+    f.seek(0)
+    header = f.read(12)
+    if len(header) < 12 or header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+        raise ValueError("不是有效的 WAV 文件")
+    chunks = []
+    pos = 12
+    while pos + 8 <= file_size:
+        f.seek(pos)
+        chunk_id, size = struct.unpack("<4sI", f.read(8))
+        payload = pos + 8
+        if size == 0 or size == 0xFFFFFFFF or payload + size > file_size:
+            # Unpatched header of an interrupted recording, or a truncated file
+            if chunk_id == b"data" or payload + size > file_size:
+                size = file_size - payload
+        chunks.append(Chunk(chunk_id.decode("latin-1"), payload, size))
+        pos = payload + size + (size & 1)
+    return chunks
+
+
+def read_wav_info(path):
+    """
+    Parse the ``fmt `` chunk and locate the ``data`` chunk.
+
+    Args:
+        path (str): WAV file
+
+    Returns:
+        WavInfo: Format and data range
+
+    Raises:
+        ValueError: Not a WAV file, or ``fmt ``/``data`` missing
+    """
+    file_size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        chunks = read_chunks(f, file_size)
+        fmt = next((c for c in chunks if c.id == "fmt "), None)
+        data = next((c for c in chunks if c.id == "data"), None)
+        if fmt is None or data is None:
+            raise ValueError("WAV 文件缺少 fmt 或 data 块")
+        f.seek(fmt.offset)
+        format_tag, channels, rate, _, _, bits = struct.unpack("<HHIIHH", f.read(16))
+        if format_tag == WAVE_FORMAT_EXTENSIBLE and fmt.size >= 40:
+            f.seek(fmt.offset + 24)
+            format_tag = struct.unpack("<H", f.read(2))[0]
+    return WavInfo(path, format_tag, channels, rate, (bits + 7) // 8, data.offset, data.size, chunks)
+
+
+def _chunk(chunk_id, payload):
+    return struct.pack("<4sI", chunk_id, len(payload)) + payload + b"\0" * (len(payload) & 1)
+
+
+def append_cues(path, cues):
+    """
+    Append a ``cue `` chunk and its ``labl`` labels (``LIST``/``adtl``) to a closed WAV file.
+
+    Args:
+        path (str): WAV file
+        cues (list): ``(frame, label)`` pairs; frames count from the first sample frame of ``data``
+    """
+    if not cues:
+        return
+    points = struct.pack("<I", len(cues))
+    labels = b""
+    for cue_id, (frame, label) in enumerate(cues, start=1):
+        # ID, play order position, chunk "data", chunk start, block start, sample offset
+        points += struct.pack("<II4sIII", cue_id, frame, b"data", 0, 0, frame)
+        labels += _chunk(b"labl", struct.pack("<I", cue_id) + label.encode("utf-8") + b"\0")
+    body = _chunk(b"cue ", points) + _chunk(b"LIST", b"adtl" + labels)
+    with open(path, "r+b") as f:
+        size = f.seek(0, os.SEEK_END)
+        read_chunks(f, size)  # Only append to a well-formed file
+        if size + 1 + len(body) - 8 > 0xFFFFFFFF:
+            raise ValueError("文件超过 4 GB，无法写入标记")
+        f.seek(size)
+        if size & 1:
+            f.write(b"\0")
+            size += 1
+        f.write(body)
+        f.seek(4)
+        f.write(struct.pack("<I", size + len(body) - 8))
+
+
+def read_cues(path):
+    """
+    Cue points of a WAV file with their labels.
+
+    Returns:
+        list: ``(frame, label)`` pairs in frame order; the label is "" where there is none
+    """
+    file_size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        chunks = read_chunks(f, file_size)
+        points = {}
+        labels = {}
+        for chunk in chunks:
+            if chunk.id not in ("cue ", "LIST"):
+                continue
+            f.seek(chunk.offset)
+            payload = f.read(chunk.size)
+            if chunk.id == "cue " and len(payload) >= 4:
+                count = struct.unpack_from("<I", payload)[0]
+                for i in range(min(count, (len(payload) - 4) // 24)):
+                    cue_id, _, _, _, _, frame = struct.unpack_from("<II4sIII", payload, 4 + 24 * i)
+                    points[cue_id] = frame
+            elif chunk.id == "LIST" and payload[:4] == b"adtl":
+                pos = 4
+                while pos + 8 <= len(payload):
+                    sub_id, size = struct.unpack_from("<4sI", payload, pos)
+                    if sub_id == b"labl" and size >= 4:
+                        cue_id = struct.unpack_from("<I", payload, pos + 8)[0]
+                        text = payload[pos + 12:pos + 8 + size].split(b"\0", 1)[0]
+                        labels[cue_id] = text.decode("utf-8", "replace")
+                    pos += 8 + size + (size & 1)
+    return sorted((frame, labels.get(cue_id, "")) for cue_id, frame in points.items())
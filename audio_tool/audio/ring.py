@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Fixed-size sample ring shared between the capture callback and its readers.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+from .memory import default_budget
+
+
+@dataclass
+class AudioBlock:
+    """
+    A run of captured frames.
+
+    Attributes:
+        samples (numpy.ndarray): ``(frames, channels)`` array, usually a view into a ring
+        position (int): Absolute index of the first frame since the stream started
+        timestamp (float): ``time.monotonic()`` at which the first frame was captured
+    """
+    samples: np.ndarray
+    position: int
+    timestamp: float
+
+    @property
+    def frames(self):
+        return len(self.samples)
+
+    @property
+    def end(self):
+        return self.position + len(self.samples)
+
+
+class SampleRing:
+    """
+    Single-writer ring buffer addressed by absolute frame positions.
+
+    The writer (the PortAudio callback) copies each block in once; readers
+    keep their own positions and get views back, so nothing downstream needs
+    to copy live data. A reader that falls more than ``capacity`` frames
+    behind has lost data; ``oldest`` tells it where valid data starts.
+    """
+
+    def __init__(self, capacity, channels=1, dtype=np.int16):
+        self.capacity = int(capacity)
+        self.channels = int(channels)
+        self.dtype = np.dtype(dtype)
+        self._buf = default_budget().allocate("ring", (self.capacity, self.channels), self.dtype)
+        self.written = 0  # Absolute number of frames ever written
+
+    @property
+    def oldest(self):
+        """
+        Absolute position of the oldest frame still held.
+        """
+        return max(0, self.written - self.capacity)
+
+    @property
+    def nbytes(self):
+        return self._buf.nbytes
+
+    def reset(self):
+        self.written = 0
+
+    def resized(self, capacity):
+        """
+        Copy of this ring with a different capacity and the same positions.
+
+        Only call while no writer is active (stream stopped).
+        """
+        ring = SampleRing(capacity, self.channels, self.dtype)
+        start = max(self.oldest, self.written - ring.capacity)
+        ring.written = start
+        for _, view in self.views(start):
+            ring.write(view)
+        return ring
+
+    def write(self, frames):
+        """
+        Append frames, overwriting the oldest data when full.
+
+        Args:
+            frames (numpy.ndarray): ``(n, channels)`` or flat interleaved samples
+        """
+        frames = frames.reshape(-1, self.channels)
+        n = len(frames)
+        if n >= self.capacity:
+            frames = frames[-self.capacity:]
+            start = (self.written + n - self.capacity) % self.capacity
+            n_copy = self.capacity
+        else:
+            start = self.written % self.capacity
+            n_copy = n
+        first = min(n_copy, self.capacity - start)
+        self._buf[start:start + first] = frames[:first]
+        if first < n_copy:
+            self._buf[:n_copy - first] = frames[first:]
+        # Publish only after the copy so readers never see a half-written block
+        self.written += n
+
+    def write_bytes(self, data):
+        """
+        Append raw interleaved sample bytes as delivered by PortAudio.
+        """
+        self.write(np.frombuffer(data, dtype=self.dtype))
+
+    def views(self, start, stop=None):
+        """
+        Get views covering ``[start, stop)``.
+
+        Args:
+            start (int): Absolute start position, clamped to ``oldest``
+            stop (int, optional): Absolute end position, defaults to ``written``
+
+        Returns:
+            list: One or two ``(position, ndarray)`` pairs (two when the range wraps)
+        """
+        if stop is None or stop > self.written:
+            stop = self.written
+        start = max(start, self.oldest)
+        if start >= stop:
+            return []
+        i = start % self.capacity
+        j = i + (stop - start)
+        if j <= self.capacity:
+            return [(start, self._buf[i:j])]
+        split = self.capacity - i
+        return [(start, self._buf[i:]), (start + split, self._buf[:j - self.capacity])]
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Threshold-triggered recording: arm the engine, record only what happens.
+
+``TriggerDetector`` scans each captured block with whole-array comparisons
+and reports the exact ring position where the signal crosses the start
+level (or jumps by more than the slope threshold from one sample to the
+next), and where an event ends: the last sample above the stop level plus
+the post-trigger window, once the input stayed under it for the hold time.
+
+The engine runs the detector on its own thread ahead of the writer
+(``AudioEngine.set_trigger``). The pre-trigger window is the pre-roll
+kept in the ring, so a take starts ``pre_seconds`` before the crossing;
+while an event is open the writer is held back to ``pending_end``, so the
+take stops at the exact end position even though that is only known once
+the hold time has passed. Every event is its own file.
+
+    engine.set_trigger(TriggerSettings(start_dbfs=-30), EventPaths("event_%Y%m%d_{n:04d}.wav"))
+    ...
+    engine.set_trigger(None)
+"""
+import math
+import os
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass
+class TriggerSettings:
+    """
+    Thresholds and windows of a trigger; levels are dBFS of the highest channel.
+    """
+    start_dbfs: float = -30.0  # A sample at or above this starts an event
+    stop_dbfs: float = None  # The level an event must stay under to end (default: 6 dB below the start)
+    slope_dbfs: float = None  # Also start when consecutive samples differ by this much (clicks, hits)
+    pre_seconds: float = 0.5  # Audio kept from before the crossing
+    post_seconds: float = 1.0  # Audio kept after the last sample above the stop level
+    hold_seconds: float = 0.5  # Quiet time before an event ends; louder samples in between extend it
+    max_seconds: float = None  # Split events longer than this
+
+    @property
+    def release_dbfs(self):
+        return self.start_dbfs - 6.0 if self.stop_dbfs is None else min(self.stop_dbfs, self.start_dbfs)
+
+
+@dataclass
+class TriggerEvent:
+    """
+    A start or stop decision.
+
+    Attributes:
+        kind (str): ``"start"`` or ``"stop"``
+        position (int): Absolute ring position; the crossing sample for a start, the end (exclusive) for a stop
+        reason (str): ``"level"``/``"slope"`` for starts, ``"quiet"``/``"max_length"`` for stops
+    """
+    kind: str
+    position: int
+    reason: str
+
+
+def _threshold(dbfs):
+    """
+    Smallest int16 magnitude at or above ``dbfs``.
+    """
+    return int(min(32767, max(1, math.ceil(32768 * 10 ** (dbfs / 20)))))
+
+
+class TriggerDetector:
+    """
+    Sample-accurate start/stop detection over consecutive blocks.
+
+    Args:
+        rate (int): Sampling rate (Hz)
+        channels (int): Channels per frame
+        settings (TriggerSettings): Thresholds and windows
+    """
+
+    def __init__(self, rate, channels, settings=None):
+        self.rate = rate
+        self.channels = channels
+        self.settings = settings or TriggerSettings()
+        s = self.settings
+        self._start = _threshold(s.start_dbfs)
+        self._release = _threshold(s.release_dbfs)
+        self._slope = _threshold(s.slope_dbfs) if s.slope_dbfs is not None else None
+        self._post = int(round(s.post_seconds * rate))
+        # Quiet frames after the last loud sample before the end is known; the post window must be captured too
+        self._wait = max(int(round(s.hold_seconds * rate)), self._post)
+        self._max = int(round(s.max_seconds * rate)) if s.max_seconds else None
+        self.reset()
+
+    def reset(self):
+        self.start = None  # Position of the open event's crossing
+        self.last_active = None  # Last sample of the open event at or above the stop level
+        self._previous = None  # Last frame seen, for the slope across blocks
+
+    @property
+    def active(self):
+        return self.start is not None
+
+    @property
+    def pending_end(self):
+        """
+        Earliest position the open event can end at (None while idle); audio before it belongs to the event.
+        """
+        return None if self.start is None else self.last_active + 1 + self._post
+
+    def _loud(self, samples, threshold):
+        # Compare in int16; abs() would overflow on -32768
+        return ((samples >= threshold) | (samples <= -threshold)).any(axis=1)
+
+    def _start_mask(self, samples):
+        level = self._loud(samples, self._start)
+        if self._slope is None:
+            return level, None
+        x = samples.astype(np.int32)
+        previous = x[:1] if self._previous is None else self._previous[None]
+        jumps = (np.abs(np.diff(x, axis=0, prepend=previous)) >= self._slope).any(axis=1)
+        return level | jumps, level
+
+    def process(self, position, samples):
+        """
+        Scan one block.
+
+        Args:
+            position (int): Absolute position of the first frame
+            samples (numpy.ndarray): ``(frames, channels)`` int16
+
+        Returns:
+            list: ``TriggerEvent`` objects in order
+        """
+        events = []
+        n = len(samples)
+        if not n:
+            return events
+        starts = level = loud = None  # Masks, computed once per block when first needed
+        i = 0
+        while i < n:
+            if self.start is None:
+                if starts is None:
+                    starts, level = self._start_mask(samples)
+                hits = starts[i:]
+                j = int(hits.argmax())
+                if not hits[j]:
+                    break
+                i += j
+                reason = "level" if level is None or level[i] else "slope"
+                self.start = self.last_active = position + i
+                events.append(TriggerEvent("start", position + i, reason))
+                i += 1
+                continue
+
+            if loud is None:
+                loud = self._loud(samples, self._release)
+            cap = None if self._max is None else self.start + self._max - position  # Where the event must end
+            limit = n if cap is None else max(i, min(n, cap))
+            marks = np.flatnonzero(loud[i:limit]) + (position + i)
+            # Gaps between loud samples, from the last one before this stretch; the first long one ends the event
+            ended = np.flatnonzero(np.diff(marks, prepend=self.last_active) > self._wait)
+            if len(ended):
+                k = ended[0]
+                i = self._stop(events, int(marks[k - 1]) if k else self.last_active) - position
+                continue
+            if len(marks):
+                self.last_active = int(marks[-1])
+            if position + limit - self.last_active - 1 >= self._wait:
+                i = self._stop(events, self.last_active) - position
+                continue
+            if cap is not None and cap <= n:
+                events.append(TriggerEvent("stop", position + cap, "max_length"))
+                self.start = self.last_active = None
+                i = cap
+                continue
+            break
+        self._previous = samples[-1].astype(np.int32)
+        return events
+
+    def _stop(self, events, last):
+        """
+        End the open event after its last loud sample; returns where scanning for the next one resumes.
+        """
+        events.append(TriggerEvent("stop", last + 1 + self._post, "quiet"))
+        self.start = self.last_active = None
+        return last + 1 + self._wait
+
+
+class EventPaths:
+    """
+    File names for triggered events: ``strftime`` codes and an ``{n}`` event counter.
+
+    A plain class rather than a closure so it can be sent to a capture process.
+
+        EventPaths("hits/%Y%m%d_%H%M%S_{n:04d}.wav")
+    """
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.count = 0
+
+    def __call__(self):
+        self.count += 1
+        name = time.strftime(self.pattern)
+        if "{n" in name:
+            return name.format(n=self.count)
+        root, ext = os.path.splitext(name)
+        return f"{root}_{self.count:04d}{ext}"
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+WAV file output for captured audio.
+"""
+import os
+import time
+import wave
+
+import numpy as np
+
+
+class WaveWriter:
+
+    def __init__(self, fn: str, channels=1, rate=44100, sample_width=2):
+        self.fn = fn
+        self.CHANNELS = channels  # Mono recording by default
+        self.RATE = rate  # Sampling rate (Hz)
+        self.SAMPLE_WIDTH = sample_width  # Bytes per sample (2 = int16)
+        self.frames_written = 0
+        self.w = None
+
+    def init(self, sw=None, fn: str = None):
+        if fn is None:
+            fn = self.fn
+        if sw is not None:
+            self.SAMPLE_WIDTH = sw
+        try:
+            self.w = wave.open(fn, 'wb')
+            self.w.setnchannels(self.CHANNELS)
+            self.w.setsampwidth(self.SAMPLE_WIDTH)
+            self.w.setframerate(self.RATE)
+        except Exception as e:
+            print(f"Error initializing wave file: {e}")
+            raise e
+        self.fn = fn
+        self.frames_written = 0
+
+    def write(self, data):
+        """
+        Write audio data to the wave file.
+
+        Args:
+            data (bytes | numpy.ndarray): Audio data to write; contiguous arrays are written without copying
+        """
+        self.w.writeframes(data)
+        self.frames_written += memoryview(data).nbytes // (self.SAMPLE_WIDTH * self.CHANNELS)
+
+    @property
+    def bytes_written(self):
+        return self.frames_written * self.SAMPLE_WIDTH * self.CHANNELS
+
+    def close(self):
+        if self.w is not None:
+            self.w.close()
+            self.w = None
+
+
+class RotatingWaveWriter:
+    """
+    ``WaveWriter`` that starts a new file every ``max_frames`` frames or ``max_bytes`` bytes.
+
+    Files are split on exact frame boundaries, so concatenating them gives
+    back the continuous capture. ``fn`` may contain ``strftime`` codes and a
+    ``{n}`` placeholder for the file sequence number; it is expanded when
+    each file is opened.
+
+    Args:
+        fn (str): File name pattern, e.g. ``"rec_%Y%m%d_%H%M%S_{n:04d}.wav"``
+        max_frames (int, optional): Frames per file
+        max_bytes (int, optional): Sample data bytes per file
+    """
+
+    def __init__(self, fn: str, channels=1, rate=44100, sample_width=2, max_frames=None, max_bytes=None):
+        self.pattern = fn
+        self.CHANNELS = channels
+        self.RATE = rate
+        self.SAMPLE_WIDTH = sample_width
+        limits = [m for m in (max_frames, max_bytes and max_bytes // (sample_width * channels)) if m]
+        self.max_frames = min(limits) if limits else None
+        self.files = []
+        self.frames_written = 0
+        self._current = None
+        self.on_rotate = None  # Optional callback(closed_path, new_path)
+
+    @property
+    def fn(self):
+        return self._current.fn if self._current is not None else None
+
+    @property
+    def bytes_written(self):
+        return self.frames_written * self.SAMPLE_WIDTH * self.CHANNELS
+
+    def _expand(self):
+        name = time.strftime(self.pattern)
+        if "{n" in name:
+            name = name.format(n=len(self.files))
+        elif self.files and self.max_frames:
+            root, ext = os.path.splitext(name)
+            name = f"{root}_{len(self.files):04d}{ext}"
+        return name
+
+    def _open_next(self):
+        previous = self.fn
+        if self._current is not None:
+            self._current.close()
+        self._current = WaveWriter(self._expand(), self.CHANNELS, self.RATE, self.SAMPLE_WIDTH)
+        self._current.init()
+        self.files.append(self._current.fn)
+        if previous is not None and self.on_rotate is not None:
+            self.on_rotate(previous, self._current.fn)
+
+    def init(self, sw=None, fn: str = None):
+        if fn is not None:
+            self.pattern = fn
+        if sw is not None:
+            self.SAMPLE_WIDTH = sw
+        self.files = []
+        self.frames_written = 0
+        self._open_next()
+
+    def write(self, data):
+        """
+        Write frames, rotating to a new file at the frame limit.
+
+        Args:
+            data (bytes | numpy.ndarray): Interleaved int16 samples or ``(frames, channels)`` array
+        """
+        if not isinstance(data, np.ndarray):
+            data = np.frombuffer(data, dtype=np.int16)
+        frames = data.reshape(-1, self.CHANNELS)
+        while len(frames):
+            room = len(frames)
+            if self.max_frames:
+                room = min(room, self.max_frames - self._current.frames_written)
+                if room == 0:
+                    self._open_next()
+                    continue
+            self._current.write(frames[:room])
+            self.frames_written += room
+            frames = frames[room:]
+
+    def close(self):
+        if self._current is not None:
+            self._current.close()
+            self._current = None
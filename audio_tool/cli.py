@@ -0,0 +1,541 @@
+#!/usr/bin/env python3
+"""
+Headless command-line front end: ``audio-tool record`` / ``monitor`` / ``analyze`` / ``export`` / ``latency``.
+
+Runs the capture engine and WAV writer without importing PySide6, for
+unattended capture on server machines.
+"""
+import argparse
+import functools
+import json
+import os
+import signal
+import sys
+import threading
+import time
+
+import numpy as np
+from loguru import logger
+
+from audio_tool.audio.backend import PyAudioBackend, SyntheticBackend
+from audio_tool.audio.devices import DeviceRegistry
+from audio_tool.audio.engine import PASSTHROUGH_FRAMES, AudioEngine
+from audio_tool.audio.latency import PROFILES
+from audio_tool.audio.memory import MB, default_budget
+from audio_tool.audio.metadata import recording_section, sidecar_path, update_sidecar
+from audio_tool.audio import pipeline as dsp
+from audio_tool.audio.writer import RotatingWaveWriter
+
+
+def _make_backend(args):
+    if args.synthetic:
+        # Triggers need something to trigger on: 1 s tone bursts every 4 s
+        return SyntheticBackend(bursts=(1.0, 3.0) if getattr(args, "trigger", None) is not None else None)
+    return PyAudioBackend()
+
+
+def _pipeline_factory(args, rate):
+    """
+    Build the per-take DSP chain from the command line, or None for raw capture.
+    """
+    from audio_tool.audio.resample import Resample
+    stages = []
+    if args.gain:
+        stages.append(dsp.Gain(args.gain))
+    if args.highpass:
+        stages.append(dsp.HighPass(args.highpass))
+    if args.mono:
+        stages.append(dsp.Mixdown())
+    if args.output_rate and args.output_rate != rate:
+        stages.append(Resample(args.output_rate, args.resample_quality))
+    if args.limit is not None:
+        stages.append(dsp.Limiter(args.limit))
+    if not stages:
+        return None
+    stages.append(dsp.DitherToInt16())
+    return lambda rate, channels: dsp.Pipeline(stages, rate, channels, max_frames=4096)
+
+
+def _device_registry(backend):
+    registry = DeviceRegistry(scanner=backend.list_devices)
+    registry.refresh()
+    return registry
+
+
+def _resolve_device(backend, device, output=False):
+    """
+    Accept a PortAudio index, a stable device id or part of a device name.
+
+    Args:
+        output (bool): Look for an output device instead of an input device
+
+    Returns:
+        DeviceInfo: The device, or None for the default one
+    """
+    if not device:
+        return None
+    registry = _device_registry(backend)
+    candidates = registry.devices(input_only=not output, output_only=output)
+    if device.isdigit():
+        info = next((d for d in candidates if d.index == int(device)), None)
+    else:
+        info = registry.get(device) or next((d for d in candidates if device in d.name), None)
+    if info is None or not (info.is_output if output else info.is_input):
+        raise SystemExit(f"未找到{'输出' if output else '输入'}设备: {device}")
+    logger.info(f"using {'output' if output else 'input'} device {info.index}: {info.name}")
+    return info
+
+
+def _default_input(backend, info):
+    if info is not None:
+        return info
+    return next((d for d in _device_registry(backend).devices(input_only=True) if d.is_default_input), None)
+
+
+def _capture_rate(backend, info, rate):
+    """
+    ``--rate native`` captures at the device's default rate (44100 when unknown).
+    """
+    if rate != "native":
+        return rate
+    info = _default_input(backend, info)
+    if info is not None:
+        logger.info(f"native rate {info.default_sample_rate:.0f} Hz")
+        return int(info.default_sample_rate)
+    return 44100
+
+
+def _describe_device(backend, info):
+    """
+    ``(device_id, name)`` of the capture device, for the catalog.
+    """
+    info = _default_input(backend, info)
+    if info is None:
+        return None, None
+    return info.id, info.name
+
+
+def _register_take(args, backend, device_info, info, loudness):
+    """
+    Add a finished take to the catalog unless ``--no-catalog`` was given.
+    """
+    if args.no_catalog:
+        return
+    from audio_tool.audio.catalog import Catalog
+    try:
+        device_id, device_name = _describe_device(backend, device_info)
+        catalog = Catalog(args.catalog)
+        try:
+            catalog.add_recording(info, device_id=device_id, device_name=device_name, loudness=loudness,
+                                  sidecar=sidecar_path((info.files or [info.path])[0]))
+        finally:
+            catalog.close()
+    except Exception as e:
+        logger.error(f"登记录音失败: {str(e)}")
+
+
+def _finish_take(args, engine, backend, device_info, info, loudness):
+    """
+    Print the take's files, write its sidecar and register it.
+    """
+    for path in info.files or [info.path]:
+        print(path, flush=True)
+    reading = loudness.reading()
+    update_sidecar((info.files or [info.path])[0], recording=recording_section(info),
+                   loudness=reading.as_dict(), latency=engine.latency.as_dict(), clock=info.clock)
+    _register_take(args, backend, device_info, info, reading)
+    logger.info(f"recorded {info.duration:.2f} s in {len(info.files or [])} file(s)")
+
+
+def _trigger_settings(args):
+    from audio_tool.audio.trigger import TriggerSettings
+    return TriggerSettings(start_dbfs=args.trigger, stop_dbfs=args.trigger_stop, slope_dbfs=args.trigger_slope,
+                           pre_seconds=args.pre, post_seconds=args.post, hold_seconds=args.hold,
+                           max_seconds=args.max_event)
+
+
+def _on_trigger_take(args, engine, backend, device_info, loudness, event, payload):
+    """
+    Engine event listener in trigger mode: reset the meters per event, finish each take as it closes.
+    """
+    if event == "recording_started":
+        loudness.reset()
+    elif event == "recording_stopped":
+        try:
+            _finish_take(args, engine, backend, device_info, payload, loudness)
+        except Exception as e:
+            logger.error(f"保存录音信息失败: {str(e)}")
+
+
+class LevelMeter:
+    """
+    Peak level since the last read, updated from the engine thread.
+    """
+
+    def __init__(self):
+        self.peak = 0
+
+    def __call__(self, block):
+        peak = int(np.abs(block.samples).max(initial=0))
+        if peak > self.peak:
+            self.peak = peak
+
+    def take_dbfs(self):
+        peak, self.peak = self.peak, 0
+        return 20 * np.log10(peak / 32768) if peak else float("-inf")
+
+
+def _stats_line(engine, meter, loudness, t0):
+    stats = engine.stats
+    elapsed = time.monotonic() - t0
+    line = (f"{elapsed:8.1f}s  captured {stats.frames_captured / engine.rate:8.1f}s  "
+            f"written {stats.frames_written / engine.rate:8.1f}s  overflows {stats.overflows}  "
+            f"dropped {stats.dropped_frames}  latency {stats.latency_us / 1000:5.1f} ms/{stats.frames_per_buffer}  "
+            f"drift {engine.clock.ppm:+6.1f} ppm  "
+            f"peak {meter.take_dbfs():6.1f} dBFS  "
+            f"S {loudness.short_term:6.1f} I {loudness.integrated:6.1f} LUFS  "
+            f"mem {default_budget().ram / MB:6.1f} MB")
+    if engine.passthrough:
+        line += (f"  passthrough {stats.passthrough_latency_us / 1000:.1f} ms  "
+                 f"underflows {stats.output_underflows}  late {stats.late_callbacks}")
+    if engine.current_file:
+        line += f"  -> {engine.current_file}"
+    return line
+
+
+def _run(args, record):
+    # Only what this run uses is imported: the metrics server, the catalog's sqlite3, the trigger
+    from audio_tool.audio.catalog import library_dir
+    from audio_tool.audio.loudness import LoudnessMeter
+    from audio_tool.utils.profiling import profiler
+
+    if args.memory_limit is not None:
+        default_budget().limit = int(args.memory_limit * MB)
+    backend = _make_backend(args)
+    device_info = _resolve_device(backend, args.device)
+    # The engine gets the stable id and resolves it to an index where it opens the stream
+    device = device_info.id if device_info is not None else None
+    output_info = _resolve_device(backend, args.passthrough, output=True) if args.passthrough else None
+    rate = _capture_rate(backend, device_info, args.rate)
+    engine = AudioEngine(backend, rate=rate, channels=args.channels, frames_per_buffer=args.chunk,
+                         latency_profile=args.latency, auto_tune=args.auto_tune)
+    meter = LevelMeter()
+    engine.add_block_listener(meter)
+    loudness = LoudnessMeter(rate, args.channels)
+    engine.add_block_listener(loudness)
+
+    stop = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    if hasattr(signal, "SIGTERM"):
+        signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    # Profiling: from the start with $AUDIO_TOOL_PROFILE, or toggled with `kill -USR1 <pid>`
+    profiles = os.path.join(library_dir(), "profiles")
+    profiler().start_from_env(profiles)
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, lambda *_: profiler().toggle(profiles))
+
+    metrics = None
+    try:
+        if args.metrics_port is not None or args.metrics_file:
+            from audio_tool.audio.metrics import MetricsExporter, engine_metrics
+            metrics = MetricsExporter(engine_metrics(engine, loudness), port=args.metrics_port,
+                                      path=args.metrics_file)
+            metrics.start()
+        engine.open_device(device).result(10)
+        if args.passthrough is not None:
+            output = output_info.id if output_info is not None else None
+            if not engine.set_passthrough(True, output, args.passthrough_gain, args.passthrough_chunk).result(10):
+                raise OSError(f"无法打开监听输出设备: {args.passthrough or '默认'}")
+        if record:
+            rotate_frames = int(args.rotate_seconds * (args.output_rate or rate)) if args.rotate_seconds else None
+            rotate_bytes = int(args.rotate_mb * 1024 * 1024) if args.rotate_mb else None
+            engine.writer_factory = functools.partial(
+                RotatingWaveWriter, max_frames=rotate_frames, max_bytes=rotate_bytes)
+            engine.pipeline_factory = _pipeline_factory(args, rate)
+            if args.trigger is not None:
+                # Every event is its own take, finished on the engine thread as it ends
+                engine.add_event_listener(functools.partial(_on_trigger_take, args, engine, backend, device_info,
+                                                            loudness))
+                from audio_tool.audio.trigger import EventPaths
+                engine.set_trigger(_trigger_settings(args), EventPaths(args.output), device).result(10)
+            else:
+                engine.start_recording(args.output, device).result(10)
+                loudness.reset()
+    except Exception as e:
+        logger.error(str(e))
+        profiler().stop()
+        if metrics is not None:
+            metrics.stop()
+        engine.shutdown()
+        backend.terminate()
+        return 1
+
+    t0 = time.monotonic()
+    deadline = t0 + args.duration if args.duration else None
+    next_stats = t0 + args.stats_interval
+    while not stop.is_set():
+        now = time.monotonic()
+        if deadline is not None and now >= deadline:
+            break
+        if now >= next_stats:
+            print(_stats_line(engine, meter, loudness, t0), flush=True)
+            next_stats += args.stats_interval
+        stop.wait(min(0.1, max(0.0, next_stats - now)))
+
+    if record and args.trigger is not None:
+        events = engine.set_trigger(None).result(10)
+        logger.info(f"{events} triggered event(s)")
+    elif record:
+        info = engine.stop_recording().result(10)
+        if info is not None:
+            _finish_take(args, engine, backend, device_info, info, loudness)
+    print(_stats_line(engine, meter, loudness, t0), flush=True)
+    logger.info("latency per stage (age of the newest sample):\n" + engine.latency.format())
+    logger.info(f"audio buffer memory: {json.dumps(default_budget().summary(), ensure_ascii=False)}")
+    profiler().stop()
+    if metrics is not None:
+        metrics.stop()
+    engine.shutdown()
+    backend.terminate()
+    return 0
+
+
+def cmd_record(args):
+    return _run(args, record=True)
+
+
+def cmd_monitor(args):
+    return _run(args, record=False)
+
+
+def cmd_devices(args):
+    backend = _make_backend(args)
+    for info in _device_registry(backend).devices():
+        kind = ("in" if info.is_input else "") + ("/out" if info.is_output else "")
+        default = "*" if info.is_default_input else " "
+        print(f"{default}{info.index:3d}  {info.id}  {kind:6s} {info.default_sample_rate:7.0f} Hz  "
+              f"{info.host_api}: {info.name}")
+    backend.terminate()
+    return 0
+
+
+def cmd_latency(args):
+    from audio_tool.audio.loopback import read_source, run_loopback
+    if args.synthetic:
+        backend = SyntheticBackend(loopback_delay=args.loopback_delay)
+    else:
+        backend = PyAudioBackend()
+    try:
+        input_info = _resolve_device(backend, args.device)
+        # Same process as the streams, so the index is valid here
+        input_index = input_info.index if input_info is not None else None
+        output_index = int(args.output_device) if args.output_device is not None else None
+        source = read_source(args.source, args.rate) if args.source else None
+        result = run_loopback(backend, input_index, output_index, rate=args.rate, source=source,
+                              seconds=args.duration, frames_per_buffer=args.chunk, latency_profile=args.latency)
+    except Exception as e:
+        logger.error(str(e))
+        return 1
+    finally:
+        backend.terminate()
+
+    if args.json:
+        print(json.dumps(result.as_dict(), ensure_ascii=False))
+    else:
+        print(f"matched {result.matched} of {result.segments} segments")
+        print(result.round_trip.format())
+        print(result.stages.format())
+    return 0 if result.matched else 1
+
+
+def _rate_arg(value):
+    if value == "native":
+        return value
+    try:
+        return int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid rate: {value}")
+
+
+def _wav_paths(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                for name in sorted(files):
+                    if name.lower().endswith(".wav"):
+                        yield os.path.join(root, name)
+        else:
+            yield path
+
+
+def cmd_analyze(args):
+    from audio_tool.audio.analysis import analyze_files
+
+    paths = list(_wav_paths(args.paths))
+    if not paths:
+        logger.error("没有找到 WAV 文件")
+        return 1
+
+    def progress(done, total, elapsed):
+        rate = done / elapsed / 1e6 if elapsed else 0.0
+        print(f"\r{done / 1e6:10.1f} / {total / 1e6:.1f} MB  {rate:8.1f} MB/s", end="", file=sys.stderr, flush=True)
+
+    t0 = time.perf_counter()
+    results = analyze_files(
+        paths, jobs=args.jobs, chunk_bytes=int(args.chunk_mb * 1024 * 1024), silence_db=args.silence_db,
+        min_silence=args.min_silence, progress=None if args.quiet else progress,
+    )
+    elapsed = time.perf_counter() - t0
+    if not args.quiet:
+        print(file=sys.stderr)
+
+    failed = 0
+    for stats in results:
+        if stats.error:
+            failed += 1
+        if args.json:
+            print(json.dumps(stats.as_dict(), ensure_ascii=False))
+        elif stats.error:
+            print(f"{stats.path}: {stats.error}")
+        else:
+            print(f"{stats.duration:9.2f}s  peak {stats.peak_dbfs:6.1f}  rms {stats.rms_dbfs:6.1f} dBFS  "
+                  f"clipped {stats.clipped:6d}  silence {stats.silence_seconds:8.2f}s "
+                  f"({len(stats.silent_regions)})  {stats.path}")
+    total = sum(stats.size for stats in results)
+    logger.info(f"{len(results)} file(s), {total / 1e6:.1f} MB in {elapsed:.1f} s "
+                f"({total / 1e6 / elapsed if elapsed else 0:.1f} MB/s), {failed} failed")
+    return 1 if failed else 0
+
+
+def cmd_export(args):
+    from audio_tool.audio.export import export_region
+    from audio_tool.audio.riff import read_wav_info
+
+    try:
+        info = read_wav_info(args.source)
+        rate = info.rate
+        end = info.frames if args.end is None else int(round(args.end * rate))
+        result = export_region(args.source, args.output, int(round(args.start * rate)), end)
+    except (OSError, ValueError) as e:
+        logger.error(f"导出选区失败: {e}")
+        return 1
+    logger.info(f"{result.frames / rate:.2f} s ({result.bytes / 1e6:.1f} MB) written to {result.path} "
+                f"via {result.method} in {result.seconds:.2f} s")
+    return 0
+
+
+def _add_capture_options(parser):
+    parser.add_argument("-d", "--device", help="input device index, id or part of its name (default: system default)")
+    parser.add_argument("-r", "--rate", type=_rate_arg, default=44100,
+                        help="capture rate in Hz, or 'native' for the device default (default: 44100)")
+    parser.add_argument("-c", "--channels", type=int, default=1, help="input channels (default: 1)")
+    parser.add_argument("--chunk", type=int, default=None, help="frames per buffer (default: from the latency profile)")
+    parser.add_argument("--latency", choices=list(PROFILES), default="balanced",
+                        help="buffer size and device latency profile (default: balanced)")
+    parser.add_argument("--auto-tune", action="store_true",
+                        help="grow or shrink the buffer to the measured callback jitter and overflows")
+    parser.add_argument("-t", "--duration", type=float, default=None, help="stop after this many seconds")
+    parser.add_argument("--stats-interval", type=float, default=5.0, help="seconds between stats lines (default: 5)")
+    parser.add_argument("--synthetic", action="store_true", help="capture a test tone instead of a device")
+    parser.add_argument("--memory-limit", type=float, default=None, metavar="MB",
+                        help="RAM for audio buffers; colder data spills to temp files (default: $AUDIO_TOOL_MEMORY_MB "
+                             "or 1/8 of RAM, at most 512)")
+    parser.add_argument("--metrics-port", type=int, default=None, metavar="PORT",
+                        help="serve Prometheus metrics on http://127.0.0.1:PORT/metrics")
+    parser.add_argument("--metrics-file", default=None, metavar="PATH",
+                        help="rewrite Prometheus metrics to PATH every second (textfile collector)")
+    parser.add_argument("--passthrough", nargs="?", const="", default=None, metavar="OUTPUT",
+                        help="play the input on an output device: index, id or part of its name "
+                             "(default device if omitted), full duplex")
+    parser.add_argument("--passthrough-gain", type=float, default=0.0, metavar="DB",
+                        help="passthrough gain in dB (default: 0)")
+    parser.add_argument("--passthrough-chunk", type=int, default=None, metavar="FRAMES",
+                        help=f"frames per buffer while passing through (default: {PASSTHROUGH_FRAMES})")
+
+
+def build_parser():
+    from audio_tool.audio.resample import QUALITY_PRESETS
+    parser = argparse.ArgumentParser(prog="audio-tool", description="Headless audio capture")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    record = sub.add_parser("record", help="capture to WAV files")
+    _add_capture_options(record)
+    record.add_argument("-o", "--output", default="rec_%Y%m%d_%H%M%S.wav",
+                        help="output file; strftime codes and {n} (file number) are expanded")
+    record.add_argument("--rotate-seconds", type=float, default=None, help="start a new file every N seconds")
+    record.add_argument("--rotate-mb", type=float, default=None, help="start a new file every N MiB")
+    record.add_argument("--gain", type=float, default=0.0, help="gain in dB applied before writing")
+    record.add_argument("--highpass", type=float, default=None, metavar="HZ", help="high-pass filter cutoff")
+    record.add_argument("--limit", type=float, default=None, metavar="DBFS", help="peak limiter ceiling")
+    record.add_argument("--mono", action="store_true", help="mix all channels down to mono")
+    record.add_argument("--output-rate", type=int, default=None, metavar="HZ",
+                        help="resample to this rate before writing (default: capture rate)")
+    record.add_argument("--resample-quality", choices=list(QUALITY_PRESETS), default="high",
+                        help="resampler filter length (default: high)")
+    record.add_argument("--catalog", default=None, metavar="PATH",
+                        help="take catalog to register the recording in (default: the GUI's library catalog)")
+    record.add_argument("--no-catalog", action="store_true", help="do not register the recording")
+    trigger = record.add_argument_group("trigger", "record only events above a threshold, one file per event "
+                                                   "(OUTPUT may contain {n}, the event number)")
+    trigger.add_argument("--trigger", type=float, default=None, metavar="DBFS", help="start level of an event")
+    trigger.add_argument("--trigger-stop", type=float, default=None, metavar="DBFS",
+                         help="level an event must stay under to end (default: 6 dB below --trigger)")
+    trigger.add_argument("--trigger-slope", type=float, default=None, metavar="DBFS",
+                         help="also start on a sample-to-sample jump this large (clicks, hits)")
+    trigger.add_argument("--pre", type=float, default=0.5, metavar="SECONDS", help="audio kept before the crossing")
+    trigger.add_argument("--post", type=float, default=1.0, metavar="SECONDS",
+                         help="audio kept after the last loud sample")
+    trigger.add_argument("--hold", type=float, default=0.5, metavar="SECONDS", help="quiet time that ends an event")
+    trigger.add_argument("--max-event", type=float, default=None, metavar="SECONDS", help="split longer events")
+    record.set_defaults(func=cmd_record)
+
+    monitor = sub.add_parser("monitor", help="capture and report levels without writing")
+    _add_capture_options(monitor)
+    monitor.set_defaults(func=cmd_monitor)
+
+    analyze = sub.add_parser("analyze", help="duration, level, clipping and silence statistics of WAV files")
+    analyze.add_argument("paths", nargs="+", help="WAV files or directories (searched recursively)")
+    analyze.add_argument("-j", "--jobs", type=int, default=None, help="worker processes (default: CPU count)")
+    analyze.add_argument("--chunk-mb", type=float, default=64, help="work unit size in MiB (default: 64)")
+    analyze.add_argument("--silence-db", type=float, default=-60.0, help="silence threshold in dBFS (default: -60)")
+    analyze.add_argument("--min-silence", type=float, default=0.5,
+                         help="shortest silent stretch to report, seconds (default: 0.5)")
+    analyze.add_argument("--json", action="store_true", help="one JSON object per file")
+    analyze.add_argument("-q", "--quiet", action="store_true", help="no progress line")
+    analyze.set_defaults(func=cmd_analyze)
+
+    export = sub.add_parser("export", help="copy a time range of a WAV file into a new file without decoding")
+    export.add_argument("source", help="WAV file to cut from")
+    export.add_argument("output", help="new WAV file")
+    export.add_argument("--start", type=float, default=0.0, metavar="SECONDS", help="start of the region (default: 0)")
+    export.add_argument("--end", type=float, default=None, metavar="SECONDS",
+                        help="end of the region (default: end of file)")
+    export.set_defaults(func=cmd_export)
+
+    latency = sub.add_parser("latency", help="measure round-trip latency by playing a test signal into the input")
+    latency.add_argument("-d", "--device", help="input device index, id or part of its name (default: system default)")
+    latency.add_argument("--output-device", default=None, help="output device index (default: system default)")
+    latency.add_argument("-r", "--rate", type=int, default=44100, help="sampling rate in Hz (default: 44100)")
+    latency.add_argument("--chunk", type=int, default=None, help="frames per buffer (default: from the latency profile)")
+    latency.add_argument("--latency", choices=list(PROFILES), default="balanced",
+                         help="buffer size and device latency profile (default: balanced)")
+    latency.add_argument("--source", default=None, help="16-bit WAV file to play (default: a noise burst train)")
+    latency.add_argument("-t", "--duration", type=float, default=5.0, help="length of the burst train in seconds")
+    latency.add_argument("--synthetic", action="store_true", help="use a simulated loopback cable")
+    latency.add_argument("--loopback-delay", type=float, default=0.05, help="delay of the simulated cable (seconds)")
+    latency.add_argument("--json", action="store_true", help="print the result as JSON")
+    latency.set_defaults(func=cmd_latency)
+
+    devices = sub.add_parser("devices", help="list audio devices")
+    devices.add_argument("--synthetic", action="store_true", help=argparse.SUPPRESS)
+    devices.set_defaults(func=cmd_devices)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
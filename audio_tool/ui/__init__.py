@@ -1,3 +1,4 @@
 # UI components for Audio Recorder and Renderer Tool
 from .main_window import MainWindow
-from .waveform_widget import WaveformWidget
\ No newline at end of file
+from .waveform_widget import WaveformWidget
+from .device_combo import DeviceComboBox
\ No newline at end of file
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Device selection combo box that keeps its selection across rescans.
+"""
+from PySide6.QtWidgets import QComboBox
+from PySide6.QtCore import Signal
+
+
+class DeviceComboBox(QComboBox):
+    """
+    Combo box whose items carry stable device ids as item data.
+    """
+
+    popup_about_to_show = Signal()  # Emitted right before the drop-down opens
+
+    def showPopup(self):
+        self.popup_about_to_show.emit()
+        super().showPopup()
+
+    def set_devices(self, devices):
+        """
+        Replace all items, keeping the current selection if it still exists.
+
+        Args:
+            devices (list): Dictionaries with 'id' and 'name'
+        """
+        selected = self.currentData()
+        self.blockSignals(True)
+        self.clear()
+        for device in devices:
+            self.addItem(device["name"], device["id"])
+        self.blockSignals(False)
+        self.select_device(selected)
+
+    def apply_diff(self, diff, input_only=True):
+        """
+        Update items in place from a ``DeviceDiff``.
+
+        Args:
+            diff (DeviceDiff): Result of a registry refresh
+            input_only (bool): Ignore devices without input channels
+        """
+        selected = self.currentData()
+        self.blockSignals(True)
+        for info in diff.removed:
+            row = self.findData(info.id)
+            if row >= 0:
+                self.removeItem(row)
+        for info in diff.changed:
+            row = self.findData(info.id)
+            if row >= 0:
+                self.setItemText(row, info.name)
+        for info in diff.added:
+            if (info.is_input if input_only else info.is_output) and self.findData(info.id) < 0:
+                self.addItem(info.name, info.id)
+        self.blockSignals(False)
+        if not self.select_device(selected):
+            self.currentIndexChanged.emit(self.currentIndex())
+
+    def select_device(self, device_id):
+        """
+        Select the item for ``device_id``.
+
+        Returns:
+            bool: True if the device is present
+        """
+        row = self.findData(device_id)
+        if row >= 0:
+            self.setCurrentIndex(row)
+            return True
+        return False
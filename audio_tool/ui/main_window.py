@@ -4,12 +4,25 @@ Main window for the Audio Recorder and Renderer Tool.
 """
 from PySide6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-    QPushButton, QComboBox, QLabel, QFrame, QSizePolicy
+    QPushButton, QComboBox, QLabel, QFrame, QSizePolicy,
+    QCheckBox, QDoubleSpinBox, QDockWidget
 )
-from PySide6.QtGui import QPalette, QColor, QFont
+from PySide6.QtGui import QPalette, QColor, QFont, QAction, QKeySequence
+import os
+
 from PySide6.QtCore import Qt, QTimer
+from loguru import logger
 from audio_tool.audio import AudioRecorder
+from audio_tool.audio.bus import LATEST
+from audio_tool.audio.catalog import library_dir
+from audio_tool.audio.latency import PROFILES
+from audio_tool.audio.memory import MB, default_budget
+from audio_tool.audio.trigger import TriggerSettings
+from audio_tool.utils.profiling import profiler
 from .waveform_widget import WaveformWidget
+from .device_combo import DeviceComboBox
+from .take_browser import TakeBrowser
+from .take_view import TakeView
 
 
 class MainWindow(QMainWindow):
@@ -17,22 +30,30 @@ class MainWindow(QMainWindow):
     Main window class for the Audio Recorder and Renderer Tool.
     """
     
-    def __init__(self):
+    def __init__(self, capture_process=False):
+        """
+        Args:
+            capture_process (bool): Run capture in a separate process, isolated from GUI stalls
+        """
         super().__init__()
         self.setWindowTitle("Audio Recorder & Renderer")
         self.setGeometry(100, 100, 800, 600)
         
         # Initialize audio recorder
-        self.recorder = AudioRecorder()
+        self.recorder = AudioRecorder(out_of_process=capture_process)
         
         # Initialize UI components
         self.init_ui()
+        self.recorder.add_latency_stage(self.waveform_widget.latency)
         
         # Connect signals and slots
         self.connect_signals()
         
         # Load available microphones
         self.load_microphones()
+
+        # Profiling from startup with $AUDIO_TOOL_PROFILE
+        profiler().start_from_env(self.profiles_dir)
         
     def init_ui(self):
         """
@@ -64,13 +85,50 @@ class MainWindow(QMainWindow):
         self.mic_label = QLabel("麦克风:", self)
         mic_layout.addWidget(self.mic_label)
         
-        self.mic_combo = QComboBox(self)
+        self.mic_combo = DeviceComboBox(self)
         self.mic_combo.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
-        # TODO: Populate with available microphones
-        self.mic_combo.addItem("默认麦克风")
+        self.mic_combo.addItem("默认麦克风", None)
         mic_layout.addWidget(self.mic_combo)
         
         controls_layout.addLayout(mic_layout, 1)
+
+        # Pre-roll monitoring: keep the last N seconds before the record click
+        self.monitor_check = QCheckBox("预录", self)
+        self.monitor_check.setToolTip("持续监听麦克风，录音时包含按下按钮前的音频")
+        controls_layout.addWidget(self.monitor_check)
+
+        self.preroll_spin = QDoubleSpinBox(self)
+        self.preroll_spin.setRange(0.5, 30.0)
+        self.preroll_spin.setSingleStep(0.5)
+        self.preroll_spin.setValue(3.0)
+        self.preroll_spin.setSuffix(" 秒")
+        controls_layout.addWidget(self.preroll_spin)
+
+        # Threshold trigger: record each event louder than the threshold to its own take;
+        # the pre-roll duration is the pre-trigger window
+        self.trigger_check = QCheckBox("触发", self)
+        self.trigger_check.setToolTip("电平超过阈值时自动开始录音，安静后自动停止，每次事件保存为单独的录音")
+        controls_layout.addWidget(self.trigger_check)
+
+        self.trigger_spin = QDoubleSpinBox(self)
+        self.trigger_spin.setRange(-90.0, 0.0)
+        self.trigger_spin.setSingleStep(1.0)
+        self.trigger_spin.setValue(-30.0)
+        self.trigger_spin.setSuffix(" dBFS")
+        self.trigger_spin.setToolTip("触发阈值")
+        controls_layout.addWidget(self.trigger_spin)
+
+        # Capture buffer size: a starting profile, auto-tuned to the machine's load
+        self.latency_combo = QComboBox(self)
+        for name, label in zip(PROFILES, ("低延迟", "均衡", "高吞吐")):
+            self.latency_combo.addItem(label, name)
+        self.latency_combo.setCurrentIndex(self.latency_combo.findData(self.recorder.LATENCY_PROFILE))
+        self.latency_combo.setToolTip("采集缓冲区大小; 勾选自动时根据抖动和溢出自动调整")
+        controls_layout.addWidget(self.latency_combo)
+
+        self.auto_tune_check = QCheckBox("自动", self)
+        self.auto_tune_check.setChecked(True)
+        controls_layout.addWidget(self.auto_tune_check)
         
         # Record button
         self.record_button = QPushButton("开始录音", self)
@@ -79,6 +137,12 @@ class MainWindow(QMainWindow):
             "QPushButton:hover { background-color: #FF5252; }"
         )
         controls_layout.addWidget(self.record_button)
+
+        # Pause button: keeps the stream and the file open, the gap is marked in the take
+        self.pause_button = QPushButton("暂停", self)
+        self.pause_button.setEnabled(False)
+        self.pause_button.setToolTip("暂停写入，继续后接着写入同一个文件，暂停处在文件中留有标记")
+        controls_layout.addWidget(self.pause_button)
         
         # Play button
         self.play_button = QPushButton("播放录音", self)
@@ -88,8 +152,64 @@ class MainWindow(QMainWindow):
         )
         self.play_button.setEnabled(False)  # Disabled initially
         controls_layout.addWidget(self.play_button)
+
+        # Playback speed (tape-style, pitch follows)
+        self.speed_combo = QComboBox(self)
+        for speed in (0.5, 0.75, 1.0, 1.5, 2.0):
+            self.speed_combo.addItem(f"{speed:g}x", speed)
+        self.speed_combo.setCurrentIndex(self.speed_combo.findData(1.0))
+        self.speed_combo.setToolTip("播放速度")
+        controls_layout.addWidget(self.speed_combo)
+
+        # Region export: shift-drag or right-drag on the take overview selects
+        self.export_button = QPushButton("导出选区", self)
+        self.export_button.setEnabled(False)
+        self.export_button.setToolTip("在波形上按住 Shift 拖动或右键拖动选择区域，导出为新的录音 (直接复制采样数据，不解码)")
+        controls_layout.addWidget(self.export_button)
+
+        # Take library: catalog browser in a dock, hidden until asked for
+        self.library_button = QPushButton("录音库", self)
+        self.library_button.setCheckable(True)
+        controls_layout.addWidget(self.library_button)
+        self.take_browser = None
+        self.library_dock = None
+        self.selected_take = None  # Take chosen in the library; None plays the last recording
+        if self.recorder.catalog is not None:
+            self.take_browser = TakeBrowser(self.recorder.catalog, self)
+            self.library_dock = QDockWidget("录音库", self)
+            self.library_dock.setWidget(self.take_browser)
+            self.addDockWidget(Qt.RightDockWidgetArea, self.library_dock)
+            self.library_dock.hide()
+        else:
+            self.library_button.setEnabled(False)
         
         main_layout.addLayout(controls_layout)
+
+        # Passthrough: hear the microphone on an output device through a full-duplex stream
+        passthrough_layout = QHBoxLayout()
+        passthrough_layout.setSpacing(5)
+        self.passthrough_check = QCheckBox("监听", self)
+        self.passthrough_check.setToolTip("将麦克风输入实时送到输出设备 (全双工，低延迟)")
+        passthrough_layout.addWidget(self.passthrough_check)
+
+        self.output_combo = DeviceComboBox(self)
+        self.output_combo.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+        self.output_combo.addItem("默认输出设备", None)
+        passthrough_layout.addWidget(self.output_combo, 1)
+
+        self.gain_spin = QDoubleSpinBox(self)
+        self.gain_spin.setRange(-60.0, 12.0)
+        self.gain_spin.setSingleStep(1.0)
+        self.gain_spin.setValue(0.0)
+        self.gain_spin.setSuffix(" dB")
+        self.gain_spin.setToolTip("监听增益")
+        passthrough_layout.addWidget(self.gain_spin)
+
+        # Glitch counters of the capture stream, so dropouts under load are visible
+        self.glitch_label = QLabel(self)
+        self.glitch_label.setStyleSheet("QLabel { color: #90A4AE; }")
+        passthrough_layout.addWidget(self.glitch_label)
+        main_layout.addLayout(passthrough_layout)
         
         # Render area
         render_frame = QFrame(self)
@@ -107,20 +227,110 @@ class MainWindow(QMainWindow):
         self.waveform_widget = WaveformWidget()
         self.waveform_widget.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
         self.render_layout.addWidget(self.waveform_widget)
+
+        # Whole-take overview of the loaded recording; click or drag to seek and scrub
+        self.take_view = TakeView(self)
+        self.take_view.setFixedHeight(90)
+        self.take_view.hide()
+        self.render_layout.addWidget(self.take_view)
+        self.playhead_timer = QTimer(self)
+        self.playhead_timer.timeout.connect(self.update_playhead)
+        self.triggered_takes = 0
         
         main_layout.addWidget(render_frame)
+
+        # Loudness meter (EBU R128)
+        self.loudness_label = QLabel(self)
+        self.loudness_label.setAlignment(Qt.AlignCenter)
+        self.loudness_label.setFont(QFont("Menlo", 11))
+        self.loudness_label.setStyleSheet("QLabel { color: #37474F; }")
+        main_layout.addWidget(self.loudness_label)
+        self.loudness_timer = QTimer(self)
+        self.loudness_timer.timeout.connect(self.update_loudness)
+        self.loudness_timer.start(200)
+        self.update_loudness(force=True)
         
         # Recording timer
         self.recording_timer = QTimer(self)
         self.recording_time = 0
         self.recording_timer.timeout.connect(self.update_recording_time)
+
+        # Background device rescan (hot-plug). PortAudio only sees new hardware when no stream
+        # is open, so an idle standby stream is closed for the rescan and reopened; the engine
+        # leaves it alone while recording, monitoring, armed or passing through
+        self.device_timer = QTimer(self)
+        self.device_timer.timeout.connect(lambda: self.recorder.refresh_devices(reopen=True))
+        self.device_timer.start(5000)
         
         # Status bar
         self.status_label = QLabel("就绪", self)
         self.status_label.setAlignment(Qt.AlignCenter)
         self.status_label.setStyleSheet("QLabel { color: #1DA1F2; font-weight: bold; }")
         main_layout.addWidget(self.status_label)
+
+        # Audio buffer memory against the budget
+        self.memory_label = QLabel(self)
+        self.memory_label.setAlignment(Qt.AlignRight)
+        self.memory_label.setStyleSheet("QLabel { color: #90A4AE; font-size: 10px; }")
+        main_layout.addWidget(self.memory_label)
+        self.memory_timer = QTimer(self)
+        self.memory_timer.timeout.connect(self.update_memory)
+        self.memory_timer.timeout.connect(self.update_glitches)
+        self.memory_timer.start(1000)
+        self.update_memory()
+        self.update_glitches()
+
+        # Hidden action (no menu entry, shortcut only) for support sessions
+        self.profile_action = QAction("性能分析", self)
+        self.profile_action.setShortcut(QKeySequence("Ctrl+Alt+Shift+P"))
+        self.profile_action.setShortcutContext(Qt.ApplicationShortcut)
+        self.profile_action.triggered.connect(self.toggle_profiling)
+        self.addAction(self.profile_action)
         
+    def update_memory(self):
+        """
+        Show audio buffer memory; the tooltip breaks it down per subsystem.
+        """
+        budget = default_budget()
+        usage = budget.usage()
+        text = f"内存 {budget.ram / MB:.1f} / {budget.limit / MB:.0f} MB"
+        disk = budget.disk
+        if disk:
+            text += f"，磁盘 {disk / MB:.1f} MB"
+        self.memory_label.setText(text)
+        self.memory_label.setToolTip("\n".join(
+            f"{name}: {u.ram / MB:.1f} MB" + (f" + 磁盘 {u.disk / MB:.1f} MB" if u.disk else "")
+            for name, u in usage.items()))
+
+    def update_glitches(self):
+        """
+        Show the stream's glitch counters; latency only while passthrough is on.
+        """
+        g = self.recorder.get_glitches()
+        text = f"溢出 {g['overflows']}  延迟回调 {g['late_callbacks']}"
+        if self.recorder.is_passthrough:
+            text = f"监听延迟 {g['passthrough_latency'] * 1000:.1f} ms  欠载 {g['output_underflows']}  " + text
+        self.glitch_label.setText(text)
+        self.glitch_label.setToolTip("溢出: 输入数据丢失\n欠载: 输出设备缺数据\n延迟回调: 回调晚于一个缓冲周期")
+
+    @property
+    def profiles_dir(self):
+        return os.path.join(library_dir(), "profiles")
+
+    def toggle_profiling(self):
+        """
+        Start or stop profiling the capture, writer and GUI threads.
+        """
+        try:
+            if profiler().active:
+                self.update_status(f"性能分析报告已保存: {profiler().stop()}")
+            else:
+                profiler().start(self.profiles_dir)
+                self.update_status("性能分析中... (Ctrl+Alt+Shift+P 停止)")
+        except Exception as e:
+            logger.error(f"性能分析失败: {str(e)}")
+            self.update_status(f"错误: 性能分析失败: {str(e)}")
+
     def update_status(self, message):
         """
         Update the status bar with the given message.
@@ -131,9 +341,7 @@ class MainWindow(QMainWindow):
         """
         Update the microphone dropdown list with available microphones.
         """
-        self.mic_combo.clear()
-        for mic in microphones:
-            self.mic_combo.addItem(mic["name"], mic["index"])
+        self.mic_combo.set_devices(microphones)
         
     def connect_signals(self):
         """
@@ -141,15 +349,46 @@ class MainWindow(QMainWindow):
         """
         # UI signals
         self.record_button.clicked.connect(self.toggle_recording)
+        self.pause_button.clicked.connect(self.toggle_pause)
         self.play_button.clicked.connect(self.toggle_playback)
+        self.mic_combo.popup_about_to_show.connect(lambda: self.recorder.refresh_devices(reopen=True))
+        self.mic_combo.currentIndexChanged.connect(self.on_microphone_selected)
+        self.monitor_check.toggled.connect(self.on_monitoring_changed)
+        self.preroll_spin.valueChanged.connect(self.on_monitoring_changed)
+        self.trigger_check.toggled.connect(self.on_trigger_changed)
+        self.passthrough_check.toggled.connect(self.on_passthrough_changed)
+        self.output_combo.popup_about_to_show.connect(lambda: self.recorder.refresh_devices(reopen=True))
+        self.output_combo.currentIndexChanged.connect(self.on_passthrough_changed)
+        self.gain_spin.valueChanged.connect(self.on_passthrough_gain_changed)
+        self.latency_combo.currentIndexChanged.connect(self.on_latency_changed)
+        self.auto_tune_check.toggled.connect(self.on_latency_changed)
+        self.speed_combo.currentIndexChanged.connect(
+            lambda *_: self.recorder.set_playback_speed(self.speed_combo.currentData()))
+        self.take_view.scrub_started.connect(self.recorder.begin_scrub)
+        self.take_view.scrub_moved.connect(self.recorder.scrub)
+        self.take_view.scrub_finished.connect(self.recorder.end_scrub)
+        self.take_view.selection_changed.connect(self.on_selection_changed)
+        self.export_button.clicked.connect(self.export_selection)
+        self.recorder.region_exported.connect(self.on_region_exported)
+        if self.library_dock is not None:
+            self.library_button.toggled.connect(self.library_dock.setVisible)
+            self.library_dock.visibilityChanged.connect(self.library_button.setChecked)
+            self.take_browser.take_activated.connect(self.on_take_activated)
+            self.recorder.take_registered.connect(self.on_take_registered)
         
         # Audio recorder signals
         self.recorder.recording_started.connect(self.on_recording_started)
         self.recorder.recording_stopped.connect(self.on_recording_stopped)
+        self.recorder.recording_paused.connect(self.on_recording_paused)
+        self.recorder.recording_resumed.connect(self.on_recording_resumed)
         self.recorder.error_occurred.connect(self.on_error_occurred)
-        self.recorder.audio_data_available.connect(self.on_audio_data_available)
+        # Live waveform straight from the capture ring, on a bus thread of its own
+        self.waveform_feed = self.recorder.bus.subscribe(
+            "waveform", self.feed_waveform, policy=LATEST,
+            window_seconds=self.waveform_widget.max_buffer_size / self.recorder.RATE, interval=1 / 30)
         self.recorder.playing_started.connect(self.on_playing_started)
         self.recorder.playing_stopped.connect(self.on_playing_stopped)
+        self.recorder.devices_changed.connect(self.on_devices_changed)
     
     def load_microphones(self):
         """
@@ -157,12 +396,97 @@ class MainWindow(QMainWindow):
         """
         microphones = self.recorder.get_available_microphones()
         self.update_microphone_list(microphones)
+        self.output_combo.set_devices(self.recorder.get_available_outputs())
         
         if microphones:
             self.update_status(f"发现 {len(microphones)} 个麦克风")
+            # Warm up the stream so the record button starts instantly
+            self.recorder.prepare_device(self.get_selected_microphone())
         else:
             self.update_status("未发现麦克风")
+
+    def on_microphone_selected(self, index):
+        """
+        Move the standby stream to the newly selected microphone.
+        """
+        if index >= 0 and not self.recorder.is_recording:
+            self.recorder.prepare_device(self.get_selected_microphone())
     
+    def on_devices_changed(self, diff):
+        """
+        Apply a device rescan result without rebuilding the dropdown.
+        """
+        self.mic_combo.apply_diff(diff)
+        self.output_combo.apply_diff(diff, input_only=False)
+        for info in diff.added:
+            if info.is_input:
+                self.update_status(f"发现新麦克风: {info.name}")
+        for info in diff.removed:
+            if info.is_input:
+                self.update_status(f"麦克风已断开: {info.name}")
+
+    def on_monitoring_changed(self, *args):
+        """
+        Apply the pre-roll checkbox and duration to the recorder.
+        """
+        enabled = self.monitor_check.isChecked()
+        self.recorder.set_monitoring(enabled, self.preroll_spin.value())
+        if not enabled and not self.recorder.is_recording:
+            self.waveform_widget.clear_waveform()
+
+    def on_trigger_changed(self, armed):
+        """
+        Arm or disarm threshold-triggered recording.
+        """
+        if armed:
+            self.waveform_widget.clear_waveform()
+            settings = TriggerSettings(start_dbfs=self.trigger_spin.value(), pre_seconds=self.preroll_spin.value())
+            self.recorder.arm_trigger(self.get_selected_microphone(), settings)
+            self.triggered_takes = 0
+            self.update_status(f"触发待命: 电平超过 {settings.start_dbfs:.0f} dBFS 时开始录音")
+        else:
+            self.recorder.disarm_trigger()
+            self.on_monitoring_changed()
+            self.update_status(f"触发已关闭，共录制 {self.triggered_takes} 段")
+        for widget in (self.record_button, self.monitor_check, self.preroll_spin, self.trigger_spin, self.mic_combo):
+            widget.setEnabled(not armed)
+
+    def on_passthrough_changed(self, *args):
+        """
+        Apply the passthrough checkbox and output device to the recorder.
+        """
+        enabled = self.passthrough_check.isChecked()
+        if not enabled and not self.recorder.is_passthrough:
+            return
+        future = self.recorder.set_passthrough(enabled, self.output_combo.currentData(), self.gain_spin.value())
+        if future is None:
+            return
+        try:
+            on = future.result(timeout=2.0)
+        except Exception:
+            on = False  # Reported through error_occurred
+        if enabled and not on:
+            # The output could not be opened; capture goes on without it
+            self.passthrough_check.blockSignals(True)
+            self.passthrough_check.setChecked(False)
+            self.passthrough_check.blockSignals(False)
+        elif enabled:
+            self.update_status(f"监听中: {self.output_combo.currentText() or '默认输出设备'}")
+        self.update_glitches()
+
+    def on_passthrough_gain_changed(self, gain_db):
+        """
+        Change the monitor gain without reopening the stream.
+        """
+        if self.recorder.is_passthrough:
+            self.recorder.set_passthrough(True, self.output_combo.currentData(), gain_db)
+
+    def on_latency_changed(self, *args):
+        """
+        Apply the latency profile and auto-tune checkbox to the recorder.
+        """
+        self.recorder.set_latency_profile(self.latency_combo.currentData(), self.auto_tune_check.isChecked())
+
     def toggle_recording(self):
         """
         Toggle recording state when the record button is clicked.
@@ -176,6 +500,15 @@ class MainWindow(QMainWindow):
             self.recorder.stop_recording()
             self.waveform_widget.clear_waveform()
             self.recorder.start_recording(selected_mic)
+
+    def toggle_pause(self):
+        """
+        Pause or resume the take in progress.
+        """
+        if self.recorder.is_paused:
+            self.recorder.resume_recording()
+        else:
+            self.recorder.pause_recording()
     
     def on_recording_started(self):
         """
@@ -188,12 +521,34 @@ class MainWindow(QMainWindow):
         )
         self.mic_combo.setEnabled(False)
         self.play_button.setEnabled(False)
+        self.preroll_spin.setEnabled(False)
+        self.pause_button.setEnabled(not self.trigger_check.isChecked())
+        if self.trigger_check.isChecked():
+            self.triggered_takes += 1
         self.update_status("正在录音...")
         
         # Start recording timer
         self.recording_time = 0
         self.recording_timer.start(1000)
     
+    def on_recording_paused(self):
+        """
+        Handle recording paused event: the file stays open, the clock stops.
+        """
+        self.pause_button.setText("继续")
+        self.recording_timer.stop()
+        minutes, seconds = divmod(self.recording_time, 60)
+        self.update_status(f"已暂停 {minutes:02d}:{seconds:02d}")
+
+    def on_recording_resumed(self):
+        """
+        Handle recording resumed event.
+        """
+        self.pause_button.setText("暂停")
+        self.recording_timer.start(1000)
+        minutes, seconds = divmod(self.recording_time, 60)
+        self.update_status(f"正在录音... {minutes:02d}:{seconds:02d}")
+
     def on_recording_stopped(self):
         """
         Handle recording stopped event.
@@ -203,15 +558,97 @@ class MainWindow(QMainWindow):
             "QPushButton { background-color: #FF6B6B; color: white; font-weight: bold; padding: 10px; border-radius: 5px; }"
             "QPushButton:hover { background-color: #FF5252; }"
         )
-        self.mic_combo.setEnabled(True)
+        armed = self.trigger_check.isChecked()
+        self.mic_combo.setEnabled(not armed)
         self.play_button.setEnabled(True)
+        self.pause_button.setEnabled(False)
+        self.pause_button.setText("暂停")
+        self.preroll_spin.setEnabled(not armed)
+        self.selected_take = None
+        if not self.recorder.is_recording:
+            # A triggered take may already have started the next one; never open a file being written
+            self.show_take(self.recorder.output_path)
         
         # Stop recording timer
         self.recording_timer.stop()
         
         duration = self.recorder.get_recording_duration()
-        self.update_status(f"录音完成，时长: {duration:.2f} 秒")
+        self.update_loudness(force=True)
+        integrated = self.recorder.get_loudness().integrated
+        if integrated > float("-inf"):
+            self.update_status(f"录音完成，时长: {duration:.2f} 秒，响度: {integrated:.1f} LUFS")
+        else:
+            self.update_status(f"录音完成，时长: {duration:.2f} 秒")
+        if armed:
+            self.update_status(f"触发待命，已录制 {self.triggered_takes} 段 (最近 {duration:.2f} 秒)")
+        logger.info("latency per stage (age of the newest sample):\n" + self.recorder.get_latency_report())
     
+    def on_take_registered(self, take_id):
+        """
+        Show a finished take in the library.
+        """
+        self.take_browser.refresh()
+
+    def on_take_activated(self, take):
+        """
+        A take was double-clicked in the library.
+        """
+        self.selected_take = take
+        if not self.recorder.is_recording:
+            self.play_button.setEnabled(True)
+            self.show_take(take.path, take.peaks_path)
+        self.update_status(f"已选择录音: {take.name} ({take.duration:.2f} 秒)")
+
+    def on_selection_changed(self, start, end):
+        """
+        Offer the export while a region of the shown take is selected.
+        """
+        self.export_button.setEnabled(end > start)
+        if end > start:
+            self.update_status(f"已选择 {start:.2f} - {end:.2f} 秒 ({end - start:.2f} 秒)")
+
+    def export_selection(self):
+        """
+        Export the selected region of the shown take as a new take.
+        """
+        if not self.take_view.selection or not self.take_view.path:
+            return
+        start, end = self.take_view.selection
+        source = self.selected_take if self.selected_take and self.selected_take.path == self.take_view.path else None
+        self.recorder.export_region(self.take_view.path, start, end, source)
+        self.update_status(f"正在导出选区 ({end - start:.2f} 秒)...")
+
+    def on_region_exported(self, result):
+        """
+        Report a finished region export.
+        """
+        size = result.bytes / (1024 * 1024)
+        self.update_status(f"已导出选区: {os.path.basename(result.path)} ({size:.1f} MB, 用时 {result.seconds:.2f} 秒)")
+
+    def show_take(self, path, peaks=None):
+        """
+        Load a take for playback and show its overview.
+        """
+        if not path:
+            return
+        if self.recorder.is_playing:
+            self.recorder.stop_playback()
+        try:
+            self.take_view.set_take(path, peaks)
+        except Exception as e:
+            self.update_status(f"错误: 读取录音失败: {str(e)}")
+            self.take_view.clear()
+            self.take_view.hide()
+            return
+        self.take_view.show()
+        self.recorder.open_playback(path)
+        self.playhead_timer.start(33)
+
+    def update_playhead(self):
+        position, duration = self.recorder.get_playback_position()
+        if duration:
+            self.take_view.set_playhead(position)
+
     def toggle_playback(self):
         """
         Toggle playback state when the play button is clicked.
@@ -243,8 +680,9 @@ class MainWindow(QMainWindow):
             "QPushButton { background-color: #4ECDC4; color: white; font-weight: bold; padding: 10px; border-radius: 5px; }"
             "QPushButton:hover { background-color: #26A69A; }"
         )
-        self.record_button.setEnabled(True)
-        self.mic_combo.setEnabled(True)
+        armed = self.trigger_check.isChecked()
+        self.record_button.setEnabled(not armed)
+        self.mic_combo.setEnabled(not armed)
         self.update_status("播放完成")
     
     def on_error_occurred(self, error_message):
@@ -253,13 +691,32 @@ class MainWindow(QMainWindow):
         """
         self.update_status(f"错误: {error_message}")
     
-    def on_audio_data_available(self, audio_data):
+    def feed_waveform(self, block):
         """
-        Handle new audio data available event and update waveform.
+        Push captured samples to the waveform (sample bus thread; the renderer takes them from any thread).
         """
-        if self.recorder.is_recording:
-            self.waveform_widget.update_audio_data(audio_data)
+        if self.recorder.is_recording or self.recorder.is_monitoring or self.recorder.is_triggered:
+            captured_at = block.timestamp + block.frames / self.recorder.RATE
+            self.waveform_widget.update_audio_data(block.samples[:, 0], captured_at)
     
+    def update_loudness(self, force=False):
+        """
+        Refresh the loudness readout while audio is flowing.
+        """
+        if not force and not (self.recorder.is_recording or self.recorder.is_monitoring or self.recorder.is_triggered):
+            return
+        r = self.recorder.get_loudness()
+
+        def fmt(value):
+            return f"{value:6.1f}" if value > float("-inf") else "   -∞ "
+
+        latency, frames = self.recorder.get_latency()
+        latency = f"{latency * 1000:.0f} ms ({frames})" if frames else "-"
+        self.loudness_label.setText(
+            f"M {fmt(r.momentary)}   S {fmt(r.short_term)}   I {fmt(r.integrated)} LUFS   "
+            f"TP {fmt(r.true_peak)} dBTP   延迟 {latency}"
+        )
+
     def update_recording_time(self):
         """
         Update the recording time displayed in the status bar.
@@ -269,8 +726,18 @@ class MainWindow(QMainWindow):
         seconds = self.recording_time % 60
         self.status_label.setText(f"正在录音... {minutes:02d}:{seconds:02d}")
     
+    def closeEvent(self, event):
+        """
+        Release the audio device before the window closes.
+        """
+        profiler().stop()
+        self.waveform_feed.close()
+        self.recorder.shutdown()
+        self.waveform_widget.shutdown()
+        super().closeEvent(event)
+
     def get_selected_microphone(self):
         """
-        Get the index of the selected microphone.
+        Get the stable id of the selected microphone.
         """
         return self.mic_combo.currentData()
\ No newline at end of file
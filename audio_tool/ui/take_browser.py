@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Browser panel over the take catalog.
+
+``TakeTableModel`` asks the catalog only for the row count and for the
+pages of rows the view actually paints, keeping a few pages cached, so
+scrolling and filtering stay instant with 100k takes and no WAV file is
+opened.
+"""
+import time
+from collections import OrderedDict
+
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt, QTimer, Signal
+from PySide6.QtWidgets import (
+    QAbstractItemView, QComboBox, QHBoxLayout, QHeaderView, QLabel, QLineEdit, QTableView, QVBoxLayout, QWidget
+)
+
+from audio_tool.audio.catalog import TakeFilter
+
+
+def _level(value, unit):
+    return f"{value:.1f} {unit}" if value is not None else "-"
+
+
+def _duration(seconds):
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes:02d}:{seconds:02d}"
+
+
+class TakeTableModel(QAbstractTableModel):
+    """
+    Read-only table of catalog rows, fetched a page at a time.
+
+    Args:
+        catalog (Catalog): Take catalog
+    """
+
+    PAGE_SIZE = 256
+    MAX_PAGES = 32  # Pages kept cached (least recently used are dropped)
+
+    COLUMNS = (
+        ("开始时间", lambda t: time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(t.started_at))),
+        ("时长", lambda t: _duration(t.duration)),
+        ("设备", lambda t: t.device_name or "-"),
+        ("格式", lambda t: f"{t.rate / 1000:g} kHz / {t.channels} ch / {t.sample_width * 8} bit"),
+        ("峰值", lambda t: _level(t.peak_dbfs, "dBFS")),
+        ("响度", lambda t: _level(t.integrated_lufs, "LUFS")),
+        ("文件", lambda t: t.name),
+    )
+    _NUMERIC = {1, 4, 5}
+
+    def __init__(self, catalog, parent=None):
+        super().__init__(parent)
+        self.catalog = catalog
+        self.where = TakeFilter()
+        self._count = catalog.count(self.where)
+        self._pages = OrderedDict()
+
+    def set_filter(self, where):
+        """
+        Show only the takes matching ``where`` (a ``TakeFilter``).
+        """
+        self.where = where
+        self.refresh()
+
+    def refresh(self):
+        """
+        Re-read the row count and drop cached pages (after takes were added).
+        """
+        self.beginResetModel()
+        self._pages.clear()
+        self._count = self.catalog.count(self.where)
+        self.endResetModel()
+
+    def take(self, row):
+        """
+        Returns:
+            Take: Catalog row shown at ``row``, or None
+        """
+        page, offset = divmod(row, self.PAGE_SIZE)
+        rows = self._pages.get(page)
+        if rows is None:
+            rows = self.catalog.query(self.where, limit=self.PAGE_SIZE, offset=page * self.PAGE_SIZE)
+            self._pages[page] = rows
+            if len(self._pages) > self.MAX_PAGES:
+                self._pages.popitem(last=False)
+        else:
+            self._pages.move_to_end(page)
+        return rows[offset] if offset < len(rows) else None
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._count
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.DisplayRole:
+            take = self.take(index.row())
+            return self.COLUMNS[index.column()][1](take) if take is not None else None
+        if role == Qt.ToolTipRole:
+            take = self.take(index.row())
+            return take.path if take is not None else None
+        if role == Qt.TextAlignmentRole and index.column() in self._NUMERIC:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.COLUMNS[section][0]
+        return None
+
+
+class TakeBrowser(QWidget):
+    """
+    Filterable list of recorded takes.
+
+    Args:
+        catalog (Catalog): Take catalog
+    """
+
+    take_activated = Signal(object)  # Emitted with the Take that was double-clicked
+
+    def __init__(self, catalog, parent=None):
+        super().__init__(parent)
+        self.catalog = catalog
+        self.model = TakeTableModel(catalog, self)
+
+        self.filter_edit = QLineEdit(self)
+        self.filter_edit.setPlaceholderText("筛选文件名或设备")
+        self.filter_edit.setClearButtonEnabled(True)
+        self.device_combo = QComboBox(self)
+        self.count_label = QLabel(self)
+
+        self.view = QTableView(self)
+        self.view.setModel(self.model)
+        self.view.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.view.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.view.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.view.setWordWrap(False)
+        # Fixed row heights and column widths: the view never measures rows it does not paint
+        rows = self.view.verticalHeader()
+        rows.setSectionResizeMode(QHeaderView.Fixed)
+        rows.setDefaultSectionSize(self.fontMetrics().height() + 6)
+        rows.hide()
+        columns = self.view.horizontalHeader()
+        columns.setSectionResizeMode(QHeaderView.Interactive)
+        columns.setStretchLastSection(True)
+        for column, width in enumerate((150, 70, 160, 170, 90, 90)):
+            self.view.setColumnWidth(column, width)
+
+        top = QHBoxLayout()
+        top.addWidget(self.filter_edit, 1)
+        top.addWidget(self.device_combo)
+        top.addWidget(self.count_label)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addLayout(top)
+        layout.addWidget(self.view)
+
+        # Filter after a short pause in typing rather than on every key
+        self._filter_timer = QTimer(self)
+        self._filter_timer.setSingleShot(True)
+        self._filter_timer.setInterval(150)
+        self._filter_timer.timeout.connect(self.apply_filter)
+        self.filter_edit.textChanged.connect(self._filter_timer.start)
+        self.device_combo.currentIndexChanged.connect(self.apply_filter)
+        self.view.doubleClicked.connect(self._on_double_clicked)
+
+        self.load_devices()
+        self._update_count()
+
+    def load_devices(self):
+        """
+        Fill the device filter from the devices that have takes.
+        """
+        selected = self.device_combo.currentData()
+        self.device_combo.blockSignals(True)
+        self.device_combo.clear()
+        self.device_combo.addItem("全部设备", None)
+        for device_id, name, count in self.catalog.devices():
+            if device_id is not None:
+                self.device_combo.addItem(f"{name or device_id} ({count})", device_id)
+        row = self.device_combo.findData(selected)
+        self.device_combo.setCurrentIndex(max(row, 0))
+        self.device_combo.blockSignals(False)
+
+    def apply_filter(self):
+        text = self.filter_edit.text().strip()
+        self.model.set_filter(TakeFilter(text=text or None, device_id=self.device_combo.currentData()))
+        self._update_count()
+
+    def refresh(self):
+        """
+        Pick up takes registered since the last refresh.
+        """
+        self.load_devices()
+        self.apply_filter()
+
+    def _update_count(self):
+        self.count_label.setText(f"{self.model.rowCount()} 条")
+
+    def _on_double_clicked(self, index):
+        take = self.model.take(index.row())
+        if take is not None:
+            self.take_activated.emit(take)
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Overview of a whole take with a playhead; click or drag on it to seek and scrub,
+shift-drag or right-drag to select a region.
+
+The envelope comes from the take's peak sidecar (``take.peaks.npy``), so a
+multi-hour take is drawn without reading its audio. Takes without one are
+reduced from the WAV file once, through ``WavReader``. Cue points (the
+pauses of a take) are drawn as markers.
+"""
+import os
+
+import numpy as np
+from PySide6.QtCore import Qt, Signal
+from PySide6.QtGui import QColor, QImage, QPainter
+from PySide6.QtWidgets import QWidget
+
+from audio_tool.audio.memory import default_budget
+from audio_tool.audio.peaks import PEAK_FRAMES, PeakBuilder, load_peaks, peaks_path
+from audio_tool.audio.playback import to_float
+from audio_tool.audio.reader import WavReader
+from audio_tool.audio.riff import read_cues
+
+FULL_SCALE = 32767
+
+
+def _take_peaks(reader, peaks=None):
+    """
+    Min/max peaks of a take, from its sidecar when there is one.
+    """
+    peaks = peaks or peaks_path(reader.path)
+    if os.path.exists(peaks):
+        data = load_peaks(peaks)
+        if len(data):
+            return data
+    builder = PeakBuilder(reader.channels, PEAK_FRAMES)
+    step = PEAK_FRAMES * 4096
+    for start in range(0, reader.num_frames, step):
+        block = reader.frames(start, start + step)
+        if block.dtype != np.int16:
+            block = (to_float(block) * FULL_SCALE).astype(np.int16)
+        builder.add(block)
+    try:
+        return builder.peaks()
+    finally:
+        builder.close()
+
+
+class TakeView(QWidget):
+    """
+    Whole-take waveform; emits positions in seconds for the mouse.
+    """
+
+    scrub_started = Signal(float)  # Mouse pressed at this position
+    scrub_moved = Signal(float)  # Dragged to this position
+    scrub_finished = Signal()  # Mouse released
+    selection_changed = Signal(float, float)  # Selected region (start, end); equal when cleared
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.background_color = QColor(Qt.white)
+        self.waveform_color = QColor(70, 90, 110)
+        self.playhead_color = QColor(255, 82, 82)
+        self.marker_color = QColor(255, 152, 0)
+        self.selection_color = QColor(29, 161, 242, 60)
+        self.padding = 20
+        self.path = None
+        self.duration = 0.0
+        self.playhead = 0.0
+        self.selection = None  # (start, end) seconds, or None
+        self._anchor = None  # Where a selection drag started
+        self.markers = []  # (seconds, label) of the take's cue points
+        self._peaks = None  # (bins, 2) min/max over channels
+        self._image = None
+        self._dragging = False
+        self.setMinimumHeight(80)
+        self.setCursor(Qt.IBeamCursor)
+
+    def set_take(self, path, peaks=None):
+        """
+        Show a take.
+
+        Args:
+            path (str): WAV file
+            peaks (str, optional): Its peak sidecar (default: next to the file)
+        """
+        with WavReader(path) as reader:
+            data = _take_peaks(reader, peaks)
+            self.duration = reader.duration
+            rate = reader.rate
+        try:
+            self.markers = [(frame / rate, label) for frame, label in read_cues(path)]
+        except (OSError, ValueError):
+            self.markers = []
+        self.setToolTip("\n".join(f"{seconds:.2f} s  {label}" for seconds, label in self.markers))
+        self.path = path
+        self.set_selection(None)
+        self._peaks = default_budget().track(
+            "display", np.stack((data[..., 0].min(axis=1), data[..., 1].max(axis=1)), axis=-1))
+        self.playhead = 0.0
+        self._image = None
+        self.update()
+
+    def clear(self):
+        self._peaks = None
+        self.markers = []
+        self.path = None
+        self.set_selection(None)
+        self._image = None
+        self.duration = 0.0
+        self.update()
+
+    def set_selection(self, start, end=None):
+        """
+        Select ``[start, end]`` seconds (in either order); None or an empty range clears the selection.
+        """
+        selection = None if start is None or end is None or start == end else (min(start, end), max(start, end))
+        if selection != self.selection:
+            self.selection = selection
+            self.selection_changed.emit(*(selection or (0.0, 0.0)))
+            self.update()
+
+    def set_playhead(self, seconds):
+        if seconds != self.playhead:
+            self.playhead = seconds
+            self.update()
+
+    # ------------------------------------------------------------------
+    # Geometry
+
+    def _span(self):
+        return self.padding, max(self.padding + 1, self.width() - self.padding)
+
+    def seconds_at(self, x):
+        left, right = self._span()
+        return float(np.clip((x - left) / (right - left), 0.0, 1.0)) * self.duration
+
+    def x_at(self, seconds):
+        left, right = self._span()
+        return left + (right - left) * (seconds / self.duration if self.duration else 0.0)
+
+    # ------------------------------------------------------------------
+    # Drawing
+
+    def _render(self):
+        ratio = self.devicePixelRatioF()
+        pw, ph = max(1, int(self.width() * ratio)), max(1, int(self.height() * ratio))
+        image = QImage(pw, ph, QImage.Format_ARGB32_Premultiplied)
+        image.setDevicePixelRatio(ratio)
+        pixels = np.frombuffer(image.bits(), dtype=np.uint32).reshape(ph, image.bytesPerLine() // 4)[:, :pw]
+        pixels[:] = self.background_color.rgba()
+        pad = int(self.padding * ratio)
+        columns = pw - 2 * pad
+        if self._peaks is not None and len(self._peaks) and columns > 0 and ph > 2:
+            n = len(self._peaks)
+            edges = (np.arange(columns + 1, dtype=np.int64) * n) // columns
+            if n >= columns:
+                lo = np.minimum.reduceat(self._peaks[:, 0], edges[:-1])
+                hi = np.maximum.reduceat(self._peaks[:, 1], edges[:-1])
+            else:
+                lo = self._peaks[np.minimum(edges[:-1], n - 1), 0]
+                hi = self._peaks[np.minimum(edges[:-1], n - 1), 1]
+            center, scale = ph / 2, (ph - 4) / (2 * FULL_SCALE)
+            top = np.floor(center - hi.astype(np.float32) * scale).astype(np.int32)
+            bottom = np.ceil(center - lo.astype(np.float32) * scale).astype(np.int32)
+            rows = np.arange(ph, dtype=np.int32)[:, None]
+            pixels[:, pad:pad + columns][(rows >= top) & (rows <= bottom)] = self.waveform_color.rgba()
+        del pixels
+        return image
+
+    def resizeEvent(self, event):
+        self._image = None
+        super().resizeEvent(event)
+
+    def paintEvent(self, event):
+        if self._image is None:
+            self._image = self._render()
+        painter = QPainter(self)
+        try:
+            painter.drawImage(0, 0, self._image)
+            if self.duration:
+                if self.selection:
+                    left, right = (int(self.x_at(seconds)) for seconds in self.selection)
+                    painter.fillRect(left, 0, max(1, right - left), self.height(), self.selection_color)
+                for seconds, _ in self.markers:
+                    painter.fillRect(int(self.x_at(seconds)), 0, 1, self.height(), self.marker_color)
+                painter.fillRect(int(self.x_at(self.playhead)), 0, 2, self.height(), self.playhead_color)
+        finally:
+            painter.end()
+
+    # ------------------------------------------------------------------
+    # Mouse
+
+    def _selecting(self, event):
+        return event.button() == Qt.RightButton or (
+            event.button() == Qt.LeftButton and event.modifiers() & Qt.ShiftModifier)
+
+    def mousePressEvent(self, event):
+        if self._selecting(event) and self.duration:
+            self._anchor = self.seconds_at(event.position().x())
+            self.set_selection(None)
+        elif event.button() == Qt.LeftButton and self.duration:
+            self._dragging = True
+            seconds = self.seconds_at(event.position().x())
+            self.set_playhead(seconds)
+            self.scrub_started.emit(seconds)
+
+    def mouseMoveEvent(self, event):
+        if self._anchor is not None:
+            self.set_selection(self._anchor, self.seconds_at(event.position().x()))
+        elif self._dragging:
+            seconds = self.seconds_at(event.position().x())
+            self.set_playhead(seconds)
+            self.scrub_moved.emit(seconds)
+
+    def mouseReleaseEvent(self, event):
+        if self._anchor is not None and event.button() in (Qt.LeftButton, Qt.RightButton):
+            self.set_selection(self._anchor, self.seconds_at(event.position().x()))
+            self._anchor = None
+        elif self._dragging and event.button() == Qt.LeftButton:
+            self._dragging = False
+            self.scrub_finished.emit()
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Waveform rendering on a worker thread.
+
+``WaveformRenderer`` lives in its own ``QThread``. At display rate it turns
+the latest samples into a finished ``QImage`` (background, grid, axes and
+min/max envelope, all written as array operations on the image memory)
+and swaps it into a double buffer; the widget's ``paintEvent`` only blits
+the front image.
+"""
+import threading
+
+import numpy as np
+from PySide6.QtCore import QObject, QThread, QTimer, Qt, Signal, Slot
+from PySide6.QtGui import QColor, QImage
+
+from audio_tool.audio.memory import default_budget
+
+FULL_SCALE = 32767
+
+
+class WaveformRenderer(QObject):
+    """
+    Renders the sample history into images; all public methods are thread-safe.
+
+    Args:
+        max_samples (int): Samples of history shown across the width
+        fps (int): Maximum frames rendered per second
+    """
+
+    frame_ready = Signal()  # A new front image is available
+
+    def __init__(self, max_samples=44100, fps=30):
+        super().__init__()
+        self.max_samples = max_samples
+        self.fps = fps
+        self.padding = 20
+        self.rate = 44100  # Only used to space the time grid
+        self.background_color = QColor(Qt.white)
+        self.waveform_color = QColor(Qt.black)
+        self.axis_color = QColor(Qt.gray)
+        self.grid_color = QColor(230, 233, 237)
+
+        self._lock = threading.Lock()
+        budget = default_budget()
+        self._ring = budget.allocate("display", max_samples, np.int16)
+        self._ordered = budget.allocate("display", max_samples, np.int16)  # Oldest-first copy for rendering
+        self._written = 0
+        self._captured_at = None  # Capture time of the newest sample pushed
+        self._size = (0, 0, 1.0)  # width, height, device pixel ratio
+        self._dirty = True
+
+        self._front = None
+        self._back = None
+        self.front_captured_at = None  # Capture time of the newest sample in the front image
+        self._front_lock = threading.Lock()
+        self._timer = None
+
+    # ------------------------------------------------------------------
+    # Producer side (any thread)
+
+    def push(self, samples, captured_at=None):
+        """
+        Append samples to the history.
+
+        Args:
+            samples (numpy.ndarray): Mono int16 samples
+            captured_at (float, optional): ``time.monotonic()`` capture time of the last sample
+        """
+        samples = np.asarray(samples)[-self.max_samples:]
+        n = len(samples)
+        with self._lock:
+            start = self._written % self.max_samples
+            first = min(n, self.max_samples - start)
+            self._ring[start:start + first] = samples[:first]
+            self._ring[:n - first] = samples[first:]
+            self._written += n
+            self._captured_at = captured_at
+            self._dirty = True
+
+    def clear(self):
+        with self._lock:
+            self._written = 0
+            self._captured_at = None
+            self._dirty = True
+
+    def resize(self, width, height, ratio=1.0):
+        with self._lock:
+            self._size = (width, height, ratio)
+            self._dirty = True
+
+    def set_colors(self, background=None, waveform=None):
+        with self._lock:
+            if background is not None:
+                self.background_color = QColor(background)
+            if waveform is not None:
+                self.waveform_color = QColor(waveform)
+            self._dirty = True
+
+    def front(self):
+        """
+        Lock and return the current front image (or None); call ``release_front`` after drawing it.
+        """
+        self._front_lock.acquire()
+        return self._front
+
+    def release_front(self):
+        self._front_lock.release()
+
+    # ------------------------------------------------------------------
+    # Worker thread
+
+    @Slot()
+    def start(self):
+        self._timer = QTimer(self)
+        self._timer.setTimerType(Qt.PreciseTimer)
+        self._timer.timeout.connect(self.render_if_dirty)
+        self._timer.start(int(1000 / self.fps))
+
+    @Slot()
+    def stop(self):
+        if self._timer is not None:
+            self._timer.stop()
+
+    @Slot()
+    def render_if_dirty(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            self._dirty = False
+            width, height, ratio = self._size
+            n = min(self._written, self.max_samples)
+            end = self._written % self.max_samples
+            # Oldest first, into a buffer owned by the render thread
+            data = self._ordered[self.max_samples - n:]
+            if n:
+                head = self.max_samples - end
+                self._ordered[:head] = self._ring[end:]
+                self._ordered[head:] = self._ring[:end]
+            colors = (self.background_color, self.waveform_color)
+            captured_at = self._captured_at
+        if width <= 0 or height <= 0:
+            return
+        image = self._render(data, width, height, ratio, *colors)
+        with self._front_lock:
+            self._back, self._front = self._front, image
+            self.front_captured_at = captured_at
+        self.frame_ready.emit()
+
+    def _render(self, data, width, height, ratio, background, waveform):
+        pw, ph = max(1, int(width * ratio)), max(1, int(height * ratio))
+        image = self._back
+        if image is None or image.width() != pw or image.height() != ph:
+            image = QImage(pw, ph, QImage.Format_ARGB32_Premultiplied)
+        image.setDevicePixelRatio(ratio)
+        # Draw straight into the image memory; one array op per layer, no per-line painter calls
+        pixels = np.frombuffer(image.bits(), dtype=np.uint32).reshape(ph, image.bytesPerLine() // 4)[:, :pw]
+        pixels[:] = background.rgba()
+
+        pad = int(self.padding * ratio)
+        left, right = pad, pw - pad
+        columns = right - left
+        if columns > 0 and ph > 2 * pad:
+            self._draw_grid(pixels, left, right, pad, ph - pad, len(data))
+        if len(data) and columns > 0:
+            top, bottom = self._envelope(data, columns, ph, pad)
+            rows = np.arange(ph, dtype=np.int32)[:, None]
+            mask = (rows >= top) & (rows <= bottom)
+            pixels[:, left:right][mask] = waveform.rgba()
+        del pixels
+        return image
+
+    def _envelope(self, data, columns, height, pad):
+        """
+        Per-column min/max rows of the waveform, joined to the neighbouring column so there are no gaps.
+        """
+        n = len(data)
+        edges = (np.arange(columns + 1, dtype=np.int64) * n) // columns
+        if n >= columns:
+            lo = np.minimum.reduceat(data, edges[:-1])
+            hi = np.maximum.reduceat(data, edges[:-1])
+        else:
+            lo = hi = data[np.minimum(edges[:-1], n - 1)]
+        nxt_lo = np.append(lo[1:], lo[-1])
+        nxt_hi = np.append(hi[1:], hi[-1])
+        lo = np.minimum(lo, nxt_hi).astype(np.float32)
+        hi = np.maximum(hi, nxt_lo).astype(np.float32)
+
+        center = height / 2
+        scale = (height - 2 * pad) / (2 * FULL_SCALE)
+        top = np.floor(center - hi * scale).astype(np.int32)
+        bottom = np.ceil(center - lo * scale).astype(np.int32)
+        return top, bottom
+
+    def _draw_grid(self, pixels, left, right, top, bottom, samples):
+        center = (top + bottom) // 2
+        quarter = (bottom - top) // 4
+        grid, axis = self.grid_color.rgba(), self.axis_color.rgba()
+
+        pixels[[center - quarter, center + quarter], left:right] = grid
+        if samples:
+            # One vertical line per 100 ms of history, anchored at the newest sample
+            step = (right - left) * (self.rate / 10) / samples
+            if step > 4:
+                xs = np.round(right - step * np.arange(1, int((right - left) / step) + 1)).astype(np.int64)
+                pixels[top:bottom, xs[xs > left]] = grid
+
+        pixels[center, left:right] = axis
+        pixels[top:bottom, [left, right - 1]] = axis
+
+
+class RenderThread:
+    """
+    Owns a ``WaveformRenderer`` and the ``QThread`` it runs in.
+    """
+
+    def __init__(self, renderer):
+        self.renderer = renderer
+        self.thread = QThread()
+        self.thread.setObjectName("waveform-render")
+        renderer.moveToThread(self.thread)
+        self.thread.started.connect(renderer.start)
+        self.thread.start()
+
+    def stop(self):
+        if self.thread.isRunning():
+            # Stop the timer inside its own thread, then end the event loop
+            QTimer.singleShot(0, self.renderer, self.renderer.stop)
+            self.thread.quit()
+            self.thread.wait(2000)
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Runtime profiling of the capture, writer and GUI threads.
+
+``Profiler`` is switched on and off while the app runs (``$AUDIO_TOOL_PROFILE``
+or the GUI's hidden action). While on, a sampler thread reads every
+watched thread's Python stack through ``sys._current_frames()`` a few
+hundred times a second, so each thread gets its own profile and the audio
+callback runs unmodified: no tracing hooks, no extra work on the real-time
+path beyond noting its thread id. Allocations are followed with
+``tracemalloc`` between the start and the stop.
+
+Stopping writes a timestamped directory::
+
+    profiles/20261019-101530/
+        capture.txt  capture.collapsed    # per thread: top functions / flame graph stacks
+        writer.txt   writer.collapsed
+        gui.txt      gui.collapsed
+        memory.txt                        # allocation growth, traced totals, memory budget
+        start.tracemalloc stop.tracemalloc
+        cprofile.pstats                   # only with AUDIO_TOOL_PROFILE=cprofile
+
+``*.collapsed`` files load in speedscope or ``flamegraph.pl``; snapshots
+load with ``tracemalloc.Snapshot.load``. cProfile cannot be scoped to one
+thread (on Python 3.12+ it sees every thread), so it is only an opt-in
+whole-process profile next to the per-thread samples.
+"""
+import cProfile
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+from loguru import logger
+
+PROFILE_ENV = "AUDIO_TOOL_PROFILE"  # "1": sample from startup until exit; "cprofile": also run cProfile
+
+_MAX_DEPTH = 64
+_CPU_EVERY = 25  # Ticks between reads of the threads' CPU clocks
+
+
+def _label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _thread_cpu(ident):
+    """
+    CPU seconds used by a thread so far, or None where the platform cannot tell (Windows, macOS).
+    """
+    try:
+        return time.clock_gettime(time.pthread_getcpuclockid(ident))
+    except (AttributeError, OSError, OverflowError):
+        return None
+
+
+class Profiler:
+    """
+    Sampling profiler for named threads; ``start``/``stop`` may be called from any thread.
+
+    Threads are watched under a role name: the main thread is ``"gui"``,
+    others call ``note_thread`` (a no-op while not profiling) from code that
+    runs on them.
+
+    Args:
+        interval (float): Seconds between samples
+    """
+
+    def __init__(self, interval=0.002):
+        self.interval = interval
+        self.active = False
+        self.directory = None
+        self._threads = {}  # role -> thread ident
+        self._samples = {}  # role -> Counter of stacks (tuples of code objects, outermost first)
+        self._cpu = {}  # role -> [ident, CPU seconds when first seen, latest reading]
+        self._ticks = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler = None
+        self._cprofile = None
+        self._started_tracemalloc = False
+        self._snapshot = None
+        self._t0 = 0.0
+
+    def note_thread(self, role):
+        """
+        Watch the calling thread as ``role`` (call it from that thread, e.g. per callback).
+        """
+        if self.active:
+            self._threads[role] = threading.get_ident()
+
+    # ------------------------------------------------------------------
+    # Control
+
+    def start(self, base_dir, deterministic=False):
+        """
+        Start sampling; reports go to a new timestamped directory under ``base_dir``.
+
+        Args:
+            base_dir (str): Parent of the report directories
+            deterministic (bool): Also run cProfile over the whole process
+
+        Returns:
+            str: Report directory
+        """
+        with self._lock:
+            if self.active:
+                return self.directory
+            stamp = time.strftime("%Y%m%d-%H%M%S")
+            directory = os.path.join(base_dir, stamp)
+            n = 1
+            while os.path.exists(directory):
+                directory = os.path.join(base_dir, f"{stamp}_{n}")
+                n += 1
+            os.makedirs(directory)
+            self.directory = directory
+            self._threads = {"gui": threading.main_thread().ident}
+            self._samples = {}
+            self._cpu = {}
+            self._ticks = 0
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(16)
+                self._started_tracemalloc = True
+            self._snapshot = tracemalloc.take_snapshot()
+            if deterministic:
+                self._cprofile = cProfile.Profile()
+                try:
+                    self._cprofile.enable()
+                except ValueError as e:
+                    logger.warning(f"cProfile 无法启动: {e}")
+                    self._cprofile = None
+            self._t0 = time.perf_counter()
+            self._stop.clear()
+            self.active = True
+            self._sampler = threading.Thread(target=self._sample_loop, name="profiler", daemon=True)
+            self._sampler.start()
+        logger.info(f"profiling started: {directory}")
+        return directory
+
+    def stop(self):
+        """
+        Stop and write the reports.
+
+        Returns:
+            str: Report directory, or None when not profiling
+        """
+        with self._lock:
+            if not self.active:
+                return None
+            self.active = False
+            self._stop.set()
+            sampler, self._sampler = self._sampler, None
+        if sampler is not None and sampler is not threading.current_thread():
+            sampler.join(1.0)
+        elapsed = time.perf_counter() - self._t0
+        if self._cprofile is not None:
+            self._cprofile.disable()
+        directory = self.directory
+        try:
+            self._write_reports(directory, elapsed)
+        except Exception as e:
+            logger.error(f"写入性能分析报告失败: {e}")
+        finally:
+            self._cprofile = None
+            self._snapshot = None
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+                self._started_tracemalloc = False
+        logger.info(f"profiling stopped after {elapsed:.1f} s: {directory}")
+        return directory
+
+    def toggle(self, base_dir, deterministic=False):
+        """
+        Start or stop; returns the report directory.
+        """
+        if self.active:
+            return self.stop()
+        return self.start(base_dir, deterministic)
+
+    def start_from_env(self, base_dir):
+        """
+        Start if ``$AUDIO_TOOL_PROFILE`` asks for it (``1`` or ``cprofile``).
+        """
+        value = os.environ.get(PROFILE_ENV, "").strip().lower()
+        if value and value not in ("0", "false", "no"):
+            return self.start(base_dir, deterministic=value == "cprofile")
+        return None
+
+    # ------------------------------------------------------------------
+    # Sampling
+
+    def _sample_loop(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            self._ticks += 1
+            if self._ticks % _CPU_EVERY == 1:
+                self._read_cpu(frames)
+            for role, ident in list(self._threads.items()):
+                frame = frames.get(ident) if ident != own else None
+                if frame is None:
+                    continue  # Not running Python code (waiting in C, or a callback thread between callbacks)
+                stack = []
+                while frame is not None and len(stack) < _MAX_DEPTH:
+                    stack.append(frame.f_code)
+                    frame = frame.f_back
+                stack.reverse()
+                self._samples.setdefault(role, Counter())[tuple(stack)] += 1
+            del frames, frame
+
+    def _read_cpu(self, frames):
+        for role, ident in list(self._threads.items()):
+            # Only threads that hold a Python frame right now: asking for the clock of one that has
+            # exited (a closed stream's callback thread) is undefined
+            if ident not in frames:
+                continue
+            cpu = _thread_cpu(ident)
+            if cpu is None:
+                continue
+            entry = self._cpu.get(role)
+            if entry is None or entry[0] != ident:
+                self._cpu[role] = [ident, cpu, cpu]  # A new callback thread starts its own clock
+            else:
+                entry[2] = cpu
+
+    # ------------------------------------------------------------------
+    # Reports
+
+    def _write_reports(self, directory, elapsed):
+        for role in sorted(set(self._threads) | set(self._samples)):
+            stacks = self._samples.get(role, Counter())
+            with open(os.path.join(directory, f"{role}.collapsed"), "w", encoding="utf-8") as f:
+                for stack, count in stacks.most_common():
+                    f.write(";".join(_label(code) for code in stack) + f" {count}\n")
+            with open(os.path.join(directory, f"{role}.txt"), "w", encoding="utf-8") as f:
+                f.write(self._thread_report(role, stacks, elapsed))
+
+        stop = tracemalloc.take_snapshot()
+        stop.dump(os.path.join(directory, "stop.tracemalloc"))
+        if self._snapshot is not None:
+            self._snapshot.dump(os.path.join(directory, "start.tracemalloc"))
+        with open(os.path.join(directory, "memory.txt"), "w", encoding="utf-8") as f:
+            f.write(self._memory_report(stop))
+
+        if self._cprofile is not None:
+            self._cprofile.dump_stats(os.path.join(directory, "cprofile.pstats"))
+
+    def _thread_report(self, role, stacks, elapsed):
+        total = sum(stacks.values())
+        own, inclusive = Counter(), Counter()
+        for stack, count in stacks.items():
+            own[stack[-1]] += count
+            for code in set(stack):
+                inclusive[code] += count
+        ticks = max(1, self._ticks)
+        lines = [
+            f"thread: {role}",
+            f"duration: {elapsed:.1f} s, {self._ticks} ticks every {self.interval * 1000:.1f} ms",
+            f"in Python code (running, or blocked in a call): {total} samples ({100 * total / ticks:.1f}% of ticks)",
+        ]
+        cpu = self._cpu.get(role)
+        if cpu is not None:
+            lines.append(f"CPU: {cpu[2] - cpu[1]:.2f} s ({100 * (cpu[2] - cpu[1]) / max(elapsed, 1e-9):.1f}% of wall time)")
+        lines.append("")
+        for title, counts in (("self", own), ("total (self + callees)", inclusive)):
+            lines.append(f"top functions by {title}:")
+            lines.append(f"{'samples':>8} {'%':>6}  function")
+            for code, count in counts.most_common(40):
+                lines.append(f"{count:8d} {100 * count / max(1, total):6.1f}  {_label(code)}")
+            lines.append("")
+        return "\n".join(lines)
+
+    def _memory_report(self, stop):
+        current, peak = tracemalloc.get_traced_memory()
+        lines = [f"traced: {current / 1e6:.1f} MB now, {peak / 1e6:.1f} MB peak", ""]
+        try:
+            from audio_tool.audio.memory import MB, default_budget
+            budget = default_budget()
+            lines.append(f"memory budget: {budget.ram / MB:.1f} MB RAM, {budget.disk / MB:.1f} MB spilled, "
+                         f"limit {budget.limit / MB:.0f} MB")
+            for name, usage in budget.usage().items():
+                lines.append(f"  {name}: {usage.ram / MB:.2f} MB RAM, {usage.disk / MB:.2f} MB disk")
+            lines.append("")
+        except Exception as e:
+            lines.append(f"memory budget unavailable: {e}\n")
+        if self._snapshot is not None:
+            ignore = (tracemalloc.Filter(False, tracemalloc.__file__),)
+            lines.append("allocation growth since start (by line):")
+            diff = stop.filter_traces(ignore).compare_to(self._snapshot.filter_traces(ignore), "lineno")
+            for stat in diff[:30]:
+                lines.append(f"  {stat.size_diff / 1024:+10.1f} KiB {stat.count_diff:+8d} blocks  {stat.traceback}")
+        return "\n".join(lines) + "\n"
+
+
+_profiler = Profiler()
+
+
+def profiler():
+    """
+    The process-wide profiler used by the engine, the GUI and the CLI.
+    """
+    return _profiler
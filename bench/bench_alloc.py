@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Allocation regression check: a synthetic recording session must not grow.
+
+    python bench/bench_alloc.py                      # 10 simulated minutes at 20x real time
+    python bench/bench_alloc.py --minutes 60 --speed 40 --tolerance-kb 256
+    python bench/bench_alloc.py --profile            # also run the profiler over the session
+
+Records a synthetic tone through the engine, writer, peak sidecar and
+loudness meter while ``tracemalloc`` follows every allocation, and takes
+the traced total once per simulated minute. Peak pairs grow with the take
+by design and are bounded by the memory budget (they spill to disk), so
+their share is subtracted. Everything else must stay flat after the
+first minutes of warm-up: the script exits with status 1 when it grew by
+more than the tolerance, and lists the lines that allocated most.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_tool.audio.backend import SyntheticBackend  # noqa: E402
+from audio_tool.audio.engine import AudioEngine  # noqa: E402
+from audio_tool.audio.loudness import LoudnessMeter  # noqa: E402
+from audio_tool.audio.memory import default_budget  # noqa: E402
+from audio_tool.utils.profiling import profiler  # noqa: E402
+
+
+def steady_bytes(readings=5):
+    """
+    Traced bytes that should not depend on the length of the take.
+
+    The lowest of a few readings, so temporaries of a block in flight on the engine thread do not count.
+    """
+    values = []
+    for _ in range(readings):
+        peaks = default_budget().usage().get("peaks")
+        values.append(tracemalloc.get_traced_memory()[0] - (peaks.ram if peaks else 0))
+        time.sleep(0.01)
+    return min(values)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=float, default=10.0, help="simulated session length")
+    parser.add_argument("--speed", type=float, default=20.0, help="real-time multiplier of the synthetic device")
+    parser.add_argument("--rate", type=int, default=44100)
+    parser.add_argument("--channels", type=int, default=2)
+    parser.add_argument("--chunk", type=int, default=1024, help="frames per buffer")
+    parser.add_argument("--warmup", type=float, default=2.0, help="simulated minutes before the baseline")
+    parser.add_argument("--tolerance-kb", type=float, default=512.0, help="allowed growth after warm-up")
+    parser.add_argument("--profile", action="store_true", help="profile the session (reports in a temp dir)")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    tracemalloc.start(16)
+    if args.profile:
+        profiler().start(os.path.join(directory, "profiles"))
+    engine = AudioEngine(SyntheticBackend(speed=args.speed), rate=args.rate, channels=args.channels,
+                         frames_per_buffer=args.chunk, ring_seconds=4.0)
+    engine.add_block_listener(LoudnessMeter(args.rate, args.channels))
+    engine.open_device(None).result(10)
+    engine.start_recording(os.path.join(directory, "session.wav"), None).result(10)
+
+    print(f"{args.minutes:g} min of {args.channels}-ch {args.rate} Hz at {args.speed:g}x, "
+          f"{args.chunk} frames/buffer")
+    print(f"{'minute':>6} {'traced MB':>10} {'steady MB':>10} {'budget MB':>10}")
+    samples = []
+    baseline = None
+    t0 = time.monotonic()
+    for minute in range(1, int(args.minutes) + 1):
+        target = minute * 60 * args.rate
+        while engine.stats.frames_written < target:
+            time.sleep(0.05)
+            if time.monotonic() - t0 > args.minutes * 60 / args.speed * 4 + 30:
+                print("session stalled", file=sys.stderr)
+                return 2
+        steady = steady_bytes()
+        samples.append(steady)
+        print(f"{minute:6d} {tracemalloc.get_traced_memory()[0] / 1e6:10.2f} {steady / 1e6:10.2f} "
+              f"{default_budget().ram / 1e6:10.2f}")
+        if minute == int(args.warmup):
+            baseline = tracemalloc.take_snapshot()
+            baseline_bytes = steady
+    info = engine.stop_recording().result(10)
+    engine.shutdown()
+    if args.profile:
+        print(f"profile: {profiler().stop()}")
+
+    if baseline is None:
+        print("session shorter than the warm-up; nothing to compare")
+        return 0
+    growth = samples[-1] - baseline_bytes
+    ignore = (tracemalloc.Filter(False, tracemalloc.__file__),)
+    diff = tracemalloc.take_snapshot().filter_traces(ignore).compare_to(baseline.filter_traces(ignore), "lineno")
+    print(f"recorded {info.duration / 60:.1f} min, {info.frames * info.channels * 2 / 1e6:.0f} MB")
+    print(f"growth after minute {int(args.warmup)}: {growth / 1024:+.1f} KiB (tolerance {args.tolerance_kb:g} KiB)")
+    print("largest changes:")
+    for stat in diff[:10]:
+        print(f"  {stat.size_diff / 1024:+9.1f} KiB  {stat.traceback}")
+    if growth > args.tolerance_kb * 1024:
+        print("FAIL: allocations grow with session length")
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
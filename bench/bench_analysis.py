@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Batch analysis throughput (MB/s) against the number of worker processes.
+
+    python bench/bench_analysis.py                     # 1 GB of generated WAVs
+    python bench/bench_analysis.py --dir /archive      # an existing archive
+
+Generated files are written once and read again for every job count, so
+after the first pass they come from the page cache and the numbers show
+CPU scaling rather than disk speed.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_tool.audio.analysis import analyze_files  # noqa: E402
+
+
+def generate(directory, total_mb, file_mb):
+    rng = np.random.default_rng(0)
+    frames = int(file_mb * 1024 * 1024 / 2)
+    block = (rng.standard_normal(44100 * 10) * 3000).astype(np.int16)
+    paths = []
+    for i in range(max(1, int(total_mb / file_mb))):
+        path = os.path.join(directory, f"take_{i:05d}.wav")
+        with wave.open(path, "wb") as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(44100)
+            for start in range(0, frames, len(block)):
+                w.writeframes(block[:frames - start])
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dir", help="analyse the WAV files in this directory instead of generated ones")
+    parser.add_argument("--total-mb", type=float, default=1024)
+    parser.add_argument("--file-mb", type=float, default=64)
+    parser.add_argument("--chunk-mb", type=float, default=64)
+    parser.add_argument("--jobs", type=int, nargs="*", help="job counts to try (default: 1, 2, 4, ... CPUs)")
+    args = parser.parse_args()
+
+    tmp = None
+    if args.dir:
+        paths = sorted(os.path.join(args.dir, name) for name in os.listdir(args.dir) if name.lower().endswith(".wav"))
+    else:
+        tmp = tempfile.mkdtemp()
+        paths = generate(tmp, args.total_mb, args.file_mb)
+    cpus = os.cpu_count() or 1
+    jobs = args.jobs or sorted({1 << i for i in range(cpus.bit_length())} | {cpus})
+
+    try:
+        print(f"{len(paths)} file(s), {cpus} CPU(s)")
+        base = None
+        for n in jobs:
+            t0 = time.perf_counter()
+            results = analyze_files(paths, jobs=n, chunk_bytes=int(args.chunk_mb * 1024 * 1024))
+            elapsed = time.perf_counter() - t0
+            mb = sum(stats.size for stats in results) / 1e6
+            base = base or mb / elapsed
+            print(f"jobs {n:3d}: {mb / elapsed:8.1f} MB/s  ({mb / elapsed / base:4.2f}x of one job)")
+    finally:
+        if tmp:
+            shutil.rmtree(tmp)
+
+
+if __name__ == "__main__":
+    main()
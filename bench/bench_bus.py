@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Sample bus fan-out: exact delivery, decimation and isolation from a slow subscriber.
+
+    python bench/bench_bus.py                  # 60 s of synthetic capture at 20x
+    python bench/bench_bus.py --seconds 600 --speed 50
+
+A synthetic engine runs faster than real time with four subscribers:
+
+* ``lossless``: every frame, checked against the generated tone;
+* ``decimated``: every 4th frame (``rate=rate/4``), lossless, checked the same way;
+* ``latest``: a display-style reader that keeps only the newest 50 ms;
+* ``stalled``: a lossless subscriber whose callback sleeps far longer than
+  the ring holds, so it must lose data (``lost``).
+
+The stalled one must not hold up capture, the engine thread or the other
+subscribers: no dropped frames and no gaps in the other two lossless
+streams. Exits with status 1 otherwise.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_tool.audio.backend import SyntheticBackend  # noqa: E402
+from audio_tool.audio.bus import LATEST, LOSSLESS, SampleBus  # noqa: E402
+from audio_tool.audio.engine import AudioEngine  # noqa: E402
+
+
+class Checker:
+    """
+    Lossless subscriber callback: positions must be contiguous (in steps) and samples must match the tone.
+    """
+
+    def __init__(self, rate, frequency, step):
+        self.rate = rate
+        self.frequency = frequency
+        self.step = step
+        self.next = None
+        self.frames = 0
+        self.gaps = 0
+        self.mismatches = 0
+
+    def __call__(self, block):
+        if self.next is not None and block.position != self.next:
+            self.gaps += 1
+        positions = block.position + self.step * np.arange(block.frames)
+        expected = (0.3 * 32767 * np.sin(2 * np.pi * self.frequency * positions / self.rate)).astype(np.int16)
+        self.mismatches += int(np.count_nonzero(block.samples[:, 0] != expected))
+        self.next = block.position + self.step * block.frames
+        self.frames += block.frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=60.0, help="audio captured")
+    parser.add_argument("--speed", type=float, default=20.0, help="real-time multiplier of the synthetic device")
+    parser.add_argument("--rate", type=int, default=44100)
+    parser.add_argument("--chunk", type=int, default=1024)
+    args = parser.parse_args()
+
+    frequency = 440.0
+    backend = SyntheticBackend(frequency=frequency, speed=args.speed)
+    engine = AudioEngine(backend, rate=args.rate, channels=2, frames_per_buffer=args.chunk, ring_seconds=2.0)
+    bus = SampleBus(engine)
+    full = Checker(args.rate, frequency, 1)
+    decimated = Checker(args.rate, frequency, 4)
+    latest = []
+
+    def stalled(block):
+        time.sleep(engine.ring.capacity / args.rate / args.speed * 1.5)  # Longer than the ring holds
+
+    subscriptions = [
+        bus.subscribe("lossless", full, policy=LOSSLESS),
+        bus.subscribe("decimated", decimated, rate=args.rate / 4, policy=LOSSLESS),
+        bus.subscribe("latest", lambda block: latest.append(block.frames), policy=LATEST, window_seconds=0.05,
+                      interval=0.01),
+        bus.subscribe("stalled", stalled, policy=LOSSLESS),
+    ]
+    engine.open_device(None).result(10)
+    t0 = time.perf_counter()
+    while engine.ring.written < args.seconds * args.rate:
+        time.sleep(0.05)
+    engine._close_stream()  # Stop capturing, then let the subscribers catch up
+    elapsed = time.perf_counter() - t0
+    time.sleep(0.5)
+    stats = bus.stats()
+    captured = engine.stats.frames_captured
+    listeners = engine.latency.as_dict().get("listeners", {})
+    for subscription in subscriptions:
+        subscription.close()
+    bus.close()
+    engine.shutdown()
+
+    print(f"{captured / args.rate:.0f} s captured in {elapsed:.1f} s, {engine.stats.dropped_frames} dropped, "
+          f"engine listeners p99 {listeners.get('p99_ms', float('nan')):.2f} ms")
+    for name, s in stats.items():
+        print(f"{name:>10}: step {s['step']}, delivered {s['delivered']}, skipped {s['skipped']}, lost {s['lost']}, "
+              f"torn {s['torn']}, lag {s['lag']}")
+    print(f"  lossless: {full.frames} frames, {full.gaps} gaps, {full.mismatches} mismatches")
+    print(f" decimated: {decimated.frames} frames, {decimated.gaps} gaps, {decimated.mismatches} mismatches")
+    print(f"    latest: {len(latest)} deliveries, largest {max(latest, default=0)} frames")
+
+    ok = (full.frames == captured and not full.gaps and not full.mismatches
+          and decimated.frames == (captured + 3) // 4 and not decimated.gaps and not decimated.mismatches
+          and stats["lossless"]["lost"] == 0 and stats["decimated"]["lost"] == 0
+          and stats["stalled"]["lost"] > 0 and max(latest, default=0) <= int(0.05 * args.rate)
+          and engine.stats.dropped_frames == 0)
+    print("OK" if ok else "FAIL")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Catalog query times with a large number of takes.
+
+    python bench/bench_catalog.py                 # 100k generated takes
+    python bench/bench_catalog.py --takes 1000000
+
+Prints the time of what the browser panel does: count the matches and
+fetch one page, unfiltered, scrolled far down, by device and by text.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_tool.audio.catalog import Catalog, Take, TakeFilter  # noqa: E402
+
+PAGE = 256
+
+
+def generate(catalog, count):
+    rng = random.Random(0)
+    devices = [(f"dev-{i:02d}", f"Microphone {i}") for i in range(12)]
+    t = time.time() - count * 600
+    takes = []
+    for i in range(count):
+        t += rng.uniform(60, 1140)
+        device_id, device_name = rng.choice(devices)
+        duration = rng.uniform(1, 3600)
+        frames = int(duration * 48000)
+        takes.append(Take(
+            id=None, path=f"/library/{time.strftime('%Y-%m', time.localtime(t))}/rec_{i:07d}.wav",
+            name=f"rec_{i:07d}.wav", started_at=t, duration=duration, frames=frames, rate=48000, channels=2,
+            sample_width=2, files=1, size=frames * 4, device_id=device_id, device_name=device_name,
+            peak_dbfs=rng.uniform(-40, 0), integrated_lufs=rng.uniform(-40, -10), max_short_term_lufs=None,
+            true_peak_dbtp=None, peaks_path=None, sidecar_path=None, added_at=t,
+        ))
+    catalog.add_many(takes)
+
+
+def timed(fn, repeat=7):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--takes", type=int, default=100_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        catalog = Catalog(os.path.join(directory, "catalog.sqlite"))
+        t0 = time.perf_counter()
+        generate(catalog, args.takes)
+        print(f"inserted {args.takes} takes in {time.perf_counter() - t0:.1f} s")
+
+        cases = {
+            "all": TakeFilter(),
+            "device": TakeFilter(device_id="dev-03"),
+            "text": TakeFilter(text="rec_00123"),
+            "last week": TakeFilter(since=time.time() - 7 * 86400),
+        }
+        print(f"{'filter':>10s}  {'matches':>8s}  {'count ms':>9s}  {'page ms':>8s}  {'deep page ms':>12s}")
+        for name, where in cases.items():
+            matches = catalog.count(where)
+            count_ms = timed(lambda: catalog.count(where))
+            page_ms = timed(lambda: catalog.query(where, limit=PAGE))
+            deep = max(0, matches - PAGE)
+            deep_ms = timed(lambda: catalog.query(where, limit=PAGE, offset=deep))
+            print(f"{name:>10s}  {matches:8d}  {count_ms:9.2f}  {page_ms:8.2f}  {deep_ms:12.2f}")
+        print(f"devices list: {timed(catalog.devices):.2f} ms")
+        catalog.close()
+
+
+if __name__ == "__main__":
+    main()
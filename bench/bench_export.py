@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Region export: speed against a plain disk copy, exactness and flat memory.
+
+    python bench/bench_export.py                    # 1 GiB stereo take, 1/3 of it exported
+    python bench/bench_export.py --mb 10240 --fraction 0.03 --dir /data
+
+A 16-bit stereo WAV file of ``--mb`` MiB is written in small blocks (every
+frame holds its own index, so any shifted or torn byte shows), with a few
+cue points. A region starting on an odd frame is then exported with each
+copy method the platform has (``copy_file_range``, ``sendfile`` and the
+read/write fallback, the first ones disabled in turn) and compared with a
+``shutil.copyfileobj`` of the same byte range. Every export must parse as a
+WAV file of exactly the region's frames, match the source byte for byte,
+carry the cue points inside the region, and leave the peak RSS where it
+was. Exits with status 1 otherwise.
+"""
+import argparse
+import errno
+import hashlib
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_tool.audio import export  # noqa: E402
+from audio_tool.audio.riff import append_cues, read_cues, read_wav_info  # noqa: E402
+
+BLOCK_FRAMES = 1 << 18
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+
+
+def write_source(path, frames, rate):
+    with wave.open(path, "wb") as w:
+        w.setnchannels(2)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        for start in range(0, frames, BLOCK_FRAMES):
+            index = np.arange(start, min(frames, start + BLOCK_FRAMES), dtype=np.uint32)
+            w.writeframes(index.view(np.int16).tobytes())  # One uint32 per stereo int16 frame
+
+
+def digest(path, offset, count):
+    h = hashlib.blake2b()
+    buffer = bytearray(1 << 20)
+    with open(path, "rb", buffering=0) as f:
+        f.seek(offset)
+        while count:
+            n = f.readinto(memoryview(buffer)[:min(count, len(buffer))])
+            if not n:
+                break
+            h.update(memoryview(buffer)[:n])
+            count -= n
+    return h.hexdigest()
+
+
+def drop_cache(path):
+    if hasattr(os, "posix_fadvise"):
+        with open(path, "rb") as f:
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+
+
+def unsupported(*args):
+    raise OSError(errno.ENOSYS, "disabled by the benchmark")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mb", type=float, default=1024, help="size of the source take in MiB")
+    parser.add_argument("--fraction", type=float, default=1 / 3, help="part of the take exported")
+    parser.add_argument("--rate", type=int, default=44100)
+    parser.add_argument("--dir", default=None, help="where to write the files (default: a temporary directory)")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(dir=args.dir)
+    source = os.path.join(directory, "source.wav")
+    frames = int(args.mb * 1024 * 1024 // 4)
+    try:
+        t0 = time.perf_counter()
+        write_source(source, frames, args.rate)
+        info = read_wav_info(source)
+        cues = [(int(frames * f), f"cue {i}") for i, f in enumerate((0.1, 0.4, 0.5, 0.6, 0.9))]
+        append_cues(source, cues)
+        start = int(frames * 0.45) | 1
+        end = start + int(frames * args.fraction)
+        count = (end - start) * info.frame_size
+        offset = info.data_offset + start * info.frame_size
+        print(f"source: {args.mb:.0f} MiB ({frames / args.rate / 60:.1f} min) written in "
+              f"{time.perf_counter() - t0:.1f} s; region {start}..{end} ({count / 2 ** 20:.0f} MiB, "
+              f"{(end - start) / args.rate / 60:.1f} min)")
+        want = digest(source, offset, count)
+        want_cues = [(frame - start, label) for frame, label in cues if start <= frame < end]
+
+        baseline = os.path.join(directory, "baseline.raw")
+        drop_cache(source)
+        t0 = time.perf_counter()
+        with open(source, "rb") as src, open(baseline, "wb") as dst:
+            src.seek(offset)
+            remaining = count
+            while remaining:
+                chunk = src.read(min(remaining, 1 << 20))
+                dst.write(chunk)
+                remaining -= len(chunk)
+        copy_seconds = time.perf_counter() - t0
+        os.remove(baseline)
+        print(f"{'copyfileobj':>16}: {copy_seconds:6.2f} s ({count / 2 ** 20 / copy_seconds:7.0f} MiB/s)")
+
+        runs = [("copy_file_range", {}), ("sendfile", {"_copy_file_range": unsupported}),
+                ("read", {"_copy_file_range": unsupported, "_sendfile": unsupported})]
+        available = {"copy_file_range": hasattr(os, "copy_file_range"), "sendfile": hasattr(os, "sendfile"),
+                     "read": True}
+        ok = True
+        for name, disabled in runs:
+            if not available[name]:
+                continue
+            output = os.path.join(directory, f"region_{name}.wav")
+            saved = {attr: getattr(export, attr) for attr in disabled}
+            for attr, replacement in disabled.items():
+                setattr(export, attr, replacement)
+            drop_cache(source)
+            rss = peak_rss_mb()
+            try:
+                result = export.export_region(source, output, start, end)
+            finally:
+                for attr, original in saved.items():
+                    setattr(export, attr, original)
+            growth = peak_rss_mb() - rss
+            out = read_wav_info(output)
+            with wave.open(output) as w:
+                parsed = w.getnframes() == end - start and w.getnchannels() == 2 and w.getframerate() == args.rate
+            exact = digest(output, out.data_offset, out.data_size) == want and out.data_size == count
+            cues_ok = read_cues(output) == want_cues
+            good = parsed and exact and cues_ok and result.method == name and growth < 32
+            ok &= good
+            print(f"{name:>16}: {result.seconds:6.2f} s ({count / 2 ** 20 / result.seconds:7.0f} MiB/s), "
+                  f"{result.seconds / copy_seconds:4.2f}x disk copy, peak RSS +{growth:.1f} MiB, "
+                  f"{'exact' if exact else 'MISMATCH'}, {len(read_cues(output))} cues"
+                  + ("" if good else f"  FAILED (method {result.method}, header {parsed}, cues {cues_ok})"))
+            os.remove(output)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    print("OK" if ok else "FAIL")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Capture overflows while the GUI process is blocked.
+
+    python bench/bench_gui_stall.py --synthetic            # both modes, no hardware
+    python bench/bench_gui_stall.py --mode process --device 2
+
+The "GUI" repeatedly holds the GIL in one long C call (the way a heavy
+paint or a big NumPy expression does) and then idles. In-process capture
+shares that GIL and misses callbacks; the capture process does not.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import wave
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_tool.audio.backend import PyAudioBackend, SyntheticBackend  # noqa: E402
+from audio_tool.audio.engine import AudioEngine  # noqa: E402
+from audio_tool.audio.process import CaptureProcess  # noqa: E402
+
+
+def calibrate_stall(seconds):
+    """
+    Size a single GIL-holding C call to last roughly ``seconds``.
+    """
+    n = 1_000_000
+    t0 = time.perf_counter()
+    sum(range(n))
+    per_item = (time.perf_counter() - t0) / n
+    return int(seconds / per_item)
+
+
+def run(engine, args, path, stall_items):
+    engine.open_device(args.device).result(10)
+    time.sleep(0.3)
+    engine.start_recording(path, args.device).result(10)
+    t0 = time.perf_counter()
+    stalls = 0
+    while time.perf_counter() - t0 < args.seconds:
+        sum(range(stall_items))  # one C call, GIL held throughout
+        stalls += 1
+        time.sleep(args.idle)
+    engine.stop_recording().result(10)
+    stats = engine.stats
+    engine.shutdown()
+    with wave.open(path) as w:
+        frames = w.getnframes()
+    return stats, stalls, frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["inproc", "process", "both"], default="both")
+    parser.add_argument("--device", type=int, default=None)
+    parser.add_argument("--rate", type=int, default=44100)
+    parser.add_argument("--chunk", type=int, default=256, help="frames per buffer")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--stall", type=float, default=0.25, help="seconds the GUI holds the GIL per stall")
+    parser.add_argument("--idle", type=float, default=0.25, help="seconds between stalls")
+    parser.add_argument("--synthetic", action="store_true")
+    args = parser.parse_args()
+
+    stall_items = calibrate_stall(args.stall)
+    tmp = tempfile.mkdtemp()
+    modes = ["inproc", "process"] if args.mode == "both" else [args.mode]
+    print(f"{args.seconds:.0f} s capture, {args.stall * 1000:.0f} ms GIL stall every "
+          f"{(args.stall + args.idle) * 1000:.0f} ms, {args.chunk} frames/buffer")
+    for mode in modes:
+        options = dict(rate=args.rate, frames_per_buffer=args.chunk)
+        if mode == "process":
+            engine = CaptureProcess("synthetic" if args.synthetic else "pyaudio", **options)
+        else:
+            engine = AudioEngine(SyntheticBackend() if args.synthetic else PyAudioBackend(), **options)
+        stats, stalls, frames = run(engine, args, os.path.join(tmp, f"{mode}.wav"), stall_items)
+        print(f"{mode:>8}: {stalls} stalls, overflows {stats.overflows}, dropped {stats.dropped_frames}, "
+              f"{frames / args.rate:.2f} s written")
+
+
+if __name__ == "__main__":
+    main()
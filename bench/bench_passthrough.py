@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Passthrough (full-duplex input monitoring): cost, gain and glitches under GUI load.
+
+    python bench/bench_passthrough.py                         # synthetic, both modes
+    python bench/bench_passthrough.py --mode inproc --device 2 --output 4 --chunk 64
+
+First the duplex callback is timed on its own, at unity gain (the input
+block is handed straight back) and with gain (one preallocated block is
+scaled in place and returned), and the output is checked to be that
+block. Then passthrough runs for ``--seconds`` while the "GUI" holds the
+GIL in short C calls the way paints do, and the glitch counters are
+reported: late callbacks, output underflows and input overflows. Exits
+with status 1 if a synthetic in-process run glitches or the gain is off.
+"""
+import argparse
+import copy
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_tool.audio.backend import PyAudioBackend, SyntheticBackend  # noqa: E402
+from audio_tool.audio.engine import AudioEngine  # noqa: E402
+from audio_tool.audio.process import CaptureProcess  # noqa: E402
+
+TONE_PEAK = int(0.3 * 32767)  # Peak of SyntheticBackend's tone
+
+
+def calibrate_stall(seconds):
+    n = 1_000_000
+    t0 = time.perf_counter()
+    sum(range(n))
+    return int(seconds / ((time.perf_counter() - t0) / n))
+
+
+def time_callback(args):
+    """
+    Microseconds per duplex callback at unity gain and with gain; checks the output is the preallocated block.
+    """
+    engine = AudioEngine(SyntheticBackend(), rate=args.rate, channels=args.channels)
+    engine.set_passthrough(True, frames_per_buffer=args.chunk).result(10)
+    engine._close_stream()  # Drive the callback by hand
+    block = (np.arange(args.chunk * args.channels) % 2000 - 1000).astype(np.int16).tobytes()
+    time_info = {"input_buffer_adc_time": 0.0, "current_time": 0.0}
+    results = {}
+    ok = True
+    for gain_db in (0.0, -6.0, 6.0):
+        engine._cmd_passthrough(True, gain_db=gain_db)
+        out, _ = engine._on_duplex(block, args.chunk, time_info, 0)
+        expected = np.clip(np.frombuffer(block, dtype=np.int16) * 10 ** (gain_db / 20), -32768, 32767)
+        got = np.frombuffer(out, dtype=np.int16)
+        ok &= bool(np.abs(got - expected).max() <= 1)
+        ok &= (out is block) if gain_db == 0.0 else np.shares_memory(got, engine._out_samples)
+        n = 20000
+        t0 = time.perf_counter()
+        for _ in range(n):
+            engine._on_duplex(block, args.chunk, time_info, 0)
+        results[gain_db] = (time.perf_counter() - t0) / n * 1e6
+    engine.shutdown()
+    return results, ok
+
+
+def run(engine, args, stall_items):
+    engine.open_device(args.device).result(10)
+    on = engine.set_passthrough(True, args.output, args.gain, args.chunk).result(10)
+    if not on:
+        raise SystemExit("passthrough could not be opened")
+    time.sleep(0.3)
+    before = copy.copy(engine.stats)  # The in-process engine updates its stats object in place
+    t0 = time.perf_counter()
+    stalls = 0
+    while time.perf_counter() - t0 < args.seconds:
+        sum(range(stall_items))  # One C call, GIL held throughout
+        stalls += 1
+        time.sleep(args.idle)
+    stats = engine.stats
+    stream = getattr(engine, "_stream", None)
+    peak = getattr(stream, "output_peak", None)
+    engine.shutdown()
+    return before, stats, stalls, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["inproc", "process", "both"], default="both")
+    parser.add_argument("--device", type=int, default=None)
+    parser.add_argument("--output", type=int, default=None, help="output device index")
+    parser.add_argument("--rate", type=int, default=44100)
+    parser.add_argument("--channels", type=int, default=2)
+    parser.add_argument("--chunk", type=int, default=128, help="frames per buffer of the duplex stream")
+    parser.add_argument("--gain", type=float, default=-6.0, help="passthrough gain in dB")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--stall", type=float, default=0.002, help="seconds the GUI holds the GIL per paint")
+    parser.add_argument("--idle", type=float, default=0.014, help="seconds between paints")
+    parser.add_argument("--synthetic", action="store_true", help="no hardware (implied without --device)")
+    args = parser.parse_args()
+    synthetic = args.synthetic or args.device is None
+
+    costs, ok = time_callback(args)
+    print(f"duplex callback, {args.chunk} frames x {args.channels} ch: "
+          + ", ".join(f"{gain:+.0f} dB {us:.1f} us" for gain, us in costs.items())
+          + ("" if ok else "  OUTPUT MISMATCH"))
+
+    stall_items = calibrate_stall(args.stall)
+    period = args.chunk / args.rate
+    print(f"{args.seconds:.0f} s passthrough at {args.gain:+.1f} dB, block {period * 1000:.1f} ms, "
+          f"{args.stall * 1000:.0f} ms GIL stall every {(args.stall + args.idle) * 1000:.0f} ms")
+    modes = ["inproc", "process"] if args.mode == "both" else [args.mode]
+    for mode in modes:
+        options = dict(rate=args.rate, channels=args.channels)
+        if mode == "process":
+            engine = CaptureProcess("synthetic" if synthetic else "pyaudio", **options)
+        else:
+            engine = AudioEngine(SyntheticBackend() if synthetic else PyAudioBackend(), **options)
+        before, stats, stalls, peak = run(engine, args, stall_items)
+        late = stats.late_callbacks - before.late_callbacks
+        underflows = stats.output_underflows - before.output_underflows
+        overflows = stats.overflows - before.overflows
+        line = (f"{mode:>8}: latency {stats.passthrough_latency_us / 1000:.1f} ms, {stalls} stalls, "
+                f"{stats.callbacks - before.callbacks} callbacks, late {late}, underflows {underflows}, "
+                f"overflows {overflows}")
+        if peak is not None:
+            expected = min(32767, TONE_PEAK * 10 ** (args.gain / 20))
+            gain_ok = abs(peak - expected) <= max(2, expected * 1e-3)
+            line += f", output peak {20 * math.log10(max(peak, 1) / TONE_PEAK):+.2f} dB"
+            ok &= gain_ok
+        print(line)
+        if synthetic and mode == "inproc":
+            ok &= not (underflows or overflows)
+    print("OK" if ok else "FAIL")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
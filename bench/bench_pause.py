@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Pause/resume on a hot stream: sample accuracy, cue markers and cost.
+
+    python bench/bench_pause.py                   # 20 pauses over ~60 s of synthetic capture at 20x
+    python bench/bench_pause.py --pauses 100 --speed 50
+
+A synthetic engine records a tone while the take is paused and resumed at
+random moments. Each pause and resume is timed, and the stream must stay
+the same object throughout (no device reopen) with a single file written.
+Afterwards every segment of the file must be exactly the tone from its
+resume position to the following pause position, and the file's cue points
+must sit on the segment boundaries. Exits with status 1 otherwise.
+"""
+import argparse
+import glob
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_tool.audio.backend import SyntheticBackend  # noqa: E402
+from audio_tool.audio.engine import AudioEngine  # noqa: E402
+from audio_tool.audio.reader import WavReader  # noqa: E402
+from audio_tool.audio.riff import read_cues  # noqa: E402
+
+
+def tone(positions, rate, frequency):
+    return (0.3 * 32767 * np.sin(2 * np.pi * frequency * positions / rate)).astype(np.int16)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pauses", type=int, default=20)
+    parser.add_argument("--speed", type=float, default=20.0, help="real-time multiplier of the synthetic device")
+    parser.add_argument("--rate", type=int, default=44100)
+    parser.add_argument("--chunk", type=int, default=1024)
+    args = parser.parse_args()
+
+    frequency = 440.0
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "take.wav")
+    engine = AudioEngine(SyntheticBackend(frequency=frequency, speed=args.speed), rate=args.rate, channels=2,
+                         frames_per_buffer=args.chunk)
+    engine.open_device(None).result(10)
+    stream = engine._stream
+    rng = np.random.default_rng(1)
+
+    def wait():
+        time.sleep(rng.uniform(0.5, 2.0) / args.speed)
+
+    engine.start_recording(path).result(10)
+    bounds = []  # (resume position, pause position) of every written stretch
+    start = engine.recording.segments[0][1]
+    costs = {"pause": [], "resume": []}
+    for _ in range(args.pauses):
+        wait()
+        t0 = time.perf_counter()
+        paused = engine.pause().result(10)
+        costs["pause"].append(time.perf_counter() - t0)
+        bounds.append((start, paused))
+        wait()
+        t0 = time.perf_counter()
+        start = engine.resume().result(10)
+        costs["resume"].append(time.perf_counter() - t0)
+    wait()
+    info = engine.stop_recording().result(10)
+    bounds.append((start, info.segments[-1][1] + info.frames - info.segments[-1][0]))
+    same_stream = engine._stream is stream
+    engine.shutdown()
+
+    files = glob.glob(os.path.join(directory, "*.wav"))
+    with WavReader(path) as reader:
+        samples = reader.frames()[:, 0].copy()
+    cues = read_cues(path)
+
+    mismatches = 0
+    take_frame = 0
+    boundaries = []
+    for begin, end in bounds:
+        n = end - begin
+        mismatches += int(np.count_nonzero(samples[take_frame:take_frame + n] != tone(begin + np.arange(n), args.rate,
+                                                                                       frequency)))
+        take_frame += n
+        boundaries.append(take_frame)
+    gaps = [b[0] - a[1] for a, b in zip(bounds, bounds[1:])]
+
+    for name, values in costs.items():
+        ms = np.array(values) * 1000
+        print(f"{name:>7}: median {np.median(ms):.2f} ms, max {ms.max():.2f} ms over {len(ms)} calls")
+    print(f"{len(samples)} frames written in {len(bounds)} segments, gaps {min(gaps)}..{max(gaps)} frames, "
+          f"{mismatches} mismatched samples")
+    print(f"{len(cues)} cue points, first {cues[:1]}; {len(files)} file(s), stream kept: {same_stream}")
+
+    ok = (same_stream and len(files) == 1 and mismatches == 0 and take_frame == len(samples)
+          and [frame for frame, _ in cues] == boundaries[:-1] and all(g > 0 for g in gaps)
+          and [m[0] for m in info.markers] == boundaries[:-1])
+    print("OK" if ok else "FAIL")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Throughput of the DSP pipeline on one core, as a multiple of real time.
+
+    python bench/bench_pipeline.py
+    python bench/bench_pipeline.py --rate 44100 --channels 1 --block 512
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_tool.audio.pipeline import (  # noqa: E402
+    DCBlock, DitherToInt16, Gain, HighPass, Limiter, Mixdown, Pipeline,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=int, default=48000)
+    parser.add_argument("--channels", type=int, default=2)
+    parser.add_argument("--block", type=int, default=1024, help="frames per block")
+    parser.add_argument("--seconds", type=float, default=60.0, help="audio to process")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    blocks = int(args.seconds * args.rate / args.block)
+    source = (rng.standard_normal((args.block * 16, args.channels)) * 6000).astype(np.int16)
+    pipeline = Pipeline(
+        [Gain(3.0), DCBlock(), HighPass(80.0), Limiter(-1.0), Mixdown(), DitherToInt16()],
+        args.rate, args.channels, max_frames=args.block,
+    )
+    # Warm-up so first-call allocations in NumPy/BLAS are not counted
+    for i in range(16):
+        pipeline.process(source[i * args.block:(i + 1) * args.block])
+    pipeline.total_ns[:] = 0
+    pipeline.frames_processed = 0
+
+    for i in range(blocks):
+        j = i % 16
+        pipeline.process(source[j * args.block:(j + 1) * args.block])
+
+    print(f"{args.seconds:.0f} s of {args.channels}-ch {args.rate} Hz audio in {args.block}-frame blocks")
+    for name, ms, factor in pipeline.report():
+        print(f"{name:>10}: {ms:9.1f} ms  {factor:9.1f}x real time")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Streaming resampler throughput per quality preset, as a multiple of real time.
+
+    python bench/bench_resample.py                       # stereo 48k -> 44.1k
+    python bench/bench_resample.py --rate 44100 --out-rate 48000 --channels 1
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_tool.audio.resample import QUALITY_PRESETS, Resample  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=int, default=48000)
+    parser.add_argument("--out-rate", type=int, default=44100)
+    parser.add_argument("--channels", type=int, default=2)
+    parser.add_argument("--block", type=int, default=1024, help="frames per block")
+    parser.add_argument("--seconds", type=float, default=60.0, help="audio to process")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    source = rng.uniform(-0.5, 0.5, (args.block * 16, args.channels)).astype(np.float32)
+    blocks = int(args.seconds * args.rate / args.block)
+    print(f"{args.seconds:.0f} s of {args.channels}-ch audio, {args.rate} -> {args.out_rate} Hz, "
+          f"{args.block}-frame blocks")
+
+    for quality in QUALITY_PRESETS:
+        stage = Resample(args.out_rate, quality)
+        stage.configure(args.rate, args.channels, args.block)
+        for i in range(16):
+            stage.process(source[i * args.block:(i + 1) * args.block])
+        produced = 0
+        t0 = time.perf_counter()
+        for i in range(blocks):
+            j = i % 16
+            produced += len(stage.process(source[j * args.block:(j + 1) * args.block]))
+        elapsed = time.perf_counter() - t0
+        print(f"{quality:>8}: {stage.taps:3d} taps/phase, {stage.up}/{stage.down}  "
+              f"{elapsed * 1000:8.1f} ms  {blocks * args.block / args.rate / elapsed:7.1f}x real time  "
+              f"({produced} frames out)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Seek latency of the playback engine on a long take.
+
+    python bench/bench_seek.py                    # 3 h mono take, synthetic output
+    python bench/bench_seek.py --hours 10 --seeks 500
+    python bench/bench_seek.py --file take.wav --device 3
+
+Latency runs from the ``PlaybackEngine.seek`` call (window decode
+included) until the first output callback that plays the new position
+returns, on ``time.monotonic()``; the engine's own histogram, which adds
+the output buffering a real device reports, is printed alongside. A
+negative sample means the clocks disagree and is counted, not binned.
+The generated take is sparse, so a 10 h file costs no disk space; every
+seek still decodes its window through the memory map.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import wave
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_tool.audio.backend import PyAudioBackend, SyntheticBackend  # noqa: E402
+from audio_tool.audio.latency import LatencyHistogram  # noqa: E402
+from audio_tool.audio.playback import MAX_SPEED, PlaybackEngine  # noqa: E402
+
+
+def make_take(path, hours, rate):
+    """
+    Sparse mono 16-bit take of ``hours`` length.
+    """
+    with wave.open(path, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(b"\x01\x00" * rate)
+    frames = int(hours * 3600 * rate)
+    with open(path, "r+b") as f:
+        f.truncate(44 + frames * 2)
+        f.seek(4)
+        f.write((36 + frames * 2).to_bytes(4, "little"))
+        f.seek(40)
+        f.write((frames * 2).to_bytes(4, "little"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--file", help="WAV file to seek in (default: generate one)")
+    parser.add_argument("--hours", type=float, default=3.0, help="length of the generated take")
+    parser.add_argument("--rate", type=int, default=44100)
+    parser.add_argument("--seeks", type=int, default=200)
+    parser.add_argument("--interval", type=float, default=0.02, help="seconds between seeks")
+    parser.add_argument("--chunk", type=int, default=256, help="output frames per buffer")
+    parser.add_argument("--device", type=int, default=None, help="PortAudio output device (default: synthetic)")
+    args = parser.parse_args()
+
+    path = args.file
+    if path is None:
+        path = os.path.join(tempfile.mkdtemp(), "bench_seek.wav")
+        make_take(path, args.hours, args.rate)
+    backend = PyAudioBackend() if args.device is not None else SyntheticBackend()
+    player = PlaybackEngine(backend, args.device, frames_per_buffer=args.chunk)
+    measured = LatencyHistogram("seek")
+    pending = []  # (requested_at, frame) of the latest seek not yet heard
+    rejected = 0
+    callback = player._callback
+
+    def timed_callback(in_data, frame_count, time_info, status):
+        nonlocal rejected
+        result = callback(in_data, frame_count, time_info, status)
+        if pending:
+            requested_at, frame = pending[0]
+            if frame <= player._pos <= frame + frame_count * MAX_SPEED:
+                latency = time.monotonic() - requested_at
+                if latency >= 0:
+                    measured.record(latency)
+                else:
+                    rejected += 1
+                pending.clear()
+        return result
+
+    player._callback = timed_callback  # Bound when the stream opens
+    player.open(path)
+    player.play()
+    print(f"{path}: {player.duration / 3600:.2f} h, {args.chunk} frames/buffer, {args.seeks} seeks")
+
+    t0 = time.perf_counter()
+    for _ in range(args.seeks):
+        seconds = random.uniform(0, player.duration)
+        pending[:] = [(time.monotonic(), float(min(seconds * player.rate, player.reader.num_frames)))]
+        player.seek(seconds)
+        time.sleep(args.interval)
+    elapsed = time.perf_counter() - t0
+    player.close()
+    backend.terminate()
+
+    for name, histogram in (("seek", measured), ("engine", player.latency)):
+        s = histogram.summary()
+        if not s["count"]:
+            print(f"{name}: no data")
+            continue
+        print(f"{name:>6}: p50 {s['p50_ms']:.2f} ms  p90 {s['p90_ms']:.2f} ms  p99 {s['p99_ms']:.2f} ms  "
+              f"max {s['max_ms']:.2f} ms  (n={s['count']})")
+    print(f"{rejected} negative sample(s) rejected")
+    print(f"underruns {player.underruns} in {elapsed:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
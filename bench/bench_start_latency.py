@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Record-button latency: cold stream open per take vs. the persistent engine.
+
+    python bench/bench_start_latency.py                 # default microphone
+    python bench/bench_start_latency.py --device 2 --chunk 256
+    python bench/bench_start_latency.py --synthetic     # no hardware needed
+
+"cold" is what the old recorder did on every click: open a stream and wait
+for its first block. "warm" is ``AudioEngine.start_recording`` on a running
+standby stream, measured until the first frame is on disk.
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_tool.audio.backend import PA_CONTINUE, PyAudioBackend, SyntheticBackend  # noqa: E402
+from audio_tool.audio.engine import AudioEngine  # noqa: E402
+
+
+def summarize(name, samples):
+    ms = sorted(s * 1000 for s in samples)
+    p95 = ms[min(len(ms) - 1, int(len(ms) * 0.95))]
+    print(f"{name:>5}: min {ms[0]:7.2f} ms  median {statistics.median(ms):7.2f} ms  "
+          f"p95 {p95:7.2f} ms  max {ms[-1]:7.2f} ms  (n={len(ms)})")
+
+
+def bench_cold(backend, args):
+    samples = []
+    for _ in range(args.cycles):
+        first = threading.Event()
+
+        def callback(in_data, frame_count, time_info, status):
+            first.set()
+            return (None, PA_CONTINUE)
+
+        t0 = time.perf_counter()
+        stream = backend.open_input(args.device, args.rate, 1, args.chunk, callback)
+        first.wait(5)
+        samples.append(time.perf_counter() - t0)
+        stream.stop_stream()
+        stream.close()
+    return samples
+
+
+def bench_warm(backend, args, path):
+    engine = AudioEngine(backend, rate=args.rate, frames_per_buffer=args.chunk)
+    engine.open_device(args.device).result(5)
+    time.sleep(0.2)
+    samples = []
+    for _ in range(args.cycles):
+        engine.start_recording(path, args.device).result(5)
+        while engine.stats.start_latency == 0.0:
+            time.sleep(0.0005)
+        samples.append(engine.stats.start_latency)
+        engine.stats.start_latency = 0.0
+        engine.stop_recording().result(5)
+    engine.shutdown()
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--device", type=int, default=None, help="PortAudio input device index")
+    parser.add_argument("--rate", type=int, default=44100)
+    parser.add_argument("--chunk", type=int, default=1024, help="frames per buffer")
+    parser.add_argument("--cycles", type=int, default=20)
+    parser.add_argument("--synthetic", action="store_true", help="use the synthetic tone backend")
+    args = parser.parse_args()
+
+    # The synthetic device pretends a 150 ms open, typical of CoreAudio/WASAPI
+    backend = SyntheticBackend(open_delay=0.15) if args.synthetic else PyAudioBackend()
+    path = os.path.join(tempfile.mkdtemp(), "bench.wav")
+    print(f"rate {args.rate} Hz, {args.chunk} frames/buffer "
+          f"({args.chunk / args.rate * 1000:.1f} ms per block)")
+    summarize("cold", bench_cold(backend, args))
+    summarize("warm", bench_warm(backend, args, path))
+    backend.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Accuracy and cost of the threshold trigger.
+
+    python bench/bench_trigger.py                  # 10 min of stereo test signal
+    python bench/bench_trigger.py --minutes 60 --chunk 256
+    python bench/bench_trigger.py --live           # also record bursts through a synthetic engine
+
+A noise floor with bursts at known sample positions (some with a single
+click ahead of them, for the slope threshold) is fed to ``TriggerDetector``
+in blocks of random size. Every start must land on the burst's first
+sample, every stop on the last loud sample plus the post window, and the
+result must not depend on the block boundaries. The script exits with
+status 1 otherwise. ``--live`` arms the trigger of a synthetic engine at
+20x and checks that each burst became its own file of the exact length.
+"""
+import argparse
+import glob
+import os
+import sys
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_tool.audio.backend import SyntheticBackend  # noqa: E402
+from audio_tool.audio.engine import AudioEngine  # noqa: E402
+from audio_tool.audio.trigger import EventPaths, TriggerDetector, TriggerSettings  # noqa: E402
+
+
+def make_signal(minutes, rate, channels, seed=1):
+    """
+    Noise at -60 dBFS with bursts; returns the signal and the expected ``(start, last loud sample)`` pairs.
+    """
+    rng = np.random.default_rng(seed)
+    frames = int(minutes * 60 * rate)
+    x = rng.normal(0, 30, (frames, channels)).clip(-32768, 32767).astype(np.int16)
+    expected = []
+    position = rate
+    while position < frames - 10 * rate:
+        length = int(rng.uniform(0.05, 3.0) * rate)
+        channel = rng.integers(channels)
+        burst = rng.choice((-1, 1), length) * rng.integers(3000, 32767, length)
+        burst[0] = rng.choice((-32768, 32767))  # Full scale on the very first sample
+        x[position:position + length, channel] = burst
+        expected.append((position, position + length - 1))
+        position += length + int(rng.uniform(2.0, 8.0) * rate)
+    return x, expected
+
+
+def run(detector, x, blocks):
+    events = []
+    position = 0
+    for n in blocks:
+        events += detector.process(position, x[position:position + n])
+        position += n
+    return events
+
+
+def check_offline(args):
+    x, expected = make_signal(args.minutes, args.rate, args.channels)
+    settings = TriggerSettings(start_dbfs=-20.0, stop_dbfs=-26.0, pre_seconds=0.5, post_seconds=0.5,
+                               hold_seconds=1.0)
+    post = int(settings.post_seconds * args.rate)
+    want = []
+    for start, last in expected:
+        want += [("start", start), ("stop", last + 1 + post)]
+
+    rng = np.random.default_rng(2)
+    sizes = rng.integers(1, 2 * args.chunk, len(x) // args.chunk * 2 + 10)
+    sizes = sizes[:np.searchsorted(np.cumsum(sizes), len(x)) + 1]
+    runs = {
+        "whole signal": [len(x)],
+        f"{args.chunk}-frame blocks": [args.chunk] * (len(x) // args.chunk + 1),
+        "random blocks": list(sizes),
+    }
+    ok = True
+    for name, blocks in runs.items():
+        detector = TriggerDetector(args.rate, args.channels, settings)
+        t0 = time.perf_counter()
+        events = run(detector, x, blocks)
+        elapsed = time.perf_counter() - t0
+        got = [(e.kind, e.position) for e in events]
+        match = got == want
+        ok &= match
+        print(f"{name:>20}: {len(events) // 2} events, {'exact' if match else 'MISMATCH'}, "
+              f"{len(x) / elapsed / args.rate:7.0f}x real time ({elapsed * 1e6 / max(1, len(blocks)):.1f} us/block)")
+        if not match:
+            for a, b in zip(got, want):
+                if a != b:
+                    print(f"    first difference: got {a}, expected {b}")
+                    break
+
+    # A click 5 ms before a quiet burst only passes the slope threshold
+    x = np.zeros((args.rate, args.channels), dtype=np.int16)
+    x[1000] = 12000
+    events = run(TriggerDetector(args.rate, args.channels, TriggerSettings(start_dbfs=-6.0, slope_dbfs=-12.0)),
+                 x, [256] * (len(x) // 256 + 1))
+    slope = [(e.kind, e.position, e.reason) for e in events]
+    match = slope[:1] == [("start", 1000, "slope")]
+    ok &= match
+    print(f"{'slope':>20}: {slope[:2]} {'exact' if match else 'MISMATCH'}")
+    return ok
+
+
+def check_live(args):
+    directory = tempfile.mkdtemp()
+    speed = 20.0
+    engine = AudioEngine(SyntheticBackend(speed=speed, bursts=(0.5, 2.0)), rate=args.rate, channels=1,
+                         frames_per_buffer=args.chunk)
+    settings = TriggerSettings(start_dbfs=-20.0, pre_seconds=0.25, post_seconds=0.25, hold_seconds=0.5)
+    engine.set_trigger(settings, EventPaths(os.path.join(directory, "event_{n:04d}.wav"))).result(10)
+    time.sleep(25.0 / speed)  # 10 bursts
+    engine.set_trigger(None).result(10)
+    engine.shutdown()
+    files = sorted(glob.glob(os.path.join(directory, "event_*.wav")))
+    lengths = []
+    for path in files:
+        with wave.open(path) as w:
+            lengths.append(w.getnframes() / w.getframerate())
+    # pre + 0.5 s burst + post; the first burst starts with the stream (no pre-roll yet), disarming cuts the last
+    full = [d for d in lengths[1:-1] if abs(d - 1.0) < 2e-3]
+    print(f"{'live':>20}: {len(files)} files, durations {', '.join(f'{d:.3f}' for d in lengths)} s")
+    return len(files) >= 9 and len(full) == len(lengths) - 2
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=float, default=10.0, help="length of the test signal")
+    parser.add_argument("--rate", type=int, default=44100)
+    parser.add_argument("--channels", type=int, default=2)
+    parser.add_argument("--chunk", type=int, default=1024, help="frames per block")
+    parser.add_argument("--live", action="store_true", help="also record bursts through a synthetic engine")
+    args = parser.parse_args()
+
+    ok = check_offline(args)
+    if args.live:
+        ok &= check_live(args)
+    print("OK" if ok else "FAIL")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+GUI-thread cost of the waveform view per frame.
+
+    QT_QPA_PLATFORM=offscreen python bench/bench_waveform_paint.py --views 4
+
+Feeds each view 50 ms blocks of noise at real-time pace and reports the
+time spent in ``paintEvent`` (GUI thread) against the time the render
+thread needed to build each frame.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PySide6.QtWidgets import QApplication, QVBoxLayout, QWidget  # noqa: E402
+
+from audio_tool.ui.waveform_widget import WaveformWidget  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--views", type=int, default=1)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--width", type=int, default=1200)
+    parser.add_argument("--height", type=int, default=300)
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    window = QWidget()
+    layout = QVBoxLayout(window)
+    views = [WaveformWidget() for _ in range(args.views)]
+    for view in views:
+        layout.addWidget(view)
+    window.resize(args.width, args.height * args.views)
+    window.show()
+
+    # Record both sides: paint time on the GUI thread, render time on the worker
+    paint_ms, render_ms = [], []
+    for view in views:
+        renderer = view.renderer
+        original = renderer._render
+
+        def timed(*a, _original=original):
+            t0 = time.perf_counter()
+            image = _original(*a)
+            render_ms.append((time.perf_counter() - t0) * 1000)
+            return image
+        renderer._render = timed
+
+    rng = np.random.default_rng(0)
+    block = 2205
+    t_end = time.perf_counter() + args.seconds
+    next_feed = time.perf_counter()
+    while time.perf_counter() < t_end:
+        now = time.perf_counter()
+        if now >= next_feed:
+            data = (rng.standard_normal(block) * 8000).astype(np.int16)
+            for view in views:
+                view.update_audio_data(data)
+            next_feed += block / 44100
+        app.processEvents()
+        for view in views:
+            if view.last_paint_ms:
+                paint_ms.append(view.last_paint_ms)
+                view.last_paint_ms = 0.0
+        time.sleep(0.001)
+
+    for view in views:
+        view.shutdown()
+    print(f"{args.views} view(s) {args.width}x{args.height}, {args.seconds:.0f} s")
+    for name, values in (("paintEvent (GUI thread)", paint_ms), ("render (worker thread)", render_ms)):
+        if values:
+            print(f"{name:>24}: {len(values):5d} frames  median {statistics.median(values):6.3f} ms  "
+                  f"p99 {sorted(values)[int(len(values) * 0.99) - 1]:6.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,8 @@
 """
 Main entry point for the Audio Recorder and Renderer Tool.
 """
+import multiprocessing
+import os
 import sys
 from PySide6.QtWidgets import QApplication
 from audio_tool.ui import MainWindow
@@ -15,8 +17,11 @@ class AudioRecorderApp(QApplication):
         self.setApplicationName("Audio Recorder & Renderer")
         self.setApplicationVersion("0.1.0")
 
+        # Capture in a child process keeps GUI stalls away from the audio path
+        capture_process = "--capture-process" in argv or os.environ.get("AUDIO_TOOL_CAPTURE_PROCESS") == "1"
+
         # Initialize main window
-        self.main_window = MainWindow()
+        self.main_window = MainWindow(capture_process=capture_process)
         self.main_window.show()
 
 
@@ -27,4 +32,5 @@ def main():
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     sys.exit(main())
\ No newline at end of file
@@ -30,14 +30,19 @@ def record_n_seconds(device_index: int, fn: str):
         
         logger.info(f"开始录音，时长: {RECORD_SECONDS}秒")
         
-        frames = []  # 存储录音数据
-        
-        for i in range (RECORD_SECONDS):
-            logger.info(f"第{i+1}秒")
-            # 录音
-            for i in range(0, int(RATE / CHUNK)):
-                data = stream.read(CHUNK)
-                frames.append(data)
+        # 边录边写入WAV文件，内存占用不随录音时长增长
+        wf = wave.open(fn, 'wb')
+        wf.setnchannels(CHANNELS)
+        wf.setsampwidth(audio.get_sample_size(FORMAT))
+        wf.setframerate(RATE)
+        try:
+            for i in range (RECORD_SECONDS):
+                logger.info(f"第{i+1}秒")
+                # 录音
+                for i in range(0, int(RATE / CHUNK)):
+                    wf.writeframes(stream.read(CHUNK))
+        finally:
+            wf.close()
         
         logger.info("录音结束")
         
@@ -45,14 +50,6 @@ def record_n_seconds(device_index: int, fn: str):
         stream.stop_stream()
         stream.close()
         audio.terminate()
-        
-        # 保存录音到WAV文件
-        wf = wave.open(fn, 'wb')
-        wf.setnchannels(CHANNELS)
-        wf.setsampwidth(audio.get_sample_size(FORMAT))
-        wf.setframerate(RATE)
-        wf.writeframes(b''.join(frames))
-        wf.close()
     except Exception as e:
         logger.error(f"录音过程中发生错误: {e}")
         audio.terminate()
@@ -8,6 +8,9 @@ from PySide6.QtWidgets import QApplication, QLabel, QPushButton, QVBoxLayout, QH
 
 import pyaudio
 
+from audio_tool.audio.backend import PyAudioBackend
+from audio_tool.audio.devices import DeviceRegistry
+
 
 class Worker(QObject):
     finished_signal = Signal()
@@ -128,6 +131,10 @@ class MainDialog(QWidget):
         self.mic_combo = QComboBox(self)
         self.mic_combo.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
 
+        # Device list from a PyAudio instance kept for the dialog's lifetime; the worker
+        # opens its own in the same process, so the indices it resolves to are valid there
+        self.backend = PyAudioBackend()
+        self.devices = DeviceRegistry(scanner=self.backend.list_devices)
         mp = self.get_available_microphones()
         self.update_microphone_list(mp)
 
@@ -165,7 +172,7 @@ class MainDialog(QWidget):
         """
         self.mic_combo.clear()
         for mic in microphones:
-            self.mic_combo.addItem(mic["name"], mic["index"])
+            self.mic_combo.addItem(mic["name"], mic["id"])
 
     def get_available_microphones(self):
         """
@@ -174,31 +181,30 @@ class MainDialog(QWidget):
         Returns:
             list: List of dictionaries containing microphone information (index, name)
         """
-        microphones = []
-        
-        pa = pyaudio.PyAudio()
         try:
-            for i in range(pa.get_device_count()):
-                device_info = pa.get_device_info_by_index(i)
-                if device_info['maxInputChannels'] > 0:  # Only input devices (microphones)
-                    microphones.append({
-                        'index': i,
-                        'name': device_info['name']
-                    })
+            if not self.devices.devices():
+                self.devices.refresh()
+            microphones = [d.as_dict() for d in self.devices.devices(input_only=True)]
         except Exception as e:
             logger.error(f"获取麦克风列表失败: {str(e)}")
-            microphones.append({'index': 0, 'name': '默认麦克风'})
+            microphones = [{'id': None, 'index': 0, 'name': '默认麦克风'}]
 
         return microphones
 
     def get_selected_microphone(self):
         """
         Get the selected microphone index.
+
+        The combo stores stable device ids; they are resolved to the current
+        PortAudio index here so a rescan cannot point at the wrong device.
         
         Returns:
             int: Index of the selected microphone, or None if no selection
         """
-        return self.mic_combo.currentData()
+        device_id = self.mic_combo.currentData()
+        if device_id is None:
+            return None
+        return self.devices.resolve_index(device_id)
 
     def update_status(self, status):
         if status == self.LABEL_RUNNING:
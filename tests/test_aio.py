@@ -0,0 +1,55 @@
+import asyncio
+
+import pytest
+
+from audio_tool.audio.aio import open_capture
+from audio_tool.audio.backend import SyntheticBackend
+
+
+async def _wait_full(stream, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not stream._queue.full():
+        assert asyncio.get_running_loop().time() < deadline, "queue never filled"
+        await asyncio.sleep(0.01)
+
+
+def test_close_with_full_queue_after_consumer_breaks():
+    async def main():
+        async with open_capture(backend=SyntheticBackend(speed=20), rate=44100, queue_size=2) as stream:
+            async for _ in stream:
+                await _wait_full(stream)  # Slow consumer: the engine fills the queue meanwhile
+                break
+        return stream
+
+    stream = asyncio.run(main())
+
+    assert stream._closed
+
+
+def test_close_with_full_queue_drains_then_stops():
+    async def main():
+        stream = open_capture(backend=SyntheticBackend(speed=20), rate=44100, queue_size=3)
+        await stream.__aenter__()
+        await _wait_full(stream)
+        await stream.aclose()
+        return [block async for block in stream]
+
+    blocks = asyncio.run(main())
+
+    assert len(blocks) == 3
+
+
+def test_close_wakes_waiting_consumer():
+    async def main():
+        # Nearly silent device: a block every couple of seconds at most
+        stream = open_capture(backend=SyntheticBackend(speed=0.01), rate=44100, queue_size=2)
+        await stream.__aenter__()
+        while not stream._queue.empty():
+            stream._queue.get_nowait()
+        consumer = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0.05)
+        await stream.aclose()
+        return await asyncio.wait_for(consumer, 5.0)
+
+    with pytest.raises(StopAsyncIteration):
+        asyncio.run(main())
@@ -0,0 +1,36 @@
+import pytest
+
+from audio_tool import cli
+from audio_tool.audio.backend import SyntheticBackend
+from audio_tool.audio.devices import DeviceInfo, _stable_id
+
+
+class _Backend(SyntheticBackend):
+    def list_devices(self, rescan=False):
+        def device(index, name, inputs, outputs):
+            return DeviceInfo(
+                id=_stable_id("ALSA", name, inputs, outputs, 0), index=index, name=name, host_api="ALSA",
+                max_input_channels=inputs, max_output_channels=outputs, default_sample_rate=48000.0,
+                default_low_input_latency=0.01, default_high_input_latency=0.1, default_low_output_latency=0.01,
+                default_high_output_latency=0.1,
+            )
+        return [device(0, "USB Mic", 1, 0), device(1, "Speakers", 0, 2), device(2, "Headset", 1, 2)]
+
+
+@pytest.mark.parametrize("spec", ["1", "Speak", _stable_id("ALSA", "Speakers", 0, 2, 0)])
+def test_passthrough_output_by_index_name_or_id(spec):
+    assert cli._resolve_device(_Backend(), spec, output=True).name == "Speakers"
+
+
+def test_passthrough_output_rejects_unknown_or_input_only_device():
+    with pytest.raises(SystemExit):
+        cli._resolve_device(_Backend(), "Nonexistent", output=True)
+    with pytest.raises(SystemExit):
+        cli._resolve_device(_Backend(), "0", output=True)
+
+
+def test_device_name_matches_inputs_only():
+    assert cli._resolve_device(_Backend(), "Mic").name == "USB Mic"
+    assert cli._resolve_device(_Backend(), "e").name == "Headset"  # Speakers is output-only
+    assert cli._resolve_device(_Backend(), "2").name == "Headset"
+    assert cli._resolve_device(_Backend(), "") is None
@@ -0,0 +1,60 @@
+import pytest
+
+from audio_tool.audio.backend import SyntheticBackend
+from audio_tool.audio.devices import DeviceRegistry
+from audio_tool.audio.engine import AudioEngine
+
+
+class _CountingBackend(SyntheticBackend):
+    def __init__(self):
+        super().__init__(speed=4)
+        self.rescans = []
+
+    def list_devices(self, rescan=False):
+        self.rescans.append(rescan)
+        return super().list_devices(rescan)
+
+
+@pytest.fixture
+def engine():
+    engine = AudioEngine(_CountingBackend(), rate=44100, channels=1)
+    engine.open_device(None).result(10)
+    yield engine
+    engine.shutdown()
+
+
+def test_rescan_skipped_under_open_stream(engine):
+    engine.list_devices(rescan=True).result(10)
+
+    assert engine.backend.rescans[-1] is False
+
+
+def test_rescan_reopens_idle_standby_stream(engine):
+    stream = engine._stream
+
+    devices = engine.list_devices(rescan=True, reopen=True).result(10)
+
+    assert engine.backend.rescans[-1] is True
+    assert engine._stream is not None and engine._stream is not stream
+    assert [d.name for d in devices] == ["Synthetic tone"]
+
+
+def test_rescan_leaves_monitoring_stream_open(engine):
+    engine.set_monitoring(True, 1.0).result(10)
+    stream = engine._stream
+
+    engine.list_devices(rescan=True, reopen=True).result(10)
+
+    assert engine.backend.rescans[-1] is False
+    assert engine._stream is stream
+
+
+def test_refresh_async_passes_options_per_call():
+    calls = []
+    registry = DeviceRegistry(scanner=lambda rescan, **options: calls.append((rescan, options)) or [])
+
+    registry.refresh_async(reopen=True)
+    registry._worker.join(5)
+    registry.refresh(rescan=True)
+
+    assert calls == [(True, {"reopen": True}), (True, {})]
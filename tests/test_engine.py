@@ -0,0 +1,44 @@
+import time
+
+import pytest
+
+from audio_tool.audio.backend import SyntheticBackend
+from audio_tool.audio.engine import IDLE, STANDBY, AudioEngine
+
+
+@pytest.fixture
+def engine(tmp_path):
+    # Commands are run on the test thread and the engine thread is never started,
+    # so nothing drains the ring until the command under test does
+    engine = AudioEngine(SyntheticBackend(speed=4), rate=44100, channels=1, max_bytes=4096)
+    engine._cmd_open(None)
+    engine._cmd_start(str(tmp_path / "take.wav"))
+    time.sleep(0.1)  # Far more than max_bytes captured and not written yet
+    yield engine
+    engine._cmd_shutdown()
+
+
+def test_stop_after_final_drain_reaches_max_bytes(engine):
+    info = engine._cmd_stop()
+
+    assert engine.state == STANDBY
+    assert info.frames * 2 >= engine.max_bytes
+
+
+def test_pause_after_final_drain_reaches_max_bytes(engine):
+    assert engine._cmd_pause() is None
+    assert engine.state == STANDBY
+    assert engine._cmd_resume() is None
+
+
+def test_shutdown_after_final_drain_reaches_max_bytes(engine):
+    engine._cmd_shutdown()
+
+    assert engine.state == IDLE
+    assert engine.recording.frames * 2 >= engine.max_bytes
+
+
+def test_finish_recording_twice_is_harmless(engine):
+    first = engine._finish_recording()
+
+    assert engine._finish_recording() is first
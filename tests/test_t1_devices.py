@@ -0,0 +1,50 @@
+import os
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+pytest.importorskip("pyaudio")
+QtWidgets = pytest.importorskip("PySide6.QtWidgets")
+
+import t1  # noqa: E402
+from audio_tool.audio.devices import DeviceInfo, _stable_id  # noqa: E402
+
+
+def _device(index, name, inputs, outputs):
+    return DeviceInfo(
+        id=_stable_id("Core Audio", name, inputs, outputs, 0), index=index, name=name, host_api="Core Audio",
+        max_input_channels=inputs, max_output_channels=outputs, default_sample_rate=48000.0,
+        default_low_input_latency=0.01, default_high_input_latency=0.1, default_low_output_latency=0.01,
+        default_high_output_latency=0.1, is_default_input=index == 0,
+    )
+
+
+class _Backend:
+    devices = [_device(0, "Built-in Microphone", 1, 0), _device(1, "Speakers", 0, 2), _device(2, "USB Mic", 2, 0)]
+
+    def list_devices(self, rescan=False):
+        return list(self.devices)
+
+
+@pytest.fixture
+def dialog(monkeypatch):
+    monkeypatch.setattr(t1, "PyAudioBackend", _Backend)
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    dialog = t1.MainDialog()
+    yield dialog
+    dialog.close()
+    app.processEvents()
+
+
+def test_get_available_microphones_lists_backend_inputs(dialog):
+    microphones = dialog.get_available_microphones()
+
+    assert [m["name"] for m in microphones] == ["Built-in Microphone", "USB Mic"]
+    assert [m["id"] for m in microphones] == [_Backend.devices[0].id, _Backend.devices[2].id]
+    assert dialog.mic_combo.count() == 2
+
+
+def test_selected_microphone_resolves_to_backend_index(dialog):
+    dialog.mic_combo.setCurrentIndex(1)
+
+    assert dialog.get_selected_microphone() == 2